@@ -1,39 +1,129 @@
+import asyncio
 import logging
 import os
-from datetime import datetime
-from uuid import uuid4
+import sys
+from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
 from livekit.agents import (
+    NOT_GIVEN,
     Agent,
     AgentSession,
     JobContext,
+    JobExecutorType,
     JobProcess,
+    ModelSettings,
     RoomInputOptions,
+    StopResponse,
     WorkerOptions,
     cli,
+    get_job_context,
 )
 from livekit.plugins import noise_cancellation, silero
 from livekit.plugins.turn_detector.multilingual import MultilingualModel
 
+# Add main directory to path so the agent package wins over this script's directory
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from agent.call_setup import PHONE_PURPOSE, WEB_PURPOSE, CallDependencies, run_call
+from agent.hedged_llm import HedgedLLM
+from agent.prewarm import PrewarmRegistry
+from agent.response_cache import ResponseCache
+from agent.speculative import SpeculationStats, SpeculativeGeneration
+from agent.worker_load import WorkerLoad, job_executor_type
+from audio.profiles import PHONE, WEB, AudioProfile, AudioProfiles
+from audio.tts_cache import TTSAudioCache
 from memory.conversation_memory import ConversationMemory
 from memory.storage import MemoryStorage
-from models.context import AgentContext, ConversationContext, OrganizationContext, UserContext
 from prompts.manager import PromptManager
 from prompts.renderer import PromptRenderer
+from prompts.store import PromptStore
 
-from telephony.inbound_handler import handle_inbound_call
+from telephony.answering_machine import (
+    AMDConfig,
+    AnsweringMachineDetector,
+    participant_audio,
+)
+from telephony.api_client import close_api_pool
+from telephony.ivr import IVRMenus
 from telephony.outbound_handler import make_outbound_call
-from telephony.sip_config import is_sip_participant
+from telephony.overflow import (
+    CallAbandoned,
+    OverflowQueue,
+    load_hold_audio,
+    play_hold_audio,
+)
 
 from config.config import ModelConfig, validate_config
+from config.org_registry import OrganizationRegistry
+from config.provider_selector import ProviderSelector
+from metrics.call_timing import SetupMetrics
+from metrics.loop_watchdog import LoopWatchdog
+from models.context import AgentContext
 
 logger = logging.getLogger("voice-agent")
 load_dotenv(".env")
 
-prompt_manager = PromptManager()
+prompt_manager = PromptManager(os.getenv("PROMPTS_DIR", "prompts/templates"))
+if os.getenv("PROMPT_WATCH_INTERVAL"):
+    prompt_manager.start_watching(float(os.getenv("PROMPT_WATCH_INTERVAL")))
+prompt_store = PromptStore(
+    os.getenv("PROMPT_STORE_PATH", "data/prompts.db"), fallback=prompt_manager
+)
 prompt_renderer = PromptRenderer()
 memory_storage = MemoryStorage()
+org_registry = OrganizationRegistry(
+    os.getenv("ORG_SOURCE", "config/organizations.json")
+)
 conversation_memory = ConversationMemory(memory_storage)
+setup_metrics = SetupMetrics()
+call_metrics_enabled = os.getenv("CALL_METRICS_ENABLED", "false").lower() == "true"
+loop_watchdog_enabled = (
+    os.getenv("LOOP_WATCHDOG_ENABLED", "false").lower() == "true"
+)
+max_concurrent_calls = int(os.getenv("MAX_CONCURRENT_CALLS", "8"))
+# Overflow: beyond MAX_CONCURRENT_CALLS full sessions, the worker still takes
+# up to OVERFLOW_MAX_WAITING more calls and holds them until a session frees
+overflow_queue = None
+hold_audio = None
+max_waiting = 0
+if os.getenv("OVERFLOW_ENABLED", "false").lower() == "true":
+    overflow_queue = OverflowQueue(
+        slots=max_concurrent_calls, policy=os.getenv("OVERFLOW_POLICY", "fifo")
+    )
+    hold_audio = load_hold_audio(os.getenv("OVERFLOW_HOLD_AUDIO"))
+    max_waiting = int(os.getenv("OVERFLOW_MAX_WAITING", "20"))
+worker_load = WorkerLoad(
+    max_sessions=max_concurrent_calls + max_waiting,
+    max_loop_lag=float(os.getenv("WORKER_MAX_LOOP_LAG_MS", "100")) / 1000,
+    max_cpu=float(os.getenv("WORKER_MAX_CPU", "0.85")),
+)
+response_cache = None
+if os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true":
+    response_cache = ResponseCache(
+        default_ttl=float(os.getenv("RESPONSE_CACHE_TTL", "3600")),
+        min_words=int(os.getenv("RESPONSE_CACHE_MIN_WORDS", "2")),
+    )
+audio_profiles = AudioProfiles.from_file(
+    os.getenv("AUDIO_PROFILES_PATH", "config/audio_profiles.json")
+)
+speculation_stats = None
+if os.getenv("SPECULATIVE_LLM_ENABLED", "false").lower() == "true":
+    speculation_stats = SpeculationStats()
+amd_config = None
+if os.getenv("AMD_ENABLED", "false").lower() == "true":
+    amd_config = AMDConfig(
+        max_greeting=float(os.getenv("AMD_MAX_GREETING", "1.5")),
+        after_greeting_silence=float(os.getenv("AMD_AFTER_GREETING_SILENCE", "0.8")),
+    )
+ivr_menus = None
+if os.getenv("IVR_ENABLED", "false").lower() == "true":
+    ivr_menus = IVRMenus(os.getenv("IVR_MENUS_DIR", "config/ivr"))
+tts_cache = None
+if os.getenv("TTS_CACHE_ENABLED", "false").lower() == "true":
+    tts_cache = TTSAudioCache(
+        os.getenv("TTS_CACHE_DIR", "data/tts_cache"),
+        max_bytes=int(float(os.getenv("TTS_CACHE_MAX_MB", "64")) * 2**20),
+    )
 
 # Load model configuration
 model_config = ModelConfig.from_env()
@@ -48,163 +138,389 @@ except ValueError as e:
     logger.error(f"Configuration error: {e}")
     raise
 
-
-class VoiceAssistant(Agent):
-    def __init__(self, instructions: str):
-        super().__init__(instructions=instructions)
-
-
-def prewarm(proc: JobProcess):
-    """Preload models for faster startup"""
-    proc.userdata["vad"] = silero.VAD.load()
+hedged_llm = None
+if model_config.get_llm_hedge_descriptors():
+    hedged_llm = HedgedLLM.from_config(
+        model_config,
+        percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "95")),
+        hedge_ratio=float(os.getenv("LLM_HEDGE_RATIO", "0.1")),
+        max_requests_per_minute={
+            label: int(limit)
+            for label, limit in (
+                item.rsplit("=", 1)
+                for item in os.getenv("LLM_MAX_REQUESTS_PER_MINUTE", "").split(",")
+                if item.strip()
+            )
+        },
+    )
+    logger.info(f"Hedging LLM with: {model_config.get_llm_hedge_descriptors()}")
+
+# Route each session to the fastest healthy candidate of every kind that has
+# alternatives configured (the hedged LLM already spans its providers)
+provider_candidates = {
+    kind: descriptors
+    for kind, descriptors in model_config.get_candidates().items()
+    if len(descriptors) > 1 and not (kind == "llm" and hedged_llm is not None)
+}
+provider_selector = None
+if provider_candidates:
+    provider_selector = ProviderSelector(
+        provider_candidates,
+        costs={
+            descriptor: float(cost)
+            for descriptor, cost in (
+                item.rsplit("=", 1)
+                for item in os.getenv("PROVIDER_COSTS", "").split(",")
+                if item.strip()
+            )
+        },
+        cost_weight=float(os.getenv("PROVIDER_COST_WEIGHT", "0")),
+        explore_every=int(os.getenv("PROVIDER_EXPLORE_EVERY", "20")),
+        cooldown=float(os.getenv("PROVIDER_BREAKER_COOLDOWN", "30")),
+    )
+    logger.info(f"Adaptive provider selection between: {provider_candidates}")
+
+# State kept across calls needs every job in one process
+job_executor = job_executor_type(
+    {
+        "overflow_queue": overflow_queue,
+        "response_cache": response_cache,
+        "hedged_llm": hedged_llm,
+        "provider_selector": provider_selector,
+        "speculation_stats": speculation_stats,
+    }
+)
 
 
-async def entrypoint(ctx: JobContext):
-    """Main entry point for the agent"""
-    
-    # Log context setup
-    ctx.log_context_fields = {
-        "room": ctx.room.name,
-        "stt": model_config.stt_provider,
-        "llm": model_config.llm_provider,
-        "tts": model_config.tts_provider,
-    }
+class VoiceAssistant(Agent):
+    def __init__(self, instructions: str, agent_context: Optional[AgentContext] = None):
+        # The call's audio profile may use a VAD tuned for its participant kind
+        vad = NOT_GIVEN
+        profile = agent_context and agent_context.call_metadata.get("audio_profile")
+        if profile:
+            processing = prewarm_assets.get(
+                get_job_context().proc.userdata, "audio_processing"
+            )
+            vad = processing[profile]["vad"]
+        super().__init__(instructions=instructions, vad=vad)
+        self.agent_context = agent_context
+        # The organization's IVR menu, set by run_call on phone calls
+        self.ivr = None
+        self.speculation = None
+        if speculation_stats is not None:
+            self.speculation = SpeculativeGeneration(
+                lambda chat_ctx: Agent.default.llm_node(
+                    self, chat_ctx, self.tools, ModelSettings()
+                ),
+                lambda: self.chat_ctx,
+                stats=speculation_stats,
+                stable_interims=int(os.getenv("SPECULATIVE_LLM_STABLE_INTERIMS", "2")),
+                max_divergence=float(os.getenv("SPECULATIVE_LLM_MAX_DIVERGENCE", "0")),
+            )
 
-    await memory_storage.initialize()
+    async def on_enter(self):
+        if self.speculation is not None:
+
+            @self.session.on("user_input_transcribed")
+            def on_transcribed(event):
+                self.speculation.on_transcript(event.transcript, event.is_final)
+
+    async def on_user_turn_completed(self, turn_ctx, new_message):
+        """Answer IVR menu turns with their fixed line instead of the LLM"""
+        if self.ivr is None:
+            return
+        if await self.ivr.answer(new_message.text_content or "") is not None:
+            if self.speculation is not None:
+                self.speculation.end_turn()
+            raise StopResponse()
+
+    async def llm_node(self, chat_ctx, tools, model_settings):
+        """
+        Answer the turn from the response cache, a speculative generation
+        started on interim transcripts, or the LLM, whichever is enabled
+        """
+
+        def generate():
+            if self.speculation is not None:
+                return self.speculation.respond(chat_ctx)
+            return Agent.default.llm_node(self, chat_ctx, tools, model_settings)
+
+        if response_cache is None or self.agent_context is None:
+            stream = generate()
+        else:
+            stream = response_cache.respond(self.agent_context, chat_ctx, generate)
+        try:
+            async for chunk in stream:
+                yield chunk
+        finally:
+            if self.speculation is not None:
+                self.speculation.end_turn()
+
+
+# Everything a call needs is loaded once per process in prewarm; calls only
+# reference these shared instances
+prewarm_assets = PrewarmRegistry()
+
+NOISE_CANCELLATION = {
+    "bvc": noise_cancellation.BVC,
+    "bvc_telephony": noise_cancellation.BVCTelephony,
+    "nc": noise_cancellation.NC,
+}
+
+
+@prewarm_assets.register("audio_processing")
+def load_audio_processing():
+    """VAD and noise cancellation of every audio profile"""
+    vads = {}
+    processing = {}
+    for name, profile in audio_profiles.profiles.items():
+        # Profiles with the same VAD settings share one model
+        if profile.vad_options not in vads:
+            vads[profile.vad_options] = silero.VAD.load(
+                sample_rate=profile.vad_sample_rate,
+                activation_threshold=profile.vad_activation_threshold,
+                min_silence_duration=profile.vad_min_silence_duration,
+            )
+        nc = profile.noise_cancellation
+        processing[name] = {
+            "vad": vads[profile.vad_options],
+            "noise_cancellation": NOISE_CANCELLATION[nc]() if nc else None,
+        }
+    return processing
+
+
+@prewarm_assets.register("org_index")
+def load_org_index():
+    org_registry.load()
+    org_registry.start_refreshing(float(os.getenv("ORG_REFRESH_INTERVAL", "30")))
+    return org_registry
+
+
+@prewarm_assets.register("storage")
+def initialize_storage():
+    # prewarm runs before the job's event loop exists
+    async def initialize():
+        await asyncio.gather(memory_storage.initialize(), prompt_store.initialize())
+
+    asyncio.run(initialize())
+    prompt_store.start_refreshing(
+        float(os.getenv("PROMPT_STORE_REFRESH_INTERVAL", "30"))
+    )
+    return memory_storage
 
-    # Connect to room
-    await ctx.connect()
 
-    # Check if this is an outbound call from job metadata
-    phone_number = None
-    if ctx.job.metadata:
-        phone_number = ctx.job.metadata.get("phone_number")
+@prewarm_assets.register("compiled_prompts")
+def compile_prompts():
+    for prompt in prompt_manager.prompts.values():
+        prompt_renderer.compile(prompt)
+    for org_id in org_registry.index.by_id:
+        for purpose in (PHONE_PURPOSE, WEB_PURPOSE):
+            prompt = prompt_store.resolve(org_id, purpose)
+            if prompt is not None:
+                prompt_renderer.compile(prompt)
+    return prompt_renderer
 
-    # If outbound call, create SIP participant
-    if phone_number:
-        logger.info(f"Making outbound call to {phone_number}")
-        await make_outbound_call(phone_number, ctx.room.name)
 
+if ivr_menus is not None:
 
-    # Wait for participant
-    participant = await ctx.wait_for_participant()
-    is_phone = is_sip_participant(participant)
+    @prewarm_assets.register("ivr_menus")
+    def load_ivr_menus():
+        ivr_menus.load()
+        return ivr_menus
 
-    # Create user context
-    user = UserContext(
-        user_id=participant.identity or str(uuid4()),
-        phone_number=phone_number if is_phone else None,
-    )
 
-    # Get or create user profile from memory
-    user_context = await conversation_memory.get_user_context(user.user_id)
-    if user_context and user_context.get("profile"):
-        profile = user_context["profile"]
-        user.name = profile.get("name")
-        user.email = profile.get("email")
-
-    # Create organization context (in production, load from database)
-    organization = OrganizationContext(
-        org_id="default",
-        name=os.getenv("ORG_NAME", "Your Company"),
-        industry=os.getenv("ORG_INDUSTRY"),
-    )
+if tts_cache is not None:
 
-    # Create conversation
-    conversation = await conversation_memory.create_conversation(
-        user, metadata={"is_phone": is_phone, "room": ctx.room.name}
-    )
+    @prewarm_assets.register("tts_cache")
+    def preload_tts_cache():
+        tts_cache.preload()
+        return tts_cache
 
-    # Build agent context
-    agent_context = AgentContext(
-        user=user,
-        organization=organization,
-        conversation=conversation,
-        is_phone_call=is_phone,
-        call_metadata={"participant_id": participant.identity},
-    )
 
-    # Select prompt based on context
-    if is_phone:
-        prompt = prompt_manager.get_prompt("phone_receptionist")
-    else:
-        prompt = prompt_manager.get_prompt("base_assistant")
-
-    # Fallback to default if prompt not found
-    if not prompt:
-        logger.warning("Prompt not found, using default")
-        instructions = """You are a helpful voice AI assistant. Keep responses concise and conversational."""
-    else:
-        # Render prompt with context
-        instructions = prompt_renderer.render(prompt, agent_context)
-        logger.info(f"Using prompt: {prompt.id}")
-    
-    logger.debug(f"Rendered instructions: {instructions}")
+def prewarm(proc: JobProcess):
+    """Preload models and services for faster startup"""
+    prewarm_assets.load_all(proc)
 
 
-    # Set up voice AI session with configured models
+def create_session(ctx: JobContext) -> AgentSession:
+    """Set up voice AI session with configured models"""
+    config = model_config
+    if provider_selector is not None:
+        choice = provider_selector.select_all()
+        config = model_config.with_providers(choice)
     session = AgentSession(
         # Speech-to-text
-        stt=model_config.get_stt_descriptor(),
-        # Large Language Model
-        llm=model_config.get_llm_descriptor(),
+        stt=config.get_stt_descriptor(),
+        # Large Language Model, hedged to secondary providers when configured
+        llm=hedged_llm or config.get_llm_descriptor(),
         # Text-to-speech with voice
-        tts=f"{model_config.get_tts_descriptor()}:{model_config.tts_voice}",
+        tts=f"{config.get_tts_descriptor()}:{config.tts_voice}",
         # Voice Activity Detection
-        vad=ctx.proc.userdata.get("vad") or silero.VAD.load(),
-        # Turn detection
+        vad=prewarm_assets.get(ctx.proc.userdata, "audio_processing")[WEB]["vad"],
+        # Turn detection; the model itself runs in the worker's shared
+        # inference process, this only binds it to the job's executor
         turn_detection=MultilingualModel(),
     )
+    if provider_selector is not None:
+        provider_selector.attach(session, choice)
+    return session
+
+
+def detect_answering_machine(
+    ctx: JobContext, participant
+) -> AnsweringMachineDetector:
+    """Answering machine detection on the callee's audio, with the phone VAD"""
+    detector = AnsweringMachineDetector(amd_config)
+    processing = prewarm_assets.get(ctx.proc.userdata, "audio_processing")
+    detector.start(participant_audio(participant), processing[PHONE]["vad"])
+    return detector
+
+
+def room_input_options(
+    ctx: JobContext, profile: Optional[AudioProfile]
+) -> RoomInputOptions:
+    """Room input options for the call's audio profile"""
+    profile = profile or audio_profiles.profiles[WEB]
+    processing = prewarm_assets.get(ctx.proc.userdata, "audio_processing")
+    return RoomInputOptions(
+        # Noise cancellation model for the participant kind (None disables it)
+        noise_cancellation=processing[profile.name]["noise_cancellation"],
+        audio_sample_rate=profile.input_sample_rate,
+    )
+
+
+async def play_hold(ctx: JobContext):
+    await play_hold_audio(ctx.room, hold_audio)
+
+
+call_dependencies = CallDependencies(
+    storage=memory_storage,
+    memory=conversation_memory,
+    prompt_store=prompt_store,
+    renderer=prompt_renderer,
+    org_registry=org_registry,
+    create_session=create_session,
+    create_agent=VoiceAssistant,
+    room_input_options=room_input_options,
+    audio_profiles=audio_profiles,
+    dial=make_outbound_call,
+    setup_metrics=setup_metrics,
+    metrics_enabled=call_metrics_enabled,
+    tts_cache=tts_cache,
+    tts_voice=(
+        model_config.tts_provider,
+        model_config.tts_model,
+        model_config.tts_voice,
+    ),
+    turn_metrics_enabled=os.getenv("TURN_METRICS_ENABLED", "false").lower() == "true",
+    providers={
+        "stt": model_config.get_stt_descriptor(),
+        "llm": model_config.get_llm_descriptor(),
+        "tts": model_config.get_tts_descriptor(),
+    },
+    session_providers=provider_selector.providers_for if provider_selector else None,
+    recording_dir=(
+        os.getenv("CALL_RECORDING_DIR", "data/recordings")
+        if os.getenv("CALL_RECORDING_ENABLED", "false").lower() == "true"
+        else None
+    ),
+    recording_format=os.getenv("CALL_RECORDING_FORMAT", "ogg"),
+    answering_machine=detect_answering_machine if amd_config else None,
+    overflow=overflow_queue,
+    play_hold=play_hold,
+    ivr=ivr_menus,
+    snapshot_ttl=float(os.getenv("CONTEXT_SNAPSHOT_TTL", "300")),
+)
 
-    # Start the agent session
-    await session.start(
-        room=ctx.room,
-        agent=VoiceAssistant(instructions=instructions),
-        room_input_options=RoomInputOptions(
-            # Enhanced noise cancellation
-            noise_cancellation=noise_cancellation.BVCNoiseCancellation(),
+
+def start_loop_watchdog(ctx: JobContext) -> Optional[LoopWatchdog]:
+    """
+    Watch the job's event loop until it ends
+
+    Reports stalls when LOOP_WATCHDOG_ENABLED; when jobs run as threads of
+    the worker process, the lag also feeds the worker's load.
+    """
+    feeds_load = job_executor == JobExecutorType.THREAD
+    if not (loop_watchdog_enabled or feeds_load):
+        return None
+    watchdog = LoopWatchdog(
+        threshold_ms=float(os.getenv("LOOP_WATCHDOG_THRESHOLD_MS", "50")),
+        report_interval=(
+            float(os.getenv("LOOP_WATCHDOG_INTERVAL", "60"))
+            if loop_watchdog_enabled
+            else 0
+        ),
+        on_lag=(
+            (lambda lag_ms: worker_load.record_job_lag(lag_ms / 1000))
+            if feeds_load
+            else None
         ),
     )
+    watchdog.start()
 
-    logger.info("Voice agent started successfully")
+    async def stop_watchdog():
+        watchdog.stop()
 
-    # Set up message logging
-    @ctx.room.on("track_subscribed")
-    def on_track_subscribed(track, publication, participant):
-        logger.info(f"Track subscribed: {track.kind} from {participant.identity}")
+    ctx.add_shutdown_callback(stop_watchdog)
+    return watchdog
 
-    # Log all messages to memory
-    conversation_id = conversation.conversation_id
-    # Handle different greetings based on context
-    if is_phone:
-        caller_info = await handle_inbound_call(ctx, participant)
-        greeting = f"Hello, thanks for calling {organization.name}. How can I help you today?"
-
-        # Update user profile with phone number if we got it
-        if caller_info.get("number") and caller_info["number"] != "Unknown":
-            await conversation_memory.update_user_profile(
-                user.user_id, {"phone_number": caller_info["number"]}
-            )
-    else:
-        if user.name:
-            greeting = f"Hello {user.name}! How can I help you today?"
-        else:
-            greeting = "Hello! How can I help you today?"
 
-    # Generate greeting
-    await session.generate_reply(instructions=f"Say: {greeting}")
-    await log_message(conversation_id, "assistant", greeting)
+async def entrypoint(ctx: JobContext):
+    """Main entry point for the agent"""
+    
+    # Log context setup
+    ctx.log_context_fields = {
+        "room": ctx.room.name,
+        "stt": model_config.stt_provider,
+        "llm": model_config.llm_provider,
+        "tts": model_config.tts_provider,
+    }
 
-    logger.info(f"Agent ready for conversation {conversation_id}")
+    if call_metrics_enabled:
+        setup_metrics.start_reporting(float(os.getenv("CALL_METRICS_INTERVAL", "60")))
+    watchdog = start_loop_watchdog(ctx)
+
+    # Log each enabled component's stats when the call ends, so short runs and
+    # the last calls before a restart are reported too
+    stat_loggers = [
+        call_metrics_enabled and setup_metrics.log_report,
+        loop_watchdog_enabled and watchdog.log_report,
+        response_cache and response_cache.log_stats,
+        provider_selector and provider_selector.log_stats,
+        speculation_stats and speculation_stats.log,
+        hedged_llm and hedged_llm.log_stats,
+        overflow_queue and overflow_queue.log_stats,
+        ivr_menus and ivr_menus.log_stats,
+    ]
+    for log_stats in filter(None, stat_loggers):
+
+        async def log_on_shutdown(log_stats=log_stats):
+            log_stats()
+
+        ctx.add_shutdown_callback(log_on_shutdown)
+    # Finish this job's TTS cache writes before its event loop goes away
+    if tts_cache is not None:
+        ctx.add_shutdown_callback(tts_cache.flush)
+    # Log and close the LiveKit API connections this job opened; jobs running
+    # as threads have their own and keep them
+    ctx.add_shutdown_callback(close_api_pool)
+
+    try:
+        await run_call(ctx, call_dependencies)
+    except CallAbandoned as e:
+        logger.info(str(e))
 
-async def log_message(conversation_id: str, role: str, content: str):
-        """Log message to conversation memory"""
-        await conversation_memory.add_message(conversation_id, role, content)
 
 if __name__ == "__main__":
     cli.run_app(
         WorkerOptions(
             entrypoint_fnc=entrypoint,
             prewarm_fnc=prewarm,
+            # Report the most constrained of sessions, loop lag and CPU, and
+            # stop taking dispatch once any of them reaches its limit
+            load_fnc=worker_load.get_load,
+            load_threshold=1.0,
+            request_fnc=worker_load.request_fnc,
+            job_executor_type=job_executor,
         )
     )
\ No newline at end of file
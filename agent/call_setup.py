@@ -0,0 +1,760 @@
+"""Concurrent call setup shared by the worker entrypoint and tests"""
+import asyncio
+import inspect
+import json
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Optional
+from datetime import datetime
+from pathlib import Path
+from uuid import uuid4
+
+from livekit import rtc
+from livekit.agents import Agent, AgentSession, JobContext, RoomInputOptions
+
+from audio.profiles import AudioProfile, AudioProfiles
+from audio.recorder import CallRecorder
+from audio.tts_cache import TTSAudioCache, cache_key
+from config.org_registry import OrganizationRegistry
+from memory.conversation_memory import ConversationMemory
+from memory.storage import MemoryStorage
+from metrics.call_timing import CallTimer, SetupMetrics
+from metrics.turn_metrics import TurnMetricsCollector
+from models.context import AgentContext, UserContext
+from prompts.renderer import PromptRenderer
+from prompts.store import PromptStore
+from telephony.answering_machine import AMDResult, AnsweringMachineDetector
+from telephony.inbound_handler import handle_inbound_call
+from telephony.ivr import IVRCall, IVRMenus
+from telephony.outbound_handler import make_outbound_call
+from telephony.overflow import (
+    CallAbandoned,
+    OverflowQueue,
+    QueueTicket,
+    caller_priority,
+)
+from telephony.sip_config import get_sip_routing, is_sip_participant
+
+logger = logging.getLogger("voice-agent")
+
+DEFAULT_INSTRUCTIONS = (
+    "You are a helpful voice AI assistant. Keep responses concise and conversational."
+)
+PHONE_PURPOSE = "phone_receptionist"
+WEB_PURPOSE = "base_assistant"
+
+
+@dataclass
+class CallDependencies:
+    """Per-process services and factories a call is set up with"""
+
+    storage: MemoryStorage
+    memory: ConversationMemory
+    prompt_store: PromptStore
+    renderer: PromptRenderer
+    org_registry: OrganizationRegistry
+    # Builds the AgentSession (STT/LLM/TTS/VAD/turn detection); may be async
+    create_session: Callable[[JobContext], Any]
+    create_agent: Callable[[str, AgentContext], Agent]
+    # Receives the call's audio profile (None without audio_profiles)
+    room_input_options: Callable[[JobContext, Optional[AudioProfile]], RoomInputOptions]
+    # Dials a number into a room; the default returns once the call is
+    # answered
+    dial: Callable[[str, str], Awaitable[Any]] = make_outbound_call
+    setup_metrics: Optional[SetupMetrics] = None
+    metrics_enabled: bool = False
+    # Plays greetings from cached audio instead of a TTS round trip when set
+    tts_cache: Optional[TTSAudioCache] = None
+    # (provider, model, voice) of the session's TTS; part of the cache key
+    tts_voice: tuple[str, str, str] = ("", "", "")
+    # Persist per-turn latency breakdowns to the turn_metrics table
+    turn_metrics_enabled: bool = False
+    # STT/LLM/TTS descriptors recorded with each turn ({"stt": ..., ...})
+    providers: dict[str, str] = field(default_factory=dict)
+    # Selects noise cancellation, sample rates and VAD settings per call; the
+    # chosen profile's name is stored in call_metadata["audio_profile"]
+    audio_profiles: Optional[AudioProfiles] = None
+    # Descriptors create_session chose for a session, when they vary per
+    # session; "tts" is "provider/model:voice" and overrides tts_voice
+    session_providers: Optional[Callable[[AgentSession], dict[str, str]]] = None
+    # Record both legs of each call under this directory; the file paths are
+    # listed in the conversation's metadata["recordings"]
+    recording_dir: Optional[str] = None
+    recording_format: str = "ogg"
+    # Starts answering machine detection on an outbound callee's audio. A
+    # call answered by a machine leaves the job's or organization's
+    # "voicemail_message" after the greeting (or just hangs up) and ends
+    answering_machine: Optional[
+        Callable[[JobContext, rtc.RemoteParticipant], AnsweringMachineDetector]
+    ] = None
+    # Caps the calls in full sessions; callers beyond it wait in this queue
+    # (ordered by their profile's queue_priority under the PRIORITY policy)
+    # while play_hold plays into the room
+    overflow: Optional[OverflowQueue] = None
+    play_hold: Optional[Callable[[JobContext], Awaitable[None]]] = None
+    # Phone calls to an organization with a menu get its prompt after the
+    # greeting; key presses and matching turns are answered from fixed
+    # lines, and the agent skips the LLM for them via its ``ivr`` attribute
+    ivr: Optional[IVRMenus] = None
+    # A job resumes a room's context snapshot only for the participant it
+    # was saved for, and only if saved within this many seconds, or the
+    # snapshot of the conversation_id in its job metadata (a handoff)
+    snapshot_ttl: float = 300.0
+
+
+@dataclass
+class CallState:
+    """Everything a started call produced"""
+
+    session: AgentSession
+    agent_context: AgentContext
+    participant: rtc.RemoteParticipant
+    is_phone: bool
+    resumed: bool
+    greeting: str
+    timer: CallTimer
+    turn_metrics: Optional[TurnMetricsCollector] = None
+    recorder: Optional[CallRecorder] = None
+    # Answering machine detection result of an outbound call
+    answered_by: Optional[AMDResult] = None
+    # The call's full-session slot from the overflow queue
+    slot: Optional[QueueTicket] = None
+    # The organization's IVR menu, on phone calls
+    ivr: Optional[IVRCall] = None
+
+
+class _SetupTasks:
+    """
+    The concurrently running setup steps of one call
+
+    result() waits for one step but raises as soon as any other step
+    fails, and cancel() stops everything still running, so a failed dial
+    does not leave the call waiting for a participant that never joins.
+    """
+
+    def __init__(self):
+        self._tasks: list[asyncio.Future] = []
+
+    def start(self, coro: Awaitable[Any]) -> asyncio.Future:
+        task = asyncio.ensure_future(coro)
+        self._tasks.append(task)
+        return task
+
+    async def result(self, task: asyncio.Future) -> Any:
+        while True:
+            for other in self._tasks:
+                if other.done() and not other.cancelled() and other.exception():
+                    raise other.exception()
+            if task.done():
+                return task.result()
+            pending = [t for t in self._tasks if not t.done()]
+            await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+
+    async def cancel(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def parse_job_metadata(metadata: Any) -> dict[str, Any]:
+    """Job metadata as a dict (dispatch metadata arrives as a JSON string)"""
+    if not metadata:
+        return {}
+    if isinstance(metadata, dict):
+        return metadata
+    try:
+        data = json.loads(metadata)
+    except ValueError:
+        logger.warning(f"Ignoring non-JSON job metadata: {metadata!r}")
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+async def run_call(ctx: JobContext, deps: CallDependencies) -> CallState:
+    """
+    Set up and start a call
+
+    Steps that do not depend on the participant (storage init, outbound
+    dial, prompt compilation, AgentSession construction) run concurrently
+    with ctx.connect() and wait_for_participant(). The participant-specific
+    steps (context lookup, prompt render, session start, greeting) follow.
+    If any step fails, the remaining ones are cancelled and the error is
+    raised.
+
+    With an overflow queue, the call first waits for a full-session slot,
+    on hold, and raises CallAbandoned if the caller hangs up meanwhile;
+    its AgentSession is only constructed once it has the slot.
+    """
+    timer = CallTimer(deps.setup_metrics, enabled=deps.metrics_enabled)
+    metadata = parse_job_metadata(ctx.job.metadata)
+    phone_number = metadata.get("phone_number")
+
+    tasks = _SetupTasks()
+    try:
+        initialized = tasks.start(_initialize(deps, timer))
+        prompts_ready = tasks.start(
+            _prepare_prompts(deps, initialized, metadata.get("org_id"), timer)
+        )
+        admitted = asyncio.Event()
+        session_ready = tasks.start(_create_session(ctx, deps, timer, admitted))
+        dialed = detector = None
+        if phone_number:
+            # Dialing goes through the server API, so it does not need to
+            # wait for this worker to join the room
+            logger.info(f"Making outbound call to {phone_number}")
+            dialed = tasks.start(
+                _timed(timer, "outbound_dial", deps.dial(phone_number, ctx.room.name))
+            )
+        joined = tasks.start(_join(ctx, timer))
+
+        participant = await tasks.result(joined)
+        if dialed is not None:
+            await tasks.result(dialed)
+            detector = await _start_detection(ctx, deps, participant)
+        is_phone = is_sip_participant(participant)
+
+        await tasks.result(initialized)
+        slot = await _wait_for_slot(ctx, deps, participant, timer)
+        admitted.set()
+        with timer.span("context_lookup"):
+            agent_context, resumed = await _load_context(
+                ctx, deps, participant, is_phone, phone_number, metadata
+            )
+
+        profile = None
+        if deps.audio_profiles is not None:
+            profile = deps.audio_profiles.resolve(is_phone, agent_context.organization)
+            agent_context.call_metadata["audio_profile"] = profile.name
+
+        # Attached before the session starts so the agent's track is caught
+        # as it is published
+        recorder = await _start_recording(ctx, deps, agent_context, participant)
+
+        # A machine's greeting is waited out before the session starts
+        # listening, so the agent does not answer it
+        answered_by = await _screen_answer(deps, detector, agent_context, timer)
+
+        await tasks.result(prompts_ready)
+        with timer.span("prompt_render"):
+            instructions = _render_instructions(deps, agent_context, is_phone)
+        logger.debug(f"Rendered instructions: {instructions}")
+
+        session = await tasks.result(session_ready)
+        agent = deps.create_agent(instructions, agent_context)
+        with timer.span("session_start"):
+            await session.start(
+                room=ctx.room,
+                agent=agent,
+                room_input_options=deps.room_input_options(ctx, profile),
+            )
+    except BaseException:
+        await tasks.cancel()
+        raise
+
+    logger.info("Voice agent started successfully")
+
+    hung_up = _keep_snapshot(ctx, deps, participant, agent_context)
+
+    providers, tts_voice = _session_providers(deps, session)
+
+    turn_metrics = _attach_turn_metrics(ctx, deps, session, agent_context, providers)
+    ivr = _attach_ivr(ctx, deps, session, agent, agent_context, is_phone, tts_voice)
+
+    # Set up message logging
+    @ctx.room.on("track_subscribed")
+    def on_track_subscribed(track, publication, participant):
+        logger.info(f"Track subscribed: {track.kind} from {participant.identity}")
+
+    machine = answered_by is not None and answered_by.is_machine
+    if machine:
+        greeting = _voicemail_message(metadata, agent_context)
+    else:
+        greeting = await _greeting(
+            ctx, deps, participant, agent_context, is_phone, resumed, ivr
+        )
+
+    # Generate greeting
+    with timer.span("generate_reply"):
+        await _speak(deps, session, greeting, tts_voice)
+    timer.mark("setup_total")
+
+    conversation_id = agent_context.conversation.conversation_id
+    await deps.memory.add_message(conversation_id, "assistant", greeting)
+
+    if timer.enabled:
+        await deps.storage.update_conversation_metadata(
+            conversation_id, {"setup_timings_ms": timer.phases}
+        )
+    await _link_recording(deps, agent_context, recorder)
+
+    if machine:
+        # Nobody to talk to once the voicemail is left; deleting the room
+        # hangs up the SIP leg and ends the job, freeing the worker
+        logger.info(f"Hanging up on answering machine in {conversation_id}")
+        hung_up.set()
+        await ctx.delete_room()
+
+    logger.info(f"Agent ready for conversation {conversation_id}")
+    return CallState(
+        session=session,
+        agent_context=agent_context,
+        participant=participant,
+        is_phone=is_phone,
+        resumed=resumed,
+        greeting=greeting,
+        timer=timer,
+        turn_metrics=turn_metrics,
+        recorder=recorder,
+        answered_by=answered_by,
+        slot=slot,
+        ivr=ivr,
+    )
+
+
+def _keep_snapshot(
+    ctx: JobContext,
+    deps: CallDependencies,
+    participant: rtc.RemoteParticipant,
+    agent_context: AgentContext,
+) -> asyncio.Event:
+    """
+    Save the context on shutdown while the call is live, delete it once over
+
+    A call that ended leaves nothing for a later call in a reused room to
+    resume; one the job leaves mid-call is saved for the job taking over.
+
+    Returns:
+        Set when the caller hangs up, or to end the call from our side
+    """
+    hung_up = asyncio.Event()
+
+    @ctx.room.on("participant_disconnected")
+    def on_caller_left(left: rtc.RemoteParticipant):
+        if left.identity == participant.identity:
+            hung_up.set()
+
+    async def save_context_snapshot():
+        if hung_up.is_set():
+            await deps.memory.discard_context(
+                agent_context.conversation.conversation_id
+            )
+        else:
+            await deps.memory.save_context(agent_context, room=ctx.room.name)
+
+    ctx.add_shutdown_callback(save_context_snapshot)
+    return hung_up
+
+
+def _session_providers(
+    deps: CallDependencies, session: AgentSession
+) -> tuple[dict[str, str], tuple[str, str, str]]:
+    """Descriptors and TTS voice the session actually uses"""
+    if deps.session_providers is None:
+        return deps.providers, deps.tts_voice
+    chosen = dict(deps.session_providers(session))
+    tts_voice = deps.tts_voice
+    if "tts" in chosen:
+        descriptor, voice = chosen["tts"].split(":", 1)
+        provider, model = descriptor.split("/", 1)
+        chosen["tts"], tts_voice = descriptor, (provider, model, voice)
+    return {**deps.providers, **chosen}, tts_voice
+
+
+def _attach_turn_metrics(
+    ctx: JobContext,
+    deps: CallDependencies,
+    session: AgentSession,
+    agent_context: AgentContext,
+    providers: dict[str, str],
+) -> Optional[TurnMetricsCollector]:
+    if not deps.turn_metrics_enabled:
+        return None
+    turn_metrics = TurnMetricsCollector(
+        deps.storage,
+        agent_context.conversation.conversation_id,
+        agent_context.organization.org_id,
+        providers=providers,
+    )
+    turn_metrics.attach(session)
+    ctx.add_shutdown_callback(turn_metrics.flush)
+    return turn_metrics
+
+
+def _attach_ivr(
+    ctx: JobContext,
+    deps: CallDependencies,
+    session: AgentSession,
+    agent: Agent,
+    agent_context: AgentContext,
+    is_phone: bool,
+    tts_voice: tuple[str, str, str],
+) -> Optional[IVRCall]:
+    if deps.ivr is None or not is_phone:
+        return None
+    menu = deps.ivr.get(agent_context.organization.org_id)
+    if menu is None:
+        return None
+    ivr = IVRCall(deps.ivr, menu, session, deps.tts_cache, tts_voice)
+    ivr.attach(ctx.room)
+    # Lines not yet in the TTS cache are synthesized while the greeting plays
+    ivr.start_prerender()
+    ctx.add_shutdown_callback(ivr.aclose)
+    agent.ivr = ivr
+    return ivr
+
+
+async def _speak(
+    deps: CallDependencies,
+    session: AgentSession,
+    text: str,
+    tts_voice: tuple[str, str, str],
+):
+    """Say a fixed line, from cached audio when the TTS cache is enabled"""
+    if not text:
+        return
+    if deps.tts_cache is not None:
+        audio = deps.tts_cache.speak(cache_key(*tts_voice, text), text, session.tts)
+        await session.say(text, audio=audio)
+    else:
+        await session.generate_reply(instructions=f"Say: {text}")
+
+
+async def _start_detection(
+    ctx: JobContext, deps: CallDependencies, participant: rtc.RemoteParticipant
+) -> Optional[AnsweringMachineDetector]:
+    """Start answering machine detection once the callee has picked up"""
+    if deps.answering_machine is None:
+        return None
+    await _wait_for_answer(ctx, participant)
+    detector = deps.answering_machine(ctx, participant)
+    ctx.add_shutdown_callback(detector.aclose)
+    return detector
+
+
+async def _wait_for_answer(ctx: JobContext, participant: rtc.RemoteParticipant):
+    """
+    Wait while an outbound SIP participant is still ringing
+
+    The default dial already returns on answer; this covers dialers that
+    do not, so ringback is never analyzed as the callee's greeting.
+    """
+    if participant.attributes.get("sip.callStatus", "active") == "active":
+        return
+    answered = asyncio.Event()
+
+    @ctx.room.on("participant_attributes_changed")
+    def on_attributes_changed(changed, changed_participant):
+        if changed_participant.identity == participant.identity and (
+            changed_participant.attributes.get("sip.callStatus") == "active"
+        ):
+            answered.set()
+
+    # Detection then sees the audio end and reports UNKNOWN
+    @ctx.room.on("participant_disconnected")
+    def on_participant_disconnected(disconnected):
+        if disconnected.identity == participant.identity:
+            answered.set()
+
+    await answered.wait()
+
+
+async def _screen_answer(
+    deps: CallDependencies,
+    detector: Optional[AnsweringMachineDetector],
+    agent_context: AgentContext,
+    timer: CallTimer,
+) -> Optional[AMDResult]:
+    """Who answered an outbound call; waits out a machine's greeting"""
+    if detector is None:
+        return None
+    try:
+        with timer.span("answering_machine"):
+            result = await detector.decision()
+        logger.info(
+            f"Call answered by {result.label} ({result.reason}) "
+            f"after {result.decided_after:.2f}s"
+        )
+        if result.is_machine:
+            with timer.span("machine_greeting"):
+                await detector.wait_for_message_window()
+    finally:
+        await detector.aclose()
+
+    agent_context.call_metadata["answered_by"] = result.label
+    await deps.storage.update_conversation_metadata(
+        agent_context.conversation.conversation_id,
+        {"answering_machine": result.to_dict()},
+    )
+    return result
+
+
+async def _wait_for_slot(
+    ctx: JobContext,
+    deps: CallDependencies,
+    participant: rtc.RemoteParticipant,
+    timer: CallTimer,
+) -> Optional[QueueTicket]:
+    """Take a full-session slot, holding the caller while none is free"""
+    if deps.overflow is None:
+        return None
+    profile = await deps.storage.get_user_profile(participant.identity)
+    slot = deps.overflow.enter(ctx.room.name, caller_priority(profile))
+    # Frees the slot when the call ends, or the place if it never got one
+    ctx.add_shutdown_callback(slot.aclose)
+    if slot.granted:
+        return slot
+
+    logger.info(f"All agents busy; caller queued at position {slot.position}")
+    left = asyncio.Event()
+
+    @ctx.room.on("participant_disconnected")
+    def on_participant_disconnected(disconnected):
+        if disconnected.identity == participant.identity:
+            left.set()
+
+    waits = [asyncio.ensure_future(slot.wait()), asyncio.ensure_future(left.wait())]
+    # The call keeps its place even if the hold audio fails
+    tasks = list(waits)
+    if deps.play_hold is not None:
+        tasks.append(asyncio.ensure_future(deps.play_hold(ctx)))
+    try:
+        with timer.span("overflow_wait"):
+            await asyncio.wait(waits, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if left.is_set():
+        # Hand the slot (or the place in line) to the next caller
+        slot.release()
+        await ctx.delete_room()
+        raise CallAbandoned(f"Caller left after {slot.waited:.1f}s on hold")
+    logger.info(f"Agent free after {slot.waited:.1f}s on hold")
+    return slot
+
+
+def _voicemail_message(metadata: dict[str, Any], agent_context: AgentContext) -> str:
+    """Message to leave on an answering machine; empty to just hang up"""
+    return metadata.get("voicemail_message") or str(
+        agent_context.organization.custom_settings.get("voicemail_message", "")
+    )
+
+
+async def _start_recording(
+    ctx: JobContext,
+    deps: CallDependencies,
+    agent_context: AgentContext,
+    participant: rtc.RemoteParticipant,
+) -> Optional[CallRecorder]:
+    if deps.recording_dir is None:
+        return None
+    started = datetime.utcnow().strftime("%Y%m%dT%H%M%S")
+    name = f"{agent_context.conversation.conversation_id}_{started}"
+    recorder = CallRecorder(
+        str(Path(deps.recording_dir) / f"{name}.{deps.recording_format}"),
+        format=deps.recording_format,
+    )
+    await recorder.start()
+    ctx.add_shutdown_callback(recorder.aclose)
+    recorder.attach(ctx.room, participant)
+    return recorder
+
+
+async def _link_recording(
+    deps: CallDependencies,
+    agent_context: AgentContext,
+    recorder: Optional[CallRecorder],
+):
+    """List the recording's file in the conversation's metadata"""
+    if recorder is None:
+        return
+    # A resumed call adds its file to the ones its snapshot carried over
+    conversation = agent_context.conversation
+    recordings = conversation.metadata.setdefault("recordings", [])
+    recordings.append(str(recorder.path))
+    await deps.storage.update_conversation_metadata(
+        conversation.conversation_id, {"recordings": recordings}
+    )
+
+
+async def _timed(timer: CallTimer, phase: str, aw: Awaitable[Any]) -> Any:
+    with timer.span(phase):
+        return await aw
+
+
+async def _initialize(deps: CallDependencies, timer: CallTimer):
+    with timer.span("initialize"):
+        await asyncio.gather(deps.storage.initialize(), deps.prompt_store.initialize())
+
+
+async def _join(ctx: JobContext, timer: CallTimer) -> rtc.RemoteParticipant:
+    with timer.span("connect"):
+        await ctx.connect()
+    with timer.span("wait_for_participant"):
+        return await ctx.wait_for_participant()
+
+
+async def _create_session(
+    ctx: JobContext,
+    deps: CallDependencies,
+    timer: CallTimer,
+    admitted: asyncio.Event,
+):
+    if deps.overflow is not None:
+        # Held callers get a session only once they have a slot
+        await admitted.wait()
+    with timer.span("session_create"):
+        session = deps.create_session(ctx)
+        if inspect.isawaitable(session):
+            session = await session
+        return session
+
+
+async def _prepare_prompts(
+    deps: CallDependencies,
+    initialized: asyncio.Future,
+    org_id: Optional[str],
+    timer: CallTimer,
+):
+    """Compile the templates the call is likely to use before it connects"""
+    await initialized
+    with timer.span("prompt_prepare"):
+        org = deps.org_registry.resolve(org_id=org_id)
+        for purpose in (PHONE_PURPOSE, WEB_PURPOSE):
+            prompt = deps.prompt_store.resolve(org.org_id, purpose)
+            if prompt is not None:
+                deps.renderer.compile(prompt)
+
+
+async def _load_context(
+    ctx: JobContext,
+    deps: CallDependencies,
+    participant: rtc.RemoteParticipant,
+    is_phone: bool,
+    phone_number: Optional[str],
+    metadata: dict[str, Any],
+) -> tuple[AgentContext, bool]:
+    """Resume an interrupted call's context from its snapshot, or build a new one"""
+    agent_context = await _resume_context(ctx, deps, participant, metadata)
+    if agent_context is not None:
+        logger.info(
+            f"Resuming conversation {agent_context.conversation.conversation_id}"
+        )
+        return agent_context, True
+
+    user_id = participant.identity or str(uuid4())
+
+    # Known callers are built from their stored profile, new ones from what
+    # the participant supplied; both go through the validating constructor
+    user_context = await deps.memory.get_user_context(user_id)
+    if user_context and user_context.get("profile"):
+        user = UserContext.from_profile(user_context["profile"])
+        if is_phone and phone_number:
+            user.phone_number = phone_number
+    else:
+        user = UserContext(
+            user_id=user_id,
+            phone_number=phone_number if is_phone else None,
+        )
+
+    # Resolve the organization from the number or trunk that was dialed
+    routing = get_sip_routing(participant) if is_phone else {}
+    organization = deps.org_registry.resolve(
+        dialed_number=routing.get("dialed_number"),
+        trunk_id=routing.get("trunk_id"),
+        org_id=metadata.get("org_id"),
+    )
+
+    conversation = await deps.memory.create_conversation(
+        user, metadata={"is_phone": is_phone, "room": ctx.room.name}
+    )
+
+    agent_context = AgentContext.assemble(
+        user=user,
+        organization=organization,
+        conversation=conversation,
+        is_phone_call=is_phone,
+        call_metadata={"participant_id": participant.identity},
+    )
+    await deps.memory.save_context(agent_context, room=ctx.room.name)
+    return agent_context, False
+
+
+async def _resume_context(
+    ctx: JobContext,
+    deps: CallDependencies,
+    participant: rtc.RemoteParticipant,
+    metadata: dict[str, Any],
+) -> Optional[AgentContext]:
+    """The context of the call this job takes over, if it takes one over"""
+    conversation_id = metadata.get("conversation_id")
+    if conversation_id:
+        return await deps.memory.restore_context(conversation_id=conversation_id)
+
+    # Room names repeat across calls (call-<number>, <campaign>-<number>),
+    # so a room's snapshot is only the same call if it is recent and for
+    # the same participant
+    agent_context = await deps.memory.restore_context(
+        room=ctx.room.name, max_age=deps.snapshot_ttl
+    )
+    if agent_context is None:
+        return None
+    if agent_context.call_metadata.get("participant_id") != participant.identity:
+        logger.info(f"Not resuming room {ctx.room.name}: another participant's call")
+        return None
+    return agent_context
+
+
+def _render_instructions(
+    deps: CallDependencies, agent_context: AgentContext, is_phone: bool
+) -> str:
+    """Render the organization's newest prompt for this kind of call"""
+    purpose = PHONE_PURPOSE if is_phone else WEB_PURPOSE
+    prompt = deps.prompt_store.resolve(agent_context.organization.org_id, purpose)
+
+    # Fallback to default if prompt not found
+    if not prompt:
+        logger.warning("Prompt not found, using default")
+        return DEFAULT_INSTRUCTIONS
+
+    instructions = deps.renderer.render(prompt, agent_context)
+    agent_context.call_metadata["prompt_version"] = f"{prompt.id}@{prompt.version}"
+    logger.info(f"Using prompt: {prompt.id}@{prompt.version}")
+    return instructions
+
+
+async def _greeting(
+    ctx: JobContext,
+    deps: CallDependencies,
+    participant: rtc.RemoteParticipant,
+    agent_context: AgentContext,
+    is_phone: bool,
+    resumed: bool,
+    ivr: Optional[IVRCall] = None,
+) -> str:
+    """Pick the opening line for the call, followed by its IVR menu"""
+    user = agent_context.user
+    if resumed:
+        return "Sorry about that, we got disconnected. Where were we?"
+
+    if is_phone:
+        caller_info = await handle_inbound_call(ctx, participant)
+
+        # Update user profile with phone number if we got it
+        if caller_info.get("number") and caller_info["number"] != "Unknown":
+            await deps.memory.update_user_profile(
+                user.user_id, {"phone_number": caller_info["number"]}
+            )
+        greeting = (
+            f"Hello, thanks for calling {agent_context.organization.name}. "
+            "How can I help you today?"
+        )
+        if ivr is not None and ivr.menu.prompt:
+            greeting = f"{greeting} {ivr.menu.prompt}"
+            ivr.offer()
+        return greeting
+
+    if user.name:
+        return f"Hello {user.name}! How can I help you today?"
+    return "Hello! How can I help you today?"
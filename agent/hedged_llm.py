@@ -0,0 +1,363 @@
+"""Hedged LLM requests across the configured providers"""
+import asyncio
+import dataclasses
+import json
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Union
+
+from livekit.agents import APIConnectionError, inference, llm
+from livekit.agents.types import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    NOT_GIVEN,
+    APIConnectOptions,
+    NotGivenOr,
+)
+
+from config.config import ModelConfig
+from metrics.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Each attempt gets a single try; hedging replaces retries
+_ATTEMPT_CONN_OPTIONS = dataclasses.replace(DEFAULT_API_CONNECT_OPTIONS, max_retry=0)
+
+
+@dataclass
+class _ProviderStats:
+    ttft_ms: LatencyHistogram = field(default_factory=LatencyHistogram)
+    requests: int = 0
+    hedges: int = 0
+    wins: int = 0
+    cancelled: int = 0
+    errors: int = 0
+    over_budget: int = 0
+    started_at: deque = field(default_factory=deque)
+
+
+class HedgedLLM(llm.LLM):
+    """
+    LLM that hedges a slow primary with a request to the next provider
+
+    Each turn goes to the first provider. When it has not produced a first
+    token within its hedge delay, the same request is also sent to the
+    next provider; whichever streams a first token first is used and the
+    other request is cancelled. A provider that fails before its first
+    token is replaced by the next one straight away.
+
+    The hedge delay is the ``percentile`` of the provider's time to first
+    token (clamped to ``min_delay``..``max_delay``), or ``default_delay``
+    until ``min_samples`` turns have been measured. The loser of a hedge
+    counts with the time it had waited, a lower bound of its TTFT, so a
+    slow provider's percentile is not measured on its fast turns alone.
+    Attempts cancelled for any other reason (the caller interrupting the
+    turn, or a discarded speculative generation) only count as cancelled:
+    their wait says nothing about the provider and would pull the delay
+    down.
+
+    Budgets:
+
+    - ``max_requests_per_minute``: per-provider limit keyed by label;
+      a provider at its limit is skipped. When every provider is, the
+      first one is used anyway rather than leaving the caller in silence.
+    - ``hedge_ratio``: hedges may add at most this fraction of requests
+      (a retry-budget token bucket), so a provider outage does not double
+      the traffic to every other provider.
+
+    Usage::
+
+        hedged = HedgedLLM({
+            "openai/gpt-4o-mini": inference.LLM("openai/gpt-4o-mini"),
+            "groq/llama-3.3-70b-versatile": inference.LLM(
+                "groq/llama-3.3-70b-versatile"
+            ),
+        })
+        AgentSession(llm=hedged, ...)
+
+    One instance serves every job of the worker, which run as threads
+    (see agent.worker_load.job_executor_type) so the TTFT histograms and
+    budgets span all calls; the bookkeeping is locked.
+    """
+
+    def __init__(
+        self,
+        providers: dict[str, llm.LLM],
+        percentile: float = 95.0,
+        default_delay: float = 0.8,
+        min_delay: float = 0.2,
+        max_delay: float = 2.0,
+        min_samples: int = 20,
+        hedge_ratio: float = 0.1,
+        max_requests_per_minute: Optional[dict[str, int]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if not providers:
+            raise ValueError("At least one LLM provider is required")
+        super().__init__()
+        self.providers = providers
+        self.percentile = percentile
+        self.default_delay = default_delay
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        self.min_samples = min_samples
+        self.hedge_ratio = hedge_ratio
+        self.max_requests_per_minute = max_requests_per_minute or {}
+        self._clock = clock
+        self._stats = {label: _ProviderStats() for label in providers}
+        # Start with one hedge available so the first slow turn can hedge
+        self._hedge_tokens = 1.0
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.hedged = 0
+
+    @classmethod
+    def from_config(cls, config: ModelConfig, **kwargs: Any) -> "HedgedLLM":
+        """Primary and hedge providers from the model configuration"""
+        labels = [config.get_llm_descriptor(), *config.get_llm_hedge_descriptors()]
+        return cls({label: inference.LLM(model=label) for label in labels}, **kwargs)
+
+    @property
+    def model(self) -> str:
+        return next(iter(self.providers.values())).model
+
+    @property
+    def provider(self) -> str:
+        return "hedged"
+
+    def hedge_delay(self, label: str) -> float:
+        """Seconds to wait for a provider's first token before hedging"""
+        with self._lock:
+            return self._hedge_delay(label)
+
+    def _hedge_delay(self, label: str) -> float:
+        ttft = self._stats[label].ttft_ms
+        if ttft.count < self.min_samples:
+            return self.default_delay
+        delay = ttft.percentile(self.percentile) / 1000
+        return min(max(delay, self.min_delay), self.max_delay)
+
+    def _within_budget(self, label: str) -> bool:
+        limit = self.max_requests_per_minute.get(label)
+        if limit is None:
+            return True
+        started_at = self._stats[label].started_at
+        now = self._clock()
+        while started_at and started_at[0] <= now - 60:
+            started_at.popleft()
+        return len(started_at) < limit
+
+    def _begin_turn(self) -> list[str]:
+        """
+        Count a turn and refill the hedge budget
+
+        Returns:
+            Providers to try, in preference order, that are within budget
+        """
+        with self._lock:
+            self.requests += 1
+            self._hedge_tokens = min(self._hedge_tokens + self.hedge_ratio, 10.0)
+            labels = list(self.providers)
+            allowed = [label for label in labels if self._within_budget(label)]
+            for label in labels:
+                if label not in allowed:
+                    self._stats[label].over_budget += 1
+            return allowed or labels[:1]
+
+    def _start_request(self, label: str, hedge: bool):
+        with self._lock:
+            stats = self._stats[label]
+            stats.requests += 1
+            stats.started_at.append(self._clock())
+            if hedge:
+                stats.hedges += 1
+                self.hedged += 1
+                self._hedge_tokens -= 1
+
+    def _can_hedge(self) -> bool:
+        with self._lock:
+            return self._hedge_tokens >= 1
+
+    def _record(self, label: str, outcome: str, ttft_ms: Optional[float] = None):
+        """Count an attempt's outcome (wins, errors or cancelled) and its TTFT"""
+        with self._lock:
+            stats = self._stats[label]
+            setattr(stats, outcome, getattr(stats, outcome) + 1)
+            if ttft_ms is not None:
+                stats.ttft_ms.record(ttft_ms)
+
+    def chat(
+        self,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: Optional[list[Union[llm.FunctionTool, llm.RawFunctionTool]]] = None,
+        conn_options: APIConnectOptions = DEFAULT_API_CONNECT_OPTIONS,
+        parallel_tool_calls: NotGivenOr[bool] = NOT_GIVEN,
+        tool_choice: NotGivenOr[llm.ToolChoice] = NOT_GIVEN,
+        extra_kwargs: NotGivenOr[dict[str, Any]] = NOT_GIVEN,
+    ) -> llm.LLMStream:
+        return _HedgedLLMStream(
+            self,
+            chat_ctx=chat_ctx,
+            tools=tools or [],
+            conn_options=conn_options,
+            parallel_tool_calls=parallel_tool_calls,
+            tool_choice=tool_choice,
+            extra_kwargs=extra_kwargs,
+        )
+
+    def stats(self) -> dict[str, Any]:
+        """Requests, hedges, wins, cancellations and TTFT per provider"""
+        with self._lock:
+            return self._stats_locked()
+
+    def _stats_locked(self) -> dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "hedged": self.hedged,
+            "hedge_rate": (
+                round(self.hedged / self.requests, 4) if self.requests else 0.0
+            ),
+            "providers": {
+                label: {
+                    "requests": s.requests,
+                    "hedges": s.hedges,
+                    "wins": s.wins,
+                    "cancelled": s.cancelled,
+                    "errors": s.errors,
+                    "over_budget": s.over_budget,
+                    "hedge_delay_ms": round(self._hedge_delay(label) * 1000, 1),
+                    "ttft_ms": s.ttft_ms.summary(),
+                }
+                for label, s in self._stats.items()
+            },
+        }
+
+    def log_stats(self):
+        """Log the current stats as a single structured line"""
+        if self.requests:
+            logger.info(f"hedged_llm {json.dumps(self.stats())}")
+
+    async def aclose(self):
+        await asyncio.gather(*(p.aclose() for p in self.providers.values()))
+
+
+@dataclass
+class _Attempt:
+    label: str
+    stream: llm.LLMStream
+    started: float
+    first: asyncio.Task
+
+
+class _HedgedLLMStream(llm.LLMStream):
+    def __init__(
+        self,
+        hedged: HedgedLLM,
+        *,
+        chat_ctx: llm.ChatContext,
+        tools: list[Union[llm.FunctionTool, llm.RawFunctionTool]],
+        conn_options: APIConnectOptions,
+        parallel_tool_calls: NotGivenOr[bool],
+        tool_choice: NotGivenOr[llm.ToolChoice],
+        extra_kwargs: NotGivenOr[dict[str, Any]],
+    ):
+        super().__init__(
+            hedged, chat_ctx=chat_ctx, tools=tools, conn_options=conn_options
+        )
+        self._hedged = hedged
+        self._parallel_tool_calls = parallel_tool_calls
+        self._tool_choice = tool_choice
+        self._extra_kwargs = extra_kwargs
+
+    def _start(self, label: str, hedge: bool) -> _Attempt:
+        self._hedged._start_request(label, hedge)
+        stream = self._hedged.providers[label].chat(
+            chat_ctx=self._chat_ctx,
+            tools=self._tools,
+            conn_options=dataclasses.replace(
+                _ATTEMPT_CONN_OPTIONS, timeout=self._conn_options.timeout
+            ),
+            parallel_tool_calls=self._parallel_tool_calls,
+            tool_choice=self._tool_choice,
+            extra_kwargs=self._extra_kwargs,
+        )
+        first = asyncio.ensure_future(stream.__anext__())
+        return _Attempt(label, stream, time.perf_counter(), first)
+
+    async def _cancel(self, attempt: _Attempt, lost: bool):
+        # Only a hedge loser's wait bounds its TTFT from below
+        waited = None
+        if lost:
+            waited = (time.perf_counter() - attempt.started) * 1000
+        self._hedged._record(attempt.label, "cancelled", waited)
+        attempt.first.cancel()
+        await asyncio.gather(attempt.first, return_exceptions=True)
+        await attempt.stream.aclose()
+
+    async def _race(self) -> tuple[_Attempt, llm.ChatChunk]:
+        """Start attempts until one yields a first chunk; cancel the rest"""
+        hedged = self._hedged
+        queue = hedged._begin_turn()
+        running = [self._start(queue.pop(0), hedge=False)]
+        error: Optional[BaseException] = None
+        won = False
+
+        try:
+            while running:
+                timeout = None
+                if queue and hedged._can_hedge():
+                    timeout = hedged.hedge_delay(running[0].label)
+                done, _ = await asyncio.wait(
+                    [a.first for a in running],
+                    timeout=timeout,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                if not done:
+                    label = queue.pop(0)
+                    logger.info(
+                        f"No first token from {running[0].label} after "
+                        f"{timeout * 1000:.0f}ms, hedging with {label}"
+                    )
+                    running.append(self._start(label, hedge=True))
+                    continue
+
+                for attempt in [a for a in running if a.first in done]:
+                    running.remove(attempt)
+                    exc = attempt.first.exception()
+                    if exc is None:
+                        ttft = time.perf_counter() - attempt.started
+                        hedged._record(attempt.label, "wins", ttft * 1000)
+                        won = True
+                        return attempt, attempt.first.result()
+
+                    hedged._record(attempt.label, "errors")
+                    error = exc
+                    await attempt.stream.aclose()
+                    if not isinstance(exc, StopAsyncIteration):
+                        logger.warning(f"LLM {attempt.label} failed: {exc}")
+                    if queue and not running:
+                        running.append(self._start(queue.pop(0), hedge=False))
+        finally:
+            for attempt in running:
+                await self._cancel(attempt, lost=won)
+
+        # Every provider has been tried; retrying the whole race only adds silence
+        if isinstance(error, StopAsyncIteration):
+            raise APIConnectionError(
+                "LLM stream ended without a response", retryable=False
+            )
+        raise APIConnectionError(
+            f"All LLM providers failed: {error}", retryable=False
+        ) from error
+
+    async def _run(self):
+        winner, chunk = await self._race()
+        try:
+            self._event_ch.send_nowait(chunk)
+            async for chunk in winner.stream:
+                self._event_ch.send_nowait(chunk)
+        finally:
+            await winner.stream.aclose()
@@ -0,0 +1,114 @@
+"""Per-process registry of assets loaded once in prewarm"""
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import psutil
+
+logger = logging.getLogger("voice-agent")
+
+REPORT_KEY = "prewarm_report"
+
+
+@dataclass(frozen=True)
+class AssetLoad:
+    """How long one asset took to load and how much memory it added"""
+
+    name: str
+    seconds: float
+    rss_bytes: int
+
+
+class PrewarmRegistry:
+    """
+    Named loaders for the models and services every call needs
+
+    load_all() runs in the worker's prewarm function, once per JobProcess,
+    and stores each asset in ``proc.userdata`` under its name. Calls then
+    read the shared instance with get(), which raises instead of loading
+    on demand, so a missing asset shows up at startup rather than as a
+    slow first call.
+
+    Usage::
+
+        registry = PrewarmRegistry()
+        registry.register("vad", silero.VAD.load)
+
+        def prewarm(proc):
+            registry.load_all(proc)
+
+        vad = registry.get(ctx.proc.userdata, "vad")
+    """
+
+    def __init__(self):
+        self._loaders: dict[str, Callable[[], Any]] = {}
+
+    @property
+    def names(self) -> list[str]:
+        """Registered asset names in load order"""
+        return list(self._loaders)
+
+    def register(self, name: str, loader: Optional[Callable[[], Any]] = None):
+        """
+        Register a loader, directly or as a decorator
+
+        Args:
+            name: Key the asset is stored under in proc.userdata
+            loader: Zero-argument callable returning the asset
+        """
+
+        def add(fn: Callable[[], Any]):
+            if name in self._loaders:
+                raise ValueError(f"Asset already registered: {name}")
+            self._loaders[name] = fn
+            return fn
+
+        return add(loader) if loader is not None else add
+
+    def load_all(self, proc) -> list[AssetLoad]:
+        """
+        Load every registered asset into ``proc.userdata``
+
+        Assets already present in userdata are kept. The per-asset report
+        is logged and stored under ``proc.userdata["prewarm_report"]``.
+        """
+        process = psutil.Process()
+        loads = []
+        for name, loader in self._loaders.items():
+            if name in proc.userdata:
+                continue
+            rss_before = process.memory_info().rss
+            start = time.perf_counter()
+            proc.userdata[name] = loader()
+            loads.append(
+                AssetLoad(
+                    name=name,
+                    seconds=time.perf_counter() - start,
+                    rss_bytes=process.memory_info().rss - rss_before,
+                )
+            )
+
+        for load in loads:
+            logger.info(
+                f"Prewarmed {load.name} in {load.seconds * 1000:.1f}ms "
+                f"(+{load.rss_bytes / 2**20:.1f} MiB)"
+            )
+        proc.userdata[REPORT_KEY] = loads
+        return loads
+
+    def get(self, userdata: dict[str, Any], name: str) -> Any:
+        """
+        Get a prewarmed asset
+
+        Raises:
+            RuntimeError: If the asset was not loaded in prewarm
+        """
+        try:
+            return userdata[name]
+        except KeyError:
+            if name not in self._loaders:
+                raise RuntimeError(f"Unknown prewarm asset: {name}") from None
+            raise RuntimeError(
+                f"Asset {name!r} was not prewarmed; is prewarm_fnc set?"
+            ) from None
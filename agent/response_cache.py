@@ -0,0 +1,323 @@
+"""Org-scoped cache of LLM responses to repeated caller questions"""
+import json
+import logging
+import re
+import threading
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Callable, Optional
+
+from livekit.agents import llm
+
+from models.context import AgentContext, OrganizationContext
+
+logger = logging.getLogger(__name__)
+
+# Turns mentioning the caller themselves are about their own data
+_FIRST_PERSON = {"my", "me", "mine", "myself", "im", "ive", "id"}
+# Turns that answer or point back at the conversation ("yes", "what
+# about that one?") mean something different in every call
+_CONTEXTUAL = {
+    "yes",
+    "yeah",
+    "yep",
+    "no",
+    "nope",
+    "ok",
+    "okay",
+    "sure",
+    "it",
+    "its",
+    "that",
+    "thats",
+    "this",
+    "these",
+    "those",
+    "they",
+    "them",
+    "there",
+    "then",
+    "he",
+    "she",
+    "him",
+    "her",
+    "one",
+    "same",
+    "else",
+}
+# Words that do not change what a question asks; every other word must
+# match exactly, so "saturday" never answers "sunday"
+_FILLER = {
+    "a",
+    "an",
+    "the",
+    "is",
+    "are",
+    "do",
+    "does",
+    "can",
+    "could",
+    "would",
+    "will",
+    "you",
+    "your",
+    "please",
+    "hi",
+    "hello",
+    "hey",
+    "um",
+    "uh",
+    "so",
+    "well",
+    "just",
+    "and",
+    "tell",
+    "us",
+}
+_EMAIL = re.compile(r"\S+@\S+")
+_NUMBER = re.compile(r"\d{3,}")
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def normalize_utterance(text: str) -> str:
+    """Lowercase words without punctuation, single-spaced"""
+    return " ".join(_WORD.findall(text.lower().replace("'", "")))
+
+
+def content_words(normalized: str) -> list[str]:
+    """The words of a normalized utterance that carry its meaning, in order"""
+    return [word for word in normalized.split() if word not in _FILLER]
+
+
+def last_user_message(chat_ctx: llm.ChatContext) -> Optional[str]:
+    """Text of the final chat item if it is a user message"""
+    if not chat_ctx.items:
+        return None
+    item = chat_ctx.items[-1]
+    if getattr(item, "type", None) != "message" or item.role != "user":
+        return None
+    return item.text_content
+
+
+def previous_assistant_message(chat_ctx: llm.ChatContext) -> str:
+    """Text of the assistant message the final user turn replies to"""
+    for item in reversed(chat_ctx.items[:-1]):
+        if getattr(item, "type", None) == "message" and item.role == "assistant":
+            return item.text_content or ""
+    return ""
+
+
+@dataclass
+class _Entry:
+    response: str
+    expires_at: float
+
+
+class ResponseCache:
+    """
+    Responses to FAQ-style turns, keyed per organization and prompt version
+
+    A turn is keyed by the assistant message it replies to and its
+    content words: the normalized utterance without filler words like
+    "the", "your" or "please", so "what are your hours?" also answers
+    "what are the hours", but no other word may differ. Entries expire
+    after the organization's TTL, taken from
+    ``custom_settings["response_cache_ttl"]`` (seconds; 0 disables the
+    cache for that organization) or ``default_ttl``.
+
+    Turns that mention the caller (first-person words, numbers, email
+    addresses, the caller's name), turns of fewer than ``min_words``
+    content words and turns referring back to the conversation ("yes",
+    "what about that?") are never cached, nor are responses that call
+    tools or repeat the caller's name, phone number or email.
+
+    One instance serves every job of the worker, which run as threads
+    (see agent.worker_load.job_executor_type), so access is locked.
+    """
+
+    def __init__(
+        self,
+        default_ttl: float = 3600.0,
+        min_words: int = 2,
+        max_entries: int = 256,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.default_ttl = default_ttl
+        self.min_words = min_words
+        self.max_entries = max_entries
+        self._clock = clock
+        self._scopes: dict[tuple[str, str], OrderedDict[str, _Entry]] = {}
+        self._counts: dict[str, Counter] = {}
+        self._lock = threading.Lock()
+
+    def ttl_for(self, organization: OrganizationContext) -> float:
+        """Cache lifetime for an organization's responses"""
+        return float(
+            organization.custom_settings.get("response_cache_ttl", self.default_ttl)
+        )
+
+    def is_cacheable(self, utterance: str, context: AgentContext) -> bool:
+        """Whether a turn is a self-contained question free of personal data"""
+        if _EMAIL.search(utterance) or _NUMBER.search(utterance):
+            return False
+        normalized = normalize_utterance(utterance)
+        words = set(normalized.split())
+        if words & (_FIRST_PERSON | _CONTEXTUAL):
+            return False
+        name = context.user.name
+        if name and words & set(normalize_utterance(name).split()):
+            return False
+        return len(content_words(normalized)) >= self.min_words
+
+    def _mentions_caller(self, response: str, context: AgentContext) -> bool:
+        user = context.user
+        lowered = response.lower()
+        return any(
+            value and value.lower() in lowered
+            for value in (user.name, user.phone_number, user.email)
+        )
+
+    def _count(self, org_id: str, outcome: str):
+        """Count a turn's outcome (caller holds the lock)"""
+        self._counts.setdefault(org_id, Counter())[outcome] += 1
+
+    @staticmethod
+    def _key(utterance: str, previous: str) -> str:
+        words = content_words(normalize_utterance(utterance))
+        return f"{normalize_utterance(previous)}\x1f{' '.join(words)}"
+
+    def lookup(
+        self,
+        organization: OrganizationContext,
+        prompt_version: str,
+        utterance: str,
+        previous: str = "",
+    ) -> Optional[str]:
+        """
+        Find a cached response for an utterance, counting the hit or miss
+
+        Args:
+            previous: The assistant message the utterance replies to
+        """
+        key = self._key(utterance, previous)
+        with self._lock:
+            entries = self._scopes.get((organization.org_id, prompt_version))
+            response = self._find(entries, key)
+            self._count(organization.org_id, "hits" if response else "misses")
+        return response
+
+    def _find(
+        self, entries: Optional[OrderedDict[str, _Entry]], key: str
+    ) -> Optional[str]:
+        if not entries:
+            return None
+        now = self._clock()
+        for expired in [k for k, e in entries.items() if e.expires_at <= now]:
+            del entries[expired]
+
+        entry = entries.get(key)
+        if entry is None:
+            return None
+        entries.move_to_end(key)
+        return entry.response
+
+    def store(
+        self,
+        organization: OrganizationContext,
+        prompt_version: str,
+        utterance: str,
+        response: str,
+        previous: str = "",
+    ):
+        """Cache a response for the organization's TTL"""
+        ttl = self.ttl_for(organization)
+        if ttl <= 0:
+            return
+        key = self._key(utterance, previous)
+        with self._lock:
+            entries = self._scopes.setdefault(
+                (organization.org_id, prompt_version), OrderedDict()
+            )
+            entries[key] = _Entry(response, self._clock() + ttl)
+            entries.move_to_end(key)
+            while len(entries) > self.max_entries:
+                entries.popitem(last=False)
+            self._count(organization.org_id, "stores")
+
+    async def respond(
+        self,
+        context: AgentContext,
+        chat_ctx: llm.ChatContext,
+        generate: Callable[[], AsyncIterable[Any]],
+    ) -> AsyncIterable[Any]:
+        """
+        LLM node output for a turn, from the cache or from ``generate``
+
+        Args:
+            context: Context of the call the turn belongs to
+            chat_ctx: Chat context passed to the agent's llm_node
+            generate: Starts the real LLM stream (ChatChunk or str items)
+        """
+        org = context.organization
+        prompt_version = context.call_metadata.get("prompt_version", "")
+        utterance = last_user_message(chat_ctx)
+        if (
+            utterance is None
+            or self.ttl_for(org) <= 0
+            or not self.is_cacheable(utterance, context)
+        ):
+            if utterance is not None:
+                with self._lock:
+                    self._count(org.org_id, "skipped")
+            async for chunk in generate():
+                yield chunk
+            return
+
+        previous = previous_assistant_message(chat_ctx)
+        cached = self.lookup(org, prompt_version, utterance, previous)
+        if cached is not None:
+            yield cached
+            return
+
+        parts = []
+        used_tools = False
+        async for chunk in generate():
+            if isinstance(chunk, str):
+                parts.append(chunk)
+            elif chunk.delta is not None:
+                parts.append(chunk.delta.content or "")
+                used_tools = used_tools or bool(chunk.delta.tool_calls)
+            yield chunk
+
+        response = "".join(parts).strip()
+        if used_tools or not response or self._mentions_caller(response, context):
+            return
+        self.store(org, prompt_version, utterance, response, previous)
+
+    def stats(self) -> dict[str, Any]:
+        """Hit, miss, skipped and store counts with hit rates, overall and per org"""
+        total = Counter()
+        by_org = {}
+        with self._lock:
+            for org_id, counts in sorted(self._counts.items()):
+                total.update(counts)
+                by_org[org_id] = _with_hit_rate(counts)
+            entries = sum(len(e) for e in self._scopes.values())
+        return {**_with_hit_rate(total), "entries": entries, "by_org": by_org}
+
+    def log_stats(self):
+        """Log the current stats as a single structured line"""
+        if self._counts:
+            logger.info(f"response_cache {json.dumps(self.stats())}")
+
+
+def _with_hit_rate(counts: Counter) -> dict[str, Any]:
+    lookups = counts["hits"] + counts["misses"]
+    return {
+        "hits": counts["hits"],
+        "misses": counts["misses"],
+        "skipped": counts["skipped"],
+        "stores": counts["stores"],
+        "hit_rate": round(counts["hits"] / lookups, 4) if lookups else 0.0,
+    }
@@ -0,0 +1,272 @@
+"""Speculative LLM generation on interim transcripts"""
+import asyncio
+import difflib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterable, Callable, Optional
+
+from livekit.agents import llm
+
+from agent.response_cache import last_user_message, normalize_utterance
+from metrics.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+
+def divergence(a: str, b: str) -> float:
+    """Word-level difference between two utterances, 0.0 (same) to 1.0"""
+    words_a = normalize_utterance(a).split()
+    words_b = normalize_utterance(b).split()
+    if not words_a and not words_b:
+        return 0.0
+    return 1.0 - difflib.SequenceMatcher(None, words_a, words_b).ratio()
+
+
+@dataclass
+class SpeculationStats:
+    """
+    Outcomes of speculative generations, shared by the sessions of a worker
+
+    The sessions are jobs on different threads, so counts are updated
+    through the record methods, which take a lock.
+    """
+
+    started: int = 0
+    committed: int = 0
+    discarded: int = 0
+    committed_tokens: int = 0
+    wasted_tokens: int = 0
+    saved_ms: LatencyHistogram = field(default_factory=LatencyHistogram)
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, repr=False, compare=False
+    )
+
+    def record_started(self):
+        with self._lock:
+            self.started += 1
+
+    def record_discarded(self, tokens: int):
+        with self._lock:
+            self.discarded += 1
+            self.wasted_tokens += tokens
+
+    def record_committed(self, saved_ms: float):
+        with self._lock:
+            self.committed += 1
+            self.saved_ms.record(saved_ms)
+
+    def record_committed_tokens(self, tokens: int):
+        with self._lock:
+            self.committed_tokens += tokens
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            return self._summary()
+
+    def _summary(self) -> dict[str, Any]:
+        tokens = self.committed_tokens + self.wasted_tokens
+        return {
+            "started": self.started,
+            "committed": self.committed,
+            "discarded": self.discarded,
+            "commit_rate": (
+                round(self.committed / self.started, 4) if self.started else 0.0
+            ),
+            "wasted_tokens": self.wasted_tokens,
+            "waste_ratio": round(self.wasted_tokens / tokens, 4) if tokens else 0.0,
+            "saved_ms": self.saved_ms.summary(),
+        }
+
+    def log(self):
+        """Log the summary as a single structured line"""
+        if self.started:
+            logger.info(f"speculative_llm {json.dumps(self.summary())}")
+
+
+class _Speculation:
+    """One background generation and the chunks it has produced so far"""
+
+    def __init__(
+        self, text: str, stream: AsyncIterable[Any], clock: Callable[[], float]
+    ):
+        self.text = text
+        self.started_at = clock()
+        self.first_chunk_at: Optional[float] = None
+        self.chunks: list[Any] = []
+        self.done = False
+        self._clock = clock
+        self._changed = asyncio.Event()
+        self._task = asyncio.create_task(self._consume(stream))
+
+    async def _consume(self, stream: AsyncIterable[Any]):
+        try:
+            async for chunk in stream:
+                if self.first_chunk_at is None:
+                    self.first_chunk_at = self._clock()
+                self.chunks.append(chunk)
+                self._changed.set()
+        finally:
+            self.done = True
+            self._changed.set()
+
+    async def replay(self) -> AsyncIterable[Any]:
+        """Chunks produced so far, then the rest as they arrive"""
+        sent = 0
+        while True:
+            while sent < len(self.chunks):
+                yield self.chunks[sent]
+                sent += 1
+            if self.done:
+                break
+            self._changed.clear()
+            await self._changed.wait()
+        # Surface a failed generation like the LLM node would
+        if not self._task.cancelled() and self._task.exception() is not None:
+            raise self._task.exception()
+
+    def cancel(self):
+        self._task.cancel()
+
+
+class SpeculativeGeneration:
+    """
+    Starts a session's LLM turn on interim transcripts, before end of turn
+
+    Feed it the session's transcripts with on_transcript(). Once an
+    interim transcript has stayed the same for ``stable_interims``
+    consecutive updates, or a final transcript arrives, the turn so far
+    (earlier final segments plus the current one) is sent to
+    ``generate`` with ``history()`` as context, and the chunks are
+    buffered. A later stable text that diverges from the speculated one
+    by more than ``max_divergence`` cancels it and starts over.
+
+    When the turn ends, respond() compares the committed user message
+    with the speculated text: within ``max_divergence`` the buffered
+    chunks are replayed and the stream continues, otherwise the
+    speculation is discarded and the turn is generated normally.
+    ``max_divergence`` is a word-level difference (see divergence());
+    the default 0.0 only commits identical normalized text.
+
+    Tokens are counted as streamed chunks. Saved latency is how much of
+    the speculation's time to first token had elapsed when the turn
+    ended.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[llm.ChatContext], AsyncIterable[Any]],
+        history: Callable[[], llm.ChatContext],
+        stats: Optional[SpeculationStats] = None,
+        stable_interims: int = 2,
+        max_divergence: float = 0.0,
+        min_words: int = 2,
+        clock: Callable[[], float] = time.perf_counter,
+    ):
+        self._generate = generate
+        self._history = history
+        self.stats = stats or SpeculationStats()
+        self.stable_interims = stable_interims
+        self.max_divergence = max_divergence
+        self.min_words = min_words
+        self._clock = clock
+        self._finals: list[str] = []
+        self._interim = ""
+        self._interim_repeats = 0
+        self._current: Optional[_Speculation] = None
+        self._committed: Optional[_Speculation] = None
+
+    def on_transcript(self, transcript: str, is_final: bool):
+        """Handle a user_input_transcribed event's transcript"""
+        transcript = transcript.strip()
+        if is_final:
+            if transcript:
+                self._finals.append(transcript)
+            self._interim, self._interim_repeats = "", 0
+            self._speculate(" ".join(self._finals))
+            return
+
+        if normalize_utterance(transcript) == normalize_utterance(self._interim):
+            self._interim_repeats += 1
+        else:
+            self._interim, self._interim_repeats = transcript, 1
+        if self._interim_repeats >= self.stable_interims:
+            self._speculate(" ".join([*self._finals, transcript]))
+
+    def _speculate(self, text: str):
+        if len(normalize_utterance(text).split()) < self.min_words:
+            return
+        current = self._current
+        if current is not None:
+            if divergence(current.text, text) <= self.max_divergence:
+                return
+            self._discard()
+
+        chat_ctx = self._history().copy()
+        chat_ctx.add_message(role="user", content=text)
+        self._current = _Speculation(text, self._generate(chat_ctx), self._clock)
+        self.stats.record_started()
+
+    def _discard(self):
+        current, self._current = self._current, None
+        if current is None:
+            return
+        current.cancel()
+        self.stats.record_discarded(len(current.chunks))
+
+    async def respond(self, chat_ctx: llm.ChatContext) -> AsyncIterable[Any]:
+        """
+        LLM node output for the ended turn
+
+        Args:
+            chat_ctx: Chat context passed to the agent's llm_node
+        """
+        final = last_user_message(chat_ctx)
+        current = self._current
+        if (
+            current is not None
+            and final is not None
+            and divergence(current.text, final) <= self.max_divergence
+        ):
+            self._current, self._committed = None, current
+        else:
+            current = None
+        self._discard()
+        self._reset_transcripts()
+
+        if current is None:
+            async for chunk in self._generate(chat_ctx):
+                yield chunk
+            return
+
+        now = self._clock()
+        first_chunk_at = current.first_chunk_at or now
+        saved = min(now, first_chunk_at) - current.started_at
+        self.stats.record_committed(saved * 1000)
+        count = 0
+        try:
+            async for chunk in current.replay():
+                count += 1
+                yield chunk
+        finally:
+            current.cancel()
+            self.stats.record_committed_tokens(count)
+
+    def end_turn(self):
+        """
+        Discard any unused speculation and forget the turn's transcripts
+
+        Call it once the LLM node is done, so a turn answered without
+        respond() (e.g. from a cache) does not leave a speculation running.
+        """
+        self._discard()
+        if self._committed is not None:
+            self._committed.cancel()
+            self._committed = None
+        self._reset_transcripts()
+
+    def _reset_transcripts(self):
+        self._finals = []
+        self._interim, self._interim_repeats = "", 0
@@ -0,0 +1,209 @@
+"""Worker load reporting and job admission"""
+import logging
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+import psutil
+from livekit.agents import JobExecutorType, JobRequest
+
+logger = logging.getLogger("voice-agent")
+
+# How often the worker calls load_fnc (livekit.agents.worker.UPDATE_LOAD_INTERVAL)
+LOAD_INTERVAL = 0.5
+
+
+class ProcessTreeCPU:
+    """
+    CPU use of this process and all its descendants, in percent of all cores
+
+    The worker's jobs (with the PROCESS executor) and its inference process
+    are children of the worker, so this is the CPU the worker itself is
+    using, unlike the system-wide figure. Call it periodically: each call
+    reports the use since the previous one.
+    """
+
+    def __init__(self):
+        self._root = psutil.Process()
+        self._processes: dict[int, psutil.Process] = {}
+
+    def __call__(self) -> float:
+        try:
+            processes = [self._root, *self._root.children(recursive=True)]
+        except psutil.Error:
+            processes = [self._root]
+        total = 0.0
+        seen = {}
+        for process in processes:
+            # The first reading of a process is 0; keep each one to measure
+            # from its previous reading (unless its pid was reused)
+            known = self._processes.get(process.pid)
+            if known is not None and known == process:
+                process = known
+            try:
+                total += process.cpu_percent(interval=None)
+            except psutil.Error:
+                continue
+            seen[process.pid] = process
+        self._processes = seen
+        return total / (psutil.cpu_count() or 1)
+
+
+def job_executor_type(shared: dict[str, Any]) -> JobExecutorType:
+    """
+    How the worker runs its jobs, given the components shared between calls
+
+    Components such as the overflow queue, response cache, hedged LLM and
+    provider selector keep state that only works across calls if every
+    job sees the same instance. With the default PROCESS executor each
+    job gets its own process and a fresh copy, so while any of them is
+    enabled (truthy in ``shared``) jobs run as threads of one worker
+    process instead. Setup metrics are not among them: each job keeps its
+    own and their logs are merged (see metrics.call_timing.merge_logged).
+    """
+    enabled = sorted(name for name, component in shared.items() if component)
+    if not enabled:
+        return JobExecutorType.PROCESS
+    logger.info(f"Running jobs as threads to share: {', '.join(enabled)}")
+    return JobExecutorType.THREAD
+
+
+@dataclass(frozen=True)
+class LoadSample:
+    """One load measurement; each part is 1.0 at its configured limit"""
+
+    sessions: int
+    session_load: float
+    loop_lag: float
+    lag_load: float
+    cpu: float
+    cpu_load: float
+
+    @property
+    def load(self) -> float:
+        """Worker load reported to LiveKit: the most constrained resource"""
+        return min(max(self.session_load, self.lag_load, self.cpu_load), 1.0)
+
+
+class WorkerLoad:
+    """
+    Load function and admission policy for WorkerOptions
+
+    The load is the largest of three ratios, each 1.0 at its limit:
+
+    - active sessions / ``max_sessions``
+    - event-loop lag / ``max_loop_lag``
+    - CPU of the worker's process tree / ``max_cpu`` (see ProcessTreeCPU)
+
+    Lag and CPU are averaged over the last ``window`` samples. Loop lag is
+    the worst of the worker's own loop, measured by how late each
+    load_fnc call arrives (it is scheduled every LOAD_INTERVAL), and the
+    job loops since the last sample, which their LoopWatchdogs report
+    through record_job_lag(). Job loops only share this object when jobs
+    run as threads of the worker process; with a process per job, their
+    load shows in the process tree's CPU instead.
+
+    With ``load_threshold=1.0`` LiveKit marks the worker full once any
+    limit is reached. Status updates go out every few seconds, so
+    request_fnc() also checks admit() and rejects jobs arriving in between.
+
+    Usage::
+
+        worker_load = WorkerLoad(max_sessions=8)
+        WorkerOptions(
+            entrypoint_fnc=entrypoint,
+            load_fnc=worker_load.get_load,
+            load_threshold=1.0,
+            request_fnc=worker_load.request_fnc,
+        )
+    """
+
+    def __init__(
+        self,
+        max_sessions: int = 8,
+        max_loop_lag: float = 0.1,
+        max_cpu: float = 0.85,
+        window: int = 5,
+        cpu_percent: Optional[Callable[[], float]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_sessions = max_sessions
+        self.max_loop_lag = max_loop_lag
+        self.max_cpu = max_cpu
+        self._cpu_percent = cpu_percent or ProcessTreeCPU()
+        self._clock = clock
+        self._lags: deque[float] = deque(maxlen=window)
+        self._cpus: deque[float] = deque(maxlen=window)
+        self._last_call: Optional[float] = None
+        self._job_lag = 0.0
+        self._sessions = 0
+        self._admitted = 0
+        self._lock = threading.Lock()
+        self.last_sample: Optional[LoadSample] = None
+
+    def record_job_lag(self, lag: float):
+        """Report a job loop's lag in seconds; callable from any thread"""
+        with self._lock:
+            self._job_lag = max(self._job_lag, lag)
+
+    def get_load(self, worker) -> float:
+        """load_fnc for WorkerOptions; called from a worker executor thread"""
+        now = self._clock()
+        lag = 0.0
+        if self._last_call is not None:
+            lag = max(now - self._last_call - LOAD_INTERVAL, 0.0)
+        self._last_call = now
+        with self._lock:
+            lag = max(lag, self._job_lag)
+            self._job_lag = 0.0
+        self._lags.append(lag)
+        self._cpus.append(self._cpu_percent() / 100)
+
+        with self._lock:
+            self._sessions = len(worker.active_jobs)
+            self._admitted = 0
+            sample = self._sample(self._sessions)
+        self.last_sample = sample
+        return sample.load
+
+    def _sample(self, sessions: int) -> LoadSample:
+        loop_lag = sum(self._lags) / len(self._lags) if self._lags else 0.0
+        cpu = sum(self._cpus) / len(self._cpus) if self._cpus else 0.0
+        return LoadSample(
+            sessions=sessions,
+            session_load=sessions / self.max_sessions,
+            loop_lag=loop_lag,
+            lag_load=loop_lag / self.max_loop_lag,
+            cpu=cpu,
+            cpu_load=cpu / self.max_cpu,
+        )
+
+    def admit(self) -> bool:
+        """
+        Reserve capacity for one more call
+
+        Counts calls admitted since the last load sample, which are not
+        yet in the worker's active jobs.
+        """
+        with self._lock:
+            sample = self._sample(self._sessions + self._admitted + 1)
+            if (
+                sample.session_load > 1.0
+                or sample.lag_load >= 1.0
+                or sample.cpu_load >= 1.0
+            ):
+                logger.info(f"Worker at capacity: {sample}")
+                return False
+            self._admitted += 1
+            return True
+
+    async def request_fnc(self, req: JobRequest):
+        """request_fnc for WorkerOptions: accept only while under every limit"""
+        if self.admit():
+            await req.accept()
+            return
+
+        logger.warning(f"Rejecting job for room {req.room.name}: worker overloaded")
+        await req.reject()
@@ -0,0 +1,134 @@
+"""Audio processing profiles per participant kind and organization"""
+import json
+import logging
+from dataclasses import asdict, dataclass, fields, replace
+from pathlib import Path
+from typing import Any, Optional
+
+from models.context import OrganizationContext
+
+logger = logging.getLogger(__name__)
+
+# Noise cancellation models by profile setting (livekit.plugins.noise_cancellation)
+NOISE_CANCELLATION_MODELS = ("bvc", "bvc_telephony", "nc")
+
+PHONE = "phone"
+WEB = "web"
+
+
+@dataclass(frozen=True)
+class AudioProfile:
+    """How a participant's audio is received and processed"""
+
+    name: str
+    # One of NOISE_CANCELLATION_MODELS, or None to disable
+    noise_cancellation: Optional[str] = "bvc"
+    # Sample rate the session receives the participant's audio at
+    input_sample_rate: int = 24000
+    vad_sample_rate: int = 16000
+    vad_activation_threshold: float = 0.5
+    vad_min_silence_duration: float = 0.55
+
+    def __post_init__(self):
+        if (
+            self.noise_cancellation is not None
+            and self.noise_cancellation not in NOISE_CANCELLATION_MODELS
+        ):
+            raise ValueError(
+                f"Unknown noise cancellation {self.noise_cancellation!r} "
+                f"in audio profile {self.name}"
+            )
+        if self.vad_sample_rate not in (8000, 16000):
+            raise ValueError(
+                f"VAD sample rate must be 8000 or 16000 in audio profile {self.name}"
+            )
+
+    @property
+    def vad_options(self) -> tuple[int, float, float]:
+        """Settings that need their own VAD instance"""
+        return (
+            self.vad_sample_rate,
+            self.vad_activation_threshold,
+            self.vad_min_silence_duration,
+        )
+
+
+DEFAULT_PROFILES = {
+    WEB: AudioProfile(WEB),
+    # SIP audio is 8 kHz narrowband: the telephony-trained model, no
+    # upsampling to 24 kHz and an 8 kHz VAD do the same job for less CPU
+    PHONE: AudioProfile(
+        PHONE,
+        noise_cancellation="bvc_telephony",
+        input_sample_rate=16000,
+        vad_sample_rate=8000,
+    ),
+    # For clean lines (e.g. carrier-side noise suppression) or overloaded workers
+    "phone_lite": AudioProfile(
+        "phone_lite",
+        noise_cancellation=None,
+        input_sample_rate=16000,
+        vad_sample_rate=8000,
+    ),
+}
+
+
+class AudioProfiles:
+    """
+    Picks the audio profile of a call
+
+    Calls use the ``phone`` or ``web`` profile by participant kind. An
+    organization can override either with
+    ``custom_settings["audio_profile"]``: a profile name for all of its
+    calls, or ``{"phone": name, "web": name}``.
+
+    Profiles are the DEFAULT_PROFILES plus those in an optional JSON file
+    (``{"name": {"noise_cancellation": ..., ...}}``); a file entry with a
+    default profile's name changes only the fields it sets.
+    """
+
+    def __init__(self, profiles: Optional[dict[str, AudioProfile]] = None):
+        self.profiles = dict(DEFAULT_PROFILES)
+        self.profiles.update(profiles or {})
+
+    @classmethod
+    def from_file(cls, path: str) -> "AudioProfiles":
+        """Default profiles plus the ones in a JSON file, if it exists"""
+        file = Path(path)
+        if not file.exists():
+            return cls()
+        data: dict[str, dict[str, Any]] = json.loads(file.read_text())
+        known = {f.name for f in fields(AudioProfile)} - {"name"}
+        profiles = {}
+        for name, settings in data.items():
+            unknown = set(settings) - known
+            if unknown:
+                raise ValueError(
+                    f"Unknown audio profile settings in {name}: {unknown}"
+                )
+            base = DEFAULT_PROFILES.get(name, AudioProfile(name))
+            profiles[name] = replace(base, **settings)
+        return cls(profiles)
+
+    def resolve(
+        self, is_phone: bool, organization: Optional[OrganizationContext] = None
+    ) -> AudioProfile:
+        """Profile for a call from the participant kind and organization"""
+        kind = PHONE if is_phone else WEB
+        name = kind
+        override = None
+        if organization:
+            override = organization.custom_settings.get("audio_profile")
+        if isinstance(override, dict):
+            name = override.get(kind, kind)
+        elif override:
+            name = override
+
+        profile = self.profiles.get(name)
+        if profile is None:
+            logger.warning(f"Unknown audio profile {name!r}, using {kind}")
+            profile = self.profiles[kind]
+        return profile
+
+    def to_dict(self) -> dict[str, dict[str, Any]]:
+        return {name: asdict(profile) for name, profile in self.profiles.items()}
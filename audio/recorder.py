@@ -0,0 +1,373 @@
+"""Opt-in call recording to compressed audio files"""
+import asyncio
+import json
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import av
+import numpy as np
+from livekit import rtc
+
+logger = logging.getLogger(__name__)
+
+# Channel of each leg in the stereo recording
+LEGS = ("caller", "agent")
+# Container and codec per recording format
+FORMATS = {"ogg": ("ogg", "opus"), "flac": ("flac", "flac")}
+
+
+class _Timeline:
+    """
+    Lays out each leg's frames on a shared clock and mixes them to stereo
+
+    A frame is placed where its arrival time says it ended, so silence
+    between utterances (when a track sends nothing) stays in the
+    recording. Frames arriving within ``jitter`` of the end of their
+    leg's audio are appended, which absorbs delivery jitter.
+    """
+
+    def __init__(self, sample_rate: int, start: float, jitter: float = 0.1):
+        self.sample_rate = sample_rate
+        self.start = start
+        self.jitter = int(jitter * sample_rate)
+        self.emitted = 0
+        self._pending: list[list[np.ndarray]] = [[] for _ in LEGS]
+        self._ends = [0] * len(LEGS)
+
+    @property
+    def end(self) -> int:
+        """Sample index where the latest leg's audio ends"""
+        return max(self._ends)
+
+    def add(self, channel: int, arrival: float, samples: np.ndarray):
+        begin = round((arrival - self.start) * self.sample_rate) - len(samples)
+        # Audio that would land before the last take is appended after it
+        end = max(self._ends[channel], self.emitted)
+        if begin > end + self.jitter:
+            self._pending[channel].append(np.zeros(begin - end, dtype=np.int16))
+            end = begin
+        self._pending[channel].append(samples)
+        self._ends[channel] = end + len(samples)
+
+    def take(self, upto: int) -> Optional[np.ndarray]:
+        """Interleaved stereo samples from the last take up to ``upto``"""
+        count = upto - self.emitted
+        if count <= 0:
+            return None
+        stereo = np.zeros((count, len(LEGS)), dtype=np.int16)
+        for channel, pending in enumerate(self._pending):
+            joined = np.concatenate(pending) if pending else np.zeros(0, np.int16)
+            used = min(len(joined), count)
+            stereo[:used, channel] = joined[:used]
+            self._pending[channel] = [joined[used:]] if used < len(joined) else []
+        self.emitted = upto
+        return stereo
+
+
+class _ChunkSink:
+    """File object for the muxer that hands off output in large chunks"""
+
+    def __init__(self, chunk_bytes: int, emit: Callable[[bytes], None]):
+        self.chunk_bytes = chunk_bytes
+        self._emit = emit
+        self._buffer = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_bytes:
+            self.flush()
+        return len(data)
+
+    def flush(self):
+        if self._buffer:
+            self._emit(bytes(self._buffer))
+            self._buffer.clear()
+
+
+class CallRecorder:
+    """
+    Records a call's two legs to one stereo file, caller left, agent right
+
+    The real-time side only calls push_frame(), which timestamps the frame
+    and puts it on a bounded queue without waiting: when the queue is
+    full the frame is dropped and counted. A worker thread resamples,
+    mixes and encodes the frames (Opus in OGG, or FLAC) and hands the
+    output to an asyncio task in chunks of ``chunk_bytes``, which writes
+    them to disk in a thread. At most ``max_pending_chunks`` chunks wait
+    for the disk; beyond that the encoder stalls, then the frame queue
+    fills and frames are dropped, so a slow disk costs recording quality
+    and never call audio. A failed write ends the recording: the rest of
+    the output is discarded and aclose() reports the error.
+
+    Usage::
+
+        recorder = CallRecorder("data/recordings/conv.ogg")
+        await recorder.start()
+        recorder.attach(ctx.room, participant)
+        ...
+        await recorder.aclose()
+    """
+
+    def __init__(
+        self,
+        path: str,
+        format: str = "ogg",
+        sample_rate: int = 16000,
+        chunk_bytes: int = 256 * 1024,
+        max_pending_frames: int = 2000,
+        max_pending_chunks: int = 8,
+        flush_delay: float = 0.5,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if format not in FORMATS:
+            raise ValueError(f"Unknown recording format {format!r}")
+        self.path = Path(path)
+        self.format = format
+        self.sample_rate = sample_rate
+        self.chunk_bytes = chunk_bytes
+        self.max_pending_chunks = max_pending_chunks
+        # Audio younger than this waits for late frames of the other leg
+        self.flush_delay = flush_delay
+        self._clock = clock
+        self._frames: queue.Queue = queue.Queue(maxsize=max_pending_frames)
+        self._chunks: Optional[asyncio.Queue] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._encoder: Optional[threading.Thread] = None
+        self._encoded: Optional[asyncio.Future] = None
+        self._writer: Optional[asyncio.Task] = None
+        self._streams: list[asyncio.Task] = []
+        self._recording = False
+        self._write_failed = False
+        self.frames = 0
+        self.dropped_frames = 0
+        self.bytes_written = 0
+        self.duration = 0.0
+        self.encode_seconds = 0.0
+        self.error: Optional[BaseException] = None
+
+    @property
+    def recording(self) -> bool:
+        return self._recording
+
+    async def start(self):
+        """Open the file and start the encoder thread and writer task"""
+        self._loop = asyncio.get_running_loop()
+        self._chunks = asyncio.Queue(maxsize=self.max_pending_chunks)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file = await asyncio.to_thread(open, self.path, "wb")
+        self._writer = asyncio.create_task(self._write_chunks(file))
+        self._encoded = self._loop.create_future()
+        self._encoder = threading.Thread(
+            target=self._encode, args=(self._clock(),), daemon=True
+        )
+        self._recording = True
+        self._encoder.start()
+
+    def push_frame(self, leg: str, frame: rtc.AudioFrame):
+        """Queue a leg's frame for recording; never blocks"""
+        if not self._recording:
+            return
+        try:
+            self._frames.put_nowait((LEGS.index(leg), self._clock(), frame))
+        except queue.Full:
+            self.dropped_frames += 1
+        else:
+            self.frames += 1
+
+    def record_track(self, leg: str, track: rtc.Track):
+        """Record an audio track as one leg until aclose()"""
+
+        async def forward():
+            stream = rtc.AudioStream(
+                track, sample_rate=self.sample_rate, num_channels=1
+            )
+            try:
+                async for event in stream:
+                    self.push_frame(leg, event.frame)
+            finally:
+                await stream.aclose()
+
+        self._streams.append(asyncio.create_task(forward()))
+
+    def attach(self, room: rtc.Room, participant: rtc.RemoteParticipant):
+        """
+        Record the participant's audio as the caller leg and the audio the
+        agent publishes as the agent leg, including tracks already there
+        """
+
+        @room.on("track_subscribed")
+        def on_track_subscribed(track, publication, remote):
+            if (
+                self._recording
+                and track.kind == rtc.TrackKind.KIND_AUDIO
+                and remote.identity == participant.identity
+            ):
+                self.record_track("caller", track)
+
+        @room.on("local_track_published")
+        def on_local_track_published(publication, track):
+            if self._recording and track.kind == rtc.TrackKind.KIND_AUDIO:
+                self.record_track("agent", track)
+
+        for publication in participant.track_publications.values():
+            if publication.track and publication.kind == rtc.TrackKind.KIND_AUDIO:
+                self.record_track("caller", publication.track)
+
+    def _encode(self, start: float):
+        """Encoder thread: mix, encode and hand chunks to the writer"""
+        try:
+            self._encode_frames(start)
+        except BaseException as e:
+            self.error = e
+            self._recording = False
+            logger.error(f"Recording to {self.path} failed: {e}")
+        finally:
+            self._emit(None)
+            self._loop.call_soon_threadsafe(self._encoded.set_result, None)
+
+    def _encode_frames(self, start: float):
+        container_format, codec = FORMATS[self.format]
+        sink = _ChunkSink(self.chunk_bytes, self._emit)
+        container = av.open(sink, mode="w", format=container_format)
+        stream = container.add_stream(codec, rate=self.sample_rate, layout="stereo")
+        timeline = _Timeline(self.sample_rate, start)
+        resamplers: dict[tuple[int, int], rtc.AudioResampler] = {}
+
+        def encode(upto: int):
+            stereo = timeline.take(upto)
+            if stereo is None:
+                return
+            frame = av.AudioFrame.from_ndarray(
+                stereo.reshape(1, -1), format="s16", layout="stereo"
+            )
+            frame.sample_rate = self.sample_rate
+            for packet in stream.encode(frame):
+                container.mux(packet)
+
+        while True:
+            try:
+                item = self._frames.get(timeout=self.flush_delay)
+            except queue.Empty:
+                item = ()
+            if item is None:
+                break
+            began = time.process_time()
+            if item:
+                channel, arrival, frame = item
+                for mono in self._mono(channel, frame, resamplers):
+                    timeline.add(channel, arrival, mono)
+            horizon = (self._clock() - start - self.flush_delay) * self.sample_rate
+            encode(min(int(horizon), timeline.end))
+            self.encode_seconds += time.process_time() - began
+
+        encode(timeline.end)
+        for packet in stream.encode(None):
+            container.mux(packet)
+        container.close()
+        sink.flush()
+        self.duration = timeline.emitted / self.sample_rate
+
+    def _mono(
+        self,
+        channel: int,
+        frame: rtc.AudioFrame,
+        resamplers: dict[tuple[int, int], rtc.AudioResampler],
+    ) -> list[np.ndarray]:
+        """A frame's samples as mono int16 at the recording's sample rate"""
+        if frame.sample_rate != self.sample_rate:
+            key = (channel, frame.sample_rate)
+            if key not in resamplers:
+                resamplers[key] = rtc.AudioResampler(
+                    frame.sample_rate, self.sample_rate, num_channels=1
+                )
+            frames = resamplers[key].push(_downmix(frame))
+        else:
+            frames = [_downmix(frame)]
+        return [np.frombuffer(f.data, dtype=np.int16) for f in frames]
+
+    def _emit(self, chunk: Optional[bytes]):
+        """Hand a chunk to the writer, waiting while too many are pending"""
+        if chunk is not None and self._write_failed:
+            return
+        asyncio.run_coroutine_threadsafe(self._chunks.put(chunk), self._loop).result()
+
+    async def _write_chunks(self, file):
+        """Write chunks until the end marker, draining the queue after a failure"""
+        while (chunk := await self._chunks.get()) is not None:
+            if self._write_failed:
+                continue
+            try:
+                await asyncio.to_thread(self._write, file, chunk)
+            except Exception as e:
+                self._fail_writes(e)
+            else:
+                self.bytes_written += len(chunk)
+        try:
+            await asyncio.to_thread(file.close)
+        except Exception as e:
+            self._fail_writes(e)
+
+    def _fail_writes(self, error: Exception):
+        if self._write_failed:
+            return
+        self._write_failed = True
+        self._recording = False
+        self.error = self.error or error
+        logger.error(f"Writing recording {self.path} failed: {error}")
+
+    def _write(self, file, chunk: bytes):
+        file.write(chunk)
+
+    async def aclose(self) -> dict[str, Any]:
+        """
+        Stop recording, finish the file and return its stats
+
+        Does not raise when recording failed; the stats carry the error.
+        """
+        if self._encoder is None:
+            return self.stats()
+        self._recording = False
+        for task in self._streams:
+            task.cancel()
+        await asyncio.gather(*self._streams, return_exceptions=True)
+        # The encoder may be stalled on a full chunk queue; never block the loop
+        await asyncio.to_thread(self._stop_encoder)
+        await self._encoded
+        await self._writer
+        self._encoder = None
+        logger.info(f"call_recording {json.dumps(self.stats())}")
+        return self.stats()
+
+    def _stop_encoder(self):
+        while self._encoder.is_alive():
+            try:
+                self._frames.put(None, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "path": str(self.path),
+            "format": self.format,
+            "duration_s": round(self.duration, 2),
+            "bytes": self.bytes_written,
+            "frames": self.frames,
+            "dropped_frames": self.dropped_frames,
+            "encode_ms": round(self.encode_seconds * 1000, 1),
+            "error": str(self.error) if self.error else None,
+        }
+
+
+def _downmix(frame: rtc.AudioFrame) -> rtc.AudioFrame:
+    if frame.num_channels == 1:
+        return frame
+    samples = np.frombuffer(frame.data, dtype=np.int16).reshape(
+        -1, frame.num_channels
+    )
+    mono = samples.mean(axis=1).astype(np.int16)
+    return rtc.AudioFrame(mono.tobytes(), frame.sample_rate, 1, len(mono))
@@ -0,0 +1,370 @@
+"""Content-addressed on-disk cache of synthesized speech"""
+import asyncio
+import hashlib
+import logging
+import os
+import re
+import struct
+import threading
+import time
+import unicodedata
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from livekit import rtc
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TA"
+VERSION = 2
+
+# Magic, version, channels, sample rate, PCM length
+_HEADER = struct.Struct("!2sBBII")
+_SUFFIX = ".pcm"
+_TMP_SUFFIX = ".tmp"
+# Temp files older than this were left by a crashed writer
+_STALE_TMP_SECONDS = 300
+_FRAMES_PER_SECOND = 50  # 20ms playback frames
+_BYTES_PER_SAMPLE = 2  # int16 PCM
+
+
+def normalize_text(text: str) -> str:
+    """Normalize utterance text so trivially different strings share audio"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def cache_key(provider: str, model: str, voice: str, text: str) -> str:
+    """Key for one utterance spoken by one TTS voice"""
+    identity = "\x1f".join((provider, model, voice, normalize_text(text)))
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedAudio:
+    """Synthesized speech as one contiguous int16 PCM buffer"""
+
+    sample_rate: int
+    num_channels: int
+    pcm: bytes
+
+    @property
+    def duration(self) -> float:
+        """Length in seconds"""
+        samples = len(self.pcm) // (_BYTES_PER_SAMPLE * self.num_channels)
+        return samples / self.sample_rate
+
+    @classmethod
+    def from_frames(cls, frames: list[rtc.AudioFrame]) -> "CachedAudio":
+        """Join frames (all with the same format) into one buffer"""
+        first = frames[0]
+        return cls(
+            sample_rate=first.sample_rate,
+            num_channels=first.num_channels,
+            pcm=b"".join(bytes(frame.data) for frame in frames),
+        )
+
+    def encode(self) -> bytes:
+        header = _HEADER.pack(
+            MAGIC, VERSION, self.num_channels, self.sample_rate, len(self.pcm)
+        )
+        return header + self.pcm
+
+    @classmethod
+    def decode(cls, data: bytes) -> "CachedAudio":
+        """
+        Decode a cache file
+
+        Raises:
+            ValueError: If the data is not a complete cache file of a known
+                version
+        """
+        if len(data) < _HEADER.size:
+            raise ValueError("Cached audio is truncated")
+        magic, version, num_channels, sample_rate, length = _HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a cached audio file")
+        if len(data) - _HEADER.size != length:
+            raise ValueError("Cached audio is truncated")
+        return cls(sample_rate, num_channels, data[_HEADER.size :])
+
+    async def frames(self) -> AsyncIterator[rtc.AudioFrame]:
+        """Play back as 20ms frames"""
+        samples = self.sample_rate // _FRAMES_PER_SECOND
+        frame_bytes = self.num_channels * _BYTES_PER_SAMPLE
+        step = samples * frame_bytes
+        view = memoryview(self.pcm)
+        for offset in range(0, len(view), step):
+            chunk = view[offset : offset + step]
+            yield rtc.AudioFrame(
+                data=chunk,
+                sample_rate=self.sample_rate,
+                num_channels=self.num_channels,
+                samples_per_channel=len(chunk) // frame_bytes,
+            )
+
+
+class TTSAudioCache:
+    """
+    Synthesized utterances on disk, keyed by voice and normalized text
+
+    Files are evicted least recently used first once the directory grows
+    past ``max_bytes``; recency is the file's mtime, which is bumped on
+    every disk hit so it survives restarts. The ``memory_entries`` most
+    recently used entries are also kept decoded in memory, and preload()
+    fills them at process start.
+
+    Several processes can share a directory: entries are written to a
+    temp file and renamed into place, so readers never see a partial
+    file, a miss in this process's index still looks on disk, and each
+    write enforces ``max_bytes`` over the whole directory.
+
+    Disk reads and writes run in a thread. When jobs run as threads, one
+    instance serves every job's event loop: the index and the in-memory
+    entries are guarded by a lock, and background writes are tracked per
+    loop, so flush() waits for those of the calling job.
+    """
+
+    def __init__(
+        self,
+        directory: str = "data/tts_cache",
+        max_bytes: int = 64 * 2**20,
+        memory_entries: int = 32,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.memory_entries = memory_entries
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._memory: OrderedDict[str, CachedAudio] = OrderedDict()
+        self._pending: set[str] = set()
+        self._writes: dict[asyncio.AbstractEventLoop, set[asyncio.Task]] = {}
+        self.hits = 0
+        self.misses = 0
+
+        # Disk index in LRU order (oldest first)
+        self._sizes: OrderedDict[str, int] = OrderedDict()
+        self._index(_scan(self.directory))
+        stale = time.time() - _STALE_TMP_SECONDS
+        _unlink_all(
+            [
+                path
+                for path in self.directory.glob(f"*{_TMP_SUFFIX}")
+                if path.stat().st_mtime < stale
+            ]
+        )
+
+    def _index(self, files: list[tuple[int, str, int]]):
+        self._sizes = OrderedDict((key, size) for _, key, size in files)
+        self._total = sum(self._sizes.values())
+
+    @property
+    def size(self) -> int:
+        """Bytes on disk as of the last write or scan"""
+        return self._total
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._sizes or self._path(key).exists()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{_SUFFIX}"
+
+    def _remember(self, key: str, audio: CachedAudio):
+        # Callers hold _lock
+        self._memory[key] = audio
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def preload(self, limit: Optional[int] = None) -> int:
+        """
+        Load the most recently used entries into memory (blocking)
+
+        Returns:
+            Number of entries loaded
+        """
+        limit = self.memory_entries if limit is None else limit
+        with self._lock:
+            keys = list(self._sizes)[-limit:] if limit > 0 else []
+        loaded = 0
+        for key in keys:
+            try:
+                audio = CachedAudio.decode(self._path(key).read_bytes())
+            except (OSError, ValueError) as e:
+                logger.warning(f"Skipping unreadable cached audio {key}: {e}")
+                continue
+            with self._lock:
+                self._remember(key, audio)
+            loaded += 1
+        return loaded
+
+    async def get(self, key: str) -> Optional[CachedAudio]:
+        """Get an entry from memory or disk, marking it recently used"""
+        with self._lock:
+            audio = self._memory.get(key)
+            if audio is not None:
+                self._memory.move_to_end(key)
+                if key in self._sizes:
+                    self._sizes.move_to_end(key)
+                return audio
+
+        # Not indexed may still mean written by another process
+        try:
+            audio = await asyncio.to_thread(self._read, key)
+        except FileNotFoundError:
+            self._forget(key)
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Dropping unreadable cached audio {key}: {e}")
+            self._forget(key)
+            await asyncio.to_thread(_unlink_all, [self._path(key)])
+            return None
+        with self._lock:
+            self._remember(key, audio)
+            if key not in self._sizes:
+                self._sizes[key] = _HEADER.size + len(audio.pcm)
+                self._total += self._sizes[key]
+            self._sizes.move_to_end(key)
+        return audio
+
+    def _read(self, key: str) -> CachedAudio:
+        path = self._path(key)
+        audio = CachedAudio.decode(path.read_bytes())
+        os.utime(path)
+        return audio
+
+    async def put(self, key: str, audio: CachedAudio):
+        """Write an entry and evict the least recently used past max_bytes"""
+        data = audio.encode()
+        if len(data) > self.max_bytes:
+            return
+        # Entries held in memory count as most recently used, as their hits
+        # do not touch the file; ties in mtime go by this process's order
+        with self._lock:
+            order = [k for k in self._sizes if k != key]
+            order += [k for k in self._memory if k != key] + [key]
+            in_memory = set(self._memory) | {key}
+        rank = {k: i for i, k in enumerate(order)}
+        files = await asyncio.to_thread(
+            self._write_and_evict, key, data, rank, in_memory
+        )
+        with self._lock:
+            self._remember(key, audio)
+            self._index(files)
+            for evicted in set(self._memory) - set(self._sizes):
+                self._memory.pop(evicted)
+
+    def _write_and_evict(
+        self, key: str, data: bytes, rank: dict[str, int], in_memory: set[str]
+    ) -> list[tuple[int, str, int]]:
+        """
+        Atomically write one file, then trim the directory to max_bytes
+
+        Returns:
+            The remaining files as (mtime_ns, key, size), least recently
+            used first
+        """
+        path = self._path(key)
+        tmp = path.with_name(f"{key}.{uuid.uuid4().hex}{_TMP_SUFFIX}")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+        files = _scan(self.directory)
+        files.sort(key=lambda f: (f[1] in in_memory, f[0], rank.get(f[1], -1)))
+        total = sum(size for _, _, size in files)
+        evicted = []
+        while total > self.max_bytes and len(files) > 1:
+            _, old_key, size = files.pop(0)
+            total -= size
+            evicted.append(self._path(old_key))
+        _unlink_all(evicted)
+        return files
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._total -= self._sizes.pop(key, 0)
+            self._memory.pop(key, None)
+
+    async def speak(self, key: str, text: str, tts) -> AsyncIterator[rtc.AudioFrame]:
+        """
+        Audio frames for an utterance, from the cache or from ``tts``
+
+        On a miss the TTS frames are passed through as they arrive and,
+        once synthesis completes, written to the cache in a background
+        task. Interrupted synthesis is not cached.
+        """
+        audio = await self.get(key)
+        with self._lock:
+            if audio is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        if audio is not None:
+            async for frame in audio.frames():
+                yield frame
+            return
+
+        frames = []
+        async with tts.synthesize(text) as stream:
+            async for event in stream:
+                frames.append(event.frame)
+                yield event.frame
+
+        if not frames:
+            return
+        with self._lock:
+            if key in self._pending:
+                return
+            self._pending.add(key)
+        loop = asyncio.get_running_loop()
+        task = loop.create_task(self.put(key, CachedAudio.from_frames(frames)))
+        with self._lock:
+            self._writes.setdefault(loop, set()).add(task)
+        task.add_done_callback(lambda t: self._write_done(key, loop, t))
+
+    def _write_done(
+        self, key: str, loop: asyncio.AbstractEventLoop, task: asyncio.Task
+    ):
+        with self._lock:
+            self._pending.discard(key)
+            writes = self._writes.get(loop)
+            if writes is not None:
+                writes.discard(task)
+                if not writes:
+                    del self._writes[loop]
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to cache audio {key}: {task.exception()}")
+
+    async def flush(self):
+        """Wait for the background cache writes started on this event loop"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._lock:
+                writes = list(self._writes.get(loop, ()))
+            if not writes:
+                return
+            await asyncio.gather(*writes, return_exceptions=True)
+
+
+def _scan(directory: Path) -> list[tuple[int, str, int]]:
+    """Cache files as (mtime_ns, key, size), least recently used first"""
+    files = []
+    for path in directory.glob(f"*{_SUFFIX}"):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            # Evicted by another process meanwhile
+            continue
+        files.append((stat.st_mtime_ns, path.stem, stat.st_size))
+    return sorted(files)
+
+
+def _unlink_all(paths: list[Path]):
+    for path in paths:
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
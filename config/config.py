@@ -1,5 +1,5 @@
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
 from typing import Optional
 
 
@@ -15,12 +15,20 @@ class ModelConfig:
     # LLM Configuration
     llm_provider: str = "openai"
     llm_model: str = "gpt-4o-mini"
+    # Secondary "provider/model" descriptors slow turns are hedged to
+    llm_hedge_models: list[str] = field(default_factory=list)
     
     # TTS Configuration
     tts_provider: str = "cartesia"
     tts_model: str = "sonic-2"
     tts_voice: str = "sonic-english"
     
+    # Alternative descriptors sessions may be routed to by a ProviderSelector
+    # ("provider/model" for STT and LLM, "provider/model:voice" for TTS)
+    stt_candidates: list[str] = field(default_factory=list)
+    llm_candidates: list[str] = field(default_factory=list)
+    tts_candidates: list[str] = field(default_factory=list)
+
     @classmethod
     def from_env(cls) -> "ModelConfig":
         """Create config from environment variables"""
@@ -30,9 +38,13 @@ class ModelConfig:
             stt_language=os.getenv("STT_LANGUAGE", "en"),
             llm_provider=os.getenv("LLM_PROVIDER", "openai"),
             llm_model=os.getenv("LLM_MODEL", "gpt-4o-mini"),
+            llm_hedge_models=_env_list("LLM_HEDGE_MODELS"),
             tts_provider=os.getenv("TTS_PROVIDER", "cartesia"),
             tts_model=os.getenv("TTS_MODEL", "sonic-2"),
             tts_voice=os.getenv("TTS_VOICE", "sonic-english"),
+            stt_candidates=_env_list("STT_CANDIDATES"),
+            llm_candidates=_env_list("LLM_CANDIDATES"),
+            tts_candidates=_env_list("TTS_CANDIDATES"),
         )
     
     def get_stt_descriptor(self) -> str:
@@ -43,10 +55,58 @@ class ModelConfig:
         """Get LLM model descriptor for LiveKit Inference"""
         return f"{self.llm_provider}/{self.llm_model}"
     
+    def get_llm_hedge_descriptors(self) -> list[str]:
+        """Get descriptors of the LLMs slow requests are hedged to"""
+        return list(self.llm_hedge_models)
+
     def get_tts_descriptor(self) -> str:
         """Get TTS model descriptor for LiveKit Inference"""
         return f"{self.tts_provider}/{self.tts_model}"
 
+    def get_candidates(self) -> dict[str, list[str]]:
+        """Configured models and their alternatives per kind, configured first"""
+        configured = {
+            "stt": f"{self.stt_provider}/{self.stt_model}",
+            "llm": self.get_llm_descriptor(),
+            "tts": f"{self.get_tts_descriptor()}:{self.tts_voice}",
+        }
+        extra = {
+            "stt": self.stt_candidates,
+            "llm": self.llm_candidates,
+            "tts": [_with_voice(tts) for tts in self.tts_candidates],
+        }
+        return {
+            kind: list(dict.fromkeys([configured[kind], *extra[kind]]))
+            for kind in configured
+        }
+
+    def with_providers(self, choice: dict[str, str]) -> "ModelConfig":
+        """Copy of this config using the chosen candidate of each kind"""
+        changes = {}
+        if "stt" in choice:
+            provider, model = choice["stt"].split("/", 1)
+            changes.update(stt_provider=provider, stt_model=model)
+        if "llm" in choice:
+            provider, model = choice["llm"].split("/", 1)
+            changes.update(llm_provider=provider, llm_model=model)
+        if "tts" in choice:
+            descriptor, voice = choice["tts"].split(":", 1)
+            provider, model = descriptor.split("/", 1)
+            changes.update(tts_provider=provider, tts_model=model, tts_voice=voice)
+        return replace(self, **changes)
+
+
+def _with_voice(tts: str) -> str:
+    """TTS candidate with the provider's first voice unless one is given"""
+    if ":" in tts:
+        return tts
+    return f"{tts}:{TTS_PROVIDERS[tts.split('/')[0]]['voices'][0]}"
+
+
+def _env_list(name: str) -> list[str]:
+    """Comma-separated environment variable as a list"""
+    return [item.strip() for item in os.getenv(name, "").split(",") if item.strip()]
+
 
 # Available providers
 STT_PROVIDERS = {
@@ -129,6 +189,24 @@ TTS_PROVIDERS = {
 }
 
 
+def _validate_alternatives(config: ModelConfig):
+    """Validate the providers and API keys of hedge models and candidates"""
+    alternatives = [
+        ("LLM hedge", LLM_PROVIDERS, config.llm_hedge_models),
+        ("STT candidate", STT_PROVIDERS, config.stt_candidates),
+        ("LLM candidate", LLM_PROVIDERS, config.llm_candidates),
+        ("TTS candidate", TTS_PROVIDERS, config.tts_candidates),
+    ]
+    for label, providers, descriptors in alternatives:
+        for descriptor in descriptors:
+            provider = descriptor.split("/")[0]
+            if provider not in providers:
+                raise ValueError(f"Invalid {label} provider: {descriptor}")
+            key = providers[provider]["requires_key"]
+            if not os.getenv(key):
+                raise ValueError(f"Missing required API key: {key}")
+
+
 def validate_config(config: ModelConfig) -> bool:
     """Validate that the configuration is valid"""
     
@@ -151,6 +229,8 @@ def validate_config(config: ModelConfig) -> bool:
     if not os.getenv(llm_key):
         raise ValueError(f"Missing required API key: {llm_key}")
     
+    _validate_alternatives(config)
+
     tts_key = TTS_PROVIDERS[config.tts_provider]["requires_key"]
     if not os.getenv(tts_key):
         raise ValueError(f"Missing required API key: {tts_key}")
@@ -0,0 +1,224 @@
+"""Organization registry keyed by dialed number and SIP trunk"""
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from types import MappingProxyType
+from typing import Any, Mapping, Optional
+
+from models.context import OrganizationContext
+
+logger = logging.getLogger(__name__)
+
+_ORG_FIELDS = set(OrganizationContext.model_fields)
+
+
+def normalize_number(number: str) -> str:
+    """Normalize a phone number to +digits form for lookups"""
+    digits = re.sub(r"\D", "", number)
+    return f"+{digits}" if digits else ""
+
+
+@dataclass(frozen=True)
+class OrganizationIndex:
+    """Immutable lookup tables built from one load of the source"""
+
+    by_id: Mapping[str, OrganizationContext] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    by_number: Mapping[str, OrganizationContext] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    by_trunk: Mapping[str, OrganizationContext] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    default_org_id: Optional[str] = None
+
+
+class OrganizationRegistry:
+    """
+    Resolves the organization for a call from an in-memory index
+
+    The source is a JSON file or a SQLite database with an
+    ``organizations`` table. Each load builds a new OrganizationIndex and
+    swaps it in with a single assignment, so resolve() never blocks and
+    never sees a partially loaded index.
+    """
+
+    def __init__(self, source: str = "config/organizations.json"):
+        self.source = Path(source)
+        self._index = OrganizationIndex()
+        self._mtime_ns: Optional[int] = None
+        self._fallback: Optional[OrganizationContext] = None
+        self._refresher: Optional[threading.Thread] = None
+        self._stop_refreshing = threading.Event()
+
+    @property
+    def index(self) -> OrganizationIndex:
+        """Current immutable index"""
+        return self._index
+
+    def load(self, force: bool = False) -> bool:
+        """
+        Load organizations from the source into a new index
+
+        Args:
+            force: Reload even if the source has not been modified
+
+        Returns:
+            True if a new index was installed
+        """
+        if not self.source.exists():
+            logger.warning(f"Organization source not found: {self.source}")
+            return False
+
+        mtime_ns = self.source.stat().st_mtime_ns
+        if not force and mtime_ns == self._mtime_ns:
+            return False
+
+        if self.source.suffix == ".json":
+            records, default_org_id = self._read_json()
+        else:
+            records, default_org_id = self._read_sqlite()
+
+        by_id: dict[str, OrganizationContext] = {}
+        by_number: dict[str, OrganizationContext] = {}
+        by_trunk: dict[str, OrganizationContext] = {}
+        for record in records:
+            try:
+                org = OrganizationContext(
+                    **{k: v for k, v in record.items() if k in _ORG_FIELDS}
+                )
+            except Exception as e:
+                logger.error(
+                    f"Skipping invalid organization {record.get('org_id')}: {e}"
+                )
+                continue
+
+            by_id[org.org_id] = org
+            for number in record.get("numbers") or []:
+                by_number[normalize_number(number)] = org
+            for trunk_id in record.get("trunk_ids") or []:
+                by_trunk[trunk_id] = org
+
+        self._index = OrganizationIndex(
+            by_id=MappingProxyType(by_id),
+            by_number=MappingProxyType(by_number),
+            by_trunk=MappingProxyType(by_trunk),
+            default_org_id=default_org_id,
+        )
+        self._mtime_ns = mtime_ns
+        logger.info(
+            f"Loaded {len(by_id)} organizations "
+            f"({len(by_number)} numbers, {len(by_trunk)} trunks)"
+        )
+        return True
+
+    def _read_json(self) -> tuple[list[dict[str, Any]], Optional[str]]:
+        """Read organization records from a JSON file"""
+        with open(self.source, "r") as f:
+            data = json.load(f)
+        return data.get("organizations", []), data.get("default_org_id")
+
+    def _read_sqlite(self) -> tuple[list[dict[str, Any]], Optional[str]]:
+        """Read organization records from a SQLite database"""
+        json_columns = {
+            "numbers",
+            "trunk_ids",
+            "business_hours",
+            "contact_info",
+            "custom_settings",
+            "branding",
+        }
+        conn = sqlite3.connect(f"file:{self.source}?mode=ro", uri=True)
+        conn.row_factory = sqlite3.Row
+        try:
+            rows = conn.execute("SELECT * FROM organizations").fetchall()
+        finally:
+            conn.close()
+
+        records = []
+        default_org_id = None
+        for row in rows:
+            record = {}
+            for key in row.keys():
+                value = row[key]
+                if key in json_columns and value:
+                    value = json.loads(value)
+                record[key] = value
+            if record.pop("is_default", False):
+                default_org_id = record["org_id"]
+            records.append(record)
+        return records, default_org_id
+
+    def get(self, org_id: str) -> Optional[OrganizationContext]:
+        """Get an organization by ID"""
+        return self._index.by_id.get(org_id)
+
+    def resolve(
+        self,
+        dialed_number: Optional[str] = None,
+        trunk_id: Optional[str] = None,
+        org_id: Optional[str] = None,
+    ) -> OrganizationContext:
+        """
+        Resolve the organization for a call
+
+        Looks up by explicit org ID, then dialed number, then SIP trunk,
+        then the configured default. Falls back to an organization built
+        from ORG_NAME/ORG_INDUSTRY when nothing matches.
+        """
+        index = self._index
+        org = None
+        if org_id:
+            org = index.by_id.get(org_id)
+        if org is None and dialed_number:
+            org = index.by_number.get(normalize_number(dialed_number))
+        if org is None and trunk_id:
+            org = index.by_trunk.get(trunk_id)
+        if org is None and index.default_org_id:
+            org = index.by_id.get(index.default_org_id)
+        if org is None:
+            if self._fallback is None:
+                self._fallback = OrganizationContext(
+                    org_id="default",
+                    name=os.getenv("ORG_NAME", "Your Company"),
+                    industry=os.getenv("ORG_INDUSTRY"),
+                )
+            org = self._fallback
+        return org
+
+    def start_refreshing(self, interval: float = 30.0):
+        """
+        Reload the source in a background thread when it changes
+
+        Args:
+            interval: Seconds between checks
+        """
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+
+        self._stop_refreshing.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh, args=(interval,), name="org-refresh", daemon=True
+        )
+        self._refresher.start()
+
+    def stop_refreshing(self):
+        """Stop the background refresh thread if it is running"""
+        self._stop_refreshing.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+
+    def _refresh(self, interval: float):
+        """Background refresh loop"""
+        while not self._stop_refreshing.wait(interval):
+            try:
+                self.load()
+            except Exception as e:
+                logger.error(f"Organization refresh failed: {e}")
@@ -0,0 +1,243 @@
+"""Latency-adaptive STT/LLM/TTS provider selection"""
+import json
+import logging
+import threading
+import time
+import weakref
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from livekit.agents import metrics
+
+logger = logging.getLogger(__name__)
+
+# Error event types of each kind (ErrorEvent.error.type)
+_ERROR_KINDS = {"stt_error": "stt", "llm_error": "llm", "tts_error": "tts"}
+
+
+@dataclass
+class CandidateStats:
+    """Rolling statistics and breaker state of one provider/model"""
+
+    descriptor: str
+    cost: float = 0.0
+    # Exponentially weighted moving averages
+    ttft_ms: Optional[float] = None
+    error_rate: float = 0.0
+    samples: int = 0
+    errors: int = 0
+    selected: int = 0
+    consecutive_failures: int = 0
+    open_until: float = 0.0
+
+    def is_open(self, now: float) -> bool:
+        return now < self.open_until
+
+
+class ProviderSelector:
+    """
+    Routes new sessions to the best configured candidate of each kind
+
+    Each candidate keeps an EWMA of its time to first token/byte
+    (transcription delay for STT) and of its error rate, fed from the
+    sessions it was chosen for. Its score is::
+
+        ttft_ms + error_rate * error_penalty_ms + cost * cost_weight
+
+    and select() returns the lowest-scoring candidate. Candidates without
+    samples score ``default_ttft_ms``.
+
+    Circuit breaking: ``failure_threshold`` consecutive errors open a
+    candidate's breaker for ``cooldown`` seconds, during which it is not
+    chosen. Afterwards it is half-open: it is eligible again and the
+    next error re-opens it straight away, while a success closes it.
+
+    Exploration: every ``explore_every``-th selection of a kind goes to
+    the next closed candidate in turn, so the stats of candidates that
+    are not winning stay current.
+
+    The best candidate of each kind is cached and only recomputed when a
+    sample arrives or a breaker expires, so select() is O(1). One
+    instance is shared by every session of the worker process.
+    """
+
+    def __init__(
+        self,
+        candidates: dict[str, list[str]],
+        costs: Optional[dict[str, float]] = None,
+        cost_weight: float = 0.0,
+        error_penalty_ms: float = 2000.0,
+        default_ttft_ms: float = 500.0,
+        alpha: float = 0.2,
+        failure_threshold: int = 3,
+        cooldown: float = 30.0,
+        explore_every: int = 20,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        costs = costs or {}
+        self.cost_weight = cost_weight
+        self.error_penalty_ms = error_penalty_ms
+        self.default_ttft_ms = default_ttft_ms
+        self.alpha = alpha
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.explore_every = explore_every
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._candidates: dict[str, dict[str, CandidateStats]] = {
+            kind: {d: CandidateStats(d, costs.get(d, 0.0)) for d in descriptors}
+            for kind, descriptors in candidates.items()
+            if descriptors
+        }
+        self._best: dict[str, str] = {}
+        self._recheck_at: dict[str, float] = {}
+        self._selections: dict[str, int] = {}
+        self._explore_next: dict[str, int] = {}
+        self._sessions: "weakref.WeakKeyDictionary[Any, dict[str, str]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        for kind in self._candidates:
+            self._selections[kind] = 0
+            self._explore_next[kind] = 0
+            self._rank(kind)
+
+    @property
+    def kinds(self) -> list[str]:
+        return list(self._candidates)
+
+    def score(self, stats: CandidateStats) -> float:
+        """Objective to minimize: latency, penalized errors and weighted cost"""
+        ttft = self.default_ttft_ms if stats.ttft_ms is None else stats.ttft_ms
+        return (
+            ttft
+            + stats.error_rate * self.error_penalty_ms
+            + stats.cost * self.cost_weight
+        )
+
+    def _rank(self, kind: str):
+        """Recompute the cached best candidate of a kind (caller holds the lock)"""
+        now = self._clock()
+        candidates = self._candidates[kind].values()
+        closed = [c for c in candidates if not c.is_open(now)]
+        # With every breaker open, the one closest to closing is the least bad
+        pool = closed or [min(candidates, key=lambda c: c.open_until)]
+        self._best[kind] = min(pool, key=self.score).descriptor
+        opened = [c.open_until for c in candidates if c.is_open(now)]
+        self._recheck_at[kind] = min(opened) if opened else float("inf")
+
+    def select(self, kind: str) -> str:
+        """Descriptor to use for a new session's ``kind`` (stt, llm or tts)"""
+        with self._lock:
+            if self._clock() >= self._recheck_at[kind]:
+                self._rank(kind)
+            self._selections[kind] += 1
+            choice = self._best[kind]
+            if self.explore_every and self._selections[kind] % self.explore_every == 0:
+                choice = self._explore(kind) or choice
+            self._candidates[kind][choice].selected += 1
+            return choice
+
+    def _explore(self, kind: str) -> Optional[str]:
+        now = self._clock()
+        descriptors = list(self._candidates[kind])
+        for _ in range(len(descriptors)):
+            index = self._explore_next[kind] % len(descriptors)
+            self._explore_next[kind] = index + 1
+            stats = self._candidates[kind][descriptors[index]]
+            if stats.descriptor != self._best[kind] and not stats.is_open(now):
+                return stats.descriptor
+        return None
+
+    def select_all(self) -> dict[str, str]:
+        """One descriptor per configured kind"""
+        return {kind: self.select(kind) for kind in self._candidates}
+
+    def record_latency(self, kind: str, descriptor: str, ttft_ms: float):
+        """Record a successful request's time to first token/byte"""
+        with self._lock:
+            stats = self._candidates.get(kind, {}).get(descriptor)
+            if stats is None:
+                return
+            stats.samples += 1
+            if stats.ttft_ms is None:
+                stats.ttft_ms = ttft_ms
+            else:
+                stats.ttft_ms += self.alpha * (ttft_ms - stats.ttft_ms)
+            stats.error_rate -= self.alpha * stats.error_rate
+            stats.consecutive_failures = 0
+            stats.open_until = 0.0
+            self._rank(kind)
+
+    def record_error(self, kind: str, descriptor: str):
+        """Record a failed request; trips the breaker after repeated failures"""
+        with self._lock:
+            stats = self._candidates.get(kind, {}).get(descriptor)
+            if stats is None:
+                return
+            now = self._clock()
+            half_open = stats.open_until > 0 and not stats.is_open(now)
+            stats.errors += 1
+            stats.error_rate += self.alpha * (1.0 - stats.error_rate)
+            stats.consecutive_failures += 1
+            if stats.consecutive_failures >= self.failure_threshold or half_open:
+                if not stats.is_open(now):
+                    logger.warning(
+                        f"Opening circuit for {kind} {descriptor} "
+                        f"for {self.cooldown:.0f}s"
+                    )
+                stats.open_until = now + self.cooldown
+            self._rank(kind)
+
+    def attach(self, session, choice: dict[str, str]):
+        """Feed a session's metrics and errors back into its chosen candidates"""
+        self._sessions[session] = dict(choice)
+
+        def on_metrics(event):
+            m = event.metrics
+            if isinstance(m, metrics.LLMMetrics) and "llm" in choice:
+                if not m.cancelled and m.ttft >= 0:
+                    self.record_latency("llm", choice["llm"], m.ttft * 1000)
+            elif isinstance(m, metrics.TTSMetrics) and "tts" in choice:
+                if not m.cancelled and m.ttfb >= 0:
+                    self.record_latency("tts", choice["tts"], m.ttfb * 1000)
+            elif isinstance(m, metrics.EOUMetrics) and "stt" in choice:
+                self.record_latency("stt", choice["stt"], m.transcription_delay * 1000)
+
+        def on_error(event):
+            kind = _ERROR_KINDS.get(getattr(event.error, "type", None))
+            if kind in choice:
+                self.record_error(kind, choice[kind])
+
+        session.on("metrics_collected", on_metrics)
+        session.on("error", on_error)
+
+    def providers_for(self, session) -> dict[str, str]:
+        """Descriptors chosen for a session attached with attach()"""
+        return dict(self._sessions.get(session, {}))
+
+    def stats(self) -> dict[str, Any]:
+        """Score, latency, error rate, breaker state and selections per candidate"""
+        with self._lock:
+            now = self._clock()
+            return {
+                kind: {
+                    "best": self._best[kind],
+                    "candidates": {
+                        d: {
+                            "score": round(self.score(s), 1),
+                            "ttft_ms": s.ttft_ms and round(s.ttft_ms, 1),
+                            "error_rate": round(s.error_rate, 4),
+                            "samples": s.samples,
+                            "errors": s.errors,
+                            "selected": s.selected,
+                            "open": s.is_open(now),
+                        }
+                        for d, s in candidates.items()
+                    },
+                }
+                for kind, candidates in self._candidates.items()
+            }
+
+    def log_stats(self):
+        """Log the current stats as a single structured line"""
+        logger.info(f"provider_selector {json.dumps(self.stats())}")
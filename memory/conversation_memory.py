@@ -4,7 +4,8 @@ from datetime import datetime
 from typing import Any, Optional
 from uuid import uuid4
 
-from models.context import ConversationContext, UserContext
+from models.context import AgentContext, ConversationContext, UserContext
+from models.snapshot import SnapshotError, decode_snapshot, encode_snapshot
 from memory.storage import MemoryStorage
 
 logger = logging.getLogger(__name__)
@@ -24,10 +25,11 @@ class ConversationMemory:
 
         await self.storage.save_conversation(conversation_id, user.user_id, metadata)
 
-        context = ConversationContext(
+        context = ConversationContext.new(
             conversation_id=conversation_id,
             user_id=user.user_id,
-            metadata=metadata or {},
+            start_time=datetime.utcnow(),
+            metadata=metadata,
         )
 
         logger.info(f"Created conversation {conversation_id} for user {user.user_id}")
@@ -84,4 +86,31 @@ class ConversationMemory:
     async def update_user_profile(self, user_id: str, profile_data: dict[str, Any]):
         """Update user profile"""
         await self.storage.save_user_profile(user_id, profile_data)
-        logger.info(f"Updated profile for user {user_id}")
\ No newline at end of file
+        logger.info(f"Updated profile for user {user_id}")
+
+    async def save_context(self, context: AgentContext, room: Optional[str] = None):
+        """Store a snapshot of the agent context alongside its conversation"""
+        await self.storage.save_context_snapshot(
+            context.conversation.conversation_id, encode_snapshot(context), room
+        )
+
+    async def restore_context(
+        self,
+        conversation_id: Optional[str] = None,
+        room: Optional[str] = None,
+        max_age: Optional[float] = None,
+    ) -> Optional[AgentContext]:
+        """Restore an agent context from its snapshot in a single lookup"""
+        data = await self.storage.get_context_snapshot(conversation_id, room, max_age)
+        if data is None:
+            return None
+
+        try:
+            return decode_snapshot(data)
+        except SnapshotError as e:
+            logger.warning(f"Ignoring unreadable context snapshot: {e}")
+            return None
+
+    async def discard_context(self, conversation_id: str):
+        """Delete a finished conversation's snapshot so nothing resumes it"""
+        await self.storage.delete_context_snapshot(conversation_id)
@@ -1,7 +1,7 @@
 """Persistent storage for conversation memory"""
 import json
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Any, Optional
 
@@ -9,6 +9,39 @@ import aiosqlite
 
 logger = logging.getLogger(__name__)
 
+_TURN_LATENCIES = (
+    "transcription_ms",
+    "end_of_utterance_ms",
+    "llm_ttft_ms",
+    "tts_ttfb_ms",
+    "total_ms",
+    "playout_ms",
+)
+_TURN_COLUMNS = (
+    "conversation_id",
+    "org_id",
+    "speech_id",
+    "started_at",
+    "stt_provider",
+    "llm_provider",
+    "tts_provider",
+    *_TURN_LATENCIES,
+    "cancelled",
+)
+_TURN_GROUPS = {
+    "stt_provider": "stt_provider",
+    "llm_provider": "llm_provider",
+    "tts_provider": "tts_provider",
+    "org_id": "org_id",
+    "hour": "substr(started_at, 1, 13)",
+}
+
+
+def _nearest_rank(ordered: list[float], percentile: float) -> float:
+    """Nearest-rank percentile of an ascending list"""
+    rank = max(int(-(-len(ordered) * percentile // 100)), 1)
+    return ordered[rank - 1]
+
 
 class MemoryStorage:
     """SQLite-based storage for conversation memory"""
@@ -16,6 +49,7 @@ class MemoryStorage:
     def __init__(self, db_path: str = "data/memory.db"):
         self.db_path = db_path
         self._connection = None  # Keep connection alive for :memory:
+        self._initialized = False
         
         # Create directory for file-based DB
         if db_path != ":memory:":
@@ -33,7 +67,9 @@ class MemoryStorage:
             return await aiosqlite.connect(self.db_path)
 
     async def initialize(self):
-        """Initialize database tables"""
+        """Initialize database tables (once per instance)"""
+        if self._initialized:
+            return
         conn = await self._get_connection()
         
         # Conversations table
@@ -79,6 +115,55 @@ class MemoryStorage:
             """
         )
 
+        # Agent context snapshots for resuming a call on another worker
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS context_snapshots (
+                conversation_id TEXT PRIMARY KEY,
+                room TEXT,
+                snapshot BLOB NOT NULL,
+                updated_at TEXT NOT NULL,
+                FOREIGN KEY (conversation_id) REFERENCES conversations(conversation_id)
+            )
+            """
+        )
+        await conn.execute(
+            """
+            CREATE UNIQUE INDEX IF NOT EXISTS idx_context_snapshots_room
+            ON context_snapshots(room)
+            """
+        )
+
+        # Per-turn latency breakdowns (milliseconds from end of user speech)
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS turn_metrics (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                conversation_id TEXT NOT NULL,
+                org_id TEXT,
+                speech_id TEXT NOT NULL,
+                started_at TEXT NOT NULL,
+                stt_provider TEXT,
+                llm_provider TEXT,
+                tts_provider TEXT,
+                transcription_ms REAL,
+                end_of_utterance_ms REAL,
+                llm_ttft_ms REAL,
+                tts_ttfb_ms REAL,
+                total_ms REAL,
+                playout_ms REAL,
+                cancelled INTEGER NOT NULL DEFAULT 0,
+                FOREIGN KEY (conversation_id) REFERENCES conversations(conversation_id)
+            )
+            """
+        )
+        await conn.execute(
+            """
+            CREATE INDEX IF NOT EXISTS idx_turn_metrics_started_at
+            ON turn_metrics(started_at)
+            """
+        )
+
         await conn.commit()
         
         # Verify tables were created
@@ -91,6 +176,7 @@ class MemoryStorage:
         # Close connection if not in-memory
         if self.db_path != ":memory:":
             await conn.close()
+        self._initialized = True
 
     async def save_conversation(
         self, conversation_id: str, user_id: str, metadata: Optional[dict[str, Any]] = None
@@ -116,6 +202,30 @@ class MemoryStorage:
         if self.db_path != ":memory:":
             await conn.close()
 
+    async def update_conversation_metadata(
+        self, conversation_id: str, updates: dict[str, Any]
+    ):
+        """Merge keys into a conversation's metadata"""
+        conn = await self._get_connection()
+
+        async with conn.execute(
+            "SELECT metadata FROM conversations WHERE conversation_id = ?",
+            (conversation_id,),
+        ) as cursor:
+            row = await cursor.fetchone()
+
+        if row is not None:
+            metadata = json.loads(row[0]) if row[0] else {}
+            metadata.update(updates)
+            await conn.execute(
+                "UPDATE conversations SET metadata = ? WHERE conversation_id = ?",
+                (json.dumps(metadata), conversation_id),
+            )
+            await conn.commit()
+
+        if self.db_path != ":memory:":
+            await conn.close()
+
     async def save_message(
         self,
         conversation_id: str,
@@ -295,12 +405,164 @@ class MemoryStorage:
         
         return result
 
+    async def save_context_snapshot(
+        self, conversation_id: str, snapshot: bytes, room: Optional[str] = None
+    ):
+        """Save or replace the context snapshot for a conversation"""
+        conn = await self._get_connection()
+
+        if room is not None:
+            # A room only ever resumes its latest conversation
+            await conn.execute(
+                "DELETE FROM context_snapshots WHERE room = ? AND conversation_id != ?",
+                (room, conversation_id),
+            )
+        await conn.execute(
+            """
+            INSERT OR REPLACE INTO context_snapshots
+            (conversation_id, room, snapshot, updated_at)
+            VALUES (?, ?, ?, ?)
+            """,
+            (conversation_id, room, snapshot, datetime.utcnow().isoformat()),
+        )
+        await conn.commit()
+
+        if self.db_path != ":memory:":
+            await conn.close()
+
+    async def get_context_snapshot(
+        self,
+        conversation_id: Optional[str] = None,
+        room: Optional[str] = None,
+        max_age: Optional[float] = None,
+    ) -> Optional[bytes]:
+        """
+        Get the context snapshot for a conversation or room
+
+        Args:
+            max_age: Ignore snapshots last saved more than this many seconds ago
+        """
+        if conversation_id is None and room is None:
+            raise ValueError("conversation_id or room is required")
+
+        conn = await self._get_connection()
+
+        if conversation_id is not None:
+            query = "SELECT snapshot FROM context_snapshots WHERE conversation_id = ?"
+            params = [conversation_id]
+        else:
+            query = "SELECT snapshot FROM context_snapshots WHERE room = ?"
+            params = [room]
+        if max_age is not None:
+            query += " AND updated_at >= ?"
+            cutoff = datetime.utcnow() - timedelta(seconds=max_age)
+            params.append(cutoff.isoformat())
+
+        async with conn.execute(query, params) as cursor:
+            row = await cursor.fetchone()
+
+        if self.db_path != ":memory:":
+            await conn.close()
+
+        return row[0] if row else None
+
+    async def delete_context_snapshot(self, conversation_id: str):
+        """Delete a conversation's context snapshot, if any"""
+        conn = await self._get_connection()
+
+        await conn.execute(
+            "DELETE FROM context_snapshots WHERE conversation_id = ?",
+            (conversation_id,),
+        )
+        await conn.commit()
+
+        if self.db_path != ":memory:":
+            await conn.close()
+
+    async def save_turn_metrics(self, turns: list[dict[str, Any]]):
+        """Insert a batch of per-turn latency rows in one transaction"""
+        if not turns:
+            return
+        conn = await self._get_connection()
+
+        await conn.executemany(
+            f"""
+            INSERT INTO turn_metrics ({", ".join(_TURN_COLUMNS)})
+            VALUES ({", ".join("?" for _ in _TURN_COLUMNS)})
+            """,
+            [tuple(turn.get(column) for column in _TURN_COLUMNS) for turn in turns],
+        )
+        await conn.commit()
+
+        if self.db_path != ":memory:":
+            await conn.close()
+
+    async def get_turn_latency_rollup(
+        self,
+        group_by: str = "llm_provider",
+        metric: str = "total_ms",
+        since: Optional[str] = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Percentiles of a turn latency metric per group
+
+        Args:
+            group_by: stt_provider, llm_provider, tts_provider, org_id or hour
+            metric: Latency column, e.g. total_ms, llm_ttft_ms or tts_ttfb_ms
+            since: Only include turns started at or after this ISO timestamp
+
+        Returns:
+            One row per group with count, mean, p50, p95 and p99, ordered by group
+        """
+        if group_by not in _TURN_GROUPS:
+            raise ValueError(f"Cannot group turn metrics by {group_by!r}")
+        if metric not in _TURN_LATENCIES:
+            raise ValueError(f"Unknown turn latency metric {metric!r}")
+
+        conn = await self._get_connection()
+        query = (
+            f"SELECT {_TURN_GROUPS[group_by]}, {metric} FROM turn_metrics "
+            f"WHERE {metric} IS NOT NULL AND cancelled = 0"
+        )
+        params: tuple = ()
+        if since is not None:
+            query += " AND started_at >= ?"
+            params = (since,)
+        query += f" ORDER BY 1, {metric}"
+
+        async with conn.execute(query, params) as cursor:
+            rows = await cursor.fetchall()
+
+        if self.db_path != ":memory:":
+            await conn.close()
+
+        groups: dict[Any, list[float]] = {}
+        for group, value in rows:
+            groups.setdefault(group, []).append(value)
+        return [
+            {
+                group_by: group,
+                "count": len(values),
+                "mean": round(sum(values) / len(values), 2),
+                "p50": _nearest_rank(values, 50),
+                "p95": _nearest_rank(values, 95),
+                "p99": _nearest_rank(values, 99),
+            }
+            for group, values in groups.items()
+        ]
+
     async def verify_tables(self) -> dict[str, bool]:
         """Verify all required tables exist"""
         conn = await self._get_connection()
         
         tables = {}
-        for table_name in ["conversations", "messages", "user_profiles"]:
+        for table_name in [
+            "conversations",
+            "messages",
+            "user_profiles",
+            "context_snapshots",
+            "turn_metrics",
+        ]:
             async with conn.execute(
                 "SELECT name FROM sqlite_master WHERE type='table' AND name=?",
                 (table_name,)
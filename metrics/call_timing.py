@@ -0,0 +1,165 @@
+"""Per-phase call setup timing"""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Iterable, Optional
+
+from metrics.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+_NOOP_SPAN = nullcontext()
+HISTOGRAMS_EVENT = "call_setup_histograms"
+_decoder = json.JSONDecoder()
+
+
+class SetupMetrics:
+    """
+    Latency histograms for each call setup phase, over the calls of a process
+
+    Jobs run in a process each, so every job records into its own
+    instance; when cross-call state makes them run as threads (see
+    agent.worker_load.job_executor_type) they share one, so recording and
+    reporting are locked. Besides readable summaries, each report logs
+    the values recorded since the previous one as mergeable histograms
+    (``call_setup_histograms``): merge_logged() adds up those lines from
+    every job into worker- or fleet-wide percentiles.
+    """
+
+    def __init__(self):
+        self.histograms: dict[str, LatencyHistogram] = {}
+        self._unlogged: dict[str, LatencyHistogram] = {}
+        self._lock = threading.Lock()
+        self._reporter: Optional[threading.Thread] = None
+        self._stop_reporting = threading.Event()
+
+    def record(self, phase: str, duration_ms: float):
+        """Record one phase duration in milliseconds"""
+        with self._lock:
+            for histograms in (self.histograms, self._unlogged):
+                histogram = histograms.get(phase)
+                if histogram is None:
+                    histogram = histograms[phase] = LatencyHistogram()
+                histogram.record(duration_ms)
+
+    def report(self) -> dict[str, dict[str, float]]:
+        """Summaries (count, mean, p50/p95/p99...) for every phase"""
+        with self._lock:
+            return {
+                phase: h.summary() for phase, h in sorted(self.histograms.items())
+            }
+
+    def log_report(self):
+        """Log the current summaries and the histograms recorded since the last"""
+        if not self.histograms:
+            return
+        logger.info(f"call_setup_latency {json.dumps(self.report())}")
+        with self._lock:
+            unlogged, self._unlogged = self._unlogged, {}
+        if unlogged:
+            histograms = {phase: h.to_dict() for phase, h in unlogged.items()}
+            logger.info(f"{HISTOGRAMS_EVENT} {json.dumps(histograms)}")
+
+    def start_reporting(self, interval: float = 60.0):
+        """Log a report every ``interval`` seconds from a background thread"""
+        if self._reporter is not None and self._reporter.is_alive():
+            return
+        self._stop_reporting.clear()
+        self._reporter = threading.Thread(
+            target=self._report_loop,
+            args=(interval,),
+            name="setup-metrics-report",
+            daemon=True,
+        )
+        self._reporter.start()
+
+    def stop_reporting(self):
+        """Stop periodic reporting"""
+        self._stop_reporting.set()
+        if self._reporter is not None:
+            self._reporter.join()
+            self._reporter = None
+
+    def _report_loop(self, interval: float):
+        while not self._stop_reporting.wait(interval):
+            self.log_report()
+
+
+def merge_logged(lines: Iterable[str]) -> SetupMetrics:
+    """
+    Merge the histograms every job logged into one SetupMetrics
+
+    Args:
+        lines: Log lines, plain or JSON-formatted; those without
+            ``call_setup_histograms`` are skipped
+    """
+    metrics = SetupMetrics()
+    for line in lines:
+        if line.lstrip().startswith("{"):
+            # JSON-formatted logs carry the line in their message
+            try:
+                line = json.loads(line).get("message", "")
+            except ValueError:
+                continue
+        _, found, payload = line.partition(f"{HISTOGRAMS_EVENT} ")
+        if not found:
+            continue
+        # Formatters may append fields after the message
+        histograms, _ = _decoder.raw_decode(payload)
+        for phase, data in histograms.items():
+            histogram = LatencyHistogram.from_dict(data)
+            merged = metrics.histograms.setdefault(
+                phase, LatencyHistogram(histogram.precision, histogram.min_value)
+            )
+            merged.merge(histogram)
+    return metrics
+
+
+class CallTimer:
+    """
+    Monotonic-clock spans around the phases of a single call setup
+
+    Usage::
+
+        timer = CallTimer(setup_metrics)
+        with timer.span("connect"):
+            await ctx.connect()
+
+    When disabled, span() returns a shared no-op context manager and
+    nothing is recorded.
+    """
+
+    def __init__(self, metrics: Optional[SetupMetrics] = None, enabled: bool = True):
+        self.metrics = metrics
+        self.enabled = enabled
+        self.phases: dict[str, float] = {}
+        self._start = time.perf_counter() if enabled else 0.0
+
+    def span(self, phase: str):
+        """Context manager timing one phase"""
+        if not self.enabled:
+            return _NOOP_SPAN
+        return self._span(phase)
+
+    @contextmanager
+    def _span(self, phase: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(phase, (time.perf_counter() - start) * 1000)
+
+    def add(self, phase: str, duration_ms: float):
+        """Record a phase duration measured elsewhere"""
+        if not self.enabled:
+            return
+        self.phases[phase] = round(duration_ms, 2)
+        if self.metrics is not None:
+            self.metrics.record(phase, duration_ms)
+
+    def mark(self, phase: str):
+        """Record the time elapsed since the timer was created"""
+        if self.enabled:
+            self.add(phase, (time.perf_counter() - self._start) * 1000)
@@ -0,0 +1,121 @@
+"""HDR-style latency histogram"""
+import math
+from typing import Any, Optional
+
+
+class LatencyHistogram:
+    """
+    Log-bucketed histogram with bounded relative error
+
+    Each bucket spans a constant ratio of values, so recording is O(1),
+    memory grows with the log of the value range, and any reported
+    percentile is within ``precision`` of the true value.
+
+    Not thread-safe: owners shared between job threads record and read
+    it under their own lock (see SetupMetrics, SpeculationStats).
+    """
+
+    def __init__(self, precision: float = 0.01, min_value: float = 0.01):
+        self.precision = precision
+        self.min_value = min_value
+        self._log_base = math.log1p(2 * precision)
+        self._buckets: dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def _bucket(self, value: float) -> int:
+        if value <= self.min_value:
+            return 0
+        return int(math.log(value / self.min_value) / self._log_base) + 1
+
+    def _bucket_value(self, bucket: int) -> float:
+        if bucket == 0:
+            return self.min_value
+        # Midpoint of the bucket keeps the relative error within precision
+        low = self.min_value * math.exp((bucket - 1) * self._log_base)
+        return low * (1 + self.precision)
+
+    def record(self, value: float):
+        """Record a single value"""
+        bucket = self._bucket(value)
+        self._buckets[bucket] = self._buckets.get(bucket, 0) + 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other: "LatencyHistogram"):
+        """Add all values recorded in another histogram with the same precision"""
+        for bucket, count in other._buckets.items():
+            self._buckets[bucket] = self._buckets.get(bucket, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None and (self.min is None or other.min < self.min):
+            self.min = other.min
+        if other.max is not None and (self.max is None or other.max > self.max):
+            self.max = other.max
+
+    def to_dict(self) -> dict[str, Any]:
+        """Buckets and totals as JSON-serializable data (see from_dict())"""
+        return {
+            "precision": self.precision,
+            "min_value": self.min_value,
+            "buckets": {str(bucket): count for bucket, count in self._buckets.items()},
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "LatencyHistogram":
+        """Rebuild a histogram from to_dict() output, e.g. read from a log"""
+        histogram = cls(data["precision"], data["min_value"])
+        histogram._buckets = {
+            int(bucket): count for bucket, count in data["buckets"].items()
+        }
+        histogram.count = data["count"]
+        histogram.total = data["total"]
+        histogram.min = data["min"]
+        histogram.max = data["max"]
+        return histogram
+
+    def percentile(self, percentile: float) -> Optional[float]:
+        """Value at the given percentile (0-100), or None if empty"""
+        if self.count == 0:
+            return None
+
+        target = max(1, math.ceil(self.count * percentile / 100))
+        seen = 0
+        for bucket in sorted(self._buckets):
+            seen += self._buckets[bucket]
+            if seen >= target:
+                value = self._bucket_value(bucket)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def reset(self):
+        """Clear all recorded values"""
+        self._buckets.clear()
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def summary(self) -> dict[str, float]:
+        """Count, mean, min, max and p50/p95/p99 rounded for reporting"""
+        if self.count == 0:
+            return {"count": 0}
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 2),
+            "min": round(self.min, 2),
+            "p50": round(self.percentile(50), 2),
+            "p95": round(self.percentile(95), 2),
+            "p99": round(self.percentile(99), 2),
+            "max": round(self.max, 2),
+        }
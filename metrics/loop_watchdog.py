@@ -0,0 +1,213 @@
+"""Event-loop lag and blocking-call detection"""
+import asyncio
+import json
+import logging
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+
+from metrics.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Packages whose frames blocking time is attributed to
+PROJECT_PACKAGES = (
+    "agent",
+    "audio",
+    "config",
+    "memory",
+    "metrics",
+    "models",
+    "prompts",
+    "telephony",
+)
+
+
+@dataclass
+class _Site:
+    """Accumulated blocking time of one code location"""
+
+    samples: int = 0
+    stalls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+
+
+class LoopWatchdog:
+    """
+    Measures event-loop lag and samples the stack of blocking callbacks
+
+    A task on the loop wakes every ``interval`` seconds and records how
+    late it woke in a lag histogram. A sampler thread watches that
+    heartbeat; while the loop has been stuck for more than ``threshold_ms``
+    it samples the loop thread's stack every half threshold and charges
+    the time to the innermost frame from one of ``packages`` (or the
+    innermost frame at all when none is on the stack), e.g.
+    ``memory.storage:save_message``. Per-module totals and the worst sites
+    are logged every ``report_interval`` seconds. ``on_lag``, if set, is
+    called on the loop with every lag measurement in milliseconds.
+
+    Stack sampling reads sys._current_frames() from the sampler thread,
+    so the loop pays nothing unless it is already stalled.
+    """
+
+    def __init__(
+        self,
+        threshold_ms: float = 50.0,
+        interval: float = 0.05,
+        report_interval: float = 60.0,
+        packages: tuple[str, ...] = PROJECT_PACKAGES,
+        top: int = 10,
+        on_lag: Optional[Callable[[float], None]] = None,
+    ):
+        self.threshold_ms = threshold_ms
+        self.interval = interval
+        self.report_interval = report_interval
+        self.packages = packages
+        self.top = top
+        self.on_lag = on_lag
+        self.lag = LatencyHistogram()
+        self.stalls = 0
+        self._sites: dict[str, _Site] = {}
+        self._modules: dict[str, float] = {}
+        self._episode_site: Optional[str] = None
+        self._lock = threading.Lock()
+        self._beat = 0.0
+        self._loop_thread: Optional[int] = None
+        self._stop = threading.Event()
+        self._sampler: Optional[threading.Thread] = None
+        self._ticker: Optional[asyncio.Task] = None
+        self._reporter: Optional[asyncio.Task] = None
+
+    @property
+    def running(self) -> bool:
+        return self._ticker is not None and not self._ticker.done()
+
+    def start(self):
+        """Start watching the running event loop (call from that loop)"""
+        if self.running:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stop.clear()
+        self._ticker = asyncio.create_task(self._tick())
+        if self.report_interval > 0:
+            self._reporter = asyncio.create_task(self._report_loop())
+        self._sampler = threading.Thread(
+            target=self._sample_loop, name="loop-watchdog", daemon=True
+        )
+        self._sampler.start()
+
+    def stop(self):
+        """Stop watching"""
+        self._stop.set()
+        for task in (self._ticker, self._reporter):
+            if task is not None:
+                task.cancel()
+        self._ticker = self._reporter = None
+        if self._sampler is not None:
+            self._sampler.join()
+            self._sampler = None
+
+    async def _tick(self):
+        while True:
+            expected = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.perf_counter()
+            lag_ms = max(now - expected, 0.0) * 1000
+            self._beat = now
+            self.lag.record(lag_ms)
+            if self.on_lag is not None:
+                self.on_lag(lag_ms)
+            if lag_ms >= self.threshold_ms:
+                self._end_stall(lag_ms)
+
+    def _end_stall(self, lag_ms: float):
+        with self._lock:
+            self.stalls += 1
+            site = self._sites.get(self._episode_site or "unknown")
+            if site is None:
+                site = self._sites["unknown"] = _Site()
+            site.stalls += 1
+            site.max_ms = max(site.max_ms, lag_ms)
+            self._episode_site = None
+
+    def _sample_loop(self):
+        period = self.threshold_ms / 2000
+        while not self._stop.wait(period):
+            stalled_ms = (time.perf_counter() - self._beat) * 1000
+            if stalled_ms < self.threshold_ms + self.interval * 1000:
+                continue
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is not None:
+                self._attribute(frame, period * 1000)
+
+    def _attribute(self, frame, duration_ms: float):
+        innermost = None
+        site = None
+        while frame is not None:
+            module = frame.f_globals.get("__name__", "?")
+            if innermost is None:
+                innermost = (module, frame)
+            if module.split(".")[0] in self.packages:
+                site = (module, frame)
+                break
+            frame = frame.f_back
+        module, frame = site or innermost
+        key = f"{module}:{frame.f_code.co_name}:{frame.f_lineno}"
+
+        with self._lock:
+            entry = self._sites.setdefault(key, _Site())
+            entry.samples += 1
+            entry.total_ms += duration_ms
+            self._modules[module] = self._modules.get(module, 0.0) + duration_ms
+            self._episode_site = key
+
+    def report(self) -> dict[str, Any]:
+        """Lag percentiles, stall count, blocked time by module and worst sites"""
+        with self._lock:
+            worst = sorted(
+                self._sites.items(),
+                key=lambda item: (item[1].total_ms, item[1].max_ms),
+                reverse=True,
+            )[: self.top]
+            return {
+                "lag_ms": self.lag.summary(),
+                "stalls": self.stalls,
+                "blocked_ms_by_module": {
+                    module: round(ms, 1)
+                    for module, ms in sorted(
+                        self._modules.items(), key=lambda item: item[1], reverse=True
+                    )
+                },
+                "worst": [
+                    {
+                        "site": key,
+                        "blocked_ms": round(site.total_ms, 1),
+                        "stalls": site.stalls,
+                        "max_stall_ms": round(site.max_ms, 1),
+                    }
+                    for key, site in worst
+                ],
+            }
+
+    def reset(self):
+        """Clear everything recorded so far"""
+        with self._lock:
+            self.lag.reset()
+            self.stalls = 0
+            self._sites.clear()
+            self._modules.clear()
+
+    def log_report(self):
+        """Log the current report as a single structured line and reset"""
+        if self.lag.count:
+            logger.info(f"loop_watchdog {json.dumps(self.report())}")
+        self.reset()
+
+    async def _report_loop(self):
+        while True:
+            await asyncio.sleep(self.report_interval)
+            self.log_report()
@@ -0,0 +1,172 @@
+"""Per-turn latency breakdowns from AgentSession metrics events"""
+import asyncio
+import logging
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from typing import Any, Optional
+
+from livekit.agents import metrics
+
+from memory.storage import MemoryStorage
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class TurnLatency:
+    """
+    Latency of one user turn, in milliseconds from the end of user speech
+
+    total_ms is end of utterance + LLM first token + TTS first byte;
+    playout_ms is measured up to the agent actually starting to speak.
+    """
+
+    speech_id: str
+    started_at: str
+    transcription_ms: Optional[float] = None
+    end_of_utterance_ms: Optional[float] = None
+    llm_ttft_ms: Optional[float] = None
+    tts_ttfb_ms: Optional[float] = None
+    total_ms: Optional[float] = None
+    playout_ms: Optional[float] = None
+    cancelled: bool = False
+
+
+@dataclass
+class _PendingTurn:
+    eou: Optional[metrics.EOUMetrics] = None
+    llm: Optional[metrics.LLMMetrics] = None
+    tts: Optional[metrics.TTSMetrics] = None
+
+
+def _ms(seconds: Optional[float]) -> Optional[float]:
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+class TurnMetricsCollector:
+    """
+    Joins EOU, LLM and TTS metrics of each turn by speech_id
+
+    Subscribes to a session's ``metrics_collected`` and
+    ``agent_state_changed`` events. Completed turns are written to the
+    ``turn_metrics`` table in batches of ``batch_size`` from a background
+    task; flush() writes the rest (call it when the call ends).
+
+    Usage::
+
+        collector = TurnMetricsCollector(storage, conversation_id, org_id,
+                                         providers={"llm": "openai/gpt-4o-mini"})
+        collector.attach(session)
+        ctx.add_shutdown_callback(collector.flush)
+    """
+
+    def __init__(
+        self,
+        storage: MemoryStorage,
+        conversation_id: str,
+        org_id: str,
+        providers: Optional[dict[str, str]] = None,
+        batch_size: int = 10,
+    ):
+        self.storage = storage
+        self.conversation_id = conversation_id
+        self.org_id = org_id
+        self.providers = providers or {}
+        self.batch_size = batch_size
+        self.turns: list[TurnLatency] = []
+        self._pending: dict[str, _PendingTurn] = {}
+        self._batch: list[TurnLatency] = []
+        self._speaking_at: list[float] = []
+        self._writes: set[asyncio.Task] = set()
+
+    def attach(self, session):
+        """Subscribe to a session's metrics and agent state events"""
+        session.on("metrics_collected", self._on_metrics)
+        session.on("agent_state_changed", self._on_agent_state)
+
+    def _on_agent_state(self, event):
+        if event.new_state == "speaking":
+            self._speaking_at.append(event.created_at)
+
+    def _on_metrics(self, event):
+        m = event.metrics
+        speech_id = getattr(m, "speech_id", None)
+        if speech_id is None:
+            return
+        turn = self._pending.setdefault(speech_id, _PendingTurn())
+        if isinstance(m, metrics.EOUMetrics):
+            turn.eou = m
+        elif isinstance(m, metrics.LLMMetrics):
+            turn.llm = m
+        elif isinstance(m, metrics.TTSMetrics):
+            # A turn's first TTS segment carries its time to first byte
+            turn.tts = turn.tts or m
+        else:
+            return
+
+        if turn.eou is not None and turn.llm is not None and turn.tts is not None:
+            self._complete(speech_id)
+        elif turn.llm is not None and turn.llm.cancelled:
+            self._complete(speech_id)
+
+    def _complete(self, speech_id: str):
+        turn = self._pending.pop(speech_id)
+        latency = self._latency(speech_id, turn)
+        self.turns.append(latency)
+        self._batch.append(latency)
+        if len(self._batch) >= self.batch_size:
+            self._write(self._take_batch())
+
+    def _latency(self, speech_id: str, turn: _PendingTurn) -> TurnLatency:
+        eou, llm, tts = turn.eou, turn.llm, turn.tts
+        started = eou.last_speaking_time if eou else (llm or tts).timestamp
+        latency = TurnLatency(
+            speech_id=speech_id,
+            started_at=datetime.utcfromtimestamp(started).isoformat(),
+            transcription_ms=_ms(eou.transcription_delay) if eou else None,
+            end_of_utterance_ms=_ms(eou.end_of_utterance_delay) if eou else None,
+            llm_ttft_ms=_ms(llm.ttft) if llm else None,
+            tts_ttfb_ms=_ms(tts.ttfb) if tts else None,
+            cancelled=bool(llm and llm.cancelled) or bool(tts and tts.cancelled),
+        )
+        if eou and llm and tts:
+            latency.total_ms = _ms(eou.end_of_utterance_delay + llm.ttft + tts.ttfb)
+            speaking = [t for t in self._speaking_at if t >= eou.last_speaking_time]
+            if speaking:
+                latency.playout_ms = _ms(min(speaking) - eou.last_speaking_time)
+            self._speaking_at = speaking
+        return latency
+
+    def _take_batch(self) -> list[dict[str, Any]]:
+        rows = [
+            {
+                **asdict(turn),
+                "conversation_id": self.conversation_id,
+                "org_id": self.org_id,
+                "stt_provider": self.providers.get("stt"),
+                "llm_provider": self.providers.get("llm"),
+                "tts_provider": self.providers.get("tts"),
+            }
+            for turn in self._batch
+        ]
+        self._batch = []
+        return rows
+
+    def _write(self, rows: list[dict[str, Any]]):
+        task = asyncio.create_task(self.storage.save_turn_metrics(rows))
+        self._writes.add(task)
+        task.add_done_callback(self._write_done)
+
+    def _write_done(self, task: asyncio.Task):
+        self._writes.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Failed to save turn metrics: {task.exception()}")
+
+    async def flush(self):
+        """Write completed and partially measured turns and wait for writes"""
+        for speech_id in list(self._pending):
+            self._complete(speech_id)
+        if self._batch:
+            self._write(self._take_batch())
+        while self._writes:
+            await asyncio.gather(*list(self._writes), return_exceptions=True)
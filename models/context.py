@@ -17,6 +17,21 @@ class UserContext(BaseModel):
     metadata: dict[str, Any] = Field(default_factory=dict)
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+    @classmethod
+    def from_profile(cls, profile: dict[str, Any]) -> "UserContext":
+        """Build a user context from a stored user profile"""
+        preferences = profile.get("preferences") or {}
+        created_at = profile.get("created_at")
+        return cls(
+            user_id=profile["user_id"],
+            name=profile.get("name"),
+            phone_number=profile.get("phone_number"),
+            email=profile.get("email"),
+            language=preferences.get("language", "en"),
+            timezone=preferences.get("timezone", "UTC"),
+            created_at=created_at or datetime.utcnow(),
+        )
+
 
 class OrganizationContext(BaseModel):
     """Organization-specific context"""
@@ -29,6 +44,19 @@ class OrganizationContext(BaseModel):
     custom_settings: dict[str, Any] = Field(default_factory=dict)
     branding: dict[str, str] = Field(default_factory=dict)
 
+    @classmethod
+    def from_record(cls, record: dict[str, Any]) -> "OrganizationContext":
+        """Build an organization context from a registry record"""
+        return cls(
+            org_id=record["org_id"],
+            name=record["name"],
+            industry=record.get("industry"),
+            business_hours=record.get("business_hours"),
+            contact_info=record.get("contact_info") or {},
+            custom_settings=record.get("custom_settings") or {},
+            branding=record.get("branding") or {},
+        )
+
 
 class ConversationContext(BaseModel):
     """Conversation state and history"""
@@ -38,9 +66,26 @@ class ConversationContext(BaseModel):
     start_time: datetime = Field(default_factory=datetime.utcnow)
     messages: list[dict[str, Any]] = Field(default_factory=list)
     current_intent: Optional[str] = None
+    summary: Optional[str] = None
     variables: dict[str, Any] = Field(default_factory=dict)
     metadata: dict[str, Any] = Field(default_factory=dict)
 
+    @classmethod
+    def new(
+        cls,
+        conversation_id: str,
+        user_id: str,
+        start_time: datetime,
+        metadata: Optional[dict[str, Any]] = None,
+    ) -> "ConversationContext":
+        """Build a fresh conversation"""
+        return cls(
+            conversation_id=conversation_id,
+            user_id=user_id,
+            start_time=start_time,
+            metadata=metadata or {},
+        )
+
 
 class AgentContext(BaseModel):
     """Complete agent context"""
@@ -51,6 +96,29 @@ class AgentContext(BaseModel):
     is_phone_call: bool = False
     call_metadata: dict[str, Any] = Field(default_factory=dict)
 
+    @classmethod
+    def assemble(
+        cls,
+        user: UserContext,
+        organization: OrganizationContext,
+        conversation: ConversationContext,
+        is_phone_call: bool = False,
+        call_metadata: Optional[dict[str, Any]] = None,
+    ) -> "AgentContext":
+        """
+        Combine already-built contexts
+
+        Model instances pass through validation as they are, so only the
+        top-level fields are checked.
+        """
+        return cls(
+            user=user,
+            organization=organization,
+            conversation=conversation,
+            is_phone_call=is_phone_call,
+            call_metadata=call_metadata or {},
+        )
+
     def to_prompt_variables(self) -> dict[str, Any]:
         """Convert context to variables for prompt templates"""
         return {
@@ -0,0 +1,142 @@
+"""Compact binary snapshots of AgentContext for cross-worker handoff"""
+import struct
+import zlib
+
+from pydantic import ValidationError
+from pydantic_core import from_json, to_json
+
+from models.context import (
+    AgentContext,
+    ConversationContext,
+    OrganizationContext,
+    UserContext,
+)
+
+MAGIC = b"AC"
+VERSION = 1
+
+_HEADER = struct.Struct("!2sBB")
+_FLAG_ZLIB = 0x01
+
+# Payloads smaller than this are stored uncompressed; for a typical call
+# context zlib costs more time than the bytes it saves
+_COMPRESS_THRESHOLD = 1024
+
+
+class SnapshotError(ValueError):
+    """Raised when a snapshot cannot be decoded"""
+
+
+def encode_snapshot(context: AgentContext) -> bytes:
+    """
+    Encode an agent context into a versioned binary snapshot
+
+    The payload is a positional JSON array (no field names), zlib-compressed
+    when large, behind a 4-byte header of magic, version and flags.
+    Message history is not included; it stays in the messages table.
+    """
+    user = context.user
+    org = context.organization
+    conv = context.conversation
+    payload = [
+        [
+            user.user_id,
+            user.name,
+            user.phone_number,
+            user.email,
+            user.language,
+            user.timezone,
+            user.metadata,
+            user.created_at,
+        ],
+        [
+            org.org_id,
+            org.name,
+            org.industry,
+            org.business_hours,
+            org.contact_info,
+            org.custom_settings,
+            org.branding,
+        ],
+        [
+            conv.conversation_id,
+            conv.user_id,
+            conv.start_time,
+            conv.current_intent,
+            conv.summary,
+            conv.variables,
+            conv.metadata,
+        ],
+        context.is_phone_call,
+        context.call_metadata,
+    ]
+
+    body = to_json(payload, fallback=str)
+    flags = 0
+    if len(body) >= _COMPRESS_THRESHOLD:
+        body = zlib.compress(body)
+        flags |= _FLAG_ZLIB
+    return _HEADER.pack(MAGIC, VERSION, flags) + body
+
+
+def decode_snapshot(data: bytes) -> AgentContext:
+    """
+    Decode a snapshot produced by encode_snapshot
+
+    Raises:
+        SnapshotError: If the data is not a snapshot, has an unknown version
+            or does not hold a valid agent context
+    """
+    if len(data) < _HEADER.size:
+        raise SnapshotError("Snapshot is truncated")
+
+    magic, version, flags = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError("Not an agent context snapshot")
+    if version != VERSION:
+        raise SnapshotError(f"Unsupported snapshot version: {version}")
+
+    body = data[_HEADER.size :]
+    try:
+        if flags & _FLAG_ZLIB:
+            body = zlib.decompress(body)
+        user, org, conv, is_phone_call, call_metadata = from_json(body)
+    except (ValueError, TypeError, zlib.error) as e:
+        raise SnapshotError(f"Corrupt snapshot: {e}") from e
+
+    try:
+        return AgentContext.assemble(
+            user=UserContext(
+                user_id=user[0],
+                name=user[1],
+                phone_number=user[2],
+                email=user[3],
+                language=user[4],
+                timezone=user[5],
+                metadata=user[6],
+                created_at=user[7],
+            ),
+            organization=OrganizationContext(
+                org_id=org[0],
+                name=org[1],
+                industry=org[2],
+                business_hours=org[3],
+                contact_info=org[4],
+                custom_settings=org[5],
+                branding=org[6],
+            ),
+            conversation=ConversationContext(
+                conversation_id=conv[0],
+                user_id=conv[1],
+                start_time=conv[2],
+                current_intent=conv[3],
+                summary=conv[4],
+                variables=conv[5],
+                metadata=conv[6],
+            ),
+            is_phone_call=is_phone_call,
+            call_metadata=call_metadata,
+        )
+    except (ValidationError, LookupError, TypeError) as e:
+        # Well-formed JSON with short or wrongly typed arrays
+        raise SnapshotError(f"Corrupt snapshot: {e}") from e
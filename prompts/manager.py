@@ -1,51 +1,229 @@
 """Prompt template manager"""
+import hashlib
 import json
 import logging
+import threading
+from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional
+from types import MappingProxyType
+from typing import Mapping, Optional
 
 from models.prompts import PromptTemplate
 
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class _PromptFile:
+    """Fingerprint and parsed contents of a single template file"""
+
+    mtime_ns: int
+    size: int
+    digest: str
+    prompts: tuple[PromptTemplate, ...]
+
+
+@dataclass(frozen=True)
+class PromptSnapshot:
+    """Immutable view of all loaded prompts and their secondary indexes"""
+
+    prompts: Mapping[str, PromptTemplate] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    by_category: Mapping[str, tuple[PromptTemplate, ...]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    by_organization: Mapping[str, tuple[PromptTemplate, ...]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    by_tag: Mapping[str, tuple[PromptTemplate, ...]] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+    files: Mapping[Path, _PromptFile] = field(
+        default_factory=lambda: MappingProxyType({})
+    )
+
+    @classmethod
+    def build(cls, files: dict[Path, _PromptFile]) -> "PromptSnapshot":
+        """Build a snapshot and its indexes from parsed template files"""
+        prompts: dict[str, PromptTemplate] = {}
+        for path in sorted(files):
+            for prompt in files[path].prompts:
+                prompts[prompt.id] = prompt
+
+        by_category: dict[str, list[PromptTemplate]] = {}
+        by_organization: dict[str, list[PromptTemplate]] = {}
+        by_tag: dict[str, list[PromptTemplate]] = {}
+        for prompt in prompts.values():
+            by_category.setdefault(prompt.category, []).append(prompt)
+            if prompt.organization_id is not None:
+                by_organization.setdefault(prompt.organization_id, []).append(prompt)
+            for tag in prompt.tags:
+                by_tag.setdefault(tag, []).append(prompt)
+
+        def freeze(index: dict[str, list[PromptTemplate]]):
+            return MappingProxyType({k: tuple(v) for k, v in index.items()})
+
+        return cls(
+            prompts=MappingProxyType(prompts),
+            by_category=freeze(by_category),
+            by_organization=freeze(by_organization),
+            by_tag=freeze(by_tag),
+            files=MappingProxyType(dict(files)),
+        )
+
+
 class PromptManager:
     """Manages prompt templates"""
 
     def __init__(self, prompts_dir: str = "src/prompts/templates"):
         self.prompts_dir = Path(prompts_dir)
-        self.prompts: dict[str, PromptTemplate] = {}
+        self._snapshot = PromptSnapshot()
+        self._reload_lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop_watching = threading.Event()
         self._load_prompts()
 
-    def _load_prompts(self):
-        """Load all prompt templates from disk"""
-        if not self.prompts_dir.exists():
-            logger.warning(f"Prompts directory not found: {self.prompts_dir}")
-            return
+    @property
+    def prompts(self) -> Mapping[str, PromptTemplate]:
+        """Read-only mapping of prompt ID to template"""
+        return self._snapshot.prompts
 
-        for prompt_file in self.prompts_dir.glob("**/*.json"):
-            try:
-                with open(prompt_file, "r") as f:
-                    data = json.load(f)
-                    prompt = PromptTemplate(**data)
-                    self.prompts[prompt.id] = prompt
-                    logger.info(f"Loaded prompt: {prompt.id}")
-            except Exception as e:
-                logger.error(f"Failed to load prompt {prompt_file}: {e}")
+    @property
+    def snapshot(self) -> PromptSnapshot:
+        """Current immutable prompt snapshot"""
+        return self._snapshot
+
+    def _load_prompts(self) -> bool:
+        """
+        Load prompt templates from disk into a new snapshot
+
+        Only files whose mtime, size or content hash changed since the
+        previous load are parsed again. The new snapshot replaces the old
+        one in a single assignment, so readers never see a partial state.
+
+        Returns:
+            True if the set of loaded prompts changed
+        """
+        with self._reload_lock:
+            if not self.prompts_dir.exists():
+                logger.warning(f"Prompts directory not found: {self.prompts_dir}")
+                if self._snapshot.files:
+                    self._snapshot = PromptSnapshot()
+                    return True
+                return False
+
+            previous = self._snapshot.files
+            files: dict[Path, _PromptFile] = {}
+            changed = False
+            touched = False
+
+            for prompt_file in self.prompts_dir.glob("**/*.json"):
+                cached = previous.get(prompt_file)
+                loaded = self._load_file(prompt_file, cached)
+                if loaded is None:
+                    continue
+                if loaded is not cached:
+                    touched = True
+                    if cached is None or loaded.prompts is not cached.prompts:
+                        changed = True
+                files[prompt_file] = loaded
+
+            if set(files) != set(previous):
+                changed = True
+
+            if changed or touched:
+                self._snapshot = PromptSnapshot.build(files)
+            return changed
+
+    def _load_file(
+        self, prompt_file: Path, cached: Optional[_PromptFile]
+    ) -> Optional[_PromptFile]:
+        """Parse a template file, reusing the cached entry if it is unchanged"""
+        try:
+            stat = prompt_file.stat()
+            if (
+                cached is not None
+                and cached.mtime_ns == stat.st_mtime_ns
+                and cached.size == stat.st_size
+            ):
+                return cached
+
+            raw = prompt_file.read_bytes()
+            digest = hashlib.sha256(raw).hexdigest()
+            if cached is not None and cached.digest == digest:
+                return _PromptFile(
+                    stat.st_mtime_ns, stat.st_size, digest, cached.prompts
+                )
+
+            data = json.loads(raw)
+            prompt = PromptTemplate(**data)
+            logger.info(f"Loaded prompt: {prompt.id}")
+            return _PromptFile(stat.st_mtime_ns, stat.st_size, digest, (prompt,))
+        except Exception as e:
+            logger.error(f"Failed to load prompt {prompt_file}: {e}")
+            # Keep serving the last good version of a file that became invalid
+            return cached
 
     def get_prompt(self, prompt_id: str) -> Optional[PromptTemplate]:
         """Get a prompt template by ID"""
-        return self.prompts.get(prompt_id)
+        return self._snapshot.prompts.get(prompt_id)
 
     def get_prompts_by_category(self, category: str) -> list[PromptTemplate]:
         """Get all prompts in a category"""
-        return [p for p in self.prompts.values() if p.category == category]
+        return list(self._snapshot.by_category.get(category, ()))
 
     def get_organization_prompts(self, org_id: str) -> list[PromptTemplate]:
         """Get organization-specific prompts"""
-        return [p for p in self.prompts.values() if p.organization_id == org_id]
+        return list(self._snapshot.by_organization.get(org_id, ()))
+
+    def get_prompts_by_tag(self, tag: str) -> list[PromptTemplate]:
+        """Get all prompts with a tag"""
+        return list(self._snapshot.by_tag.get(tag, ()))
+
+    def reload(self) -> bool:
+        """
+        Reload prompts from disk
+
+        Unchanged files are not re-parsed and lookups keep seeing the
+        previous snapshot until the new one is ready.
 
-    def reload(self):
-        """Reload all prompts from disk"""
-        self.prompts.clear()
-        self._load_prompts()
\ No newline at end of file
+        Returns:
+            True if any prompt was added, changed or removed
+        """
+        return self._load_prompts()
+
+    def start_watching(self, interval: float = 5.0):
+        """
+        Poll the prompts directory for changes in a background thread
+
+        Args:
+            interval: Seconds between polls
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+
+        self._stop_watching.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval,), name="prompt-watcher", daemon=True
+        )
+        self._watcher.start()
+        logger.info(f"Watching {self.prompts_dir} every {interval}s")
+
+    def stop_watching(self):
+        """Stop the background watcher if it is running"""
+        self._stop_watching.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+    def _watch(self, interval: float):
+        """Background polling loop"""
+        while not self._stop_watching.wait(interval):
+            try:
+                if self.reload():
+                    logger.info(
+                        f"Reloaded prompts: {len(self._snapshot.prompts)} loaded"
+                    )
+            except Exception as e:
+                logger.error(f"Prompt reload failed: {e}")
@@ -15,6 +15,20 @@ class PromptRenderer:
 
     def __init__(self):
         self.env = Environment(autoescape=True)
+        self._compiled: dict[tuple[str, str, str], Template] = {}
+
+    def compile(self, prompt: PromptTemplate) -> Template:
+        """
+        Get the compiled Jinja template for a prompt
+
+        Compiled templates are cached per prompt ID, version and source, so
+        each template is only parsed once per process.
+        """
+        key = (prompt.id, prompt.version, prompt.template)
+        template = self._compiled.get(key)
+        if template is None:
+            template = self._compiled[key] = self.env.from_string(prompt.template)
+        return template
 
     def render(self, prompt: PromptTemplate, context: AgentContext) -> str:
         """
@@ -41,7 +55,7 @@ class PromptRenderer:
 
         # Render template
         try:
-            template = self.env.from_string(prompt.template)
+            template = self.compile(prompt)
             rendered = template.render(**variables)
             logger.debug(f"Rendered prompt {prompt.id}")
             return rendered
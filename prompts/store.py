@@ -0,0 +1,334 @@
+"""Versioned multi-tenant prompt store"""
+import logging
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from types import MappingProxyType
+from typing import Iterable, Mapping, Optional
+
+import aiosqlite
+
+from models.prompts import PromptTemplate
+from prompts.manager import PromptManager
+
+logger = logging.getLogger(__name__)
+
+GLOBAL_ORG_ID = ""
+
+# Changes with every publish() and deactivate(), from any process
+_MARKER_QUERY = (
+    "SELECT COUNT(*), COALESCE(SUM(active), 0), MAX(published_at) "
+    "FROM prompt_versions"
+)
+_ACTIVE_QUERY = (
+    "SELECT org_id, purpose, version, template, published_at "
+    "FROM prompt_versions WHERE active = 1"
+)
+
+
+def _version_key(version: str) -> tuple[int, ...]:
+    """Sort key for dotted version strings such as 1.10.2"""
+    return tuple(int(part) for part in re.findall(r"\d+", version))
+
+
+class PromptStore:
+    """
+    SQLite-backed prompt store resolving (org_id, purpose) to a template
+
+    All active versions are loaded into an in-memory cache keyed by
+    organization, so resolve() on the call path is a dict lookup. Writes
+    go through publish()/deactivate(), which commit in a single
+    transaction and then swap the affected organization's cache entry.
+    Versions published or deactivated by other processes are picked up
+    by start_refreshing(), which polls a cheap change marker and reloads
+    the cache when it moves.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "data/prompts.db",
+        fallback: Optional[PromptManager] = None,
+    ):
+        self.db_path = db_path
+        self.fallback = fallback
+        self._connection = None  # Keep connection alive for :memory:
+        self._cache: Mapping[str, Mapping[str, PromptTemplate]] = MappingProxyType({})
+        self._loaded = False
+        self._initialized = False
+        self._marker: Optional[tuple] = None
+        self._install_lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._stop_refreshing = threading.Event()
+
+        # Create directory for file-based DB
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+    async def _get_connection(self):
+        """Get or create database connection"""
+        if self.db_path == ":memory:":
+            if self._connection is None:
+                self._connection = await aiosqlite.connect(self.db_path)
+            return self._connection
+        return await aiosqlite.connect(self.db_path)
+
+    async def _release(self, conn):
+        """Close a per-operation connection"""
+        if self.db_path != ":memory:":
+            await conn.close()
+
+    async def initialize(self):
+        """Create tables and warm the cache if it has not been loaded yet"""
+        if self._initialized:
+            return
+        conn = await self._get_connection()
+        await conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS prompt_versions (
+                org_id TEXT NOT NULL,
+                purpose TEXT NOT NULL,
+                version TEXT NOT NULL,
+                template TEXT NOT NULL,
+                active INTEGER NOT NULL DEFAULT 1,
+                published_at TEXT NOT NULL,
+                PRIMARY KEY (org_id, purpose, version)
+            )
+            """
+        )
+        await conn.commit()
+        await self._release(conn)
+
+        if not self._loaded:
+            await self.refresh()
+        self._initialized = True
+
+    async def refresh(self, org_id: Optional[str] = None):
+        """
+        Reload active versions from the database into the cache
+
+        Args:
+            org_id: Only reload this organization (None reloads everything)
+        """
+        conn = await self._get_connection()
+        query = _ACTIVE_QUERY
+        params: tuple = ()
+        if org_id is not None:
+            query += " AND org_id = ?"
+            params = (org_id,)
+
+        async with conn.execute(query, params) as cursor:
+            rows = await cursor.fetchall()
+        marker = None
+        if org_id is None:
+            async with conn.execute(_MARKER_QUERY) as cursor:
+                marker = await cursor.fetchone()
+        await self._release(conn)
+
+        self._install(rows, org_id, marker)
+
+    def _install(
+        self,
+        rows: Iterable[tuple],
+        org_id: Optional[str] = None,
+        marker: Optional[tuple] = None,
+    ):
+        """Swap the cache for one built from active version rows"""
+        newest: dict[str, dict[str, tuple]] = {}
+        for row_org, purpose, version, template, published_at in rows:
+            key = (_version_key(version), published_at)
+            current = newest.setdefault(row_org, {}).get(purpose)
+            if current is None or key > current[0]:
+                newest[row_org][purpose] = (key, template)
+
+        with self._install_lock:
+            cache = dict(self._cache) if org_id is not None else {}
+            if org_id is not None:
+                cache.pop(org_id, None)
+            for row_org, purposes in newest.items():
+                cache[row_org] = MappingProxyType(
+                    {
+                        purpose: PromptTemplate.model_validate_json(template)
+                        for purpose, (_, template) in purposes.items()
+                    }
+                )
+
+            self._cache = MappingProxyType(cache)
+            if marker is not None:
+                self._marker = tuple(marker)
+            self._loaded = True
+        logger.info(f"Prompt store cache holds {len(cache)} organizations")
+
+    def poll(self) -> bool:
+        """
+        Reload the cache if versions changed since it was loaded
+
+        Runs the database reads synchronously, for the refresh thread.
+
+        Returns:
+            True if the cache was reloaded
+        """
+        conn = sqlite3.connect(f"file:{self.db_path}?mode=ro", uri=True)
+        try:
+            marker = conn.execute(_MARKER_QUERY).fetchone()
+            if tuple(marker) == self._marker:
+                return False
+            rows = conn.execute(_ACTIVE_QUERY).fetchall()
+        finally:
+            conn.close()
+        self._install(rows, marker=marker)
+        return True
+
+    def start_refreshing(self, interval: float = 30.0):
+        """
+        Pick up versions other processes publish, in a background thread
+
+        Args:
+            interval: Seconds between checks
+        """
+        if self.db_path == ":memory:":
+            return
+        if self._refresher is not None and self._refresher.is_alive():
+            return
+
+        self._stop_refreshing.clear()
+        self._refresher = threading.Thread(
+            target=self._refresh, args=(interval,), name="prompt-refresh", daemon=True
+        )
+        self._refresher.start()
+
+    def stop_refreshing(self):
+        """Stop the background refresh thread if it is running"""
+        self._stop_refreshing.set()
+        if self._refresher is not None:
+            self._refresher.join()
+            self._refresher = None
+
+    def _refresh(self, interval: float):
+        """Background refresh loop"""
+        while not self._stop_refreshing.wait(interval):
+            try:
+                self.poll()
+            except Exception as e:
+                logger.error(f"Prompt store refresh failed: {e}")
+
+    def resolve(
+        self, org_id: Optional[str], purpose: str
+    ) -> Optional[PromptTemplate]:
+        """
+        Resolve the newest active template for an organization and purpose
+
+        Falls back to the global version, then to the file-based
+        PromptManager if one was given.
+        """
+        cache = self._cache
+        if org_id:
+            prompt = cache.get(org_id, {}).get(purpose)
+            if prompt is not None:
+                return prompt
+
+        prompt = cache.get(GLOBAL_ORG_ID, {}).get(purpose)
+        if prompt is None and self.fallback is not None:
+            prompt = self.fallback.get_prompt(purpose)
+        return prompt
+
+    async def publish(
+        self,
+        prompt: PromptTemplate,
+        purpose: Optional[str] = None,
+        org_id: Optional[str] = None,
+    ):
+        """
+        Publish a new active prompt version
+
+        Args:
+            prompt: Template to publish; its version must be new for the
+                (org_id, purpose) pair
+            purpose: Purpose the template serves (defaults to prompt.id)
+            org_id: Owning organization (defaults to prompt.organization_id,
+                None publishes a global template)
+        """
+        purpose = purpose or prompt.id
+        org_key = org_id or prompt.organization_id or GLOBAL_ORG_ID
+
+        conn = await self._get_connection()
+        try:
+            await conn.execute(
+                """
+                INSERT INTO prompt_versions
+                (org_id, purpose, version, template, active, published_at)
+                VALUES (?, ?, ?, ?, 1, ?)
+                """,
+                (
+                    org_key,
+                    purpose,
+                    prompt.version,
+                    prompt.model_dump_json(),
+                    datetime.utcnow().isoformat(),
+                ),
+            )
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+        finally:
+            await self._release(conn)
+
+        await self.refresh(org_key)
+        logger.info(
+            f"Published prompt {purpose}@{prompt.version} for {org_key or 'global'}"
+        )
+
+    async def deactivate(self, org_id: Optional[str], purpose: str, version: str):
+        """Deactivate a published version, e.g. to roll back"""
+        org_key = org_id or GLOBAL_ORG_ID
+
+        conn = await self._get_connection()
+        try:
+            await conn.execute(
+                """
+                UPDATE prompt_versions SET active = 0
+                WHERE org_id = ? AND purpose = ? AND version = ?
+                """,
+                (org_key, purpose, version),
+            )
+            await conn.commit()
+        except Exception:
+            await conn.rollback()
+            raise
+        finally:
+            await self._release(conn)
+
+        await self.refresh(org_key)
+
+    async def list_versions(
+        self, org_id: Optional[str], purpose: str
+    ) -> list[dict]:
+        """List all versions of a purpose for an organization, newest first"""
+        conn = await self._get_connection()
+        async with conn.execute(
+            """
+            SELECT version, active, published_at FROM prompt_versions
+            WHERE org_id = ? AND purpose = ?
+            """,
+            (org_id or GLOBAL_ORG_ID, purpose),
+        ) as cursor:
+            rows = await cursor.fetchall()
+        await self._release(conn)
+
+        versions = [
+            {"version": version, "active": bool(active), "published_at": published_at}
+            for version, active, published_at in rows
+        ]
+        versions.sort(
+            key=lambda v: (_version_key(v["version"]), v["published_at"]), reverse=True
+        )
+        return versions
+
+    async def close(self):
+        """Stop refreshing and close the database connection"""
+        self.stop_refreshing()
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
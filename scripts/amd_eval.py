@@ -0,0 +1,188 @@
+"""
+Offline evaluation of answering machine detection over labeled WAV files
+
+Fixtures are mono or stereo 16-bit WAV recordings of the first seconds of
+answered outbound calls, sorted into ``human/`` and ``machine/``
+subdirectories of the fixtures directory. Each file is streamed through
+the detector in 20 ms frames, as a call would be.
+
+Reports accuracy (UNKNOWN counts as human, since the agent then greets
+the callee), the confusion matrix, decision latency in seconds of call
+audio, and detector CPU time per call.
+
+Usage:
+    python scripts/amd_eval.py data/amd_fixtures
+    python scripts/amd_eval.py data/amd_fixtures --vad
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+import wave
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+import numpy as np
+from livekit import rtc
+
+# Add main directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from telephony.answering_machine import (
+    HUMAN,
+    MACHINE,
+    UNKNOWN,
+    AMDConfig,
+    AMDResult,
+    AnsweringMachineDetector,
+)
+
+FRAME_MS = 20
+
+
+def load_wav(path: Path) -> tuple[np.ndarray, int]:
+    """Mono int16 samples and sample rate of a 16-bit WAV file"""
+    with wave.open(str(path), "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"{path} is not 16-bit PCM")
+        channels = wav.getnchannels()
+        rate = wav.getframerate()
+        pcm = np.frombuffer(wav.readframes(wav.getnframes()), dtype=np.int16)
+    if channels > 1:
+        pcm = pcm.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return pcm, rate
+
+
+def labeled_fixtures(directory: Path) -> list[tuple[Path, str]]:
+    return [
+        (path, label)
+        for label in (HUMAN, MACHINE)
+        for path in sorted((directory / label).glob("*.wav"))
+    ]
+
+
+def _frames(pcm: np.ndarray, rate: int) -> list[rtc.AudioFrame]:
+    samples = rate * FRAME_MS // 1000
+    return [
+        rtc.AudioFrame(pcm[i : i + samples].tobytes(), rate, 1, samples)
+        for i in range(0, len(pcm) - samples + 1, samples)
+    ]
+
+
+def _classify(pcm: np.ndarray, rate: int, config: AMDConfig) -> AMDResult:
+    detector = AnsweringMachineDetector(config)
+    samples = rate * FRAME_MS // 1000
+    audio = pcm.astype(np.float32) / 32768
+    for i in range(0, len(audio) - samples + 1, samples):
+        if detector.push(audio[i : i + samples], rate) is not None:
+            break
+    return detector.result or AMDResult(UNKNOWN, "audio_ended", detector.elapsed)
+
+
+async def _classify_with_vad(
+    pcm: np.ndarray, rate: int, config: AMDConfig, vad
+) -> AMDResult:
+    detector = AnsweringMachineDetector(config)
+
+    async def audio() -> AsyncIterator[rtc.AudioFrame]:
+        for frame in _frames(pcm, rate):
+            yield frame
+            await asyncio.sleep(0)
+
+    detector.start(audio(), vad)
+    result = await detector.decision(timeout=60)
+    await detector.aclose()
+    return result
+
+
+def _percentile(ordered: list[float], percentile: float) -> Optional[float]:
+    if not ordered:
+        return None
+    index = max(0, int(round(percentile / 100 * len(ordered))) - 1)
+    return round(ordered[index], 3)
+
+
+async def evaluate(
+    directory: str, config: Optional[AMDConfig] = None, vad=None
+) -> dict[str, Any]:
+    """
+    Classify every fixture and summarize accuracy and decision latency
+
+    Args:
+        directory: Directory with ``human/`` and ``machine/`` WAV files
+        config: Detector thresholds
+        vad: Segment speech with this VAD instead of an energy threshold
+    """
+    config = config or AMDConfig()
+    confusion = {
+        label: {HUMAN: 0, MACHINE: 0, UNKNOWN: 0} for label in (HUMAN, MACHINE)
+    }
+    latencies: list[float] = []
+    cpu = 0.0
+    files = []
+    for path, label in labeled_fixtures(Path(directory)):
+        pcm, rate = load_wav(path)
+        start = time.process_time()
+        if vad is None:
+            result = _classify(pcm, rate, config)
+        else:
+            result = await _classify_with_vad(pcm, rate, config, vad)
+        cpu += time.process_time() - start
+        confusion[label][result.label] += 1
+        latencies.append(result.decided_after)
+        predicted = MACHINE if result.is_machine else HUMAN
+        files.append(
+            {
+                "file": path.name,
+                "label": label,
+                "result": result.label,
+                "reason": result.reason,
+                "decided_after": result.decided_after,
+                "correct": predicted == label,
+            }
+        )
+
+    total = len(files)
+    latencies.sort()
+    return {
+        "files": total,
+        "accuracy": (
+            round(sum(f["correct"] for f in files) / total, 4) if total else None
+        ),
+        "confusion": confusion,
+        "decision_s": {
+            "p50": _percentile(latencies, 50),
+            "p95": _percentile(latencies, 95),
+            "max": latencies[-1] if latencies else None,
+        },
+        "cpu_ms_per_call": round(cpu * 1000 / total, 2) if total else None,
+        "results": files,
+    }
+
+
+def print_report(report: dict[str, Any]):
+    for row in report["results"]:
+        mark = " " if row["correct"] else "x"
+        print(
+            f"{mark} {row['label']:<8} {row['result']:<8} {row['reason']:<16} "
+            f"{row['decided_after']:>6.2f}s  {row['file']}"
+        )
+    summary = {key: value for key, value in report.items() if key != "results"}
+    print(json.dumps(summary, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Answering machine detection eval")
+    parser.add_argument("fixtures", help="Directory with human/ and machine/ WAVs")
+    parser.add_argument(
+        "--vad", action="store_true", help="Segment with Silero VAD (8 kHz)"
+    )
+    args = parser.parse_args()
+
+    vad = None
+    if args.vad:
+        from livekit.plugins import silero
+
+        vad = silero.VAD.load(sample_rate=8000)
+    print_report(asyncio.run(evaluate(args.fixtures, vad=vad)))
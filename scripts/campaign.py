@@ -0,0 +1,88 @@
+"""
+Run an outbound call campaign from a CSV or JSONL contact list
+
+Contacts are streamed from the file; each row needs a ``phone_number``
+and its other columns become the call's job metadata (org_id,
+voicemail_message, ...). Progress is checkpointed in SQLite: rerun the
+same command to resume a stopped campaign.
+
+Usage:
+    python scripts/campaign.py contacts.csv --campaign spring-recall --rate 5
+    python scripts/campaign.py contacts.jsonl --campaign spring-recall \\
+        --max-in-flight 20 --max-calls 40
+"""
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# Add main directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from telephony.api_client import close_api_pool
+from telephony.campaign import (
+    CampaignCheckpoint,
+    CampaignDialer,
+    RoomCapacity,
+    read_contacts,
+)
+
+load_dotenv()
+
+
+async def run_campaign(args: argparse.Namespace) -> dict:
+    checkpoint = CampaignCheckpoint(args.checkpoint)
+    capacity = None
+    if args.max_calls:
+        prefix = "" if args.count_all_rooms else None
+        capacity = RoomCapacity(args.max_calls, room_prefix=prefix)
+    dialer = CampaignDialer(
+        args.campaign,
+        checkpoint,
+        rate=args.rate,
+        burst=args.burst,
+        max_in_flight=args.max_in_flight,
+        max_attempts=args.max_attempts,
+        capacity=capacity,
+        redial_uncertain=args.redial_uncertain,
+    )
+    try:
+        stats = await dialer.run(read_contacts(args.contacts))
+        stats["checkpoint"] = await checkpoint.summary(args.campaign)
+        return stats
+    finally:
+        await checkpoint.close()
+        await close_api_pool()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Outbound call campaign dialer")
+    parser.add_argument("contacts", help="CSV or JSONL file with phone_number")
+    parser.add_argument("--campaign", required=True, help="Campaign ID (room prefix)")
+    parser.add_argument("--checkpoint", default="data/campaigns.db")
+    parser.add_argument("--rate", type=float, default=5.0, help="Dispatches/s")
+    parser.add_argument("--burst", type=float, default=1.0)
+    parser.add_argument("--max-in-flight", type=int, default=10)
+    parser.add_argument("--max-attempts", type=int, default=3)
+    parser.add_argument(
+        "--max-calls",
+        type=int,
+        default=0,
+        help="Calls the agent workers hold at once; pace to free slots",
+    )
+    parser.add_argument(
+        "--count-all-rooms",
+        action="store_true",
+        help="Count every active room against --max-calls, not just this campaign's",
+    )
+    parser.add_argument(
+        "--redial-uncertain",
+        action="store_true",
+        help="Redial contacts a crash left mid-dispatch",
+    )
+    args = parser.parse_args()
+
+    print(json.dumps(asyncio.run(run_campaign(args)), indent=2))
@@ -0,0 +1,299 @@
+"""
+Offline load test: N concurrent simulated calls through the real call setup
+
+Each call runs agent.call_setup.run_call with real storage, prompts,
+organization registry, turn metrics and setup timing, against fake rooms
+and participants. Calls then play user turns through a real AgentSession
+and VoiceAssistant whose STT, LLM and TTS are deterministic stub
+providers with configurable latency and token rate; replies play out in
+real time. Nothing talks to the network, so this runs in CI.
+
+Usage:
+    python scripts/load_test.py --sessions 50 --turns 5
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+import aiosqlite
+import psutil
+
+# Add main directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.call_setup import CallDependencies, CallState, run_call
+from config.org_registry import OrganizationRegistry
+from memory.conversation_memory import ConversationMemory
+from memory.storage import MemoryStorage
+from metrics.call_timing import SetupMetrics
+from metrics.histogram import LatencyHistogram
+from metrics.loop_watchdog import LoopWatchdog
+from prompts.manager import PromptManager
+from prompts.renderer import PromptRenderer
+from prompts.store import PromptStore
+from testing.fakes import (
+    FakeJobContext,
+    FakeParticipant,
+    FakeRoom,
+    SimulatedSession,
+    StubProviderLLM,
+    StubProviderSTT,
+    StubProviderTTS,
+    sip_participant,
+    voice_assistant,
+)
+
+ROOT = Path(__file__).parent.parent
+UTTERANCES = [
+    "What are your opening hours?",
+    "Where are you located?",
+    "Can I book an appointment for next week?",
+    "Do you take walk-ins?",
+    "Thanks, that's all.",
+]
+
+
+async def _run_session(
+    index: int,
+    deps: CallDependencies,
+    turns: int,
+    turn_gap: float,
+    connect_delay: float,
+    turn_latency: LatencyHistogram,
+):
+    """Set up one call and play its user turns"""
+    # Alternate outbound phone calls and web calls
+    if index % 2:
+        number = f"+1555{index:07d}"
+        participant = sip_participant(number=number)
+        metadata = json.dumps({"phone_number": number})
+    else:
+        participant = FakeParticipant(identity=f"web_{index}")
+        metadata = ""
+    ctx = FakeJobContext(
+        participant=participant,
+        room=FakeRoom(f"load-{index}"),
+        metadata=metadata,
+        connect_delay=connect_delay,
+        participant_delay=connect_delay,
+    )
+    state = await run_call(ctx, deps)
+
+    conversation_id = state.agent_context.conversation.conversation_id
+    for turn in range(turns):
+        await asyncio.sleep(turn_gap)
+        text = UTTERANCES[turn % len(UTTERANCES)]
+        start = time.perf_counter()
+        await deps.memory.add_message(conversation_id, "user", text)
+        response = await state.session.user_turn(text)
+        await deps.memory.add_message(conversation_id, "assistant", response)
+        turn_latency.record((time.perf_counter() - start) * 1000)
+
+    await hang_up(ctx, state)
+
+
+async def hang_up(ctx: FakeJobContext, state: CallState):
+    """
+    End a simulated call
+
+    The job shuts down first, freeing its slot; closing the session then
+    waits up to 2s for a last transcript, as when a real caller leaves.
+    """
+    await ctx.shutdown()
+    await state.session.aclose()
+
+
+async def _count_rows(db_path: str) -> dict[str, int]:
+    async with aiosqlite.connect(db_path) as conn:
+        counts = {}
+        for table in ("conversations", "messages", "context_snapshots", "turn_metrics"):
+            async with conn.execute(f"SELECT COUNT(*) FROM {table}") as cursor:
+                counts[table] = (await cursor.fetchone())[0]
+        return counts
+
+
+def build_dependencies(
+    directory: str,
+    stt_ms: float = 150,
+    llm_ttft_ms: float = 300,
+    tokens_per_second: float = 50,
+    tts_ttfb_ms: float = 120,
+    connect_ms: float = 50,
+) -> CallDependencies:
+    """Real storage, prompts and registry under ``directory``; stub models"""
+    storage = MemoryStorage(os.path.join(directory, "memory.db"))
+    prompt_store = PromptStore(
+        os.path.join(directory, "prompts.db"),
+        fallback=PromptManager(str(ROOT / "prompts" / "templates")),
+    )
+    org_registry = OrganizationRegistry(str(ROOT / "config" / "organizations.json"))
+    org_registry.load()
+
+    def create_session(ctx):
+        return SimulatedSession(
+            stt=StubProviderSTT(stt_ms / 1000),
+            llm=StubProviderLLM(
+                [llm_ttft_ms / 1000], tokens_per_second=tokens_per_second
+            ),
+            tts=StubProviderTTS(tts_ttfb_ms / 1000, frames=25),
+        )
+
+    async def dial(phone_number, room_name):
+        await asyncio.sleep(connect_ms / 1000)
+
+    return CallDependencies(
+        storage=storage,
+        memory=ConversationMemory(storage),
+        prompt_store=prompt_store,
+        renderer=PromptRenderer(),
+        org_registry=org_registry,
+        create_session=create_session,
+        create_agent=voice_assistant,
+        room_input_options=lambda ctx, profile: None,
+        dial=dial,
+        setup_metrics=SetupMetrics(),
+        metrics_enabled=True,
+        turn_metrics_enabled=True,
+        providers={"stt": "stub", "llm": "stub", "tts": "stub"},
+    )
+
+
+async def run_load_test(
+    sessions: int = 10,
+    turns: int = 3,
+    stt_ms: float = 150,
+    llm_ttft_ms: float = 300,
+    tokens_per_second: float = 50,
+    tts_ttfb_ms: float = 120,
+    connect_ms: float = 50,
+    turn_gap_ms: float = 0,
+    db_dir: Optional[str] = None,
+) -> dict[str, Any]:
+    """
+    Run ``sessions`` simulated calls concurrently and measure the worker
+
+    Returns:
+        Report with throughput, setup and turn latency percentiles, loop
+        lag, RSS growth per session and storage write rates
+    """
+    with tempfile.TemporaryDirectory(dir=db_dir) as tmp:
+        deps = build_dependencies(
+            tmp, stt_ms, llm_ttft_ms, tokens_per_second, tts_ttfb_ms, connect_ms
+        )
+        storage, prompt_store = deps.storage, deps.prompt_store
+        setup_metrics = deps.setup_metrics
+        await asyncio.gather(storage.initialize(), prompt_store.initialize())
+
+        process = psutil.Process()
+        watchdog = LoopWatchdog(report_interval=0)
+        turn_latency = LatencyHistogram()
+        rss_before = process.memory_info().rss
+
+        watchdog.start()
+        start = time.perf_counter()
+        try:
+            await asyncio.gather(
+                *(
+                    _run_session(
+                        i,
+                        deps,
+                        turns,
+                        turn_gap_ms / 1000,
+                        connect_ms / 1000,
+                        turn_latency,
+                    )
+                    for i in range(sessions)
+                )
+            )
+        finally:
+            elapsed = time.perf_counter() - start
+            watchdog.stop()
+        rss_after = process.memory_info().rss
+
+        rows = await _count_rows(storage.db_path)
+        turn_rollup = await storage.get_turn_latency_rollup("llm_provider")
+        loop = watchdog.report()
+
+    total_turns = sessions * turns
+    return {
+        "sessions": sessions,
+        "turns": total_turns,
+        "elapsed_s": round(elapsed, 3),
+        "throughput": {
+            "calls_per_s": round(sessions / elapsed, 2),
+            "turns_per_s": round(total_turns / elapsed, 2),
+        },
+        "setup_ms": setup_metrics.report(),
+        "turn_ms": turn_latency.summary(),
+        "turn_total_ms": turn_rollup[0] if turn_rollup else {},
+        "loop": {
+            "lag_ms": loop["lag_ms"],
+            "stalls": loop["stalls"],
+            "worst": loop["worst"][:3],
+        },
+        "rss_per_session_kb": round((rss_after - rss_before) / sessions / 1024, 1),
+        "storage": {
+            "rows": rows,
+            "rows_per_s": round(sum(rows.values()) / elapsed, 1),
+        },
+    }
+
+
+def print_report(report: dict[str, Any]):
+    """Print the parts of a report people look at first, then the JSON"""
+    print(
+        f"\n{report['sessions']} calls, {report['turns']} turns "
+        f"in {report['elapsed_s']}s "
+        f"({report['throughput']['turns_per_s']} turns/s)"
+    )
+    for phase, summary in report["setup_ms"].items():
+        print(
+            f"  setup {phase:<22} p50={summary['p50']:>8.1f}ms "
+            f"p95={summary['p95']:>8.1f}ms p99={summary['p99']:>8.1f}ms"
+        )
+    turn = report["turn_ms"]
+    if turn.get("count"):
+        print(
+            f"  turn  {'end_to_end':<22} p50={turn['p50']:>8.1f}ms "
+            f"p95={turn['p95']:>8.1f}ms p99={turn['p99']:>8.1f}ms"
+        )
+    lag = report["loop"]["lag_ms"]
+    if lag.get("count"):
+        print(f"  loop lag p99={lag['p99']}ms max={lag['max']}ms")
+    print(f"  RSS per session: {report['rss_per_session_kb']} KiB")
+    print(f"  storage writes: {report['storage']['rows_per_s']} rows/s")
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline multi-session load test")
+    parser.add_argument("--sessions", type=int, default=10)
+    parser.add_argument("--turns", type=int, default=3)
+    parser.add_argument("--stt-ms", type=float, default=150)
+    parser.add_argument("--llm-ttft-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-second", type=float, default=50)
+    parser.add_argument("--tts-ttfb-ms", type=float, default=120)
+    parser.add_argument("--connect-ms", type=float, default=50)
+    parser.add_argument("--turn-gap-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    print_report(
+        asyncio.run(
+            run_load_test(
+                sessions=args.sessions,
+                turns=args.turns,
+                stt_ms=args.stt_ms,
+                llm_ttft_ms=args.llm_ttft_ms,
+                tokens_per_second=args.tokens_per_second,
+                tts_ttfb_ms=args.tts_ttfb_ms,
+                connect_ms=args.connect_ms,
+                turn_gap_ms=args.turn_gap_ms,
+            )
+        )
+    )
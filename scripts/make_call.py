@@ -1,9 +1,14 @@
 """Script to make outbound phone calls"""
 import asyncio
-import os
 import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from livekit import api
+
+# Add main directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from telephony.api_client import close_api_pool
+from telephony.outbound_handler import dispatch_outbound_call
 
 load_dotenv()
 
@@ -16,12 +21,6 @@ async def make_call(phone_number: str):
         phone_number: Phone number to call (format: +1234567890)
     """
     
-    livekit_api = api.LiveKitAPI(
-        os.getenv("LIVEKIT_URL"),
-        os.getenv("LIVEKIT_API_KEY"),
-        os.getenv("LIVEKIT_API_SECRET"),
-    )
-    
     try:
         # Create unique room name
         room_name = f"call-{phone_number.replace('+', '')}"
@@ -31,13 +30,7 @@ async def make_call(phone_number: str):
         print(f"   Room: {room_name}")
         
         # Dispatch the agent with phone number in metadata
-        dispatch = await livekit_api.agent_dispatch.create_dispatch(
-            api.CreateAgentDispatchRequest(
-                agent_name="my-voice-agent",
-                room=room_name,
-                metadata={"phone_number": phone_number},
-            )
-        )
+        dispatch = await dispatch_outbound_call(phone_number, room_name)
         
         print(f"\nAgent dispatched successfully!")
         print(f"   Dispatch ID: {dispatch.id}")
@@ -47,7 +40,7 @@ async def make_call(phone_number: str):
         print(f"\n Error: {e}")
         sys.exit(1)
     finally:
-        await livekit_api.aclose()
+        await close_api_pool()
 
 
 if __name__ == "__main__":
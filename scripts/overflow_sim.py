@@ -0,0 +1,221 @@
+"""
+Offline simulation of a saturated worker with the overflow queue
+
+``calls`` inbound phone calls arrive one after another at a worker with
+``slots`` full sessions, which start talking once all have arrived.
+Every call goes through agent.call_setup.run_call with real storage and
+prompts and a real AgentSession on stub STT/LLM/TTS (see load_test.py).
+Callers beyond the slots wait on hold audio; each full session plays
+``turns`` user turns and hangs up, handing its slot to the next caller.
+Callers whose number is in ``vip`` have queue_priority 1 in their profile.
+
+Reports the queue's depth and wait-time metrics and the order calls were
+served in, then the CPU cost per call-second of held calls and of full
+sessions, each measured with only that kind of call running. Stub
+sessions skip VAD, noise cancellation and model inference, so their cost
+is a lower bound of a real session's.
+
+Usage:
+    python scripts/overflow_sim.py --calls 40 --slots 8 --policy priority
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+
+# Add main directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from agent.call_setup import CallDependencies, run_call
+from audio.tts_cache import CachedAudio
+from scripts.load_test import UTTERANCES, build_dependencies, hang_up
+from telephony.overflow import (
+    FIFO,
+    CallAbandoned,
+    OverflowQueue,
+    hold_frames,
+    hold_tone,
+)
+from testing.fakes import FakeJobContext, FakeRoom, sip_participant
+
+
+def _number(index: int) -> str:
+    return f"+1555{index:07d}"
+
+
+def hold_player(audio: CachedAudio):
+    """play_hold that paces frames as rtc.AudioSource.capture_frame would"""
+    frames = hold_frames(audio)
+
+    async def play_hold(ctx):
+        while True:
+            for frame in frames:
+                await asyncio.sleep(frame.samples_per_channel / frame.sample_rate)
+
+    return play_hold
+
+
+def _context(index: int) -> FakeJobContext:
+    return FakeJobContext(
+        participant=sip_participant(number=_number(index)),
+        room=FakeRoom(f"overflow-{index}"),
+    )
+
+
+async def _talk(deps: CallDependencies, state, turns: int):
+    conversation_id = state.agent_context.conversation.conversation_id
+    for turn in range(turns):
+        text = UTTERANCES[turn % len(UTTERANCES)]
+        await deps.memory.add_message(conversation_id, "user", text)
+        response = await state.session.user_turn(text)
+        await deps.memory.add_message(conversation_id, "assistant", response)
+
+
+async def _queue_run(
+    deps: CallDependencies, calls: int, turns: int, arrival_ms: float
+) -> list[int]:
+    """
+    All calls through the queue; returns call indexes in service order
+
+    Each call arrives ``arrival_ms`` after the previous one reached the
+    queue, and full sessions start talking once every call has arrived,
+    so the service order depends only on the slots and the policy.
+    """
+    granted_at: dict[int, float] = {}
+    arrived = asyncio.Event()
+
+    async def call(index: int):
+        ctx = _context(index)
+        state = await run_call(ctx, deps)
+        granted_at[index] = state.slot.granted_at
+        await arrived.wait()
+        await _talk(deps, state, turns)
+        await hang_up(ctx, state)
+
+    tasks = []
+    for index in range(calls):
+        await asyncio.sleep(arrival_ms / 1000)
+        entered = deps.overflow.entered
+        task = asyncio.ensure_future(call(index))
+        tasks.append(task)
+        while deps.overflow.entered == entered and not task.done():
+            await asyncio.sleep(0.001)
+    arrived.set()
+    await asyncio.gather(*tasks)
+    return sorted(granted_at, key=granted_at.get)
+
+
+async def _cpu_per_call_second(
+    deps: CallDependencies, calls: int, seconds: float, held: bool
+) -> float:
+    """CPU ms per call-second with ``calls`` calls all held or all talking"""
+    deps.overflow = OverflowQueue(slots=0 if held else calls)
+    contexts = [_context(1000 + i) for i in range(calls)]
+    started = asyncio.Event()
+    stop = asyncio.Event()
+
+    async def call(ctx: FakeJobContext):
+        try:
+            state = await run_call(ctx, deps)
+        except CallAbandoned:
+            return
+        await started.wait()
+        while not stop.is_set():
+            await _talk(deps, state, 1)
+        await hang_up(ctx, state)
+
+    tasks = [asyncio.ensure_future(call(ctx)) for ctx in contexts]
+    # Let every call finish setup (or reach the queue) before measuring
+    while deps.overflow.entered < calls:
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.1)
+    started.set()
+    cpu = time.process_time()
+    await asyncio.sleep(seconds)
+    cpu = time.process_time() - cpu
+
+    stop.set()
+    for ctx in contexts:
+        # Held callers hang up
+        ctx.room.emit("participant_disconnected", ctx.participant)
+    await asyncio.gather(*tasks)
+    return cpu * 1000 / (calls * seconds)
+
+
+async def simulate(
+    calls: int = 20,
+    slots: int = 4,
+    turns: int = 2,
+    policy: str = FIFO,
+    vip: tuple[int, ...] = (),
+    arrival_ms: float = 5,
+    cpu_calls: int = 20,
+    cpu_seconds: float = 2.0,
+    stt_ms: float = 150,
+    llm_ttft_ms: float = 300,
+    tts_ttfb_ms: float = 120,
+) -> dict[str, Any]:
+    """Run the queue scenario, then measure held and full-session CPU"""
+    with tempfile.TemporaryDirectory() as tmp:
+        deps = build_dependencies(
+            tmp, stt_ms=stt_ms, llm_ttft_ms=llm_ttft_ms, tts_ttfb_ms=tts_ttfb_ms
+        )
+        await asyncio.gather(deps.storage.initialize(), deps.prompt_store.initialize())
+        for index in vip:
+            participant = sip_participant(number=_number(index))
+            await deps.storage.save_user_profile(
+                participant.identity, {"preferences": {"queue_priority": 1}}
+            )
+        deps.play_hold = hold_player(hold_tone())
+
+        queue = deps.overflow = OverflowQueue(slots, policy=policy)
+        start = time.perf_counter()
+        served = await _queue_run(deps, calls, turns, arrival_ms)
+        elapsed = time.perf_counter() - start
+
+        held_cpu = await _cpu_per_call_second(deps, cpu_calls, cpu_seconds, True)
+        session_cpu = await _cpu_per_call_second(deps, cpu_calls, cpu_seconds, False)
+        await deps.storage.close()
+
+    return {
+        "calls": calls,
+        "elapsed_s": round(elapsed, 3),
+        "queue": queue.stats(),
+        "served": served,
+        "cpu_ms_per_call_s": {
+            "held": round(held_cpu, 3),
+            "session": round(session_cpu, 3),
+            "ratio": round(session_cpu / held_cpu, 1) if held_cpu else None,
+        },
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Overflow queue simulation")
+    parser.add_argument("--calls", type=int, default=20)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--turns", type=int, default=2)
+    parser.add_argument("--policy", default=FIFO, choices=["fifo", "priority"])
+    parser.add_argument(
+        "--vip", default="", help="Comma-separated call indexes with priority 1"
+    )
+    parser.add_argument("--cpu-calls", type=int, default=20)
+    parser.add_argument("--cpu-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    report = asyncio.run(
+        simulate(
+            calls=args.calls,
+            slots=args.slots,
+            turns=args.turns,
+            policy=args.policy,
+            vip=tuple(int(i) for i in args.vip.split(",") if i.strip()),
+            cpu_calls=args.cpu_calls,
+            cpu_seconds=args.cpu_seconds,
+        )
+    )
+    print(json.dumps(report, indent=2))
@@ -0,0 +1,33 @@
+"""Report call setup latency percentiles merged from the workers' logs"""
+import argparse
+import fileinput
+import sys
+from pathlib import Path
+
+# Add main directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from metrics.call_timing import merge_logged
+
+
+def report(paths: list[str]):
+    """Print percentiles of every setup phase across all logged calls"""
+    with fileinput.input(paths or ["-"]) as lines:
+        summaries = merge_logged(lines).report()
+    if not summaries:
+        print("No setup histograms logged (set CALL_METRICS_ENABLED=true)")
+        return
+
+    print(f"{'phase':<24} {'calls':>7} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for phase, row in summaries.items():
+        print(
+            f"{phase:<24} {row['count']:>7} {row['mean']:>8.0f} "
+            f"{row['p50']:>8.0f} {row['p95']:>8.0f} {row['p99']:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("logs", nargs="*", help="Log files (default: stdin)")
+    args = parser.parse_args()
+    report(args.logs)
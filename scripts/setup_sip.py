@@ -1,95 +1,85 @@
-"""Setup SIP trunks via API"""
+"""Provision per-organization SIP trunks and dispatch rules via API"""
+import argparse
 import asyncio
 import json
-import os
+import sys
+from pathlib import Path
 from dotenv import load_dotenv
-from livekit import api
+
+# Add main directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from telephony.api_client import close_api_pool
+from telephony.sip_provisioning import SIPProvisioner, desired_state
 
 load_dotenv()
 
 
-async def create_inbound_trunk():
-    """Create inbound SIP trunk"""
-    
-    # Load config
-    with open("config/inbound_trunk.json", "r") as f:
-        config = json.load(f)
-    
-    livekit_api = api.LiveKitAPI(
-        os.getenv("LIVEKIT_URL"),
-        os.getenv("LIVEKIT_API_KEY"),
-        os.getenv("LIVEKIT_API_SECRET"),
-    )
-    
-    try:
-        trunk = await livekit_api.sip.create_sip_inbound_trunk(
-            api.CreateSIPInboundTrunkRequest(**config)
-        )
-        print(f"Inbound trunk created: {trunk.sip_trunk_id}")
-        return trunk
-    finally:
-        await livekit_api.aclose()
+async def setup_all(
+    config_dir: str = "config",
+    organizations: str = None,
+    orgs: list[str] = None,
+    dry_run: bool = False,
+    concurrency: int = 8,
+) -> dict:
+    """
+    Sync every organization's SIP trunks and dispatch rule
 
+    Safe to re-run: existing resources are matched by name and only
+    changed ones are updated.
+    """
+    desired = desired_state(config_dir, organizations)
+    scope = f"{len(orgs)} organizations" if orgs else "all organizations"
+    action = "Planning" if dry_run else "Syncing"
+    print(f"\n{action} SIP trunks and rules for {scope}...\n")
 
-async def create_outbound_trunk():
-    """Create outbound SIP trunk"""
-    
-    # Load config
-    with open("config/outbound_trunk.json", "r") as f:
-        config = json.load(f)
-    
-    livekit_api = api.LiveKitAPI(
-        os.getenv("LIVEKIT_URL"),
-        os.getenv("LIVEKIT_API_KEY"),
-        os.getenv("LIVEKIT_API_SECRET"),
-    )
-    
+    # One keep-alive connection pool serves every request
     try:
-        trunk = await livekit_api.sip.create_sip_outbound_trunk(
-            api.CreateSIPOutboundTrunkRequest(**config)
+        report = await SIPProvisioner(concurrency=concurrency).sync(
+            desired, dry_run=dry_run, orgs=set(orgs) if orgs else None
         )
-        print(f"Outbound trunk created: {trunk.sip_trunk_id}")
-        return trunk
     finally:
-        await livekit_api.aclose()
+        await close_api_pool()
 
+    for change in report.changes:
+        print(f"  {change.describe()}")
+    if not report.changes:
+        print("  Nothing to change")
+    for failure in report.failed:
+        print(f"  FAILED {failure}")
 
-async def create_dispatch_rule():
-    """Create dispatch rule for inbound calls"""
-    
-    # Load config
-    with open("config/dispatch_rules.json", "r") as f:
-        config = json.load(f)
-    
-    livekit_api = api.LiveKitAPI(
-        os.getenv("LIVEKIT_URL"),
-        os.getenv("LIVEKIT_API_KEY"),
-        os.getenv("LIVEKIT_API_SECRET"),
-    )
-    
-    try:
-        rule = await livekit_api.sip.create_sip_dispatch_rule(
-            api.CreateSIPDispatchRuleRequest(**config)
-        )
-        print(f"Dispatch rule created: {rule.sip_dispatch_rule_id}")
-        return rule
-    finally:
-        await livekit_api.aclose()
+    result = report.to_dict()
+    print(f"\n{json.dumps({k: v for k, v in result.items() if k != 'changes'})}")
+    return result
 
 
-async def setup_all():
-    """Setup all SIP components"""
-    print("\nSetting up SIP trunks and rules...\n")
-    
-    inbound = await create_inbound_trunk()
-    outbound = await create_outbound_trunk()
-    dispatch = await create_dispatch_rule()
-    
-    print(f"\nSetup complete!")
-    print(f"\nAdd these to your .env file:")
-    print(f"SIP_TRUNK_ID={inbound.sip_trunk_id}")
-    print(f"SIP_OUTBOUND_TRUNK_ID={outbound.sip_trunk_id}")
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--config-dir", default="config")
+    parser.add_argument(
+        "--organizations",
+        help="Organizations JSON (default: <config-dir>/organizations.json)",
+    )
+    parser.add_argument("--orgs", nargs="*", help="Only these org IDs")
+    parser.add_argument(
+        "--dry-run", action="store_true", help="Print the changes without applying"
+    )
+    parser.add_argument(
+        "--concurrency", type=int, default=8, help="Changes in flight at once"
+    )
+    args = parser.parse_args()
+
+    result = asyncio.run(
+        setup_all(
+            args.config_dir,
+            args.organizations,
+            args.orgs,
+            dry_run=args.dry_run,
+            concurrency=args.concurrency,
+        )
+    )
+    sys.exit(1 if result["failed"] else 0)
 
 
 if __name__ == "__main__":
-    asyncio.run(setup_all())
\ No newline at end of file
+    main()
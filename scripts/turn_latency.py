@@ -0,0 +1,43 @@
+"""Report per-turn latency percentiles from the turn_metrics table"""
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add main directory to path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from memory.storage import MemoryStorage
+
+
+async def report(group_by: str, metric: str, since: str = None, db_path: str = None):
+    """Print percentiles of a latency metric per group"""
+    storage = MemoryStorage(db_path or "data/memory.db")
+    await storage.initialize()
+
+    rows = await storage.get_turn_latency_rollup(group_by, metric, since=since)
+    if not rows:
+        print("No turn metrics recorded (set TURN_METRICS_ENABLED=true)")
+        return
+
+    print(f"\n{metric} by {group_by}" + (f" since {since}" if since else ""))
+    print(f"{'':<32} {'turns':>7} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}")
+    for row in rows:
+        print(
+            f"{str(row[group_by]):<32} {row['count']:>7} {row['mean']:>8.0f} "
+            f"{row['p50']:>8.0f} {row['p95']:>8.0f} {row['p99']:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--by",
+        default="llm_provider",
+        choices=["stt_provider", "llm_provider", "tts_provider", "org_id", "hour"],
+    )
+    parser.add_argument("--metric", default="total_ms")
+    parser.add_argument("--since", help="ISO timestamp, e.g. 2026-01-01T00")
+    parser.add_argument("--db", help="Memory database path (default data/memory.db)")
+    args = parser.parse_args()
+    asyncio.run(report(args.by, args.metric, args.since, args.db))
@@ -0,0 +1,395 @@
+"""Answering machine detection on the first seconds of an outbound call"""
+import asyncio
+import logging
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterable, Optional
+
+import numpy as np
+from livekit import rtc
+from livekit.agents import vad as agents_vad
+
+logger = logging.getLogger(__name__)
+
+HUMAN = "human"
+MACHINE = "machine"
+# Not enough evidence either way; callers treat it like a human
+UNKNOWN = "unknown"
+
+
+@dataclass(frozen=True)
+class AMDConfig:
+    """Thresholds of the detector, in seconds of call audio unless noted"""
+
+    # No speech this long after answering
+    initial_silence: float = 2.5
+    # A greeting running longer than this is a recorded one
+    max_greeting: float = 1.5
+    # ...as is one with more words than this
+    max_words: int = 4
+    # Silence after a short greeting: a human waiting for an answer
+    after_greeting_silence: float = 0.8
+    # Give up and report UNKNOWN after this much audio
+    max_analysis: float = 5.0
+    # Word segmentation within speech (Asterisk AMD style)
+    min_word: float = 0.1
+    between_words_silence: float = 0.05
+    # Energy floor (dBFS) for speech without a VAD, and for words within it
+    silence_dbfs: float = -40.0
+    # Frames this far below the loudest speech so far are a gap between words
+    word_dip_db: float = 15.0
+    # VAD probability counted as speech
+    speech_probability: float = 0.5
+    # Beep: one dominant tone in this band, sustained this long (dBFS floor)
+    beep_min_hz: float = 400.0
+    beep_max_hz: float = 2500.0
+    beep_duration: float = 0.15
+    beep_tonality: float = 0.8
+    beep_dbfs: float = -35.0
+    # A beep's envelope is steady; two close tones beat (US ringback is
+    # 440+480Hz, beating at 40Hz). Envelope variation (std/mean) above this
+    # is a call progress tone, neither a beep nor speech
+    beep_max_beat: float = 0.25
+    # Audio the tone is measured over; long enough to resolve speech harmonics
+    tone_window: float = 0.032
+    # After a machine greeting, this much silence means it is recording
+    end_of_greeting_silence: float = 1.5
+    # Leave the message anyway once the greeting has run this long
+    max_greeting_wait: float = 30.0
+
+
+@dataclass(frozen=True)
+class AMDResult:
+    """What answered, why, and after how much audio"""
+
+    label: str
+    reason: str
+    # Seconds of call audio analyzed when the decision was made
+    decided_after: float
+    words: int = 0
+    greeting: float = 0.0
+
+    @property
+    def is_machine(self) -> bool:
+        return self.label == MACHINE
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def frame_samples(frame: rtc.AudioFrame) -> np.ndarray:
+    """A frame's samples as mono float32 in -1..1"""
+    samples = np.frombuffer(frame.data, dtype=np.int16).astype(np.float32) / 32768
+    if frame.num_channels > 1:
+        samples = samples.reshape(-1, frame.num_channels).mean(axis=1)
+    return samples
+
+
+def level_dbfs(samples: np.ndarray) -> float:
+    rms = float(np.sqrt(np.mean(samples * samples))) if len(samples) else 0.0
+    return 20 * np.log10(max(rms, 1e-9))
+
+
+def tone(samples: np.ndarray, sample_rate: int) -> tuple[float, float]:
+    """Dominant frequency and the share of energy within 2 bins of it"""
+    spectrum = np.abs(np.fft.rfft(samples * np.hanning(len(samples)))) ** 2
+    total = spectrum.sum()
+    if total <= 0:
+        return 0.0, 0.0
+    peak = int(np.argmax(spectrum))
+    share = spectrum[max(peak - 2, 0) : peak + 3].sum() / total
+    return peak * sample_rate / len(samples), float(share)
+
+
+def envelope_variation(samples: np.ndarray) -> float:
+    """Spread of the amplitude envelope (std/mean), away from the edges"""
+    n = len(samples)
+    weights = np.zeros(n)
+    weights[0] = 1
+    weights[1 : (n + 1) // 2] = 2
+    if n % 2 == 0:
+        weights[n // 2] = 1
+    # Magnitude of the analytic signal
+    envelope = np.abs(np.fft.ifft(np.fft.fft(samples) * weights))
+    envelope = envelope[n // 8 : n - n // 8]
+    mean = float(envelope.mean()) if len(envelope) else 0.0
+    return float(envelope.std()) / mean if mean > 0 else 0.0
+
+
+class AnsweringMachineDetector:
+    """
+    Classifies who answered an outbound call from its first seconds of audio
+
+    Frames come in with a VAD speech probability (or, without a VAD, an
+    energy threshold decides). Within speech, words are split on energy
+    dips. The decision follows the usual answering machine heuristics:
+
+    - a beep, or a greeting longer than ``max_greeting`` or with more
+      than ``max_words`` words: MACHINE (ringback and other beating
+      dual tones are neither beeps nor speech)
+    - a short greeting followed by ``after_greeting_silence``: HUMAN
+      ("Hello?" and a pause for the caller to speak)
+    - ``initial_silence`` without speech, or no decision within
+      ``max_analysis``: UNKNOWN
+
+    After a MACHINE decision the detector keeps listening so a message
+    can be left once the greeting is over: ready_for_message is set on a
+    beep, after ``end_of_greeting_silence``, or after
+    ``max_greeting_wait``.
+
+    push() is synchronous and cheap (one FFT per frame); start() feeds it
+    from a participant's audio in a task.
+    """
+
+    def __init__(self, config: Optional[AMDConfig] = None):
+        self.config = config or AMDConfig()
+        self.result: Optional[AMDResult] = None
+        self.elapsed = 0.0
+        self.beep = False
+        self._greeting_start: Optional[float] = None
+        self._last_speech: Optional[float] = None
+        self._words = 0
+        self._in_word = False
+        self._word_time = 0.0
+        self._gap_time = 0.0
+        self._peak_dbfs = -120.0
+        self._tone_time = 0.0
+        self._tone_hz = 0.0
+        self._recent = np.zeros(0, dtype=np.float32)
+        self._decided = asyncio.Event()
+        self._message_ready = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def ready_for_message(self) -> bool:
+        return self._message_ready.is_set()
+
+    def push(
+        self,
+        samples: np.ndarray,
+        sample_rate: int,
+        speech_probability: Optional[float] = None,
+    ) -> Optional[AMDResult]:
+        """
+        Analyze the next frame of call audio
+
+        Args:
+            samples: Mono float32 samples (see frame_samples())
+            sample_rate: Sample rate of the samples
+            speech_probability: The VAD's probability for the frame, if any
+
+        Returns:
+            The decision, once made
+        """
+        config = self.config
+        duration = len(samples) / sample_rate
+        self.elapsed += duration
+        dbfs = level_dbfs(samples)
+        if speech_probability is None:
+            speaking = dbfs >= config.silence_dbfs
+        else:
+            speaking = speech_probability >= config.speech_probability
+
+        if self._track_beep(samples, sample_rate, dbfs, duration):
+            speaking = False
+        if speaking:
+            if self._greeting_start is None:
+                self._greeting_start = self.elapsed - duration
+            self._last_speech = self.elapsed
+            self._peak_dbfs = max(self._peak_dbfs, dbfs)
+        voiced = (
+            speaking
+            and dbfs >= config.silence_dbfs
+            and dbfs >= self._peak_dbfs - config.word_dip_db
+        )
+        self._track_words(voiced, duration)
+
+        if self.result is None:
+            self._decide()
+        else:
+            self._check_message_window()
+        return self.result
+
+    def _track_beep(
+        self, samples: np.ndarray, sample_rate: int, dbfs: float, duration: float
+    ) -> bool:
+        """Track a sustained beep; True if the frame is a call progress tone"""
+        config = self.config
+        window = int(config.tone_window * sample_rate)
+        self._recent = np.concatenate((self._recent, samples))[-window:]
+        hz, share = 0.0, 0.0
+        if dbfs >= config.beep_dbfs and len(self._recent) == window:
+            hz, share = tone(self._recent, sample_rate)
+        tonal = (
+            share >= config.beep_tonality
+            and config.beep_min_hz <= hz <= config.beep_max_hz
+        )
+        progress_tone = (
+            tonal and envelope_variation(self._recent) > config.beep_max_beat
+        )
+        steady = abs(hz - self._tone_hz) <= 2 * sample_rate / window
+        if tonal and not progress_tone:
+            self._tone_time = self._tone_time + duration if steady else duration
+            self._tone_hz = hz
+        else:
+            self._tone_time, self._tone_hz = 0.0, 0.0
+        if self._tone_time >= config.beep_duration:
+            self.beep = True
+        return progress_tone
+
+    def _track_words(self, voiced: bool, duration: float):
+        config = self.config
+        if voiced:
+            self._word_time += duration
+            self._gap_time = 0.0
+            if not self._in_word and self._word_time >= config.min_word:
+                self._in_word = True
+                self._words += 1
+        else:
+            self._gap_time += duration
+            if self._gap_time >= config.between_words_silence:
+                self._in_word = False
+                self._word_time = 0.0
+
+    def _decide(self):
+        greeting = 0.0
+        if self._greeting_start is not None:
+            greeting = self._last_speech - self._greeting_start
+        decision = self._classify(greeting)
+        if decision is None and self.elapsed >= self.config.max_analysis:
+            decision = (UNKNOWN, "max_analysis")
+        if decision is None:
+            return
+
+        label, reason = decision
+        self.result = AMDResult(
+            label, reason, round(self.elapsed, 3), self._words, round(greeting, 3)
+        )
+        self._decided.set()
+        if label == MACHINE:
+            self._check_message_window()
+
+    def _classify(self, greeting: float) -> Optional[tuple[str, str]]:
+        """(label, reason) once the audio so far is conclusive"""
+        config = self.config
+        if self.beep:
+            return MACHINE, "beep"
+        if greeting > config.max_greeting:
+            return MACHINE, "long_greeting"
+        if self._words > config.max_words:
+            return MACHINE, "many_words"
+        if self._greeting_start is None:
+            if self.elapsed >= config.initial_silence:
+                return UNKNOWN, "initial_silence"
+            return None
+        if self.elapsed - self._last_speech >= config.after_greeting_silence:
+            return HUMAN, "short_greeting"
+        return None
+
+    def _check_message_window(self):
+        config = self.config
+        if not self.result.is_machine or self._message_ready.is_set():
+            return
+        silence = self.elapsed - (self._last_speech or 0.0)
+        if (
+            self.beep
+            or silence >= config.end_of_greeting_silence
+            or self.elapsed - self.result.decided_after >= config.max_greeting_wait
+        ):
+            self._message_ready.set()
+
+    def start(
+        self,
+        audio: AsyncIterable[rtc.AudioFrame],
+        vad: Optional[agents_vad.VAD] = None,
+    ):
+        """Analyze frames from ``audio`` in a task, segmented by ``vad`` if set"""
+        self._task = asyncio.create_task(self._run(audio, vad))
+
+    async def _run(
+        self, audio: AsyncIterable[rtc.AudioFrame], vad: Optional[agents_vad.VAD]
+    ):
+        try:
+            if vad is None:
+                async for frame in audio:
+                    self.push(frame_samples(frame), frame.sample_rate)
+                return
+
+            stream = vad.stream()
+
+            async def forward():
+                async for frame in audio:
+                    stream.push_frame(frame)
+                stream.end_input()
+
+            forwarding = asyncio.create_task(forward())
+            try:
+                async for event in stream:
+                    if event.type != agents_vad.VADEventType.INFERENCE_DONE:
+                        continue
+                    for frame in event.frames:
+                        self.push(
+                            frame_samples(frame), frame.sample_rate, event.probability
+                        )
+            finally:
+                forwarding.cancel()
+                await stream.aclose()
+        finally:
+            # The audio ended (or failed) before a decision could be made
+            if self.result is None:
+                self.result = AMDResult(UNKNOWN, "audio_ended", self.elapsed)
+            self._decided.set()
+            self._message_ready.set()
+
+    async def decision(self, timeout: Optional[float] = None) -> AMDResult:
+        """
+        Wait for the decision
+
+        Args:
+            timeout: Wall-clock limit, for when no audio arrives at all
+                (defaults to ``max_analysis`` plus 2s)
+        """
+        if timeout is None:
+            timeout = self.config.max_analysis + 2.0
+        try:
+            await asyncio.wait_for(self._decided.wait(), timeout)
+        except asyncio.TimeoutError:
+            self.result = self.result or AMDResult(UNKNOWN, "no_audio", self.elapsed)
+        return self.result
+
+    async def wait_for_message_window(self, timeout: Optional[float] = None):
+        """
+        Wait until the machine's greeting is over (see ready_for_message)
+
+        Args:
+            timeout: Wall-clock limit (defaults to ``max_greeting_wait``
+                plus 2s)
+        """
+        if timeout is None:
+            timeout = self.config.max_greeting_wait + 2.0
+        try:
+            await asyncio.wait_for(self._message_ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            self._message_ready.set()
+
+    async def aclose(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+
+async def participant_audio(
+    participant: rtc.RemoteParticipant, sample_rate: int = 16000
+) -> AsyncIterable[rtc.AudioFrame]:
+    """Frames of a participant's microphone track, once it is published"""
+    stream = rtc.AudioStream.from_participant(
+        participant=participant,
+        track_source=rtc.TrackSource.SOURCE_MICROPHONE,
+        sample_rate=sample_rate,
+        num_channels=1,
+    )
+    try:
+        async for event in stream:
+            yield event.frame
+    finally:
+        await stream.aclose()
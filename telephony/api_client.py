@@ -0,0 +1,217 @@
+"""Shared LiveKit server API client for dialing and SIP administration"""
+import asyncio
+import json
+import logging
+import os
+import random
+import threading
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Optional, TypeVar
+
+import aiohttp
+from livekit import api
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Statuses meaning the server did not act on the request
+_NOT_PROCESSED = (429, 503)
+
+
+def is_retryable(exc: BaseException, idempotent: bool) -> bool:
+    """
+    Whether a failed API call may be sent again
+
+    Requests that never reached the server, or that it turned away
+    (429/503), are always safe to retry. Other transport errors, timeouts
+    and 5xx responses leave it unknown whether the server acted, so they
+    are only retried for idempotent operations; retrying a dial could
+    ring the callee twice.
+    """
+    if isinstance(exc, aiohttp.ClientConnectorError):
+        return True
+    if isinstance(exc, api.TwirpError):
+        return exc.status in _NOT_PROCESSED or (idempotent and exc.status >= 500)
+    return idempotent and isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+@dataclass
+class _LoopClient:
+    """A LiveKitAPI and its session, bound to the event loop that made them"""
+
+    client: api.LiveKitAPI
+    session: aiohttp.ClientSession
+    semaphore: asyncio.Semaphore
+
+
+class LiveKitAPIPool:
+    """
+    One LiveKitAPI per event loop over a keep-alive HTTP session
+
+    The client and its aiohttp session are created on first use, so
+    constructing the pool is free. Connections are kept alive for
+    ``keepalive`` seconds and at most ``max_connections`` are open, so
+    consecutive calls skip the TCP/TLS handshake. ``max_concurrency``
+    bounds the calls in flight; callers beyond it wait their turn.
+
+    call() retries retryable failures (see is_retryable()) up to
+    ``max_retries`` times, sleeping a full-jitter exponential backoff
+    between attempts: a random time up to ``backoff * 2**attempt``,
+    capped at ``max_backoff``.
+
+    An aiohttp session belongs to the event loop that created it, so each
+    loop gets its own client, session and ``max_concurrency`` bound, e.g.
+    each job when jobs run as threads of one process. aclose() closes the
+    calling loop's client only (the next call from that loop reopens
+    one), so one job ending does not cut off the others.
+
+    Usage::
+
+        pool = get_api_pool()
+        info = await pool.call(
+            lambda lkapi: lkapi.sip.create_sip_participant(request),
+            idempotent=False,
+        )
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        api_key: Optional[str] = None,
+        api_secret: Optional[str] = None,
+        max_concurrency: int = 10,
+        max_connections: int = 20,
+        keepalive: float = 30.0,
+        timeout: float = 10.0,
+        max_retries: int = 3,
+        backoff: float = 0.1,
+        max_backoff: float = 2.0,
+        jitter: Callable[[], float] = random.random,
+    ):
+        self.url = url
+        self.api_key = api_key
+        self.api_secret = api_secret
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.keepalive = keepalive
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._jitter = jitter
+        self._clients: dict[asyncio.AbstractEventLoop, _LoopClient] = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+        self.failures = 0
+        self.sessions_created = 0
+
+    def client(self) -> api.LiveKitAPI:
+        """The running loop's client, created on first use"""
+        return self._loop_client().client
+
+    def _loop_client(self) -> _LoopClient:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            current = self._clients.get(loop)
+            if current is not None and not current.session.closed:
+                return current
+            # Loops that ended without closing their client cannot close it
+            # from here; forget them
+            for closed in [other for other in self._clients if other.is_closed()]:
+                del self._clients[closed]
+            session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(
+                    limit=self.max_connections, keepalive_timeout=self.keepalive
+                ),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+            client = api.LiveKitAPI(
+                self.url, self.api_key, self.api_secret, session=session
+            )
+            current = self._clients[loop] = _LoopClient(
+                client, session, asyncio.Semaphore(self.max_concurrency)
+            )
+            self.sessions_created += 1
+            return current
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter delay before retry number ``attempt`` (from 0)"""
+        return self._jitter() * min(self.backoff * 2**attempt, self.max_backoff)
+
+    async def call(
+        self,
+        operation: Callable[[api.LiveKitAPI], Awaitable[T]],
+        idempotent: bool = True,
+    ) -> T:
+        """
+        Run an API operation on the shared client, retrying when safe
+
+        Args:
+            operation: Receives the client and returns the request awaitable
+            idempotent: Whether sending the request twice is harmless
+
+        Raises:
+            The last error once retries are exhausted or it is not retryable
+        """
+        current = self._loop_client()
+        self.calls += 1
+        attempt = 0
+        async with current.semaphore:
+            while True:
+                try:
+                    return await operation(current.client)
+                except Exception as e:
+                    if attempt == self.max_retries or not is_retryable(e, idempotent):
+                        self.failures += 1
+                        raise
+                    delay = self.backoff_delay(attempt)
+                    logger.warning(
+                        f"LiveKit API call failed ({e}), retrying in "
+                        f"{delay * 1000:.0f}ms"
+                    )
+                    self.retries += 1
+                    attempt += 1
+                    await asyncio.sleep(delay)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "retries": self.retries,
+            "failures": self.failures,
+            "sessions_created": self.sessions_created,
+        }
+
+    async def aclose(self):
+        """Close the running loop's HTTP session; its next call opens a new one"""
+        with self._lock:
+            current = self._clients.pop(asyncio.get_running_loop(), None)
+        if current is not None:
+            await current.client.aclose()
+            await current.session.close()
+
+
+_pool: Optional[LiveKitAPIPool] = None
+
+
+def get_api_pool() -> LiveKitAPIPool:
+    """The process-wide pool, configured from the environment"""
+    global _pool
+    if _pool is None:
+        _pool = LiveKitAPIPool(
+            os.getenv("LIVEKIT_URL"),
+            os.getenv("LIVEKIT_API_KEY"),
+            os.getenv("LIVEKIT_API_SECRET"),
+            max_concurrency=int(os.getenv("LIVEKIT_API_MAX_CONCURRENCY", "10")),
+            max_retries=int(os.getenv("LIVEKIT_API_MAX_RETRIES", "3")),
+        )
+    return _pool
+
+
+async def close_api_pool():
+    """Close the calling job's connections of the process-wide pool; log stats"""
+    if _pool is not None:
+        if _pool.calls:
+            logger.info(f"livekit_api {json.dumps(_pool.stats())}")
+        await _pool.aclose()
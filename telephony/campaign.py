@@ -0,0 +1,454 @@
+"""Outbound call campaigns: paced agent dispatch with a resumable checkpoint"""
+import asyncio
+import csv
+import json
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+import aiosqlite
+from livekit import api
+
+from telephony.api_client import LiveKitAPIPool, get_api_pool, is_retryable
+from telephony.outbound_handler import AGENT_NAME, dispatch_outbound_call
+
+logger = logging.getLogger(__name__)
+
+# Checkpoint statuses. DIALING is written before the dispatch request, so
+# a contact left in it by a crash may or may not have been called.
+DIALING = "dialing"
+RETRYING = "retrying"
+DISPATCHED = "dispatched"
+FAILED = "failed"
+# In this run's queue; not stored
+_QUEUED = "queued"
+
+_E164 = re.compile(r"^\+[1-9]\d{6,14}$")
+
+
+@dataclass(frozen=True)
+class CampaignContact:
+    """A number to call and the job metadata its call starts with"""
+
+    phone_number: str
+    # org_id, voicemail_message, ... (see agent.call_setup)
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+def read_contacts(path: str) -> Iterator[CampaignContact]:
+    """
+    Stream contacts from a CSV file with a ``phone_number`` column, or a
+    JSONL file of objects with a ``phone_number`` key
+
+    The other columns or keys become the call's job metadata.
+    """
+    path = Path(path)
+    with open(path, newline="") as f:
+        if path.suffix.lower() == ".csv":
+            rows = csv.DictReader(f)
+        else:
+            rows = (json.loads(line) for line in f if line.strip())
+        for row in rows:
+            number = str(row.pop("phone_number", None) or "").strip()
+            metadata = {k: v for k, v in row.items() if v not in (None, "")}
+            yield CampaignContact(number, metadata)
+
+
+class TokenBucket:
+    """Allows ``rate`` acquisitions per second, in bursts of up to ``burst``"""
+
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.rate = rate
+        self.burst = max(burst, 1.0)
+        self._clock = clock
+        self._tokens = self.burst
+        self._updated = clock()
+
+    def _refill(self):
+        now = self._clock()
+        elapsed = now - self._updated
+        self._tokens = min(self.burst, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        """Wait for a token and take it"""
+        while True:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class RoomCapacity:
+    """
+    Free call slots on the agent workers, from the rooms currently active
+
+    ``max_calls`` is how many calls the workers hold at once (workers times
+    each worker's session limit, see agent.worker_load). Active calls are
+    the rooms whose names start with ``room_prefix``; it defaults to the
+    prefix of the campaign's rooms, and an empty prefix counts every
+    room, inbound calls included. ListRooms is polled at most every
+    ``poll_interval`` seconds; dispatches since the last poll count as
+    active until the next one sees their rooms, unless released because
+    they failed.
+    """
+
+    def __init__(
+        self,
+        max_calls: int,
+        room_prefix: Optional[str] = None,
+        pool: Optional[LiveKitAPIPool] = None,
+        poll_interval: float = 2.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_calls = max_calls
+        self.room_prefix = room_prefix
+        self.poll_interval = poll_interval
+        self._pool = pool
+        self._clock = clock
+        self._active = 0
+        self._since_poll = 0
+        self._polled_at: Optional[float] = None
+        self._polling = asyncio.Lock()
+
+    async def _poll(self):
+        response = await (self._pool or get_api_pool()).call(
+            lambda livekit_api: livekit_api.room.list_rooms(api.ListRoomsRequest())
+        )
+        self._active = sum(
+            room.name.startswith(self.room_prefix or "") for room in response.rooms
+        )
+        self._since_poll = 0
+        self._polled_at = self._clock()
+
+    async def free(self) -> int:
+        """Calls that can start now"""
+        async with self._polling:
+            if (
+                self._polled_at is None
+                or self._clock() - self._polled_at >= self.poll_interval
+            ):
+                await self._poll()
+        return self.max_calls - self._active - self._since_poll
+
+    async def acquire(self):
+        """Wait until a call can start, and count it as started"""
+        while await self.free() <= 0:
+            await asyncio.sleep(self.poll_interval)
+        self._since_poll += 1
+
+    def release(self):
+        """Give back the slot of a dispatch that did not start a call"""
+        self._since_poll = max(self._since_poll - 1, 0)
+
+
+class CampaignCheckpoint:
+    """
+    SQLite record of every contact's dispatch, for resuming a campaign
+
+    Each status change is committed before the campaign moves on, so a
+    stopped campaign restarts exactly where it left off. One connection
+    stays open for the whole run, in WAL mode.
+    """
+
+    def __init__(self, db_path: str = "data/campaigns.db"):
+        self.db_path = db_path
+        self._connection: Optional[aiosqlite.Connection] = None
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+    async def open(self):
+        if self._connection is not None:
+            return
+        self._connection = await aiosqlite.connect(self.db_path)
+        await self._connection.execute("PRAGMA journal_mode=WAL")
+        await self._connection.execute("PRAGMA synchronous=NORMAL")
+        await self._connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS campaign_calls (
+                campaign_id TEXT NOT NULL,
+                phone_number TEXT NOT NULL,
+                status TEXT NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                room_name TEXT,
+                dispatch_id TEXT,
+                error TEXT,
+                updated_at TEXT NOT NULL,
+                PRIMARY KEY (campaign_id, phone_number)
+            )
+            """
+        )
+        await self._connection.commit()
+
+    async def statuses(self, campaign_id: str) -> dict[str, str]:
+        """Status of every contact the campaign has reached, by phone number"""
+        async with self._connection.execute(
+            "SELECT phone_number, status FROM campaign_calls WHERE campaign_id = ?",
+            (campaign_id,),
+        ) as cursor:
+            return {number: status async for number, status in cursor}
+
+    async def mark(
+        self,
+        campaign_id: str,
+        phone_number: str,
+        status: str,
+        attempts: int = 0,
+        room_name: Optional[str] = None,
+        dispatch_id: Optional[str] = None,
+        error: Optional[str] = None,
+    ):
+        await self._connection.execute(
+            """
+            INSERT OR REPLACE INTO campaign_calls
+            (campaign_id, phone_number, status, attempts, room_name,
+             dispatch_id, error, updated_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """,
+            (
+                campaign_id,
+                phone_number,
+                status,
+                attempts,
+                room_name,
+                dispatch_id,
+                error,
+                datetime.utcnow().isoformat(),
+            ),
+        )
+        await self._connection.commit()
+
+    async def summary(self, campaign_id: str) -> dict[str, int]:
+        """Number of contacts in each status"""
+        async with self._connection.execute(
+            """
+            SELECT status, COUNT(*) FROM campaign_calls
+            WHERE campaign_id = ? GROUP BY status
+            """,
+            (campaign_id,),
+        ) as cursor:
+            return {status: count async for status, count in cursor}
+
+    async def close(self):
+        if self._connection is not None:
+            await self._connection.close()
+            self._connection = None
+
+
+class CampaignDialer:
+    """
+    Dispatches the agent to call every contact of a campaign
+
+    Pacing:
+
+    - ``rate``: dispatches per second (token bucket, bursts of ``burst``)
+    - ``max_in_flight``: contacts being dispatched at once. A contact
+      keeps its slot while it backs off, so an API outage slows the
+      campaign down instead of piling up retries.
+    - ``capacity``: optionally, wait for a free call slot on the agent
+      workers before each dispatch (see RoomCapacity)
+
+    A dispatch that fails with an error the server cannot have acted on
+    (see telephony.api_client.is_retryable) is retried up to
+    ``max_attempts`` times, after a full-jitter backoff of up to
+    ``retry_backoff * 2**attempt`` seconds (capped at
+    ``max_retry_backoff``). This is on top of the API pool's own short
+    retries. Other errors and invalid numbers are recorded as failed.
+
+    Every contact's progress goes to the checkpoint. Running the same
+    campaign again skips contacts already dispatched or failed, and
+    retries those that were waiting to. Contacts a crash left mid-dispatch
+    are skipped too, as their call may have been placed, unless
+    ``redial_uncertain`` is set.
+
+    Usage::
+
+        checkpoint = CampaignCheckpoint("data/campaigns.db")
+        dialer = CampaignDialer("spring-recall", checkpoint, rate=5)
+        stats = await dialer.run(read_contacts("contacts.csv"))
+    """
+
+    def __init__(
+        self,
+        campaign_id: str,
+        checkpoint: CampaignCheckpoint,
+        pool: Optional[LiveKitAPIPool] = None,
+        agent_name: str = AGENT_NAME,
+        rate: float = 5.0,
+        burst: float = 1.0,
+        max_in_flight: int = 10,
+        max_attempts: int = 3,
+        retry_backoff: float = 5.0,
+        max_retry_backoff: float = 120.0,
+        capacity: Optional[RoomCapacity] = None,
+        redial_uncertain: bool = False,
+        jitter: Callable[[], float] = random.random,
+    ):
+        self.campaign_id = campaign_id
+        self.checkpoint = checkpoint
+        self.agent_name = agent_name
+        self.max_in_flight = max_in_flight
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self.max_retry_backoff = max_retry_backoff
+        self.capacity = capacity
+        if capacity is not None and capacity.room_prefix is None:
+            capacity.room_prefix = self.room_name("")
+        self.redial_uncertain = redial_uncertain
+        self._pool = pool
+        self._jitter = jitter
+        self._bucket = TokenBucket(rate, burst)
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._dispatch_ms: list[float] = []
+        self.contacts = 0
+        self.skipped = 0
+        self.uncertain = 0
+        self.invalid = 0
+        self.dispatched = 0
+        self.failed = 0
+        self.retries = 0
+
+    def room_name(self, phone_number: str) -> str:
+        return f"{self.campaign_id}-{phone_number.lstrip('+')}"
+
+    def retry_delay(self, attempt: int) -> float:
+        """Full-jitter delay after failed attempt number ``attempt`` (from 1)"""
+        ceiling = min(self.retry_backoff * 2 ** (attempt - 1), self.max_retry_backoff)
+        return self._jitter() * ceiling
+
+    def _should_dial(self, status: Optional[str]) -> bool:
+        if status is None or status == RETRYING:
+            return True
+        if status == DIALING:
+            if not self.redial_uncertain:
+                self.uncertain += 1
+            return self.redial_uncertain
+        return False
+
+    async def run(self, contacts: Iterable[CampaignContact]) -> dict[str, Any]:
+        """
+        Dispatch calls to ``contacts`` (streamed, e.g. read_contacts())
+
+        Returns:
+            Stats of this run (see stats())
+        """
+        await self.checkpoint.open()
+        statuses = await self.checkpoint.statuses(self.campaign_id)
+        started = time.perf_counter()
+        tasks: set[asyncio.Task] = set()
+        try:
+            for contact in contacts:
+                self.contacts += 1
+                number = contact.phone_number
+                if not self._should_dial(statuses.get(number)):
+                    self.skipped += 1
+                    continue
+                # Duplicates later in the file are skipped
+                statuses[number] = _QUEUED
+                if not _E164.match(number):
+                    self.invalid += 1
+                    await self.checkpoint.mark(
+                        self.campaign_id, number, FAILED, error="invalid_number"
+                    )
+                    continue
+                await self._slots.acquire()
+                task = asyncio.create_task(self._dial(contact))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            while tasks:
+                await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        stats = self.stats(time.perf_counter() - started)
+        logger.info(f"campaign {json.dumps(stats)}")
+        return stats
+
+    async def _dial(self, contact: CampaignContact):
+        try:
+            attempt = 1
+            while not await self._attempt(contact, attempt):
+                self.retries += 1
+                await asyncio.sleep(self.retry_delay(attempt))
+                attempt += 1
+        finally:
+            self._slots.release()
+
+    async def _attempt(self, contact: CampaignContact, attempt: int) -> bool:
+        """Dispatch once; False when the contact should be retried"""
+        number = contact.phone_number
+        room_name = self.room_name(number)
+        await self._bucket.acquire()
+        if self.capacity is not None:
+            await self.capacity.acquire()
+
+        await self.checkpoint.mark(
+            self.campaign_id, number, DIALING, attempt, room_name
+        )
+        start = time.perf_counter()
+        try:
+            dispatch = await dispatch_outbound_call(
+                number, room_name, contact.metadata, self.agent_name, self._pool
+            )
+        except Exception as e:
+            if self.capacity is not None:
+                self.capacity.release()
+            retry = attempt < self.max_attempts and is_retryable(e, idempotent=False)
+            if not retry:
+                self.failed += 1
+                logger.warning(f"Campaign call to {number} failed: {e}")
+            await self.checkpoint.mark(
+                self.campaign_id,
+                number,
+                RETRYING if retry else FAILED,
+                attempt,
+                room_name,
+                error=str(e),
+            )
+            return not retry
+
+        self._dispatch_ms.append((time.perf_counter() - start) * 1000)
+        self.dispatched += 1
+        await self.checkpoint.mark(
+            self.campaign_id, number, DISPATCHED, attempt, room_name, dispatch.id
+        )
+        return True
+
+    def stats(self, elapsed: float = 0.0) -> dict[str, Any]:
+        ordered = sorted(self._dispatch_ms)
+
+        def percentile(p: float) -> Optional[float]:
+            if not ordered:
+                return None
+            return round(ordered[min(int(len(ordered) * p), len(ordered) - 1)], 2)
+
+        return {
+            "campaign_id": self.campaign_id,
+            "contacts": self.contacts,
+            "dispatched": self.dispatched,
+            "failed": self.failed,
+            "invalid": self.invalid,
+            "skipped": self.skipped,
+            "uncertain": self.uncertain,
+            "retries": self.retries,
+            "dispatch_ms": {"p50": percentile(0.5), "p95": percentile(0.95)},
+            "elapsed_s": round(elapsed, 3),
+            "dispatches_per_s": (
+                round(self.dispatched / elapsed, 2) if elapsed else None
+            ),
+        }
@@ -0,0 +1,364 @@
+"""Declarative IVR menus answered from cached audio, without the LLM"""
+import asyncio
+import json
+import logging
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+
+from livekit import rtc
+from livekit.agents import AgentSession
+
+from agent.response_cache import normalize_utterance
+from audio.tts_cache import TTSAudioCache, cache_key
+from metrics.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+# Callers often say the digit instead of pressing it ("oh" is left out: it
+# is far more often an interjection than a zero)
+_SPOKEN_DIGITS = {
+    "zero": "0",
+    "one": "1",
+    "two": "2",
+    "three": "3",
+    "four": "4",
+    "five": "5",
+    "six": "6",
+    "seven": "7",
+    "eight": "8",
+    "nine": "9",
+}
+_DIGIT_PREFIXES = ("press ", "option ", "number ")
+# A turn with any of these ("I don't want billing") never matches a keyword
+_NEGATIONS = {
+    "no",
+    "not",
+    "never",
+    "without",
+    "nor",
+    "dont",
+    "doesnt",
+    "didnt",
+    "cant",
+    "wont",
+    "isnt",
+    "arent",
+}
+
+
+def spoken_digit(normalized: str) -> Optional[str]:
+    """The key a normalized utterance like "press one" or "2" names"""
+    for prefix in _DIGIT_PREFIXES:
+        if normalized.startswith(prefix):
+            normalized = normalized[len(prefix) :]
+            break
+    if len(normalized) == 1 and normalized.isdigit():
+        return normalized
+    return _SPOKEN_DIGITS.get(normalized)
+
+
+@dataclass(frozen=True)
+class IVROption:
+    """One menu entry: a key and/or keywords, and the fixed response"""
+
+    id: str
+    response: str
+    digit: Optional[str] = None
+    # Normalized phrases; a turn matches if it contains one as whole words
+    keywords: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class IVRMenu:
+    """
+    An organization's menu
+
+    ``prompt`` is read after the phone greeting and again when the caller
+    presses ``repeat_digit``. Turns longer than ``max_words`` words,
+    negated turns, or turns matching the keywords of more than one
+    option are left to the LLM.
+    """
+
+    org_id: str
+    prompt: str
+    options: tuple[IVROption, ...]
+    max_words: int = 8
+    repeat_digit: str = "*"
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "IVRMenu":
+        """
+        Build a menu from its JSON form
+
+        Raises:
+            ValueError: If an option has no response or a key is reused
+        """
+        options = []
+        digits = set()
+        for entry in data.get("options", []):
+            if not entry.get("response"):
+                raise ValueError(f"IVR option {entry.get('id')} has no response")
+            digit = entry.get("digit")
+            if digit is not None:
+                digit = str(digit)
+                if digit in digits:
+                    raise ValueError(f"IVR key {digit} is used more than once")
+                digits.add(digit)
+            keywords = map(normalize_utterance, entry.get("keywords", []))
+            options.append(
+                IVROption(
+                    id=entry.get("id") or f"option_{len(options) + 1}",
+                    response=entry["response"],
+                    digit=digit,
+                    keywords=tuple(filter(None, keywords)),
+                )
+            )
+        return cls(
+            org_id=data["org_id"],
+            prompt=data.get("prompt", ""),
+            options=tuple(options),
+            max_words=int(data.get("max_words", 8)),
+            repeat_digit=str(data.get("repeat_digit", "*")),
+        )
+
+    @property
+    def texts(self) -> list[str]:
+        """Every line the menu can speak"""
+        return [t for t in (self.prompt, *(o.response for o in self.options)) if t]
+
+    def by_digit(self, digit: str) -> Optional[IVROption]:
+        for option in self.options:
+            if option.digit == digit:
+                return option
+        return None
+
+    def by_text(self, text: str) -> Optional[IVROption]:
+        """The one option a short turn asks for, by key name or keywords"""
+        normalized = normalize_utterance(text)
+        if not normalized or len(normalized.split()) > self.max_words:
+            return None
+        digit = spoken_digit(normalized)
+        if digit is not None:
+            return self.by_digit(digit)
+        if _NEGATIONS.intersection(normalized.split()):
+            return None
+        padded = f" {normalized} "
+        matches = [
+            option
+            for option in self.options
+            if any(f" {keyword} " in padded for keyword in option.keywords)
+        ]
+        return matches[0] if len(matches) == 1 else None
+
+
+class IVRMenus:
+    """
+    Per-organization IVR menus loaded from a directory of JSON files
+
+    One file per organization, named anything ending in ``.json``. Also
+    counts, for all calls of the process, the turns answered by key press
+    or keyword and those left to the LLM while the menu was awaiting a
+    choice, and the time from the key press or end of turn to the
+    response's first audio frame.
+    """
+
+    def __init__(self, directory: str = "config/ivr"):
+        self.directory = Path(directory)
+        self.menus: dict[str, IVRMenu] = {}
+        self.dtmf = 0
+        self.keyword = 0
+        self.fallthrough = 0
+        self.first_audio_ms = LatencyHistogram()
+        # Cache keys some call is already synthesizing
+        self._prerendering: set[str] = set()
+
+    def load(self) -> int:
+        """
+        Load every menu file, skipping invalid ones
+
+        Returns:
+            Number of menus loaded
+        """
+        menus = {}
+        for path in sorted(self.directory.glob("*.json")):
+            try:
+                with open(path, "r") as f:
+                    menu = IVRMenu.from_dict(json.load(f))
+            except (OSError, KeyError, ValueError) as e:
+                logger.error(f"Skipping invalid IVR menu {path}: {e}")
+                continue
+            menus[menu.org_id] = menu
+        self.menus = menus
+        logger.info(f"Loaded {len(menus)} IVR menus from {self.directory}")
+        return len(menus)
+
+    def get(self, org_id: str) -> Optional[IVRMenu]:
+        return self.menus.get(org_id)
+
+    def stats(self) -> dict[str, Any]:
+        handled = self.dtmf + self.keyword
+        turns = handled + self.fallthrough
+        return {
+            "menus": len(self.menus),
+            "dtmf": self.dtmf,
+            "keyword": self.keyword,
+            "fallthrough": self.fallthrough,
+            "handled_rate": round(handled / turns, 3) if turns else 0.0,
+            "first_audio_ms": self.first_audio_ms.summary(),
+        }
+
+    def log_stats(self):
+        logger.info(f"ivr {json.dumps(self.stats())}")
+
+
+class IVRCall:
+    """
+    One call's menu: answers key presses and matching turns itself
+
+    Responses are fixed lines played with session.say(), from the TTS
+    cache when one is set, so a handled turn costs neither an LLM request
+    nor, once cached, a TTS request. attach() listens for the SIP
+    participant's DTMF; the agent hands each finished user turn to
+    answer() and skips its LLM reply when that returns a response.
+
+    Spoken turns are only matched while the caller is answering the menu:
+    right after its prompt (see offer()) or one of its responses. Once a
+    turn goes to the LLM, later turns are part of that conversation and
+    stay with the LLM until the menu is offered again.
+    """
+
+    def __init__(
+        self,
+        menus: IVRMenus,
+        menu: IVRMenu,
+        session: AgentSession,
+        tts_cache: Optional[TTSAudioCache] = None,
+        tts_voice: tuple[str, str, str] = ("", "", ""),
+    ):
+        self.menus = menus
+        self.menu = menu
+        self.session = session
+        self.tts_cache = tts_cache
+        self.tts_voice = tts_voice
+        # Playout of the last response; awaitable
+        self.speech: Any = None
+        # Whether the last thing said was the menu or one of its responses
+        self.awaiting_choice = False
+        self._tasks: set[asyncio.Task] = set()
+
+    def offer(self):
+        """Note that the prompt is being read, so the next turn may choose"""
+        self.awaiting_choice = True
+
+    def attach(self, room: rtc.Room):
+        """Answer key presses in ``room``"""
+
+        @room.on("sip_dtmf_received")
+        def on_dtmf(dtmf: rtc.SipDTMF):
+            self._track(asyncio.ensure_future(self.press(dtmf.digit)))
+
+    def _track(self, task: asyncio.Task):
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def press(self, digit: str) -> Optional[str]:
+        """Answer a key press, cutting off whatever the agent is saying"""
+        started = time.perf_counter()
+        option = self.menu.by_digit(digit)
+        if option is not None:
+            text = option.response
+        elif digit == self.menu.repeat_digit and self.menu.prompt:
+            text = self.menu.prompt
+        else:
+            logger.info(f"Ignoring key {digit}: not in the menu")
+            return None
+        self.menus.dtmf += 1
+        self.awaiting_choice = True
+        self.session.interrupt()
+        self._say(text, started)
+        await self.speech
+        return text
+
+    async def answer(self, utterance: str) -> Optional[str]:
+        """
+        Start the response to a finished user turn if the menu has one
+
+        Returns:
+            The response being spoken, or None to leave the turn to the LLM
+        """
+        if not self.awaiting_choice:
+            return None
+        started = time.perf_counter()
+        option = self.menu.by_text(utterance)
+        if option is None:
+            # Only turns the menu could have answered count against it
+            self.menus.fallthrough += 1
+            self.awaiting_choice = False
+            return None
+        self.menus.keyword += 1
+        logger.info(f"IVR answered {option.id} without the LLM")
+        self._say(option.response, started)
+        return option.response
+
+    def _say(self, text: str, started: float):
+        if self.tts_cache is not None:
+            key = cache_key(*self.tts_voice, text)
+            audio = self.tts_cache.speak(key, text, self.session.tts)
+        else:
+            audio = _synthesize(self.session.tts, text)
+        self.speech = self.session.say(text, audio=self._timed(audio, started))
+
+    async def _timed(
+        self, audio: AsyncIterator[rtc.AudioFrame], started: float
+    ) -> AsyncIterator[rtc.AudioFrame]:
+        first = True
+        async for frame in audio:
+            if first:
+                self.menus.first_audio_ms.record((time.perf_counter() - started) * 1000)
+                first = False
+            yield frame
+
+    async def prerender(self) -> int:
+        """
+        Synthesize the menu's lines missing from the TTS cache
+
+        Lines are cached per voice, so this costs TTS requests only the
+        first time a process (or the cache directory) sees a menu.
+
+        Returns:
+            Number of lines synthesized
+        """
+        if self.tts_cache is None:
+            return 0
+        rendered = 0
+        for text in self.menu.texts:
+            key = cache_key(*self.tts_voice, text)
+            if key in self.tts_cache or key in self.menus._prerendering:
+                continue
+            self.menus._prerendering.add(key)
+            try:
+                async for _ in self.tts_cache.speak(key, text, self.session.tts):
+                    pass
+                rendered += 1
+            finally:
+                self.menus._prerendering.discard(key)
+        await self.tts_cache.flush()
+        return rendered
+
+    def start_prerender(self):
+        """Run prerender() in the background"""
+        self._track(asyncio.ensure_future(self.prerender()))
+
+    async def aclose(self):
+        """Stop pending key press responses and prerendering"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+async def _synthesize(tts, text: str) -> AsyncIterator[rtc.AudioFrame]:
+    async with tts.synthesize(text) as stream:
+        async for event in stream:
+            yield event.frame
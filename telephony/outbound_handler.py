@@ -1,25 +1,71 @@
+import json
 import logging
 import os
+from typing import Any, Optional
+
 from livekit import api
 
+from telephony.api_client import LiveKitAPIPool, get_api_pool
+
 logger = logging.getLogger("outbound-handler")
 
+# Agent name that explicit dispatches target
+AGENT_NAME = "my-voice-agent"
+
+
+async def dispatch_outbound_call(
+    phone_number: str,
+    room_name: str,
+    metadata: Optional[dict[str, Any]] = None,
+    agent_name: str = AGENT_NAME,
+    pool: Optional[LiveKitAPIPool] = None,
+) -> api.AgentDispatch:
+    """
+    Dispatch the agent to a room; it then dials the number itself
+
+    Args:
+        phone_number: Phone number to call (e.g., +1234567890)
+        room_name: LiveKit room name for the call
+        metadata: Extra job metadata (org_id, voicemail_message, ...)
+        agent_name: Agent to dispatch
+        pool: API client to dispatch with (defaults to the process-wide one)
+
+    Returns:
+        The created dispatch
+    """
+    request = api.CreateAgentDispatchRequest(
+        agent_name=agent_name,
+        room=room_name,
+        metadata=json.dumps({**(metadata or {}), "phone_number": phone_number}),
+    )
+    # Not idempotent: a repeated dispatch would dial twice
+    return await (pool or get_api_pool()).call(
+        lambda livekit_api: livekit_api.agent_dispatch.create_dispatch(request),
+        idempotent=False,
+    )
+
 
-async def make_outbound_call(phone_number: str, room_name: str):
+async def make_outbound_call(
+    phone_number: str,
+    room_name: str,
+    pool: Optional[LiveKitAPIPool] = None,
+    wait_until_answered: bool = True,
+):
     """
     Make an outbound phone call
     
     Args:
         phone_number: Phone number to call (e.g., +1234567890)
         room_name: LiveKit room name for the call
+        pool: API client to dial with (defaults to the process-wide one)
+        wait_until_answered: Return only once the callee picks up (raises
+            if the call is not answered), so whatever runs next, such as
+            answering machine detection, never hears the ringing
         
     Returns:
         SIP participant object
     """
     
-    livekit_url = os.getenv("LIVEKIT_URL")
-    api_key = os.getenv("LIVEKIT_API_KEY")
-    api_secret = os.getenv("LIVEKIT_API_SECRET")
     sip_trunk_id = os.getenv("SIP_OUTBOUND_TRUNK_ID")
     
     if not sip_trunk_id:
@@ -28,27 +74,27 @@ async def make_outbound_call(phone_number: str, room_name: str):
     
     logger.info(f"Initiating outbound call to {phone_number}")
 
-    # Create LiveKit API client
-    livekit_api = api.LiveKitAPI(livekit_url, api_key, api_secret)
+    request = api.CreateSIPParticipantRequest(
+        sip_trunk_id=sip_trunk_id,
+        sip_call_to=phone_number,
+        room_name=room_name,
+        participant_identity=f"sip_{phone_number.replace('+', '')}",
+        participant_name=f"Call to {phone_number}",
+        wait_until_answered=wait_until_answered,
+    )
     
     try:
-        # Create SIP participant
-        sip_participant = await livekit_api.sip.create_sip_participant(
-            api.CreateSIPParticipantRequest(
-                sip_trunk_id=sip_trunk_id,
-                sip_call_to=phone_number,
-                room_name=room_name,
-                participant_identity=f"sip_{phone_number.replace('+', '')}",
-                participant_name=f"Call to {phone_number}",
-            )
+        # Create SIP participant over the shared keep-alive client; a dial
+        # is only retried when the server cannot have acted on it
+        sip_participant = await (pool or get_api_pool()).call(
+            lambda livekit_api: livekit_api.sip.create_sip_participant(request),
+            idempotent=False,
         )
         
-        logger.info(f"Outbound call created successfully")
-        logger.info(f"SIP Participant ID: {sip_participant.sip_participant_id}")  
+        logger.info("Outbound call created successfully")
+        logger.info(f"SIP Participant ID: {sip_participant.participant_id}")  
         return sip_participant
         
     except Exception as e:
         logger.error(f"Failed to create outbound call: {e}")
-        raise
-    finally:
-        await livekit_api.aclose()
\ No newline at end of file
+        raise
\ No newline at end of file
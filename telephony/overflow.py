@@ -0,0 +1,295 @@
+"""Overflow queue: callers wait on hold audio for a free full agent session"""
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+import wave
+from typing import Any, Callable, Optional
+
+import numpy as np
+from livekit import rtc
+
+from audio.tts_cache import CachedAudio
+from metrics.histogram import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+FIFO = "fifo"
+PRIORITY = "priority"
+
+
+class CallAbandoned(Exception):
+    """The caller hung up while waiting in the overflow queue"""
+
+
+def caller_priority(profile: Optional[dict[str, Any]]) -> int:
+    """
+    Queue priority of a caller from their stored profile (higher first)
+
+    Set as ``preferences.queue_priority`` on the user profile; callers
+    without a profile or a valid value get 0.
+    """
+    preferences = (profile or {}).get("preferences") or {}
+    try:
+        return int(preferences.get("queue_priority", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+class QueueTicket:
+    """One call's place in the overflow queue, then its full-session slot"""
+
+    def __init__(
+        self,
+        queue: "OverflowQueue",
+        call_id: str,
+        priority: int,
+        sequence: int,
+        entered_at: float,
+    ):
+        self.call_id = call_id
+        self.priority = priority
+        self.sequence = sequence
+        self.entered_at = entered_at
+        self.granted_at: Optional[float] = None
+        # Had to wait: no slot was free when the call arrived
+        self.queued = False
+        self.released = False
+        self._queue = queue
+        self._granted = asyncio.Event()
+        try:
+            self._loop: Optional[asyncio.AbstractEventLoop] = (
+                asyncio.get_running_loop()
+            )
+        except RuntimeError:
+            self._loop = None
+
+    @property
+    def granted(self) -> bool:
+        return self.granted_at is not None
+
+    @property
+    def position(self) -> int:
+        """1-based place among waiting calls; 0 once granted or released"""
+        return self._queue.position(self)
+
+    @property
+    def waited(self) -> float:
+        """Seconds spent waiting for the slot"""
+        end = self.granted_at if self.granted else self._queue._clock()
+        return end - self.entered_at
+
+    def _notify(self) -> bool:
+        """Wake the waiting call, possibly on another thread's loop"""
+        if self._loop is None:
+            self._granted.set()
+            return True
+        try:
+            self._loop.call_soon_threadsafe(self._granted.set)
+        except RuntimeError:
+            # The call's event loop is gone; its job has ended
+            return False
+        return True
+
+    async def wait(self):
+        """Wait until a full-session slot is granted"""
+        await self._granted.wait()
+
+    def release(self):
+        """Free the slot (or leave the queue); safe to call more than once"""
+        self._queue.release(self)
+
+    async def aclose(self):
+        self.release()
+
+
+class OverflowQueue:
+    """
+    Admission of calls to a fixed number of full agent sessions
+
+    Calls take one of ``slots`` full sessions as long as one is free.
+    Beyond that they queue, in arrival order (FIFO) or by caller priority
+    then arrival (PRIORITY), and get the next slot a finished call
+    releases. Callers waiting are expected to hear hold audio (see
+    play_hold_audio()) and cost next to nothing until their turn.
+
+    Thread-safe: with the thread job executor every job of the worker
+    shares one queue, each on its own event loop, and a slot released on
+    one job's thread wakes the next call on its own loop.
+
+    Usage::
+
+        ticket = queue.enter(room_name, caller_priority(profile))
+        if not ticket.granted:
+            await ticket.wait()  # while playing hold audio
+        ...
+        ticket.release()  # when the call ends
+    """
+
+    def __init__(
+        self,
+        slots: int,
+        policy: str = FIFO,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if policy not in (FIFO, PRIORITY):
+            raise ValueError(f"Unknown overflow queue policy: {policy}")
+        self.slots = slots
+        self.policy = policy
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._sequence = itertools.count()
+        self._waiting: list[QueueTicket] = []
+        self._in_use = 0
+        self.wait_ms = LatencyHistogram()
+        self.entered = 0
+        self.queued = 0
+        self.abandoned = 0
+        self.max_depth = 0
+
+    @property
+    def depth(self) -> int:
+        """Calls waiting for a slot"""
+        return len(self._waiting)
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    def _key(self, ticket: QueueTicket) -> tuple[int, ...]:
+        if self.policy == PRIORITY:
+            return (-ticket.priority, ticket.sequence)
+        return (ticket.sequence,)
+
+    def enter(self, call_id: str, priority: int = 0) -> QueueTicket:
+        """Take a free slot, or join the queue for the next one"""
+        ticket = QueueTicket(
+            self, call_id, priority, next(self._sequence), self._clock()
+        )
+        with self._lock:
+            self.entered += 1
+            self._waiting.append(ticket)
+            self._grant_waiting()
+            if not ticket.granted:
+                ticket.queued = True
+                self.queued += 1
+                self.max_depth = max(self.max_depth, len(self._waiting))
+        return ticket
+
+    def position(self, ticket: QueueTicket) -> int:
+        with self._lock:
+            if ticket.granted or ticket.released:
+                return 0
+            key = self._key(ticket)
+            return 1 + sum(self._key(other) < key for other in self._waiting)
+
+    def release(self, ticket: QueueTicket):
+        with self._lock:
+            if ticket.released:
+                return
+            ticket.released = True
+            if ticket.granted:
+                self._in_use -= 1
+            else:
+                self._waiting.remove(ticket)
+                self.abandoned += 1
+            self._grant_waiting()
+
+    def _grant_waiting(self):
+        """Hand free slots to the first waiting calls; holds the lock"""
+        while self._waiting and self._in_use < self.slots:
+            ticket = min(self._waiting, key=self._key)
+            self._waiting.remove(ticket)
+            ticket.granted_at = self._clock()
+            if not ticket._notify():
+                ticket.released = True
+                self.abandoned += 1
+                continue
+            self._in_use += 1
+            if ticket.queued:
+                self.wait_ms.record((ticket.granted_at - ticket.entered_at) * 1000)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "slots": self.slots,
+                "policy": self.policy,
+                "in_use": self._in_use,
+                "depth": len(self._waiting),
+                "max_depth": self.max_depth,
+                "entered": self.entered,
+                "queued": self.queued,
+                "abandoned": self.abandoned,
+                "wait_ms": self.wait_ms.summary(),
+            }
+
+    def log_stats(self):
+        logger.info(f"overflow_queue {json.dumps(self.stats())}")
+
+
+def hold_tone(seconds: float = 4.0, sample_rate: int = 16000) -> CachedAudio:
+    """A soft two-note chime, then silence; the default hold audio"""
+    t = np.arange(int(0.4 * sample_rate)) / sample_rate
+    decay = np.exp(-6 * t)
+    notes = [np.sin(2 * np.pi * hz * t) * decay for hz in (660.0, 880.0)]
+    chime = np.concatenate(notes) * 3000
+    pcm = np.zeros(int(seconds * sample_rate), dtype=np.int16)
+    pcm[: len(chime)] = chime.astype(np.int16)
+    return CachedAudio(sample_rate, 1, pcm.tobytes())
+
+
+def load_hold_audio(path: Optional[str] = None) -> CachedAudio:
+    """Hold audio from a 16-bit PCM WAV file (music or a recorded message)"""
+    if not path:
+        return hold_tone()
+    with wave.open(path, "rb") as wav:
+        if wav.getsampwidth() != 2:
+            raise ValueError(f"Hold audio {path} is not 16-bit PCM")
+        return CachedAudio(
+            wav.getframerate(), wav.getnchannels(), wav.readframes(wav.getnframes())
+        )
+
+
+def hold_frames(audio: CachedAudio, frame_ms: int = 100) -> list[rtc.AudioFrame]:
+    """
+    ``audio`` cut into frames once, for looping
+
+    Hold audio needs no 20ms granularity; longer frames mean fewer
+    wakeups per held call.
+    """
+    samples = audio.sample_rate * frame_ms // 1000
+    step = samples * audio.num_channels * 2
+    return [
+        rtc.AudioFrame(
+            audio.pcm[offset : offset + step],
+            audio.sample_rate,
+            audio.num_channels,
+            len(audio.pcm[offset : offset + step]) // (audio.num_channels * 2),
+        )
+        for offset in range(0, len(audio.pcm), step)
+    ]
+
+
+async def play_hold_audio(room: rtc.Room, audio: CachedAudio):
+    """
+    Loop ``audio`` into the room on its own track until cancelled
+
+    Holding a call costs a frame copy every 100ms: no STT, VAD, LLM or
+    TTS runs for it.
+    """
+    frames = hold_frames(audio)
+    source = rtc.AudioSource(audio.sample_rate, audio.num_channels)
+    track = rtc.LocalAudioTrack.create_audio_track("hold", source)
+    publication = await room.local_participant.publish_track(
+        track, rtc.TrackPublishOptions(source=rtc.TrackSource.SOURCE_MICROPHONE)
+    )
+    try:
+        while True:
+            for frame in frames:
+                # Blocks while the source's buffer is full: real-time pacing
+                await source.capture_frame(frame)
+    finally:
+        await room.local_participant.unpublish_track(publication.sid)
+        await source.aclose()
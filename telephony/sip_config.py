@@ -26,7 +26,7 @@ def is_sip_participant(participant: rtc.Participant) -> bool:
     Returns:
         bool: True if SIP participant
     """
-    return participant.kind == rtc.ParticipantKind.SIP
+    return participant.kind == rtc.ParticipantKind.PARTICIPANT_KIND_SIP
 
 
 def validate_sip_config() -> bool:
@@ -47,4 +47,20 @@ def validate_sip_config() -> bool:
     if not config["livekit_url"]:
         raise ValueError("LIVEKIT_URL is required")
     
-    return True
\ No newline at end of file
+    return True
+
+def get_sip_routing(participant: rtc.Participant) -> dict:
+    """
+    Get the number and trunk an inbound SIP call arrived on
+
+    Args:
+        participant: LiveKit participant
+
+    Returns:
+        dict: dialed_number and trunk_id (None when not available)
+    """
+    attributes = participant.attributes or {}
+    return {
+        "dialed_number": attributes.get("sip.trunkPhoneNumber"),
+        "trunk_id": attributes.get("sip.trunkID"),
+    }
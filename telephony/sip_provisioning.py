@@ -0,0 +1,466 @@
+"""Idempotent provisioning of per-organization SIP trunks and dispatch rules"""
+import asyncio
+import json
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+
+from google.protobuf import json_format
+from livekit import api
+
+from telephony.api_client import LiveKitAPIPool, get_api_pool
+
+logger = logging.getLogger(__name__)
+
+INBOUND = "inbound_trunk"
+OUTBOUND = "outbound_trunk"
+DISPATCH = "dispatch_rule"
+
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+
+# Marks the resources this tool owns; only those are ever deleted
+MANAGED_BY = "sip-provisioning"
+
+# Server-assigned, or never returned by the server
+_UNCOMPARED = {
+    "sip_trunk_id",
+    "sip_dispatch_rule_id",
+    "created_at",
+    "updated_at",
+    "auth_password",
+}
+
+
+@dataclass(frozen=True)
+class _Kind:
+    """How to read and write one kind of SIP resource"""
+
+    info: type
+    id_field: str
+    template: str
+    suffix: str
+    list: Callable[[api.LiveKitAPI], Awaitable[Any]]
+    create: Callable[[api.LiveKitAPI, Any], Awaitable[Any]]
+    update: Callable[[api.LiveKitAPI, str, Any], Awaitable[Any]]
+    delete: Callable[[api.LiveKitAPI, str], Awaitable[Any]]
+
+
+def _delete_trunk(client: api.LiveKitAPI, trunk_id: str) -> Awaitable[Any]:
+    return client.sip.delete_trunk(api.DeleteSIPTrunkRequest(sip_trunk_id=trunk_id))
+
+
+KINDS: dict[str, _Kind] = {
+    INBOUND: _Kind(
+        info=api.SIPInboundTrunkInfo,
+        id_field="sip_trunk_id",
+        template="inbound_trunk.json",
+        suffix="inbound",
+        list=lambda c: c.sip.list_inbound_trunk(api.ListSIPInboundTrunkRequest()),
+        create=lambda c, info: c.sip.create_inbound_trunk(
+            api.CreateSIPInboundTrunkRequest(trunk=info)
+        ),
+        update=lambda c, id, info: c.sip.update_inbound_trunk(id, info),
+        delete=_delete_trunk,
+    ),
+    OUTBOUND: _Kind(
+        info=api.SIPOutboundTrunkInfo,
+        id_field="sip_trunk_id",
+        template="outbound_trunk.json",
+        suffix="outbound",
+        list=lambda c: c.sip.list_outbound_trunk(api.ListSIPOutboundTrunkRequest()),
+        create=lambda c, info: c.sip.create_outbound_trunk(
+            api.CreateSIPOutboundTrunkRequest(trunk=info)
+        ),
+        update=lambda c, id, info: c.sip.update_outbound_trunk(id, info),
+        delete=_delete_trunk,
+    ),
+    DISPATCH: _Kind(
+        info=api.SIPDispatchRuleInfo,
+        id_field="sip_dispatch_rule_id",
+        template="dispatch_rules.json",
+        suffix="dispatch",
+        list=lambda c: c.sip.list_dispatch_rule(api.ListSIPDispatchRuleRequest()),
+        create=lambda c, info: c.sip.create_dispatch_rule(
+            api.CreateSIPDispatchRuleRequest(dispatch_rule=info)
+        ),
+        update=lambda c, id, info: c.sip.update_dispatch_rule(id, info),
+        delete=lambda c, id: c.sip.delete_dispatch_rule(
+            api.DeleteSIPDispatchRuleRequest(sip_dispatch_rule_id=id)
+        ),
+    ),
+}
+
+
+@dataclass
+class SIPResource:
+    """The desired state of one organization's trunk or dispatch rule"""
+
+    kind: str
+    name: str
+    org_id: str
+    # Fields in the resource's protobuf JSON form
+    spec: dict[str, Any]
+    # Names of the inbound trunks a dispatch rule's trunk_ids resolve to
+    trunks: tuple[str, ...] = ()
+
+    def info(self, trunk_ids: Optional[dict[str, str]] = None) -> Any:
+        """The resource as its protobuf message, tagged as managed"""
+        info = json_format.ParseDict(
+            self.spec, KINDS[self.kind].info(), ignore_unknown_fields=True
+        )
+        info.name = self.name
+        metadata = _metadata(self.spec.get("metadata"))
+        metadata.update(org_id=self.org_id, managed_by=MANAGED_BY)
+        info.metadata = json.dumps(metadata, sort_keys=True)
+        if self.trunks:
+            del info.trunk_ids[:]
+            ids = trunk_ids or {}
+            info.trunk_ids.extend(ids.get(name, f"<{name}>") for name in self.trunks)
+        return info
+
+
+@dataclass(frozen=True)
+class SIPChange:
+    """One create, update or delete the sync will make"""
+
+    action: str
+    kind: str
+    name: str
+    resource_id: Optional[str] = None
+    resource: Optional[SIPResource] = None
+    # Fields that differ, for updates
+    fields: tuple[str, ...] = ()
+
+    def describe(self) -> str:
+        text = f"{self.action} {self.kind} {self.name}"
+        if self.resource_id:
+            text += f" ({self.resource_id})"
+        if self.fields:
+            text += f": {', '.join(self.fields)}"
+        return text
+
+
+def _metadata(value: Any) -> dict[str, Any]:
+    if not value:
+        return {}
+    try:
+        data = json.loads(value)
+    except ValueError:
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def is_managed(info: Any) -> bool:
+    """Whether an existing trunk or rule was created by this tool"""
+    return _metadata(info.metadata).get("managed_by") == MANAGED_BY
+
+
+def _fields(info: Any) -> dict[str, Any]:
+    data = json_format.MessageToDict(info, preserving_proto_field_name=True)
+    return {k: v for k, v in data.items() if k not in _UNCOMPARED}
+
+
+def desired_state(
+    config_dir: str = "config", organizations: Optional[str] = None
+) -> list[SIPResource]:
+    """
+    Trunks and dispatch rules for every organization with phone numbers
+
+    Each organization in ``organizations`` (default
+    ``<config_dir>/organizations.json``) gets an inbound trunk, an
+    outbound trunk and a dispatch rule for its ``numbers``, built from the
+    inbound_trunk.json, outbound_trunk.json and dispatch_rules.json
+    templates and named ``<org_id>-inbound``, ``-outbound`` and
+    ``-dispatch``. An organization's optional ``sip`` object overrides
+    template fields per kind (``{"outbound": {"address": ...}}``), or
+    skips a kind when set to false. Dispatch rules route the
+    organization's own inbound trunk.
+    """
+    config = Path(config_dir)
+    templates = {}
+    for kind, spec in KINDS.items():
+        with open(config / spec.template, "r") as f:
+            templates[kind] = json.load(f)
+    with open(organizations or config / "organizations.json", "r") as f:
+        records = json.load(f).get("organizations", [])
+
+    resources = []
+    for record in records:
+        org_id = record["org_id"]
+        overrides = record.get("sip") or {}
+        if not record.get("numbers") and not overrides:
+            continue
+        names = {kind: f"{org_id}-{spec.suffix}" for kind, spec in KINDS.items()}
+        for kind, spec in KINDS.items():
+            override = overrides.get(spec.suffix, {})
+            if override is False:
+                names.pop(kind)
+                continue
+            fields = {**templates[kind], **override}
+            if kind != DISPATCH:
+                fields["numbers"] = override.get("numbers", record.get("numbers", []))
+            trunks = ()
+            if kind == DISPATCH and INBOUND in names and "trunk_ids" not in override:
+                trunks = (names[INBOUND],)
+            resources.append(
+                SIPResource(kind, names[kind], org_id, fields, trunks=trunks)
+            )
+    return resources
+
+
+def kept_copies(existing: list[Any]) -> tuple[dict[str, Any], list[Any]]:
+    """
+    The existing resource kept for each name, and the managed duplicates
+
+    The first managed copy of a duplicated name is kept, or else the
+    first copy; the other managed copies are to be deleted.
+    """
+    by_name: dict[str, Any] = {}
+    duplicates = []
+    for info in sorted(existing, key=lambda i: not is_managed(i)):
+        if info.name in by_name:
+            if is_managed(info):
+                duplicates.append(info)
+            continue
+        by_name[info.name] = info
+    return by_name, duplicates
+
+
+def diff(
+    kind: str,
+    desired: list[SIPResource],
+    existing: list[Any],
+    trunk_ids: Optional[dict[str, str]] = None,
+) -> tuple[list[SIPChange], int]:
+    """
+    Changes that bring one kind's existing resources to the desired state
+
+    Existing resources are matched by name, so a resource created by hand
+    under a desired name is adopted rather than duplicated. Desired fields
+    that differ cause an update, which replaces the whole resource; fields
+    the desired state leaves out are not compared, as the server may fill
+    them in. Managed resources no longer desired, and managed duplicates
+    of a name, are deleted. Resources this tool did not create are never
+    deleted.
+
+    Returns:
+        The changes and the number of resources already up to date
+    """
+    id_field = KINDS[kind].id_field
+    by_name, duplicates = kept_copies(existing)
+    changes = [
+        SIPChange(DELETE, kind, info.name, getattr(info, id_field))
+        for info in duplicates
+    ]
+
+    unchanged = 0
+    wanted = set()
+    for resource in desired:
+        wanted.add(resource.name)
+        current = by_name.get(resource.name)
+        if current is None:
+            changes.append(SIPChange(CREATE, kind, resource.name, resource=resource))
+            continue
+        target = _fields(resource.info(trunk_ids))
+        actual = _fields(current)
+        differing = tuple(sorted(k for k in target if target[k] != actual.get(k)))
+        if differing:
+            changes.append(
+                SIPChange(
+                    UPDATE,
+                    kind,
+                    resource.name,
+                    getattr(current, id_field),
+                    resource,
+                    differing,
+                )
+            )
+        else:
+            unchanged += 1
+
+    for name, info in by_name.items():
+        if name not in wanted and is_managed(info):
+            changes.append(SIPChange(DELETE, kind, name, getattr(info, id_field)))
+    return changes, unchanged
+
+
+@dataclass
+class SyncReport:
+    """What a sync changed, or would change on a dry run"""
+
+    dry_run: bool
+    changes: list[SIPChange] = field(default_factory=list)
+    unchanged: int = 0
+    failed: list[str] = field(default_factory=list)
+    # Inbound and outbound trunk IDs by organization
+    trunk_ids: dict[str, dict[str, str]] = field(default_factory=dict)
+
+    def to_dict(self) -> dict[str, Any]:
+        counts = {CREATE: 0, UPDATE: 0, DELETE: 0}
+        for change in self.changes:
+            counts[change.action] += 1
+        return {
+            "dry_run": self.dry_run,
+            **counts,
+            "unchanged": self.unchanged,
+            "failed": self.failed,
+            "changes": [change.describe() for change in self.changes],
+            "trunk_ids": self.trunk_ids,
+        }
+
+
+class SIPProvisioner:
+    """
+    Syncs SIP trunks and dispatch rules to a desired state
+
+    sync() lists the existing resources of every kind concurrently, then
+    applies the diff in three phases, each through at most
+    ``concurrency`` requests in flight: trunk creates and updates, then
+    dispatch rule changes (which need the trunks' IDs), then trunk
+    deletes (once no rule routes them). A failed change is logged and
+    reported without stopping the others; dispatch rules whose trunk
+    failed to be created are not applied. Running it again after success
+    changes nothing.
+    """
+
+    def __init__(self, pool: Optional[LiveKitAPIPool] = None, concurrency: int = 8):
+        self._pool = pool
+        self.concurrency = concurrency
+
+    @property
+    def pool(self) -> LiveKitAPIPool:
+        return self._pool or get_api_pool()
+
+    async def existing(self) -> dict[str, list[Any]]:
+        """Current resources of every kind"""
+
+        async def list_kind(kind: str) -> list[Any]:
+            response = await self.pool.call(KINDS[kind].list)
+            return list(response.items)
+
+        kinds = list(KINDS)
+        results = await asyncio.gather(*(list_kind(kind) for kind in kinds))
+        return dict(zip(kinds, results))
+
+    async def sync(
+        self,
+        desired: list[SIPResource],
+        dry_run: bool = False,
+        orgs: Optional[set[str]] = None,
+    ) -> SyncReport:
+        """
+        Apply (or, with ``dry_run``, only plan) the changes
+
+        Args:
+            desired: Every resource that should exist
+            dry_run: Only list the changes
+            orgs: Sync only these organizations, leaving the managed
+                resources of others alone
+        """
+        report = SyncReport(dry_run=dry_run)
+        existing = await self.existing()
+        if orgs is not None:
+            desired = [r for r in desired if r.org_id in orgs]
+            existing = {
+                kind: [
+                    info
+                    for info in infos
+                    if not is_managed(info)
+                    or _metadata(info.metadata).get("org_id") in orgs
+                ]
+                for kind, infos in existing.items()
+            }
+        by_kind: dict[str, list[SIPResource]] = {kind: [] for kind in KINDS}
+        for resource in desired:
+            by_kind[resource.kind].append(resource)
+
+        trunk_changes = []
+        for kind in (INBOUND, OUTBOUND):
+            changes, unchanged = diff(kind, by_kind[kind], existing[kind])
+            trunk_changes += changes
+            report.unchanged += unchanged
+        upserts = [c for c in trunk_changes if c.action != DELETE]
+        deletes = [c for c in trunk_changes if c.action == DELETE]
+
+        # The copies diff() keeps, not duplicates it is about to delete
+        ids = {
+            name: info.sip_trunk_id
+            for kind in (INBOUND, OUTBOUND)
+            for name, info in kept_copies(existing[kind])[0].items()
+        }
+        created = await self._apply_all(upserts, report, dry_run)
+        ids.update(created)
+
+        rule_changes, unchanged = diff(
+            DISPATCH, by_kind[DISPATCH], existing[DISPATCH], ids
+        )
+        report.unchanged += unchanged
+        if not dry_run:
+            missing = {c.name for c in upserts if c.action == CREATE} - set(ids)
+            for change in list(rule_changes):
+                if change.resource and set(change.resource.trunks) & missing:
+                    rule_changes.remove(change)
+                    report.failed.append(f"{change.describe()}: trunk not created")
+        await self._apply_all(rule_changes, report, dry_run, ids)
+        await self._apply_all(deletes, report, dry_run)
+
+        for resource in by_kind[INBOUND] + by_kind[OUTBOUND]:
+            org_ids = report.trunk_ids.setdefault(resource.org_id, {})
+            org_ids[KINDS[resource.kind].suffix] = ids.get(resource.name, "<new>")
+        return report
+
+    async def _apply_all(
+        self,
+        changes: list[SIPChange],
+        report: SyncReport,
+        dry_run: bool,
+        trunk_ids: Optional[dict[str, str]] = None,
+    ) -> dict[str, str]:
+        """Apply changes concurrently; returns created resources' IDs by name"""
+        report.changes += changes
+        if dry_run or not changes:
+            return {}
+        semaphore = asyncio.Semaphore(self.concurrency)
+        created: dict[str, str] = {}
+
+        async def apply(change: SIPChange):
+            async with semaphore:
+                try:
+                    info = await self._apply(change, trunk_ids)
+                except Exception as e:
+                    logger.error(f"Failed to {change.describe()}: {e}")
+                    report.failed.append(f"{change.describe()}: {e}")
+                    return
+            logger.info(f"Applied {change.describe()}")
+            if change.action == CREATE:
+                created[change.name] = getattr(info, KINDS[change.kind].id_field)
+
+        await asyncio.gather(*(apply(change) for change in changes))
+        return created
+
+    async def _apply(
+        self, change: SIPChange, trunk_ids: Optional[dict[str, str]]
+    ) -> Any:
+        kind = KINDS[change.kind]
+        if change.action == CREATE:
+            info = change.resource.info(trunk_ids)
+            # A retried create could leave a duplicate; the next sync
+            # deletes it
+            return await self.pool.call(
+                lambda c: kind.create(c, info), idempotent=False
+            )
+        if change.action == UPDATE:
+            info = change.resource.info(trunk_ids)
+            return await self.pool.call(
+                lambda c: kind.update(c, change.resource_id, info)
+            )
+        try:
+            return await self.pool.call(lambda c: kind.delete(c, change.resource_id))
+        except api.TwirpError as e:
+            # Already gone, e.g. deleted by a retry of this request
+            if e.status != 404:
+                raise
+            return None
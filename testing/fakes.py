@@ -0,0 +1,730 @@
+"""Offline stand-ins for LiveKit rooms, jobs and sessions"""
+import asyncio
+import os
+import time
+from array import array
+from dataclasses import dataclass, field
+from types import SimpleNamespace
+from typing import Any, Callable, Optional
+
+import numpy as np
+from aiohttp import web
+from livekit import api, rtc
+from livekit.agents import (
+    DEFAULT_API_CONNECT_OPTIONS,
+    NOT_GIVEN,
+    AgentSession,
+    APIConnectOptions,
+    APIConnectionError,
+    SpeechCreatedEvent,
+    llm,
+    stt,
+    tts,
+)
+from livekit.agents.voice import io
+
+from config.config import LLM_PROVIDERS, STT_PROVIDERS, TTS_PROVIDERS, ModelConfig
+
+
+@dataclass
+class FakeParticipant:
+    """Remote participant with the attributes call setup reads"""
+
+    identity: str = "user_1"
+    kind: int = rtc.ParticipantKind.PARTICIPANT_KIND_STANDARD
+    attributes: dict[str, str] = field(default_factory=dict)
+    track_publications: dict[str, Any] = field(default_factory=dict)
+
+
+def sip_participant(number: str = "+15550001111", dialed: str = "+15550009999"):
+    """Create a SIP participant as LiveKit would for an inbound call"""
+    return FakeParticipant(
+        identity=f"sip_{number.lstrip('+')}",
+        kind=rtc.ParticipantKind.PARTICIPANT_KIND_SIP,
+        attributes={
+            "sip.phoneNumber": number,
+            "sip.trunkPhoneNumber": dialed,
+            "sip.trunkID": "ST_test",
+        },
+    )
+
+
+class FakeRoom:
+    """Room that records event handlers"""
+
+    def __init__(self, name: str = "call-test"):
+        self.name = name
+        self.handlers: dict[str, list[Callable]] = {}
+
+    def on(self, event: str, callback: Optional[Callable] = None):
+        def register(fn):
+            self.handlers.setdefault(event, []).append(fn)
+            return fn
+
+        return register(callback) if callback is not None else register
+
+    def emit(self, event: str, *args):
+        for handler in self.handlers.get(event, []):
+            handler(*args)
+
+
+@dataclass
+class FakeJob:
+    metadata: str = ""
+
+
+@dataclass
+class FakeProc:
+    userdata: dict[str, Any] = field(default_factory=dict)
+
+
+class FakeJobContext:
+    """JobContext with configurable connect and participant delays"""
+
+    def __init__(
+        self,
+        participant: Optional[FakeParticipant] = None,
+        room: Optional[FakeRoom] = None,
+        metadata: str = "",
+        connect_delay: float = 0.0,
+        participant_delay: float = 0.0,
+    ):
+        self.room = room or FakeRoom()
+        self.job = FakeJob(metadata)
+        self.proc = FakeProc()
+        self.participant = participant or FakeParticipant()
+        self.connect_delay = connect_delay
+        self.participant_delay = participant_delay
+        self.log_context_fields: dict[str, Any] = {}
+        self.shutdown_callbacks: list[Callable] = []
+        self.connected = False
+        self.room_deleted = False
+
+    async def connect(self):
+        await asyncio.sleep(self.connect_delay)
+        self.connected = True
+
+    async def wait_for_participant(self):
+        assert self.connected, "wait_for_participant called before connect"
+        await asyncio.sleep(self.participant_delay)
+        return self.participant
+
+    async def delete_room(self):
+        self.room_deleted = True
+
+    def add_shutdown_callback(self, callback: Callable):
+        self.shutdown_callbacks.append(callback)
+
+    async def shutdown(self):
+        for callback in self.shutdown_callbacks:
+            await callback()
+
+
+def tone_frames(
+    seconds: float, sample_rate: int = 16000, hz: float = 440.0
+) -> list[rtc.AudioFrame]:
+    """Mono 10ms frames of a sine tone"""
+    samples = sample_rate // 100
+    t = np.arange(int(seconds * sample_rate)) / sample_rate
+    pcm = (np.sin(2 * np.pi * hz * t) * 8000).astype(np.int16)
+    return [
+        rtc.AudioFrame(pcm[i : i + samples].tobytes(), sample_rate, 1, samples)
+        for i in range(0, len(pcm) - samples + 1, samples)
+    ]
+
+
+class StubSynthesis:
+    """ChunkedStream stand-in yielding 20ms frames of a tone"""
+
+    def __init__(self, frames: int, delay: float):
+        self.frames = frames
+        self.delay = delay
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    def __aiter__(self):
+        return self._events()
+
+    async def _events(self):
+        await asyncio.sleep(self.delay)
+        for i in range(self.frames):
+            frame = rtc.AudioFrame.create(24000, 1, 480)
+            frame.data[:] = array("h", [i % 128] * 480)
+            yield SimpleNamespace(frame=frame)
+
+
+class StubTTS:
+    """TTS that counts how often it is asked to synthesize"""
+
+    def __init__(self, delay: float = 0.0, frames: int = 50):
+        self.delay = delay
+        self.frames = frames
+        self.calls: list[str] = []
+
+    def synthesize(self, text: str) -> StubSynthesis:
+        self.calls.append(text)
+        return StubSynthesis(self.frames, self.delay)
+
+
+class StubLLM:
+    """LLM node stand-in streaming a fixed answer after a delay"""
+
+    def __init__(
+        self,
+        delay: float = 0.0,
+        response: str = "We are open 9 to 5.",
+        tokens_per_second: Optional[float] = None,
+    ):
+        self.delay = delay
+        self.response = response
+        self.tokens_per_second = tokens_per_second
+        self.calls = 0
+
+    async def stream(self):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        for i, word in enumerate(self.response.split(" ")):
+            if i and self.tokens_per_second:
+                await asyncio.sleep(1 / self.tokens_per_second)
+            yield word + " "
+
+
+class StubProviderLLM(llm.LLM):
+    """
+    LLM provider stand-in with an injected time to first token
+
+    ``ttft`` is a list of seconds used in turn (the last one repeats), so
+    tests can script a latency distribution; ``fail`` makes every request
+    raise before its first token. Words stream at ``tokens_per_second``,
+    or all at once.
+    """
+
+    def __init__(
+        self,
+        ttft: list[float],
+        response: str = "We are open 9 to 5.",
+        fail: bool = False,
+        tokens_per_second: Optional[float] = None,
+    ):
+        super().__init__()
+        self.ttft = list(ttft)
+        self.response = response
+        self.fail = fail
+        self.tokens_per_second = tokens_per_second
+        self.calls = 0
+        self.cancelled = 0
+
+    def chat(self, *, chat_ctx, tools=None, conn_options=None, **kwargs):
+        delay = self.ttft[min(self.calls, len(self.ttft) - 1)]
+        self.calls += 1
+        return _StubProviderStream(self, delay, chat_ctx=chat_ctx, tools=tools or [])
+
+
+class _StubProviderStream(llm.LLMStream):
+    def __init__(self, provider: StubProviderLLM, delay: float, chat_ctx, tools):
+        super().__init__(
+            provider,
+            chat_ctx=chat_ctx,
+            tools=tools,
+            conn_options=APIConnectOptions(max_retry=0),
+        )
+        self._provider = provider
+        self._delay = delay
+
+    async def _run(self):
+        try:
+            await asyncio.sleep(self._delay)
+        except asyncio.CancelledError:
+            self._provider.cancelled += 1
+            raise
+        if self._provider.fail:
+            raise APIConnectionError("stub provider down", retryable=False)
+        rate = self._provider.tokens_per_second
+        for i, word in enumerate(self._provider.response.split(" ")):
+            if i and rate:
+                await asyncio.sleep(1 / rate)
+            delta = llm.ChoiceDelta(role="assistant", content=word + " ")
+            self._event_ch.send_nowait(llm.ChatChunk(id="stub", delta=delta))
+
+
+class StubProviderSTT(stt.STT):
+    """
+    Streaming STT provider stand-in transcribing scripted utterances
+
+    It does not listen to audio: each line passed to speak() starts
+    speech, is transcribed ``delay`` seconds later and ends speech, as a
+    provider doing its own endpointing would (turn detection "stt").
+    """
+
+    def __init__(self, delay: float = 0.0):
+        super().__init__(
+            capabilities=stt.STTCapabilities(streaming=True, interim_results=False)
+        )
+        self.delay = delay
+        self.calls = 0
+        self._utterances: asyncio.Queue[str] = asyncio.Queue()
+
+    def speak(self, text: str):
+        self._utterances.put_nowait(text)
+
+    async def _recognize_impl(self, buffer, *, language=NOT_GIVEN, conn_options):
+        raise NotImplementedError("StubProviderSTT only streams")
+
+    def stream(self, *, language=NOT_GIVEN, conn_options=DEFAULT_API_CONNECT_OPTIONS):
+        return _StubProviderSTTStream(self, conn_options)
+
+
+class _StubProviderSTTStream(stt.RecognizeStream):
+    def __init__(self, provider: StubProviderSTT, conn_options: APIConnectOptions):
+        super().__init__(stt=provider, conn_options=conn_options)
+        self._provider = provider
+
+    async def _run(self):
+        while True:
+            text = await self._provider._utterances.get()
+            self._provider.calls += 1
+            self._send(stt.SpeechEventType.START_OF_SPEECH)
+            await asyncio.sleep(self._provider.delay)
+            self._send(
+                stt.SpeechEventType.FINAL_TRANSCRIPT,
+                [stt.SpeechData(language="en", text=text, confidence=1.0)],
+            )
+            self._send(stt.SpeechEventType.END_OF_SPEECH)
+
+    def _send(self, kind: stt.SpeechEventType, alternatives=()):
+        event = stt.SpeechEvent(type=kind, alternatives=list(alternatives))
+        self._event_ch.send_nowait(event)
+
+
+class StubProviderTTS(tts.TTS):
+    """
+    TTS provider stand-in: ``frames`` 20ms frames of a tone after ``delay``
+
+    Records the text of every request in ``calls``.
+    """
+
+    def __init__(self, delay: float = 0.0, frames: int = 50):
+        super().__init__(
+            capabilities=tts.TTSCapabilities(streaming=False),
+            sample_rate=24000,
+            num_channels=1,
+        )
+        self.delay = delay
+        self.frames = frames
+        self.calls: list[str] = []
+
+    def synthesize(self, text: str, *, conn_options=DEFAULT_API_CONNECT_OPTIONS):
+        self.calls.append(text)
+        return _StubProviderSynthesis(self, text, conn_options)
+
+
+class _StubProviderSynthesis(tts.ChunkedStream):
+    def __init__(
+        self, provider: StubProviderTTS, text: str, conn_options: APIConnectOptions
+    ):
+        super().__init__(tts=provider, input_text=text, conn_options=conn_options)
+        self._provider = provider
+
+    async def _run(self, output_emitter: tts.AudioEmitter):
+        await asyncio.sleep(self._provider.delay)
+        output_emitter.initialize(
+            request_id=f"stub_{id(self):x}",
+            sample_rate=24000,
+            num_channels=1,
+            mime_type="audio/pcm",
+            frame_size_ms=20,
+        )
+        for i in range(self._provider.frames):
+            output_emitter.push(array("h", [i % 128] * 480).tobytes())
+        output_emitter.flush()
+
+
+class StubSession:
+    """AgentSession stand-in with configurable start and reply latency"""
+
+    def __init__(
+        self,
+        start_delay: float = 0.0,
+        reply_delay: float = 0.0,
+        tts: Optional[StubTTS] = None,
+    ):
+        self.start_delay = start_delay
+        self.reply_delay = reply_delay
+        self.tts = tts or StubTTS()
+        self.agent = None
+        self.replies: list[str] = []
+        self.spoken: list[tuple[str, int]] = []
+        self.interruptions = 0
+        self.handlers: dict[str, list[Callable]] = {}
+
+    def on(self, event: str, callback: Optional[Callable] = None):
+        def register(fn):
+            self.handlers.setdefault(event, []).append(fn)
+            return fn
+
+        return register(callback) if callback is not None else register
+
+    def emit(self, event: str, *args):
+        for handler in self.handlers.get(event, []):
+            handler(*args)
+
+    async def start(self, room, agent, room_input_options=None):
+        await asyncio.sleep(self.start_delay)
+        self.agent = agent
+
+    async def generate_reply(self, instructions: str = ""):
+        await asyncio.sleep(self.reply_delay)
+        self.replies.append(instructions)
+
+    def say(self, text: str, audio=None) -> asyncio.Task:
+        """
+        Play ``audio`` (or synthesize ``text``) and record the frame count
+
+        Returns the awaitable playout, like AgentSession.say's SpeechHandle.
+        """
+        return asyncio.ensure_future(self._play(text, audio))
+
+    async def _play(self, text: str, audio):
+        if audio is None:
+            audio = (event.frame async for event in self.tts.synthesize(text))
+        frames = [frame async for frame in audio]
+        self.spoken.append((text, len(frames)))
+
+    def interrupt(self) -> asyncio.Future:
+        self.interruptions += 1
+        future = asyncio.get_running_loop().create_future()
+        future.set_result(None)
+        return future
+
+
+class FakeAudioOutput(io.AudioOutput):
+    """
+    Audio sink for an offline caller
+
+    Each segment plays out in real time from its first frame (or as soon
+    as it is flushed, with ``realtime=False``) unless the buffer is
+    cleared first; the audio itself is discarded.
+    """
+
+    def __init__(self, realtime: bool = True):
+        super().__init__(
+            label="FakeAudioOutput",
+            capabilities=io.AudioOutputCapabilities(pause=False),
+        )
+        self.realtime = realtime
+        self.frames = 0
+        self._pushed = 0.0
+        self._started_at = 0.0
+        self._interrupted = asyncio.Event()
+        self._playout: Optional[asyncio.Task] = None
+
+    async def capture_frame(self, frame: rtc.AudioFrame):
+        if self._playout is not None and not self._playout.done():
+            await self._playout
+        await super().capture_frame(frame)
+        if not self._pushed:
+            self._started_at = time.monotonic()
+        self._pushed += frame.duration
+        self.frames += 1
+
+    def flush(self):
+        super().flush()
+        if self._pushed:
+            self._playout = asyncio.ensure_future(self._play_out())
+
+    def clear_buffer(self):
+        if self._pushed:
+            self._interrupted.set()
+
+    async def _play_out(self):
+        remaining = 0.0
+        if self.realtime:
+            remaining = self._started_at + self._pushed - time.monotonic()
+        try:
+            await asyncio.wait_for(self._interrupted.wait(), max(remaining, 0.0))
+        except asyncio.TimeoutError:
+            pass
+        interrupted = self._interrupted.is_set()
+        position = self._pushed
+        if interrupted:
+            position = min(time.monotonic() - self._started_at, position)
+        self._pushed = 0.0
+        self._interrupted.clear()
+        self.on_playback_finished(playback_position=position, interrupted=interrupted)
+
+
+class SimulatedSession(AgentSession):
+    """
+    AgentSession talking to an offline caller through stub providers
+
+    The real voice pipeline runs (STT turn detection, the agent's
+    on_user_turn_completed and llm_node, TTS, speech scheduling and
+    metrics events) without a room: user_turn() has the caller say a
+    line, which StubProviderSTT transcribes, and returns the agent's
+    reply once FakeAudioOutput has played it out. There is no VAD, so no
+    interruption by speech, and no endpointing delay unless
+    ``min_endpointing_delay`` is given.
+    """
+
+    def __init__(
+        self,
+        stt: Optional["StubProviderSTT"] = None,
+        llm: Optional["StubProviderLLM"] = None,
+        tts: Optional["StubProviderTTS"] = None,
+        realtime: bool = True,
+        **kwargs,
+    ):
+        kwargs.setdefault("min_endpointing_delay", 0.0)
+        # FakeAudioOutput cannot pause
+        kwargs.setdefault("resume_false_interruption", False)
+        super().__init__(
+            stt=stt or StubProviderSTT(),
+            llm=llm or StubProviderLLM([0.0]),
+            tts=tts or StubProviderTTS(),
+            turn_detection="stt",
+            **kwargs,
+        )
+        self.output.audio = FakeAudioOutput(realtime=realtime)
+
+    async def start(self, agent, *, room=None, room_input_options=None, **kwargs):
+        """Start the agent without RoomIO; the room and its options are unused"""
+        await super().start(agent, **kwargs)
+
+    async def user_turn(self, text: str) -> str:
+        """Have the caller say ``text``; returns the reply once played out"""
+        created = asyncio.get_running_loop().create_future()
+
+        def on_speech_created(event: SpeechCreatedEvent):
+            if not created.done():
+                created.set_result(event.speech_handle)
+
+        self.on("speech_created", on_speech_created)
+        try:
+            self.stt.speak(text)
+            handle = await created
+        finally:
+            self.off("speech_created", on_speech_created)
+        await handle
+        # The scheduler lets go of a finished speech a moment later;
+        # closing the session before then waits on it forever
+        while self.current_speech is handle:
+            await asyncio.sleep(0)
+        return " ".join(
+            item.text_content or ""
+            for item in handle.chat_items
+            if item.type == "message"
+        ).strip()
+
+
+class StubAgent:
+    """Agent stand-in that keeps its instructions"""
+
+    def __init__(self, instructions: str, agent_context=None):
+        self.instructions = instructions
+        self.agent_context = agent_context
+        self.ivr = None
+
+
+def voice_assistant(instructions: str, agent_context=None):
+    """
+    agent.agent.VoiceAssistant for offline sessions, as a create_agent
+
+    agent.agent checks the configured providers' API keys at import;
+    offline sessions never reach the providers, so placeholders stand in
+    for missing keys.
+    """
+    config = ModelConfig.from_env()
+    for providers, name in (
+        (STT_PROVIDERS, config.stt_provider),
+        (LLM_PROVIDERS, config.llm_provider),
+        (TTS_PROVIDERS, config.tts_provider),
+    ):
+        os.environ.setdefault(providers[name]["requires_key"], "offline")
+    from agent.agent import VoiceAssistant
+
+    return VoiceAssistant(instructions, agent_context)
+
+
+class StubLiveKitServer:
+    """
+    Local HTTP server answering the LiveKit Twirp calls dialing makes
+
+    Serves CreateSIPParticipant, CreateDispatch (each dispatch's room
+    stays in ``rooms`` until the test removes it) and ListRooms, and
+    lists, creates, updates and deletes SIP trunks and dispatch rules
+    kept in ``sip`` by kind ("inbound_trunk", "outbound_trunk",
+    "dispatch_rule"), then ID. Counts
+    the TCP connections clients open and the most requests in flight at
+    once; the first ``fail_first`` requests get ``fail_status``.
+    """
+
+    def __init__(
+        self, delay: float = 0.0, fail_first: int = 0, fail_status: int = 503
+    ):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests: list[Any] = []
+        self.rooms: dict[str, api.AgentDispatch] = {}
+        self.sip: dict[str, dict[str, Any]] = {
+            "inbound_trunk": {},
+            "outbound_trunk": {},
+            "dispatch_rule": {},
+        }
+        self.peers: set[Any] = set()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self._runner: Optional[web.AppRunner] = None
+        self.url = ""
+
+    @property
+    def connections(self) -> int:
+        return len(self.peers)
+
+    async def start(self) -> "StubLiveKitServer":
+        app = web.Application()
+        routes = {
+            "livekit.SIP/CreateSIPParticipant": (
+                api.CreateSIPParticipantRequest,
+                self._create_sip_participant,
+            ),
+            "livekit.AgentDispatchService/CreateDispatch": (
+                api.CreateAgentDispatchRequest,
+                self._create_dispatch,
+            ),
+            "livekit.RoomService/ListRooms": (api.ListRoomsRequest, self._list_rooms),
+            **self._sip_routes(),
+        }
+        for path, (request_class, respond) in routes.items():
+
+            async def handle(request, request_class=request_class, respond=respond):
+                return await self._handle(request, request_class, respond)
+
+            app.router.add_post(f"/twirp/{path}", handle)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self.url = "http://%s:%d" % self._runner.addresses[0][:2]
+        return self
+
+    async def _handle(
+        self, request: web.Request, request_class: type, respond: Callable
+    ) -> web.Response:
+        self.peers.add(request.transport.get_extra_info("peername"))
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.delay)
+            body = request_class.FromString(await request.read())
+            self.requests.append(body)
+            if len(self.requests) <= self.fail_first:
+                return web.json_response(
+                    {"code": "unavailable", "msg": "stub failure"},
+                    status=self.fail_status,
+                )
+            response = respond(body)
+            if response is None:
+                return web.json_response(
+                    {"code": "not_found", "msg": "stub not found"}, status=404
+                )
+            return web.Response(
+                body=response.SerializeToString(),
+                content_type="application/protobuf",
+            )
+        finally:
+            self.in_flight -= 1
+
+    def _create_sip_participant(self, body: api.CreateSIPParticipantRequest):
+        return api.SIPParticipantInfo(
+            participant_id=f"PA_{len(self.requests)}",
+            participant_identity=body.participant_identity,
+            room_name=body.room_name,
+            sip_call_id=f"SCL_{len(self.requests)}",
+        )
+
+    def _create_dispatch(self, body: api.CreateAgentDispatchRequest):
+        dispatch = api.AgentDispatch(
+            id=f"AD_{len(self.requests)}",
+            agent_name=body.agent_name,
+            room=body.room,
+            metadata=body.metadata,
+        )
+        self.rooms[body.room] = dispatch
+        return dispatch
+
+    def _list_rooms(self, body: api.ListRoomsRequest):
+        return api.ListRoomsResponse(
+            rooms=[api.Room(name=name) for name in self.rooms]
+        )
+
+    def _sip_routes(self) -> dict[str, tuple[type, Callable]]:
+        routes = {}
+        kinds = (
+            ("inbound_trunk", "SIPInboundTrunk", "trunk", "sip_trunk_id", "ST"),
+            ("outbound_trunk", "SIPOutboundTrunk", "trunk", "sip_trunk_id", "ST"),
+            (
+                "dispatch_rule",
+                "SIPDispatchRule",
+                "dispatch_rule",
+                "sip_dispatch_rule_id",
+                "SDR",
+            ),
+        )
+        for kind, name, attr, id_field, prefix in kinds:
+            store = self.sip[kind]
+
+            def create(body, store=store, attr=attr, id_field=id_field, p=prefix):
+                info = getattr(body, attr)
+                setattr(info, id_field, f"{p}_{len(self.requests)}")
+                store[getattr(info, id_field)] = info
+                return info
+
+            def update(body, store=store, id_field=id_field):
+                resource_id = getattr(body, id_field)
+                if resource_id not in store:
+                    return None
+                info = body.replace
+                setattr(info, id_field, resource_id)
+                store[resource_id] = info
+                return info
+
+            responses = getattr(api, f"List{name}Response")
+            routes[f"livekit.SIP/List{name}"] = (
+                getattr(api, f"List{name}Request"),
+                lambda body, store=store, responses=responses: responses(
+                    items=list(store.values())
+                ),
+            )
+            routes[f"livekit.SIP/Create{name}"] = (
+                getattr(api, f"Create{name}Request"),
+                create,
+            )
+            routes[f"livekit.SIP/Update{name}"] = (
+                getattr(api, f"Update{name}Request"),
+                update,
+            )
+        routes["livekit.SIP/DeleteSIPTrunk"] = (
+            api.DeleteSIPTrunkRequest,
+            self._delete_sip_trunk,
+        )
+        routes["livekit.SIP/DeleteSIPDispatchRule"] = (
+            api.DeleteSIPDispatchRuleRequest,
+            lambda body: self.sip["dispatch_rule"].pop(body.sip_dispatch_rule_id, None),
+        )
+        return routes
+
+    def _delete_sip_trunk(self, body: api.DeleteSIPTrunkRequest):
+        for kind in ("inbound_trunk", "outbound_trunk"):
+            info = self.sip[kind].pop(body.sip_trunk_id, None)
+            if info is not None:
+                return info
+        return None
+
+    async def close(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -0,0 +1,216 @@
+"""Test answering machine detection and its outbound call handling"""
+import asyncio
+import json
+import wave
+
+import numpy as np
+import pytest
+from livekit import rtc
+from test_call_setup import _dependencies
+
+from agent.call_setup import run_call
+from scripts.amd_eval import evaluate
+from telephony.answering_machine import (
+    HUMAN,
+    MACHINE,
+    UNKNOWN,
+    AnsweringMachineDetector,
+)
+from testing.fakes import FakeJobContext, sip_participant
+
+RATE = 8000
+
+
+def speech(seconds: float, syllables_per_second: float = 4.0) -> np.ndarray:
+    """Voiced harmonics with a syllable-rate envelope"""
+    t = np.arange(int(seconds * RATE)) / RATE
+    envelope = np.clip(np.sin(np.pi * syllables_per_second * t), 0, None) ** 0.5
+    voice = sum(np.sin(2 * np.pi * 140 * k * t) / k for k in range(1, 6))
+    return (0.3 * envelope * voice).astype(np.float32)
+
+
+def silence(seconds: float, seed: int = 0) -> np.ndarray:
+    noise = np.random.default_rng(seed).normal(0, 0.001, int(seconds * RATE))
+    return noise.astype(np.float32)
+
+
+def beep(seconds: float = 0.5, hz: float = 1000.0) -> np.ndarray:
+    t = np.arange(int(seconds * RATE)) / RATE
+    return (0.3 * np.sin(2 * np.pi * hz * t)).astype(np.float32)
+
+
+def ringback(rings: int = 2) -> np.ndarray:
+    """US ringback: 440+480Hz, 2s on and 4s off"""
+    t = np.arange(int(2 * RATE)) / RATE
+    ring = (0.15 * (np.sin(2 * np.pi * 440 * t) + np.sin(2 * np.pi * 480 * t)))
+    return np.concatenate([ring.astype(np.float32), silence(4)] * rings)
+
+
+CALLS = {
+    # "Hello?" and a pause for the caller
+    HUMAN: [
+        np.concatenate([silence(0.4), speech(0.6), silence(3.0)]),
+        np.concatenate([silence(0.2), speech(1.0), silence(3.0)]),
+    ],
+    # A recorded greeting, then the beep
+    MACHINE: [
+        np.concatenate([silence(0.3), speech(3.5), silence(0.4), beep(), silence(2)]),
+        np.concatenate([silence(0.3), speech(1.2, 6), silence(0.2), speech(2.0)]),
+    ],
+}
+
+
+def _detect(audio: np.ndarray, frame: int = 160) -> AnsweringMachineDetector:
+    detector = AnsweringMachineDetector()
+    for i in range(0, len(audio), frame):
+        detector.push(audio[i : i + frame], RATE)
+    return detector
+
+
+def test_classifies_greetings():
+    """Test human, machine, beep and dead-air answers"""
+    for label, calls in CALLS.items():
+        for audio in calls:
+            assert _detect(audio).result.label == label
+
+    human = _detect(CALLS[HUMAN][0]).result
+    assert human.reason == "short_greeting"
+    # Decided after the greeting plus the pause, not after the whole clip
+    assert human.decided_after < 2.0
+
+    machine = _detect(CALLS[MACHINE][0])
+    assert machine.result.reason == "long_greeting"
+    assert machine.beep and machine.ready_for_message
+
+    beep_only = _detect(np.concatenate([silence(0.5), beep(), silence(1)]))
+    assert beep_only.result.reason == "beep"
+    assert _detect(silence(6)).result.label == UNKNOWN
+
+
+def test_ringback_is_neither_beep_nor_greeting():
+    """Test that a dual-tone ringback heard before the answer is not a machine"""
+    detector = _detect(np.concatenate([silence(0.2), ringback()]))
+
+    assert not detector.beep
+    assert detector.result.label == UNKNOWN
+    assert detector.result.reason == "initial_silence"
+
+
+@pytest.mark.asyncio
+async def test_evaluation_harness_over_wav_fixtures(tmp_path):
+    """Test accuracy and decision latency over labeled WAV files"""
+    for label, calls in CALLS.items():
+        (tmp_path / label).mkdir()
+        for index, audio in enumerate(calls):
+            with wave.open(str(tmp_path / label / f"{index}.wav"), "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(RATE)
+                wav.writeframes((audio * 32767).astype(np.int16).tobytes())
+
+    report = await evaluate(str(tmp_path))
+
+    assert report["files"] == 4
+    assert report["accuracy"] == 1.0
+    assert report["confusion"][MACHINE][MACHINE] == 2
+    assert 0 < report["decision_s"]["p50"] <= report["decision_s"]["max"] < 3
+
+
+def _answering(audio: np.ndarray):
+    """answering_machine factory that plays ``audio`` as the callee"""
+    samples = RATE // 50
+
+    async def frames():
+        pcm = (audio * 32767).astype(np.int16)
+        for i in range(0, len(pcm) - samples + 1, samples):
+            yield rtc.AudioFrame(pcm[i : i + samples].tobytes(), RATE, 1, samples)
+            await asyncio.sleep(0)
+
+    def start(ctx, participant):
+        detector = AnsweringMachineDetector()
+        detector.start(frames())
+        return detector
+
+    return start
+
+
+@pytest.mark.asyncio
+async def test_machine_gets_voicemail_and_hang_up():
+    """Test that a machine hears the voicemail after its beep, then the call ends"""
+    deps = _dependencies()
+    deps.answering_machine = _answering(CALLS[MACHINE][0])
+    message = "Hi, this is Acme returning your call. Please call us back."
+    ctx = FakeJobContext(
+        participant=sip_participant(),
+        metadata=json.dumps(
+            {"phone_number": "+15550001111", "voicemail_message": message}
+        ),
+    )
+
+    state = await run_call(ctx, deps)
+
+    assert state.answered_by.label == MACHINE
+    assert state.greeting == message
+    assert state.session.replies == [f"Say: {message}"]
+    assert ctx.room_deleted
+    assert state.agent_context.call_metadata["answered_by"] == MACHINE
+    assert "machine_greeting" in state.timer.phases
+
+    await ctx.shutdown()
+    await deps.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_detection_starts_when_the_call_is_answered():
+    """Test that a dialer returning while the callee rings is waited out"""
+    deps = _dependencies()
+    started = []
+    answering = _answering(CALLS[HUMAN][0])
+
+    def start(ctx, participant):
+        started.append(participant.attributes["sip.callStatus"])
+        return answering(ctx, participant)
+
+    deps.answering_machine = start
+    participant = sip_participant()
+    participant.attributes["sip.callStatus"] = "ringing"
+    ctx = FakeJobContext(
+        participant=participant,
+        metadata=json.dumps({"phone_number": "+15550001111"}),
+    )
+
+    call = asyncio.create_task(run_call(ctx, deps))
+    while "participant_attributes_changed" not in ctx.room.handlers:
+        await asyncio.sleep(0.01)
+    assert started == []
+    participant.attributes["sip.callStatus"] = "active"
+    ctx.room.emit(
+        "participant_attributes_changed", {"sip.callStatus": "active"}, participant
+    )
+    state = await call
+
+    assert started == ["active"]
+    assert state.answered_by.label == HUMAN
+
+    await ctx.shutdown()
+    await deps.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_human_gets_greeting():
+    """Test that a human answer continues as a normal call"""
+    deps = _dependencies()
+    deps.answering_machine = _answering(CALLS[HUMAN][0])
+    ctx = FakeJobContext(
+        participant=sip_participant(),
+        metadata=json.dumps({"phone_number": "+15550001111"}),
+    )
+
+    state = await run_call(ctx, deps)
+
+    assert state.answered_by.label == HUMAN
+    assert state.session.replies == [f"Say: {state.greeting}"]
+    assert not ctx.room_deleted
+
+    await ctx.shutdown()
+    await deps.storage.close()
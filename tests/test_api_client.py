@@ -0,0 +1,176 @@
+"""Test the shared LiveKit API client pool against a local stub server"""
+import asyncio
+
+import pytest
+from livekit import api
+
+from telephony.api_client import LiveKitAPIPool
+from telephony.outbound_handler import make_outbound_call
+from testing.fakes import StubLiveKitServer
+
+
+def _request(number: str = "+15550001111") -> api.CreateSIPParticipantRequest:
+    return api.CreateSIPParticipantRequest(
+        sip_trunk_id="ST_test", sip_call_to=number, room_name=f"call-{number[1:]}"
+    )
+
+
+def _pool(server: StubLiveKitServer, **options) -> LiveKitAPIPool:
+    options.setdefault("jitter", lambda: 0.0)
+    return LiveKitAPIPool(server.url, "key", "secret-" * 6, **options)
+
+
+def _dial(request: api.CreateSIPParticipantRequest):
+    return lambda livekit_api: livekit_api.sip.create_sip_participant(request)
+
+
+@pytest.mark.asyncio
+async def test_consecutive_calls_reuse_one_connection():
+    """Test that the keep-alive session serves sequential calls over one socket"""
+    server = await StubLiveKitServer().start()
+    pool = _pool(server)
+
+    for _ in range(5):
+        info = await pool.call(_dial(_request()), idempotent=False)
+        assert info.room_name == "call-15550001111"
+
+    assert server.connections == 1
+    assert pool.stats() == {
+        "calls": 5,
+        "retries": 0,
+        "failures": 0,
+        "sessions_created": 1,
+    }
+    await pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_dial_retries_when_server_turned_it_away():
+    """Test that a 503 is retried even for a dial, since nothing was placed"""
+    server = await StubLiveKitServer(fail_first=2).start()
+    pool = _pool(server)
+
+    info = await pool.call(_dial(_request()), idempotent=False)
+
+    assert info.participant_id == "PA_3"
+    assert pool.retries == 2 and pool.failures == 0
+    await pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_dial_not_retried_after_ambiguous_error():
+    """Test that a 500 fails a dial at once but is retried when idempotent"""
+    server = await StubLiveKitServer(fail_first=1, fail_status=500).start()
+    pool = _pool(server)
+
+    with pytest.raises(api.TwirpError) as error:
+        await pool.call(_dial(_request()), idempotent=False)
+    assert error.value.status == 500
+    assert len(server.requests) == 1 and pool.failures == 1
+
+    server.requests.clear()
+    await pool.call(_dial(_request()), idempotent=True)
+    assert len(server.requests) == 2 and pool.retries == 1
+    await pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_retries_give_up_with_backoff():
+    """Test that retries stop at max_retries, backing off exponentially"""
+    server = await StubLiveKitServer(fail_first=10).start()
+    pool = _pool(server, max_retries=2, backoff=0.01, jitter=lambda: 1.0)
+
+    with pytest.raises(api.TwirpError):
+        await pool.call(_dial(_request()))
+
+    assert len(server.requests) == 3
+    assert pool.retries == 2 and pool.failures == 1
+    assert [pool.backoff_delay(attempt) for attempt in range(3)] == [
+        0.01,
+        0.02,
+        0.04,
+    ]
+    assert pool.backoff_delay(10) == pool.max_backoff
+    await pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_concurrency_is_bounded():
+    """Test that calls beyond max_concurrency wait for a free slot"""
+    server = await StubLiveKitServer(delay=0.02).start()
+    pool = _pool(server, max_concurrency=3)
+
+    numbers = [f"+1555000{i:04d}" for i in range(12)]
+    infos = await asyncio.gather(
+        *(pool.call(_dial(_request(number))) for number in numbers)
+    )
+
+    assert [info.room_name for info in infos] == [f"call-{n[1:]}" for n in numbers]
+    assert server.max_in_flight == 3
+    assert server.connections <= 3
+    await pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_reopens_after_close():
+    """Test that a closed pool opens a new session on the next call"""
+    server = await StubLiveKitServer().start()
+    pool = _pool(server)
+
+    await pool.call(_dial(_request()))
+    await pool.aclose()
+    await pool.call(_dial(_request()))
+
+    assert pool.sessions_created == 2
+    assert server.connections == 2
+    await pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_each_event_loop_has_its_own_client():
+    """Test that jobs on other threads' loops neither replace nor close ours"""
+    server = await StubLiveKitServer().start()
+    pool = _pool(server)
+    await pool.call(_dial(_request()))
+    ours = pool.client()
+
+    def job(number: str):
+        async def run():
+            await pool.call(_dial(_request(number)))
+            await pool.aclose()
+
+        asyncio.run(run())
+
+    await asyncio.gather(
+        *(asyncio.to_thread(job, f"+1555000{i:04d}") for i in range(2))
+    )
+    await pool.call(_dial(_request()))
+
+    assert pool.client() is ours
+    assert pool.sessions_created == 3
+    assert len(server.requests) == 4
+    await pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_outbound_call_dials_through_pool(monkeypatch):
+    """Test that make_outbound_call sends its request over the given pool"""
+    monkeypatch.setenv("SIP_OUTBOUND_TRUNK_ID", "ST_outbound")
+    server = await StubLiveKitServer().start()
+    pool = _pool(server)
+
+    info = await make_outbound_call("+15550001111", "call-15550001111", pool)
+
+    assert info.participant_identity == "sip_15550001111"
+    (request,) = server.requests
+    assert request.sip_trunk_id == "ST_outbound"
+    assert request.sip_call_to == "+15550001111"
+    await pool.aclose()
+    await server.close()
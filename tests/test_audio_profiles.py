@@ -0,0 +1,83 @@
+"""Test audio profile selection per participant kind and organization"""
+import json
+
+import pytest
+
+from agent.call_setup import run_call
+from audio.profiles import PHONE, WEB, AudioProfile, AudioProfiles
+from models.context import OrganizationContext
+from testing.fakes import FakeJobContext, sip_participant
+from test_call_setup import _dependencies
+
+
+def test_resolve_by_participant_kind_and_org_override():
+    """Test phone/web defaults and organization overrides"""
+    profiles = AudioProfiles()
+    assert profiles.resolve(is_phone=True).name == PHONE
+    assert profiles.resolve(is_phone=False).name == WEB
+    assert profiles.resolve(True).noise_cancellation == "bvc_telephony"
+
+    lite = OrganizationContext(
+        org_id="quiet", name="Quiet", custom_settings={"audio_profile": "phone_lite"}
+    )
+    assert profiles.resolve(True, lite).noise_cancellation is None
+
+    per_kind = OrganizationContext(
+        org_id="mixed",
+        name="Mixed",
+        custom_settings={"audio_profile": {"phone": "phone_lite"}},
+    )
+    assert profiles.resolve(True, per_kind).name == "phone_lite"
+    assert profiles.resolve(False, per_kind).name == WEB
+
+    unknown = OrganizationContext(
+        org_id="typo", name="Typo", custom_settings={"audio_profile": "nope"}
+    )
+    assert profiles.resolve(True, unknown).name == PHONE
+
+
+def test_profiles_from_file_override_defaults(tmp_path):
+    """Test that a JSON file adds profiles and overrides default fields"""
+    path = tmp_path / "audio_profiles.json"
+    path.write_text(
+        json.dumps(
+            {
+                "phone": {"vad_activation_threshold": 0.6},
+                "studio": {"noise_cancellation": "nc", "input_sample_rate": 48000},
+            }
+        )
+    )
+    profiles = AudioProfiles.from_file(str(path)).profiles
+
+    assert profiles["phone"].vad_activation_threshold == 0.6
+    assert profiles["phone"].noise_cancellation == "bvc_telephony"
+    assert profiles["studio"].input_sample_rate == 48000
+    assert AudioProfiles.from_file(str(tmp_path / "missing.json")).profiles["web"]
+
+    path.write_text(json.dumps({"phone": {"vad_rate": 8000}}))
+    with pytest.raises(ValueError):
+        AudioProfiles.from_file(str(path))
+
+
+def test_invalid_profile_settings():
+    """Test that unknown NC models and VAD rates are rejected"""
+    with pytest.raises(ValueError):
+        AudioProfile("bad", noise_cancellation="krisp")
+    with pytest.raises(ValueError):
+        AudioProfile("bad", vad_sample_rate=24000)
+
+
+@pytest.mark.asyncio
+async def test_call_setup_passes_profile_to_room_input():
+    """Test that a phone call gets the phone profile for its room input"""
+    received = []
+    deps = _dependencies()
+    deps.audio_profiles = AudioProfiles()
+    deps.room_input_options = lambda ctx, profile: received.append(profile)
+
+    state = await run_call(FakeJobContext(participant=sip_participant()), deps)
+
+    assert [p.name for p in received] == [PHONE]
+    assert state.agent_context.call_metadata["audio_profile"] == PHONE
+
+    await deps.storage.close()
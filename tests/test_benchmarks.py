@@ -0,0 +1,371 @@
+"""Micro-benchmarks for call hot-path operations
+
+Run with ``pytest tests/test_benchmarks.py -s`` to see the timings. They
+are printed, not asserted, as they vary with the machine's load; the
+assertions check behavior such as request counts.
+"""
+import asyncio
+import time
+from datetime import datetime
+
+import pytest
+from livekit import api
+from livekit.agents import llm
+
+from agent.response_cache import ResponseCache
+from audio.profiles import AudioProfiles
+from audio.recorder import CallRecorder
+from audio.tts_cache import TTSAudioCache
+from models.context import (
+    AgentContext,
+    ConversationContext,
+    OrganizationContext,
+    UserContext,
+)
+from models.snapshot import decode_snapshot, encode_snapshot
+from scripts.audio_profile_benchmark import run_benchmark
+from telephony.api_client import LiveKitAPIPool
+from telephony.campaign import CampaignCheckpoint, CampaignContact, CampaignDialer
+from telephony.ivr import IVRCall, IVRMenu, IVRMenus
+from testing.fakes import (
+    SimulatedSession,
+    StubLiveKitServer,
+    StubLLM,
+    StubProviderLLM,
+    StubProviderTTS,
+    tone_frames,
+    voice_assistant,
+)
+
+ITERATIONS = 2000
+
+
+def _best_of(fn, repeat: int = 9) -> float:
+    """Return the fastest of several timed runs of fn, in seconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def test_benchmark_context_construction():
+    """Compare the validating factories with model_construct for a call's contexts"""
+    profile = {
+        "user_id": "user123",
+        "name": "John",
+        "phone_number": "+1234567890",
+        "email": "john@example.com",
+        "preferences": {"language": "en"},
+        "created_at": "2025-01-01T12:00:00",
+    }
+    org_record = {
+        "org_id": "org123",
+        "name": "Tech Corp",
+        "industry": "tech",
+        "business_hours": {"monday-friday": "9:00-17:00"},
+        "branding": {"color": "blue"},
+    }
+
+    def constructed():
+        for _ in range(ITERATIONS):
+            user = UserContext.model_construct(
+                user_id=profile["user_id"],
+                name=profile["name"],
+                phone_number=profile["phone_number"],
+                email=profile["email"],
+                language=profile["preferences"]["language"],
+                created_at=datetime.fromisoformat(profile["created_at"]),
+            )
+            org = OrganizationContext.model_construct(**org_record)
+            conv = ConversationContext.model_construct(
+                conversation_id="c1", user_id=user.user_id, metadata={"room": "r1"}
+            )
+            AgentContext.model_construct(user=user, organization=org, conversation=conv)
+
+    def validated():
+        for _ in range(ITERATIONS):
+            user = UserContext.from_profile(profile)
+            org = OrganizationContext.from_record(org_record)
+            conv = ConversationContext.new(
+                "c1", user.user_id, datetime.utcnow(), {"room": "r1"}
+            )
+            AgentContext.assemble(user, org, conv)
+
+    constructed_time = _best_of(constructed)
+    validated_time = _best_of(validated)
+    # On pydantic 2 validation runs in pydantic-core, while model_construct
+    # fills defaults in a Python loop, so skipping validation is no faster.
+    # Reported, not asserted: wall-clock comparisons vary between runs
+    print(
+        f"\ncontext construction x{ITERATIONS}: "
+        f"model_construct={constructed_time * 1000:.1f}ms "
+        f"validated={validated_time * 1000:.1f}ms "
+        f"speedup={constructed_time / validated_time:.1f}x"
+    )
+
+
+def _sample_agent_context() -> AgentContext:
+    """Build a representative agent context for serialization benchmarks"""
+    return AgentContext(
+        user=UserContext(
+            user_id="sip_15550001111",
+            name="John Doe",
+            phone_number="+15550001111",
+            email="john@example.com",
+        ),
+        organization=OrganizationContext(
+            org_id="acme",
+            name="Acme Plumbing",
+            industry="home services",
+            business_hours={"monday-friday": "8:00-18:00", "saturday": "9:00-12:00"},
+            contact_info={"email": "office@acme.example", "phone": "+15550002222"},
+            branding={"greeting_name": "Acme"},
+        ),
+        conversation=ConversationContext(
+            conversation_id="9f1c2d7e-0b7a-4d43-9a55-2f1f1f0e6a01",
+            user_id="sip_15550001111",
+            current_intent="schedule_service",
+            summary="Caller has a leaking kitchen sink and wants a visit on Tuesday.",
+            variables={"preferred_day": "tuesday", "issue": "leak"},
+            metadata={"is_phone": True, "room": "call-_+15550001111_abc"},
+        ),
+        is_phone_call=True,
+        call_metadata={"participant_id": "sip_15550001111"},
+    )
+
+
+def test_benchmark_snapshot_vs_model_dump_json():
+    """Compare snapshot size and speed against pydantic JSON"""
+    context = _sample_agent_context()
+
+    snapshot = encode_snapshot(context)
+    dumped = context.model_dump_json().encode()
+
+    encode_time = _best_of(
+        lambda: [encode_snapshot(context) for _ in range(ITERATIONS)]
+    )
+    dump_time = _best_of(lambda: [context.model_dump_json() for _ in range(ITERATIONS)])
+    decode_time = _best_of(
+        lambda: [decode_snapshot(snapshot) for _ in range(ITERATIONS)]
+    )
+    validate_time = _best_of(
+        lambda: [AgentContext.model_validate_json(dumped) for _ in range(ITERATIONS)]
+    )
+
+    print(
+        f"\nsnapshot size={len(snapshot)}B model_dump_json size={len(dumped)}B"
+        f"\nencode x{ITERATIONS}: snapshot={encode_time * 1000:.1f}ms "
+        f"model_dump_json={dump_time * 1000:.1f}ms"
+        f"\ndecode x{ITERATIONS}: snapshot={decode_time * 1000:.1f}ms "
+        f"model_validate_json={validate_time * 1000:.1f}ms"
+    )
+
+    assert decode_snapshot(snapshot) == AgentContext.model_validate_json(dumped)
+    assert len(snapshot) < len(dumped)
+
+
+@pytest.mark.asyncio
+async def test_benchmark_response_cache_hit_vs_llm():
+    """Compare a repeated FAQ turn through the cache with a stub LLM round trip"""
+    llm_latency = 0.05
+    stub = StubLLM(delay=llm_latency)
+    cache = ResponseCache()
+    context = AgentContext(
+        user=UserContext(user_id="caller"),
+        organization=OrganizationContext(org_id="acme", name="Acme"),
+        conversation=ConversationContext(conversation_id="conv", user_id="caller"),
+        call_metadata={"prompt_version": "phone_receptionist@1.0"},
+    )
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="user", content="What are your opening hours?")
+
+    async def turn():
+        return [chunk async for chunk in cache.respond(context, chat_ctx, stub.stream)]
+
+    start = time.perf_counter()
+    await turn()
+    miss = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        await turn()
+    hit = (time.perf_counter() - start) / ITERATIONS
+
+    print(
+        f"\nresponse turn: llm={miss * 1000:.1f}ms cached={hit * 1e6:.1f}us "
+        f"speedup={miss / hit:.0f}x"
+    )
+    assert stub.calls == 1
+    assert cache.stats()["hit_rate"] == pytest.approx(ITERATIONS / (ITERATIONS + 1))
+
+
+@pytest.mark.asyncio
+async def test_benchmark_audio_profiles():
+    """Compare per-session input processing CPU of the audio profiles"""
+    report = await run_benchmark(seconds=2, repeat=1)
+
+    for name, row in report.items():
+        print(f"\naudio profile {name}: {row['cpu_ms_per_audio_s']}ms CPU/s of audio")
+    assert set(report) == set(AudioProfiles().profiles)
+    assert all(row["vad_events"] > 0 for row in report.values())
+
+
+@pytest.mark.asyncio
+async def test_benchmark_recorder_push_frame(tmp_path):
+    """Time the real-time side of recording while encoding and disk lag behind"""
+
+    class SlowDiskRecorder(CallRecorder):
+        def _write(self, file, chunk):
+            time.sleep(0.05)
+            super()._write(file, chunk)
+
+    seconds = 20
+    caller = tone_frames(seconds)
+    agent = tone_frames(seconds, 48000, 880)
+
+    async def push_all(recorder):
+        timings = []
+        for caller_frame, agent_frame in zip(caller, agent):
+            start = time.perf_counter()
+            if recorder is not None:
+                recorder.push_frame("caller", caller_frame)
+                recorder.push_frame("agent", agent_frame)
+            timings.append(time.perf_counter() - start)
+            await asyncio.sleep(0)
+        return sorted(timings)
+
+    baseline = await push_all(None)
+    recorder = SlowDiskRecorder(str(tmp_path / "call.ogg"), chunk_bytes=16 * 1024)
+    await recorder.start()
+    timings = await push_all(recorder)
+    stats = await recorder.aclose()
+
+    p99 = timings[int(len(timings) * 0.99)]
+    print(
+        f"\nrecorder push (2 legs): p50={timings[len(timings) // 2] * 1e6:.1f}us "
+        f"p99={p99 * 1e6:.1f}us max={timings[-1] * 1e6:.1f}us "
+        f"(no recorder max={baseline[-1] * 1e6:.1f}us); "
+        f"encode={stats['encode_ms'] / seconds:.2f}ms CPU/s of audio, "
+        f"dropped={stats['dropped_frames']}/{stats['frames'] + stats['dropped_frames']}"
+    )
+    assert stats["error"] is None
+
+
+@pytest.mark.asyncio
+async def test_benchmark_api_client_per_call_vs_pool():
+    """Compare a new LiveKitAPI per dial with the shared keep-alive pool"""
+    dials = 50
+    secret = "secret-" * 6
+    request = api.CreateSIPParticipantRequest(
+        sip_trunk_id="ST_test", sip_call_to="+15550001111", room_name="call-test"
+    )
+
+    async def per_call(url):
+        livekit_api = api.LiveKitAPI(url, "key", secret)
+        try:
+            return await livekit_api.sip.create_sip_participant(request)
+        finally:
+            await livekit_api.aclose()
+
+    async def time_dials(dial) -> list[float]:
+        timings = []
+        for _ in range(dials):
+            start = time.perf_counter()
+            await dial()
+            timings.append(time.perf_counter() - start)
+        return sorted(timings)
+
+    fresh_server = await StubLiveKitServer().start()
+    fresh = await time_dials(lambda: per_call(fresh_server.url))
+    await fresh_server.close()
+
+    pool_server = await StubLiveKitServer().start()
+    pool = LiveKitAPIPool(pool_server.url, "key", secret)
+    pooled = await time_dials(
+        lambda: pool.call(
+            lambda livekit_api: livekit_api.sip.create_sip_participant(request)
+        )
+    )
+    await pool.aclose()
+    await pool_server.close()
+
+    def p50(timings):
+        return timings[len(timings) // 2] * 1000
+
+    print(
+        f"\n{dials} dials: client per call p50={p50(fresh):.2f}ms "
+        f"connections={fresh_server.connections}, "
+        f"pool p50={p50(pooled):.2f}ms connections={pool_server.connections}"
+    )
+    assert fresh_server.connections == dials
+    assert pool_server.connections == 1
+
+
+@pytest.mark.asyncio
+async def test_benchmark_campaign_dispatch_throughput(tmp_path):
+    """Unthrottled campaign throughput with a file checkpoint per contact"""
+    contacts = [CampaignContact(f"+1555{i:07d}") for i in range(2000)]
+    server = await StubLiveKitServer().start()
+    pool = LiveKitAPIPool(server.url, "key", "secret-" * 6)
+    checkpoint = CampaignCheckpoint(str(tmp_path / "campaigns.db"))
+    dialer = CampaignDialer(
+        "bench", checkpoint, pool=pool, rate=1e6, max_in_flight=20
+    )
+
+    stats = await dialer.run(contacts)
+
+    await checkpoint.close()
+    await pool.aclose()
+    await server.close()
+    print(
+        f"\ncampaign: {stats['dispatched']} dispatches in {stats['elapsed_s']}s "
+        f"({stats['dispatches_per_s']}/s), dispatch p50="
+        f"{stats['dispatch_ms']['p50']}ms p95={stats['dispatch_ms']['p95']}ms, "
+        f"connections={server.connections}"
+    )
+    assert stats["dispatched"] == len(contacts)
+    assert server.connections <= 20
+
+
+@pytest.mark.asyncio
+async def test_benchmark_ivr_turn_vs_llm(tmp_path):
+    """Compare a menu turn from cached audio with a stub LLM and TTS turn"""
+    llm_latency, tts_latency = 0.05, 0.02
+    menus = IVRMenus(str(tmp_path))
+    menu = IVRMenu.from_dict(
+        {
+            "org_id": "acme",
+            "prompt": "For our hours press 1.",
+            "options": [
+                {"digit": "1", "keywords": ["hours"], "response": "We open at 9."}
+            ],
+        }
+    )
+    session = SimulatedSession(
+        llm=StubProviderLLM([llm_latency]),
+        tts=StubProviderTTS(delay=tts_latency),
+        realtime=False,
+    )
+    agent = voice_assistant("")
+    await session.start(agent)
+    ivr = IVRCall(menus, menu, session, TTSAudioCache(str(tmp_path / "tts")))
+    await ivr.prerender()
+    ivr.offer()
+
+    start = time.perf_counter()
+    await session.user_turn("What are your opening hours?")
+    llm_turn = time.perf_counter() - start
+
+    agent.ivr = ivr
+    for _ in range(ITERATIONS // 10):
+        await session.user_turn("What are your opening hours?")
+    first_audio = menus.stats()["first_audio_ms"]
+    await session.aclose()
+
+    print(
+        f"\nhours turn: llm+tts={llm_turn * 1000:.1f}ms "
+        f"ivr first audio p50={first_audio['p50']:.3f}ms"
+    )
+    assert session.llm.calls == 1
@@ -0,0 +1,244 @@
+"""Test concurrent call setup with stub components"""
+import asyncio
+import json
+import time
+
+import pytest
+
+from agent.call_setup import CallDependencies, parse_job_metadata, run_call
+from audio.tts_cache import TTSAudioCache
+from config.org_registry import OrganizationRegistry
+from memory.conversation_memory import ConversationMemory
+from memory.storage import MemoryStorage
+from prompts.renderer import PromptRenderer
+from prompts.store import PromptStore
+from testing.fakes import (
+    FakeJobContext,
+    FakeParticipant,
+    FakeRoom,
+    StubAgent,
+    StubSession,
+    StubTTS,
+    sip_participant,
+)
+
+CONNECT = 0.10
+PARTICIPANT = 0.15
+DIAL = 0.10
+SESSION_CREATE = 0.10
+SESSION_START = 0.02
+REPLY = 0.02
+
+
+def _dependencies(dial=None, create_session=None) -> CallDependencies:
+    """Real storage and prompt services with stubbed LiveKit pieces"""
+    storage = MemoryStorage(db_path=":memory:")
+
+    async def stub_dial(phone_number, room_name):
+        await asyncio.sleep(DIAL)
+
+    async def stub_create_session(ctx):
+        # Stands in for building STT/LLM/TTS/VAD/turn detection
+        await asyncio.sleep(SESSION_CREATE)
+        return StubSession(start_delay=SESSION_START, reply_delay=REPLY)
+
+    return CallDependencies(
+        storage=storage,
+        memory=ConversationMemory(storage),
+        prompt_store=PromptStore(db_path=":memory:"),
+        renderer=PromptRenderer(),
+        org_registry=OrganizationRegistry("missing.json"),
+        create_session=create_session or stub_create_session,
+        create_agent=StubAgent,
+        room_input_options=lambda ctx, profile: None,
+        dial=dial or stub_dial,
+        metrics_enabled=True,
+    )
+
+
+def test_parse_job_metadata():
+    """Test reading dispatch metadata as JSON"""
+    assert parse_job_metadata('{"phone_number": "+1555"}') == {"phone_number": "+1555"}
+    assert parse_job_metadata({"org_id": "acme"}) == {"org_id": "acme"}
+    assert parse_job_metadata("") == {}
+    assert parse_job_metadata("not json") == {}
+
+
+@pytest.mark.asyncio
+async def test_outbound_call_setup_overlaps_independent_steps():
+    """Test that setup runs faster than the serial sum of its steps"""
+    deps = _dependencies()
+    ctx = FakeJobContext(
+        participant=sip_participant(),
+        metadata=json.dumps({"phone_number": "+15550001111"}),
+        connect_delay=CONNECT,
+        participant_delay=PARTICIPANT,
+    )
+
+    start = time.perf_counter()
+    state = await run_call(ctx, deps)
+    elapsed = time.perf_counter() - start
+
+    serial = CONNECT + PARTICIPANT + DIAL + SESSION_CREATE + SESSION_START + REPLY
+    critical_path = CONNECT + PARTICIPANT + SESSION_START + REPLY
+    print(f"\nsetup: serial={serial * 1000:.0f}ms concurrent={elapsed * 1000:.0f}ms")
+
+    assert elapsed < serial - 0.1
+    assert elapsed >= critical_path
+    assert state.is_phone is True
+    assert state.greeting.startswith("Hello, thanks for calling")
+    assert state.session.replies == [f"Say: {state.greeting}"]
+    assert "setup_total" in state.timer.phases
+
+    history = await deps.memory.get_conversation_history(
+        state.agent_context.conversation.conversation_id
+    )
+    assert history[0]["content"] == state.greeting
+
+    await deps.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_dial_cancels_setup():
+    """Test that a failing step aborts the call instead of waiting forever"""
+    created = []
+
+    async def failing_dial(phone_number, room_name):
+        raise RuntimeError("trunk rejected call")
+
+    async def slow_create_session(ctx):
+        created.append("started")
+        await asyncio.sleep(10)
+
+    deps = _dependencies(dial=failing_dial, create_session=slow_create_session)
+    ctx = FakeJobContext(
+        metadata=json.dumps({"phone_number": "+15550001111"}),
+        participant_delay=10,
+    )
+
+    start = time.perf_counter()
+    with pytest.raises(RuntimeError, match="trunk rejected call"):
+        await run_call(ctx, deps)
+
+    assert time.perf_counter() - start < 1
+    assert created == ["started"]
+
+    await deps.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_restarted_job_resumes_context():
+    """Test that only the same caller's interrupted call resumes a room"""
+    deps = _dependencies()
+    first_ctx = FakeJobContext()
+    first = await run_call(first_ctx, deps)
+    conversation_id = first.agent_context.conversation.conversation_id
+    # The job goes away mid-call
+    await first_ctx.shutdown()
+
+    # Another caller reusing the room name starts a new conversation
+    other_ctx = FakeJobContext(participant=FakeParticipant(identity="someone-else"))
+    other = await run_call(other_ctx, deps)
+    assert other.resumed is False
+    other_id = other.agent_context.conversation.conversation_id
+    assert other_id != conversation_id
+    assert other.agent_context.user.user_id == "someone-else"
+    await other_ctx.shutdown()
+
+    # An explicit handoff resumes by conversation ID in any room
+    handoff = await run_call(
+        FakeJobContext(
+            participant=FakeParticipant(identity="someone-else"),
+            room=FakeRoom("call-elsewhere"),
+            metadata=json.dumps({"conversation_id": other_id}),
+        ),
+        deps,
+    )
+    assert handoff.resumed is True
+    assert handoff.agent_context.conversation.conversation_id == other_id
+
+    # Once the caller hangs up the snapshot is gone
+    ctx = FakeJobContext(room=FakeRoom("call-hangup"))
+    ended = await run_call(ctx, deps)
+    ctx.room.emit("participant_disconnected", ctx.participant)
+    await ctx.shutdown()
+    assert await deps.memory.restore_context(
+        conversation_id=ended.agent_context.conversation.conversation_id
+    ) is None
+    again = await run_call(FakeJobContext(room=FakeRoom("call-hangup")), deps)
+    assert again.resumed is False
+
+    await deps.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_room_snapshot_is_not_resumed():
+    """Test that a room snapshot older than the TTL starts a new call"""
+    deps = _dependencies()
+    deps.snapshot_ttl = 0.05
+    await run_call(FakeJobContext(), deps)
+    await asyncio.sleep(0.1)
+
+    second = await run_call(FakeJobContext(), deps)
+
+    assert second.resumed is False
+    await deps.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_cached_greeting_skips_tts(tmp_path):
+    """Test that the second call's greeting is played from the audio cache"""
+    tts = StubTTS()
+
+    async def create_session(ctx):
+        return StubSession(tts=tts)
+
+    deps = _dependencies(create_session=create_session)
+    deps.tts_cache = TTSAudioCache(str(tmp_path))
+
+    first = await run_call(FakeJobContext(room=FakeRoom("call-a")), deps)
+    await deps.tts_cache.flush()
+    second = await run_call(FakeJobContext(room=FakeRoom("call-b")), deps)
+
+    assert first.greeting == second.greeting
+    assert tts.calls == [first.greeting]
+    assert second.session.spoken == [(second.greeting, tts.frames)]
+    assert second.session.replies == []
+
+    await deps.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_turn_metrics_attached_and_flushed_on_shutdown():
+    """Test that enabled turn metrics subscribe to the session and flush"""
+    deps = _dependencies()
+    deps.turn_metrics_enabled = True
+    deps.providers = {"llm": "openai/gpt-4o-mini"}
+    ctx = FakeJobContext()
+
+    state = await run_call(ctx, deps)
+
+    assert "metrics_collected" in state.session.handlers
+    assert state.turn_metrics.org_id == state.agent_context.organization.org_id
+    await ctx.shutdown()
+    assert await deps.storage.get_turn_latency_rollup() == []
+
+    await deps.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_session_providers_override_recorded_providers():
+    """Test that per-session choices reach turn metrics and the TTS cache key"""
+    deps = _dependencies()
+    deps.turn_metrics_enabled = True
+    deps.providers = {"stt": "deepgram/nova-3:en", "tts": "cartesia/sonic-2"}
+    deps.session_providers = lambda session: {"tts": "elevenlabs/turbo-v2.5:rachel"}
+
+    state = await run_call(FakeJobContext(), deps)
+
+    assert state.turn_metrics.providers == {
+        "stt": "deepgram/nova-3:en",
+        "tts": "elevenlabs/turbo-v2.5",
+    }
+
+    await deps.storage.close()
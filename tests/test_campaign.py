@@ -0,0 +1,232 @@
+"""Test the outbound campaign dialer against a local stub LiveKit server"""
+import asyncio
+import json
+import time
+
+import pytest
+
+from telephony.api_client import LiveKitAPIPool
+from telephony.campaign import (
+    DIALING,
+    DISPATCHED,
+    FAILED,
+    CampaignCheckpoint,
+    CampaignContact,
+    CampaignDialer,
+    RoomCapacity,
+    TokenBucket,
+    read_contacts,
+)
+from testing.fakes import StubLiveKitServer
+
+
+def _contacts(count: int, start: int = 0) -> list[CampaignContact]:
+    return [
+        CampaignContact(f"+1555000{i:04d}", {"org_id": "acme"})
+        for i in range(start, start + count)
+    ]
+
+
+def _pool(server: StubLiveKitServer, **options) -> LiveKitAPIPool:
+    return LiveKitAPIPool(
+        server.url, "key", "secret-" * 6, jitter=lambda: 0.0, **options
+    )
+
+
+def _dialer(server, checkpoint, **options) -> CampaignDialer:
+    options.setdefault("rate", 1000.0)
+    return CampaignDialer(
+        "spring",
+        checkpoint,
+        pool=_pool(server, max_retries=0),
+        retry_backoff=0.01,
+        **options,
+    )
+
+
+def test_reads_csv_and_jsonl(tmp_path):
+    """Test that extra columns become job metadata and blanks are dropped"""
+    csv_path = tmp_path / "contacts.csv"
+    csv_path.write_text(
+        "phone_number,org_id,voicemail_message\n"
+        "+15550001111,acme,Call us back\n"
+        " +15550002222 ,acme,\n"
+    )
+    jsonl_path = tmp_path / "contacts.jsonl"
+    jsonl_path.write_text(
+        '{"phone_number": "+15550001111", "org_id": "acme"}\n\n'
+        '{"phone_number": "+15550002222"}\n'
+    )
+
+    assert list(read_contacts(str(csv_path))) == [
+        CampaignContact(
+            "+15550001111", {"org_id": "acme", "voicemail_message": "Call us back"}
+        ),
+        CampaignContact("+15550002222", {"org_id": "acme"}),
+    ]
+    assert list(read_contacts(str(jsonl_path))) == [
+        CampaignContact("+15550001111", {"org_id": "acme"}),
+        CampaignContact("+15550002222", {}),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_paces_after_burst():
+    """Test that acquisitions beyond the burst wait for the rate"""
+    bucket = TokenBucket(rate=100.0, burst=5)
+
+    start = time.perf_counter()
+    for _ in range(5):
+        await bucket.acquire()
+    burst_time = time.perf_counter() - start
+    for _ in range(10):
+        await bucket.acquire()
+    paced_time = time.perf_counter() - start - burst_time
+
+    assert burst_time < 0.02
+    assert paced_time >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_dispatches_every_contact_once():
+    """Test dispatch metadata, checkpointing, invalid numbers and duplicates"""
+    server = await StubLiveKitServer().start()
+    checkpoint = CampaignCheckpoint(":memory:")
+    dialer = _dialer(server, checkpoint)
+    contacts = _contacts(20) + _contacts(2) + [CampaignContact("555-1234")]
+
+    stats = await dialer.run(contacts)
+
+    assert stats["dispatched"] == 20
+    assert stats["invalid"] == 1
+    assert stats["skipped"] == 2
+    assert len(server.rooms) == 20
+    dispatch = server.rooms["spring-15550000003"]
+    assert dispatch.agent_name == "my-voice-agent"
+    assert json.loads(dispatch.metadata) == {
+        "org_id": "acme",
+        "phone_number": "+15550000003",
+    }
+    assert await checkpoint.summary("spring") == {DISPATCHED: 20, FAILED: 1}
+
+    await checkpoint.close()
+    await dialer._pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_retries_turned_away_dispatches():
+    """Test that 503s are retried with backoff up to max_attempts"""
+    server = await StubLiveKitServer(fail_first=4).start()
+    checkpoint = CampaignCheckpoint(":memory:")
+    dialer = _dialer(server, checkpoint, max_in_flight=1, max_attempts=3)
+
+    stats = await dialer.run(_contacts(3))
+
+    # The first contact fails all three attempts, the second its first
+    assert stats["retries"] == 3
+    assert stats["dispatched"] == 2 and stats["failed"] == 1
+    assert await checkpoint.summary("spring") == {DISPATCHED: 2, FAILED: 1}
+
+    await checkpoint.close()
+    await dialer._pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_resumes_from_checkpoint(tmp_path):
+    """Test that a rerun dials only contacts not yet reached"""
+    db_path = str(tmp_path / "campaigns.db")
+    server = await StubLiveKitServer().start()
+    contacts = _contacts(10)
+
+    checkpoint = CampaignCheckpoint(db_path)
+    first = _dialer(server, checkpoint)
+    await first.run(contacts[:6])
+    # A crash left this contact mid-dispatch: it may have been called
+    await checkpoint.mark("spring", contacts[6].phone_number, DIALING, 1)
+    await checkpoint.close()
+
+    checkpoint = CampaignCheckpoint(db_path)
+    second = _dialer(server, checkpoint)
+    stats = await second.run(contacts)
+
+    assert stats["skipped"] == 7 and stats["uncertain"] == 1
+    assert stats["dispatched"] == 3
+    assert "spring-15550000006" not in server.rooms
+    assert len(server.rooms) == 9
+
+    await checkpoint.close()
+    for dialer in (first, second):
+        await dialer._pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_bounds_requests_in_flight():
+    """Test that no more than max_in_flight dispatches run at once"""
+    server = await StubLiveKitServer(delay=0.01).start()
+    checkpoint = CampaignCheckpoint(":memory:")
+    dialer = _dialer(server, checkpoint, max_in_flight=3)
+
+    stats = await dialer.run(_contacts(15))
+
+    assert stats["dispatched"] == 15
+    assert server.max_in_flight == 3
+
+    await checkpoint.close()
+    await dialer._pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_waits_for_worker_capacity():
+    """Test that dispatch pauses while the workers' call slots are full"""
+    server = await StubLiveKitServer().start()
+    checkpoint = CampaignCheckpoint(":memory:")
+    pool = _pool(server)
+    capacity = RoomCapacity(2, pool=pool, poll_interval=0.01)
+    dialer = _dialer(server, checkpoint, capacity=capacity)
+    # Only the campaign's rooms count by default
+    assert capacity.room_prefix == "spring-"
+
+    run = asyncio.create_task(dialer.run(_contacts(4)))
+    await asyncio.sleep(0.1)
+    assert len(server.rooms) == 2 and not run.done()
+
+    # The first two calls end
+    server.rooms.clear()
+    stats = await run
+
+    assert stats["dispatched"] == 4
+    assert len(server.rooms) == 2
+
+    await checkpoint.close()
+    await pool.aclose()
+    await dialer._pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_failed_dispatches_release_capacity():
+    """Test that retried and failed dispatches give their call slot back"""
+    server = await StubLiveKitServer(fail_first=4).start()
+    # Rooms are listed once, from a server with none
+    rooms_server = await StubLiveKitServer().start()
+    pool = _pool(rooms_server)
+    capacity = RoomCapacity(2, pool=pool, poll_interval=60)
+    checkpoint = CampaignCheckpoint(":memory:")
+    dialer = _dialer(
+        server, checkpoint, max_in_flight=1, max_attempts=3, capacity=capacity
+    )
+
+    stats = await asyncio.wait_for(dialer.run(_contacts(3)), 5)
+
+    # Five failed attempts, then two calls fill both slots
+    assert stats["failed"] == 1 and stats["dispatched"] == 2
+    assert await capacity.free() == 0
+
+    await checkpoint.close()
+    await pool.aclose()
+    await dialer._pool.aclose()
+    await asyncio.gather(server.close(), rooms_server.close())
@@ -0,0 +1,157 @@
+"""Test hedged LLM requests against stub providers"""
+import asyncio
+
+import pytest
+from livekit.agents import APIConnectionError, llm
+
+from agent.hedged_llm import HedgedLLM
+from config.config import ModelConfig
+from testing.fakes import StubProviderLLM
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _chat() -> llm.ChatContext:
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="user", content="What are your hours?")
+    return chat_ctx
+
+
+async def _turn(hedged: HedgedLLM) -> str:
+    async with hedged.chat(chat_ctx=_chat()) as stream:
+        return "".join([chunk.delta.content async for chunk in stream]).strip()
+
+
+@pytest.mark.asyncio
+async def test_fast_primary_is_not_hedged():
+    """Test that a primary answering within the deadline is used alone"""
+    primary = StubProviderLLM([0.01], response="primary")
+    secondary = StubProviderLLM([0.01], response="secondary")
+    hedged = HedgedLLM({"a": primary, "b": secondary}, default_delay=0.2)
+
+    assert await _turn(hedged) == "primary"
+    assert secondary.calls == 0
+    assert hedged.stats()["providers"]["a"]["wins"] == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_and_cancelled():
+    """Test that a slow primary is hedged and the losing request cancelled"""
+    primary = StubProviderLLM([1.0], response="primary")
+    secondary = StubProviderLLM([0.01], response="secondary")
+    hedged = HedgedLLM({"a": primary, "b": secondary}, default_delay=0.05)
+
+    assert await _turn(hedged) == "secondary"
+    assert primary.cancelled == 1
+
+    stats = hedged.stats()
+    assert stats["hedged"] == 1
+    assert stats["providers"]["a"]["cancelled"] == 1
+    assert stats["providers"]["b"]["wins"] == 1
+    # The loser's wait is kept as a censored sample, at least the deadline
+    assert stats["providers"]["a"]["ttft_ms"]["count"] == 1
+    assert stats["providers"]["a"]["ttft_ms"]["min"] >= 50
+
+
+@pytest.mark.asyncio
+async def test_interrupted_turn_records_no_ttft():
+    """Test that a turn the caller cancels leaves the TTFT histogram alone"""
+    primary = StubProviderLLM([1.0])
+    hedged = HedgedLLM({"a": primary, "b": StubProviderLLM([1.0])})
+
+    turn = asyncio.ensure_future(_turn(hedged))
+    await asyncio.sleep(0.05)
+    turn.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await turn
+
+    stats = hedged.stats()["providers"]["a"]
+    assert stats["cancelled"] == 1
+    assert stats["ttft_ms"]["count"] == 0
+
+
+@pytest.mark.asyncio
+async def test_failed_primary_falls_through_without_waiting():
+    """Test that a primary failing before its first token is replaced at once"""
+    primary = StubProviderLLM([0.0], fail=True)
+    secondary = StubProviderLLM([0.0], response="secondary")
+    hedged = HedgedLLM({"a": primary, "b": secondary}, default_delay=10.0)
+
+    assert await _turn(hedged) == "secondary"
+    assert hedged.stats()["providers"]["a"]["errors"] == 1
+    assert hedged.hedged == 0
+
+    secondary.fail = True
+    with pytest.raises(APIConnectionError):
+        await _turn(hedged)
+
+
+@pytest.mark.asyncio
+async def test_hedge_delay_follows_primary_percentile():
+    """Test that the deadline is the primary's p95 TTFT once measured"""
+    # 19 fast turns then one slow one: p95 lands on the fast ones
+    primary = StubProviderLLM([0.01] * 19 + [0.06])
+    hedged = HedgedLLM(
+        {"a": primary, "b": StubProviderLLM([0.0])},
+        default_delay=1.0,
+        min_delay=0.0,
+        min_samples=20,
+        hedge_ratio=0.0,
+    )
+    assert hedged.hedge_delay("a") == 1.0
+    for _ in range(20):
+        await _turn(hedged)
+
+    assert 0.01 <= hedged.hedge_delay("a") < 0.03
+
+
+@pytest.mark.asyncio
+async def test_hedge_budget_limits_extra_requests():
+    """Test that hedges stop once the hedge ratio budget is spent"""
+    primary = StubProviderLLM([0.05])
+    secondary = StubProviderLLM([0.0])
+    hedged = HedgedLLM(
+        {"a": primary, "b": secondary}, default_delay=0.01, hedge_ratio=0.1
+    )
+    for _ in range(5):
+        await _turn(hedged)
+
+    # The initial token pays for one hedge; 0.1 per request refills slowly
+    assert hedged.hedged == 1
+    assert secondary.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_provider_over_rate_budget_is_skipped():
+    """Test that a provider at its requests-per-minute limit is skipped"""
+    clock = FakeClock()
+    primary = StubProviderLLM([0.0], response="primary")
+    secondary = StubProviderLLM([0.0], response="secondary")
+    hedged = HedgedLLM(
+        {"a": primary, "b": secondary},
+        max_requests_per_minute={"a": 2},
+        clock=clock,
+    )
+
+    assert [await _turn(hedged) for _ in range(3)] == [
+        "primary",
+        "primary",
+        "secondary",
+    ]
+    assert hedged.stats()["providers"]["a"]["over_budget"] == 1
+
+    clock.now = 61
+    assert await _turn(hedged) == "primary"
+
+
+def test_model_config_hedge_models(monkeypatch):
+    """Test that hedge providers are read from LLM_HEDGE_MODELS"""
+    monkeypatch.setenv("LLM_HEDGE_MODELS", "groq/llama-3.3-70b-versatile, ")
+    config = ModelConfig.from_env()
+    assert config.get_llm_hedge_descriptors() == ["groq/llama-3.3-70b-versatile"]
@@ -0,0 +1,159 @@
+"""Test IVR menus answered without the LLM"""
+import asyncio
+import json
+
+import pytest
+from livekit import rtc
+
+from agent.call_setup import run_call
+from audio.tts_cache import TTSAudioCache
+from telephony.ivr import IVRMenu, IVRMenus
+from testing.fakes import (
+    FakeJobContext,
+    FakeRoom,
+    SimulatedSession,
+    StubProviderLLM,
+    StubProviderTTS,
+    sip_participant,
+    voice_assistant,
+)
+from test_call_setup import _dependencies
+
+MENU = {
+    "org_id": "default",
+    "prompt": "For our hours press 1, for our address press 2.",
+    "options": [
+        {
+            "id": "hours",
+            "digit": "1",
+            "keywords": ["hours", "when are you open"],
+            "response": "We are open 9 to 5, Monday to Friday.",
+        },
+        {
+            "id": "address",
+            "digit": 2,
+            "keywords": ["address", "where are you"],
+            "response": "We are at 100 Main Street.",
+        },
+    ],
+}
+
+
+def _menus(tmp_path) -> IVRMenus:
+    (tmp_path / "default.json").write_text(json.dumps(MENU))
+    menus = IVRMenus(str(tmp_path))
+    menus.load()
+    return menus
+
+
+def test_menu_matching():
+    """Test key names, keywords, ambiguous and open-ended turns"""
+    menu = IVRMenu.from_dict(MENU)
+
+    assert menu.by_digit("2").id == "address"
+    assert menu.by_text("What are your hours?").id == "hours"
+    assert menu.by_text("When are you open").id == "hours"
+    assert menu.by_text("press two").id == "address"
+    assert menu.by_text("1").id == "hours"
+    assert menu.by_text("nine") is None
+    # Asks for both options: the LLM answers
+    assert menu.by_text("your hours and address") is None
+    assert menu.by_text("I need to move my appointment to a later time") is None
+    assert menu.by_text("shoulders") is None
+    # Interjections and negated keywords
+    assert menu.by_text("oh") is None
+    assert menu.by_text("I don't need your hours") is None
+    assert menu.by_text("not the address") is None
+
+
+def test_load_skips_invalid_menus(tmp_path):
+    """Test that a menu reusing a key is rejected and others still load"""
+    broken = {**MENU, "org_id": "broken"}
+    broken["options"] = [*MENU["options"], {"digit": "1", "response": "Again"}]
+    (tmp_path / "broken.json").write_text(json.dumps(broken))
+    menus = _menus(tmp_path)
+
+    assert list(menus.menus) == ["default"]
+    assert menus.get("default").texts[0] == MENU["prompt"]
+
+
+@pytest.mark.asyncio
+async def test_key_press_answered_without_llm(tmp_path):
+    """Test that the menu follows the greeting and key presses are answered"""
+    deps = _dependencies()
+    deps.ivr = _menus(tmp_path)
+    ctx = FakeJobContext(participant=sip_participant())
+    state = await run_call(ctx, deps)
+    session = state.session
+
+    assert state.greeting.endswith(MENU["prompt"])
+    ctx.room.emit("sip_dtmf_received", rtc.SipDTMF(code=1, digit="1"))
+    await asyncio.sleep(0)
+    await state.ivr.speech
+    ctx.room.emit("sip_dtmf_received", rtc.SipDTMF(code=9, digit="9"))
+    ctx.room.emit("sip_dtmf_received", rtc.SipDTMF(code=10, digit="*"))
+    await asyncio.sleep(0)
+    await state.ivr.speech
+
+    assert [text for text, _ in session.spoken] == [
+        MENU["options"][0]["response"],
+        MENU["prompt"],
+    ]
+    assert session.interruptions == 2
+    assert session.replies == [f"Say: {state.greeting}"]
+    assert deps.ivr.stats()["dtmf"] == 2
+
+    await ctx.shutdown()
+    await deps.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_matching_turns_skip_llm_and_play_from_cache(tmp_path):
+    """Test that menu turns cost no LLM request and, once cached, no TTS"""
+    deps = _dependencies()
+    deps.ivr = _menus(tmp_path)
+    deps.tts_cache = TTSAudioCache(str(tmp_path / "tts"))
+    tts = StubProviderTTS()
+    llm = StubProviderLLM([0.0])
+
+    async def create_session(ctx):
+        return SimulatedSession(llm=llm, tts=tts, realtime=False)
+
+    deps.create_session = create_session
+    deps.create_agent = voice_assistant
+    first_ctx = FakeJobContext(participant=sip_participant(), room=FakeRoom("call-a"))
+    first = await run_call(first_ctx, deps)
+    # Prerendering runs while the greeting plays
+    await asyncio.gather(*first.ivr._tasks)
+    await first_ctx.shutdown()
+    await deps.tts_cache.flush()
+    # Greeting plus the menu's lines, synthesized once for the process
+    assert len(tts.calls) == 1 + len(deps.ivr.get("default").texts)
+
+    ctx = FakeJobContext(participant=sip_participant(), room=FakeRoom("call-b"))
+    state = await run_call(ctx, deps)
+    assert await state.session.user_turn("what are your hours") == (
+        MENU["options"][0]["response"]
+    )
+    assert llm.calls == 0
+    assert await state.session.user_turn("Can I book a cleaning?") == llm.response
+    assert llm.calls == 1
+    # Past the menu, a keyword is part of the conversation with the LLM
+    assert await state.session.user_turn("what are your hours") == llm.response
+    assert llm.calls == 2
+    # A key press brings the menu back
+    await state.ivr.press("*")
+    assert await state.session.user_turn("address") == (
+        MENU["options"][1]["response"]
+    )
+
+    # The second call only synthesized the LLM's answers; the rest was cached
+    assert len(tts.calls) == 1 + len(deps.ivr.get("default").texts) + 2
+    stats = deps.ivr.stats()
+    # Only the turn the menu was offered for counts as fallen through
+    assert stats["keyword"] == 2 and stats["fallthrough"] == 1
+    assert stats["first_audio_ms"]["count"] == 3
+
+    await ctx.shutdown()
+    await asyncio.gather(first.session.aclose(), state.session.aclose())
+    await deps.storage.close()
@@ -0,0 +1,34 @@
+"""Run the offline load-test harness at CI size"""
+import pytest
+
+from scripts.load_test import run_load_test
+
+
+@pytest.mark.asyncio
+async def test_load_test_reports_every_section(tmp_path):
+    """Test a small concurrent run end to end with stub providers"""
+    report = await run_load_test(
+        sessions=6,
+        turns=2,
+        stt_ms=10,
+        llm_ttft_ms=20,
+        tokens_per_second=500,
+        tts_ttfb_ms=10,
+        connect_ms=10,
+        db_dir=str(tmp_path),
+    )
+
+    assert report["turns"] == 12
+    assert report["throughput"]["turns_per_s"] > 0
+    assert report["setup_ms"]["setup_total"]["count"] == 6
+    assert report["turn_ms"]["count"] == 12
+    # Every turn went through STT, LLM and TTS latency at least once
+    assert report["turn_ms"]["min"] >= 40
+
+    rows = report["storage"]["rows"]
+    assert rows["conversations"] == 6
+    assert rows["turn_metrics"] >= 12
+    assert rows["messages"] == 6 + 12 * 2
+    assert report["turn_total_ms"]["count"] == 12
+    assert report["loop"]["lag_ms"]["count"] > 0
+    assert "rss_per_session_kb" in report
@@ -0,0 +1,56 @@
+"""Test the event-loop lag and blocking-call watchdog"""
+import asyncio
+import time
+
+import pytest
+
+from metrics.loop_watchdog import LoopWatchdog
+
+
+def render_synchronously(seconds: float):
+    """Stands in for synchronous work on the loop (template render, json...)"""
+    time.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_blocking_call_is_attributed_to_its_module():
+    """Test that a stall is sampled and charged to the blocking function"""
+    watchdog = LoopWatchdog(
+        threshold_ms=20, interval=0.01, report_interval=0, packages=(__name__,)
+    )
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.05)
+        render_synchronously(0.2)
+        await asyncio.sleep(0.05)
+    finally:
+        watchdog.stop()
+
+    report = watchdog.report()
+    assert report["stalls"] >= 1
+    assert report["lag_ms"]["max"] >= 150
+    assert report["blocked_ms_by_module"][__name__] >= 100
+
+    worst = report["worst"][0]
+    assert worst["site"].startswith(f"{__name__}:render_synchronously:")
+    assert worst["stalls"] == 1
+    assert worst["max_stall_ms"] >= 150
+
+
+@pytest.mark.asyncio
+async def test_idle_loop_reports_no_stalls():
+    """Test that an idle loop only records lag samples"""
+    watchdog = LoopWatchdog(threshold_ms=50, interval=0.01, report_interval=0)
+    watchdog.start()
+    try:
+        await asyncio.sleep(0.1)
+    finally:
+        watchdog.stop()
+
+    report = watchdog.report()
+    assert report["stalls"] == 0
+    assert report["worst"] == []
+    assert report["lag_ms"]["count"] > 0
+
+    watchdog.log_report()
+    assert watchdog.report()["lag_ms"]["count"] == 0
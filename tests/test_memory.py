@@ -2,7 +2,7 @@
 import pytest
 from memory.conversation_memory import ConversationMemory
 from memory.storage import MemoryStorage
-from models.context import UserContext
+from models.context import AgentContext, OrganizationContext, UserContext
 
 
 @pytest.mark.asyncio
@@ -141,4 +141,29 @@ async def test_conversation_summary():
 
     assert "3 messages" in summary
     
-    await storage.close()
\ No newline at end of file
+    await storage.close()
+
+@pytest.mark.asyncio
+async def test_save_and_restore_context():
+    """Test resuming an agent context from its snapshot"""
+    storage = MemoryStorage(db_path=":memory:")
+    await storage.initialize()
+    memory = ConversationMemory(storage)
+
+    user = UserContext(user_id="user123", name="John")
+    conversation = await memory.create_conversation(user)
+    conversation.summary = "Asked about opening hours."
+    context = AgentContext(
+        user=user,
+        organization=OrganizationContext(org_id="org1", name="Corp"),
+        conversation=conversation,
+        is_phone_call=True,
+    )
+
+    await memory.save_context(context, room="call-abc")
+    restored = await memory.restore_context(room="call-abc")
+
+    assert restored == context
+    assert await memory.restore_context(room="call-missing") is None
+
+    await storage.close()
@@ -0,0 +1,110 @@
+"""Test latency metrics"""
+import json
+import logging
+import random
+import time
+
+from metrics.call_timing import CallTimer, SetupMetrics, merge_logged
+from metrics.histogram import LatencyHistogram
+
+
+def test_histogram_percentiles_within_precision():
+    """Test that percentiles stay within the configured relative error"""
+    rng = random.Random(42)
+    values = [rng.lognormvariate(5, 1) for _ in range(10000)]
+    histogram = LatencyHistogram(precision=0.01)
+    for value in values:
+        histogram.record(value)
+
+    ordered = sorted(values)
+    for p in (50, 95, 99):
+        exact = ordered[int(len(ordered) * p / 100) - 1]
+        assert abs(histogram.percentile(p) - exact) / exact < 0.03
+
+    assert histogram.count == 10000
+    assert histogram.min == min(values)
+    assert histogram.max == max(values)
+
+
+def test_histogram_merge_and_empty():
+    """Test merging histograms and empty summaries"""
+    a = LatencyHistogram()
+    b = LatencyHistogram()
+    assert a.percentile(50) is None
+    assert a.summary() == {"count": 0}
+
+    for value in (10, 20, 30):
+        a.record(value)
+    for value in (1000, 2000):
+        b.record(value)
+    a.merge(b)
+
+    assert a.count == 5
+    assert a.max == 2000
+    assert 990 < a.percentile(99) <= 2000
+
+    restored = LatencyHistogram.from_dict(a.to_dict())
+    assert restored.summary() == a.summary()
+
+
+def test_call_timer_spans():
+    """Test recording phases into the per-call dict and worker histograms"""
+    metrics = SetupMetrics()
+    timer = CallTimer(metrics)
+
+    with timer.span("connect"):
+        pass
+    timer.add("wait_for_participant", 120.0)
+    timer.mark("setup_total")
+
+    assert set(timer.phases) == {"connect", "wait_for_participant", "setup_total"}
+    report = metrics.report()
+    assert report["wait_for_participant"]["count"] == 1
+    assert report["wait_for_participant"]["p50"] == 120.0
+
+
+def test_disabled_call_timer_records_nothing():
+    """Test that a disabled timer is a no-op"""
+    metrics = SetupMetrics()
+    timer = CallTimer(metrics, enabled=False)
+
+    with timer.span("connect"):
+        pass
+    timer.mark("setup_total")
+
+    assert timer.phases == {}
+    assert metrics.report() == {}
+
+
+def test_jobs_histograms_merge_from_logs(caplog):
+    """Test that each report logs new values only and the logs add up"""
+    first, second = SetupMetrics(), SetupMetrics()
+    with caplog.at_level(logging.INFO, logger="metrics.call_timing"):
+        first.record("connect", 10.0)
+        first.log_report()
+        first.record("connect", 30.0)
+        first.log_report()
+        second.record("connect", 1000.0)
+        second.record("session_start", 5.0)
+        second.log_report()
+    lines = [record.getMessage() for record in caplog.records]
+    # JSON-formatted logs carry the line in their message
+    lines[-1] = json.dumps({"message": lines[-1], "room": "call-b"})
+
+    merged = merge_logged(lines).report()
+
+    assert merged["connect"]["count"] == 3
+    assert merged["connect"]["min"] == 10.0 and merged["connect"]["max"] == 1000.0
+    assert merged["session_start"]["count"] == 1
+
+
+def test_reporting_outlives_the_starting_loop(caplog):
+    """Test that periodic reports run on a thread, not the first job's loop"""
+    metrics = SetupMetrics()
+    metrics.record("connect", 10.0)
+    with caplog.at_level(logging.INFO, logger="metrics.call_timing"):
+        metrics.start_reporting(interval=0.01)
+        time.sleep(0.1)
+        metrics.stop_reporting()
+
+    assert any("call_setup_latency" in r.getMessage() for r in caplog.records)
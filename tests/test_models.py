@@ -4,6 +4,7 @@ from datetime import datetime
 
 from models.context import AgentContext, ConversationContext, OrganizationContext, UserContext
 from models.prompts import PromptTemplate, PromptVariable, PromptVariableType
+from models.snapshot import SnapshotError, decode_snapshot, encode_snapshot
 
 
 def test_user_context():
@@ -78,4 +79,91 @@ def test_prompt_template_validation():
     assert template.validate_context({"name": "John"}) is True
 
     # Invalid context (missing required)
-    assert template.validate_context({}) is False
\ No newline at end of file
+    assert template.validate_context({}) is False
+
+def test_factories_match_constructors():
+    """Test that the context factories build the same models as the constructors"""
+    profile = {
+        "user_id": "user123",
+        "name": "John",
+        "phone_number": "+1234567890",
+        "email": "john@example.com",
+        "preferences": {"language": "es"},
+        "created_at": "2025-01-01T12:00:00",
+        "updated_at": "2025-01-01T12:00:00",
+    }
+    user = UserContext.from_profile(profile)
+    assert user == UserContext(
+        user_id="user123",
+        name="John",
+        phone_number="+1234567890",
+        email="john@example.com",
+        language="es",
+        created_at=datetime(2025, 1, 1, 12),
+    )
+
+    record = {"org_id": "org123", "name": "Tech Corp", "industry": "tech"}
+    org = OrganizationContext.from_record(record)
+    assert org == OrganizationContext(**record)
+
+    start = datetime.utcnow()
+    conv = ConversationContext.new("conv123", "user123", start, {"room": "r1"})
+    assert conv == ConversationContext(
+        conversation_id="conv123",
+        user_id="user123",
+        start_time=start,
+        metadata={"room": "r1"},
+    )
+
+    agent_context = AgentContext.assemble(user, org, conv, is_phone_call=True)
+    assert agent_context == AgentContext(
+        user=user, organization=org, conversation=conv, is_phone_call=True
+    )
+    assert agent_context.to_prompt_variables()["user_name"] == "John"
+
+
+def test_snapshot_round_trip():
+    """Test encoding and decoding an agent context snapshot"""
+    user = UserContext(user_id="user123", name="John", phone_number="+1234567890")
+    org = OrganizationContext(
+        org_id="org123",
+        name="Tech Corp",
+        business_hours={"monday-friday": "9:00-17:00"},
+        branding={"color": "blue"},
+    )
+    conv = ConversationContext(
+        conversation_id="conv123",
+        user_id="user123",
+        current_intent="book_appointment",
+        summary="Caller wants a cleaning next week.",
+        variables={"preferred_day": "tuesday"},
+    )
+    context = AgentContext(
+        user=user,
+        organization=org,
+        conversation=conv,
+        is_phone_call=True,
+        call_metadata={"participant_id": "sip_1234567890"},
+    )
+
+    data = encode_snapshot(context)
+    restored = decode_snapshot(data)
+
+    assert data[:2] == b"AC"
+    assert restored == context
+
+
+def test_snapshot_rejects_bad_data():
+    """Test that invalid snapshots raise SnapshotError"""
+    with pytest.raises(SnapshotError):
+        decode_snapshot(b"AC")
+    with pytest.raises(SnapshotError):
+        decode_snapshot(b"XX\x01\x00[]")
+    with pytest.raises(SnapshotError):
+        decode_snapshot(b"AC\x63\x00[]")
+    with pytest.raises(SnapshotError):
+        decode_snapshot(b"AC\x01\x01not-zlib")
+    # Well-formed JSON that does not hold a context
+    for body in (b"[[], [], [], false, {}]", b"[1, 2, 3, false, {}]", b"7"):
+        with pytest.raises(SnapshotError):
+            decode_snapshot(b"AC\x01\x00" + body)
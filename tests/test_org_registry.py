@@ -0,0 +1,104 @@
+"""Test organization registry"""
+import json
+import sqlite3
+
+from config.org_registry import OrganizationRegistry, normalize_number
+
+
+def _write_orgs(path, default_org_id=None):
+    """Write a JSON organization source"""
+    path.write_text(
+        json.dumps(
+            {
+                "default_org_id": default_org_id,
+                "organizations": [
+                    {
+                        "org_id": "acme",
+                        "name": "Acme Plumbing",
+                        "numbers": ["+1 (555) 000-1111"],
+                        "trunk_ids": ["ST_acme"],
+                        "business_hours": {"monday-friday": "8:00-18:00"},
+                        "branding": {"color": "blue"},
+                    },
+                    {"org_id": "globex", "name": "Globex", "numbers": ["+15550002222"]},
+                ],
+            }
+        )
+    )
+
+
+def test_normalize_number():
+    """Test phone number normalization"""
+    assert normalize_number("+1 (555) 000-1111") == "+15550001111"
+    assert normalize_number("15550001111") == "+15550001111"
+    assert normalize_number("") == ""
+
+
+def test_resolve_by_number_and_trunk(tmp_path):
+    """Test resolving organizations by dialed number and trunk"""
+    source = tmp_path / "orgs.json"
+    _write_orgs(source)
+    registry = OrganizationRegistry(str(source))
+    assert registry.load() is True
+
+    acme = registry.resolve(dialed_number="+15550001111")
+    assert acme.name == "Acme Plumbing"
+    assert acme.business_hours == {"monday-friday": "8:00-18:00"}
+    assert registry.resolve(trunk_id="ST_acme") is acme
+    assert registry.resolve(dialed_number="+15550002222").org_id == "globex"
+    assert registry.resolve(org_id="globex").org_id == "globex"
+
+
+def test_resolve_fallback(tmp_path, monkeypatch):
+    """Test default organization and environment fallback"""
+    monkeypatch.setenv("ORG_NAME", "Env Corp")
+    source = tmp_path / "orgs.json"
+    _write_orgs(source)
+    registry = OrganizationRegistry(str(source))
+    registry.load()
+
+    assert registry.resolve(dialed_number="+19999999999").name == "Env Corp"
+
+    _write_orgs(source, default_org_id="globex")
+    assert registry.load(force=True) is True
+    assert registry.resolve(dialed_number="+19999999999").org_id == "globex"
+
+
+def test_load_skips_unchanged_source(tmp_path):
+    """Test that an unmodified source does not rebuild the index"""
+    source = tmp_path / "orgs.json"
+    _write_orgs(source)
+    registry = OrganizationRegistry(str(source))
+    registry.load()
+    index = registry.index
+
+    assert registry.load() is False
+    assert registry.index is index
+
+
+def test_load_from_sqlite(tmp_path):
+    """Test loading organizations from a SQLite database"""
+    source = tmp_path / "orgs.db"
+    conn = sqlite3.connect(source)
+    conn.execute(
+        """
+        CREATE TABLE organizations (
+            org_id TEXT PRIMARY KEY, name TEXT, industry TEXT, numbers TEXT,
+            trunk_ids TEXT, custom_settings TEXT, is_default INTEGER
+        )
+        """
+    )
+    conn.execute(
+        "INSERT INTO organizations VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ("acme", "Acme", "plumbing", '["+15550001111"]', "[]", '{"vip": true}', 1),
+    )
+    conn.commit()
+    conn.close()
+
+    registry = OrganizationRegistry(str(source))
+    registry.load()
+
+    org = registry.resolve(dialed_number="+15550001111")
+    assert org.org_id == "acme"
+    assert org.custom_settings == {"vip": True}
+    assert registry.resolve().org_id == "acme"
@@ -0,0 +1,185 @@
+"""Test the inbound overflow queue and holding calls in run_call"""
+import asyncio
+import threading
+
+import pytest
+
+from agent.call_setup import run_call
+from scripts.overflow_sim import simulate
+from telephony.overflow import (
+    PRIORITY,
+    CallAbandoned,
+    OverflowQueue,
+    caller_priority,
+    hold_frames,
+    hold_tone,
+)
+from testing.fakes import FakeJobContext, FakeRoom, StubSession, sip_participant
+from test_call_setup import _dependencies
+
+
+def test_caller_priority():
+    """Test reading queue_priority from a stored profile"""
+    assert caller_priority(None) == 0
+    assert caller_priority({"preferences": {"queue_priority": "2"}}) == 2
+    assert caller_priority({"preferences": {"queue_priority": "gold"}}) == 0
+
+
+def test_fifo_and_priority_order():
+    """Test that waiting calls are granted by arrival, or priority first"""
+    for policy, expected in (("fifo", ["b", "c", "d"]), (PRIORITY, ["d", "b", "c"])):
+        queue = OverflowQueue(1, policy=policy)
+        first = queue.enter("a")
+        waiting = {
+            "b": queue.enter("b"),
+            "c": queue.enter("c"),
+            "d": queue.enter("d", priority=1),
+        }
+        assert first.granted and queue.depth == 3
+        assert waiting[expected[0]].position == 1
+
+        served = []
+        slot = first
+        for _ in range(3):
+            slot.release()
+            slot = next(t for t in waiting.values() if t.granted and not t.released)
+            served.append(slot.call_id)
+        assert served == expected
+        assert queue.stats()["wait_ms"]["count"] == 3
+
+
+def test_abandoned_call_gives_up_its_place():
+    """Test that leaving the queue moves the calls behind it up"""
+    queue = OverflowQueue(1)
+    first = queue.enter("a")
+    second = queue.enter("b")
+    third = queue.enter("c")
+
+    second.release()
+    second.release()
+    assert third.position == 1
+    first.release()
+
+    assert third.granted and not second.granted
+    assert queue.stats()["abandoned"] == 1
+    assert queue.in_use == 1 and queue.depth == 0
+
+
+def test_release_on_another_thread_wakes_waiter():
+    """Test that a slot freed by one job's thread wakes a call on another"""
+    queue = OverflowQueue(1)
+    first = queue.enter("a")
+    granted = threading.Event()
+
+    async def wait_in_line():
+        ticket = queue.enter("b")
+        assert not ticket.granted
+        await asyncio.wait_for(ticket.wait(), timeout=2)
+        granted.set()
+
+    waiter = threading.Thread(target=asyncio.run, args=(wait_in_line(),))
+    waiter.start()
+    while queue.depth == 0:
+        threading.Event().wait(0.001)
+    first.release()
+    waiter.join(timeout=3)
+
+    assert granted.is_set()
+
+
+def test_hold_frames_cover_audio():
+    """Test that hold audio is cut into 100ms frames without losing samples"""
+    audio = hold_tone(seconds=1.05)
+    frames = hold_frames(audio)
+
+    assert len(frames) == 11
+    assert frames[0].samples_per_channel == 1600
+    assert sum(f.samples_per_channel for f in frames) == 16800
+
+
+@pytest.mark.asyncio
+async def test_queued_call_holds_then_starts_session():
+    """Test that a call beyond the slots hears hold audio until one frees"""
+    created = []
+
+    async def create_session(ctx):
+        created.append(ctx.room.name)
+        return StubSession()
+
+    deps = _dependencies(create_session=create_session)
+    deps.overflow = OverflowQueue(1)
+    held = []
+
+    async def play_hold(ctx):
+        held.append(ctx.room.name)
+        await asyncio.Future()
+
+    deps.play_hold = play_hold
+    first_ctx = FakeJobContext(room=FakeRoom("call-a"))
+    await run_call(first_ctx, deps)
+
+    second_ctx = FakeJobContext(
+        participant=sip_participant(number="+15550002222"), room=FakeRoom("call-b")
+    )
+    second = asyncio.create_task(run_call(second_ctx, deps))
+    await asyncio.sleep(0.2)
+    assert held == ["call-b"] and not second.done()
+    assert deps.overflow.depth == 1
+    # No session is built for a caller on hold
+    assert created == ["call-a"]
+
+    await first_ctx.shutdown()
+    state = await asyncio.wait_for(second, timeout=2)
+
+    assert state.slot.granted and state.session.agent is not None
+    assert created == ["call-a", "call-b"]
+    assert deps.overflow.stats()["wait_ms"]["count"] == 1
+    await second_ctx.shutdown()
+    assert deps.overflow.in_use == 0
+    await deps.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_caller_hanging_up_on_hold_abandons():
+    """Test that a held caller who leaves gives up the place and the room"""
+    deps = _dependencies()
+    deps.overflow = OverflowQueue(0)
+    ctx = FakeJobContext()
+
+    call = asyncio.create_task(run_call(ctx, deps))
+    while deps.overflow.depth == 0:
+        await asyncio.sleep(0.01)
+    ctx.room.emit("participant_disconnected", ctx.participant)
+
+    with pytest.raises(CallAbandoned):
+        await call
+    assert ctx.room_deleted
+    assert deps.overflow.stats()["abandoned"] == 1
+    assert deps.overflow.depth == 0
+    await deps.storage.close()
+
+
+@pytest.mark.asyncio
+async def test_simulation_serves_every_call():
+    """Test the saturated-worker simulation end to end"""
+    report = await simulate(
+        calls=6,
+        slots=2,
+        turns=1,
+        policy=PRIORITY,
+        vip=(5,),
+        arrival_ms=0,
+        cpu_calls=5,
+        cpu_seconds=0.3,
+        stt_ms=5,
+        llm_ttft_ms=10,
+        tts_ttfb_ms=5,
+    )
+
+    # Calls 0 and 1 take the free slots; the VIP, queued last, gets the
+    # first one released ahead of the earlier callers
+    assert report["served"] == [0, 1, 5, 2, 3, 4]
+    assert report["queue"]["max_depth"] > 0
+    assert report["queue"]["in_use"] == 0
+    held = report["cpu_ms_per_call_s"]
+    assert held["held"] < held["session"]
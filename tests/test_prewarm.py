@@ -0,0 +1,49 @@
+"""Test the per-process prewarm registry"""
+import pytest
+
+from agent.prewarm import REPORT_KEY, PrewarmRegistry
+from testing.fakes import FakeProc
+
+
+def test_load_all_loads_each_asset_once():
+    """Test that assets load into userdata once and are reported"""
+    calls = []
+    registry = PrewarmRegistry()
+    registry.register("vad", lambda: calls.append("vad") or object())
+
+    @registry.register("buffer")
+    def load_buffer():
+        calls.append("buffer")
+        return bytearray(4 * 2**20)
+
+    proc = FakeProc()
+    loads = registry.load_all(proc)
+    vad = registry.get(proc.userdata, "vad")
+
+    assert [load.name for load in loads] == ["vad", "buffer"]
+    assert all(load.seconds >= 0 for load in loads)
+    assert proc.userdata[REPORT_KEY] == loads
+
+    # A second prewarm of the same process keeps the warm instances
+    assert registry.load_all(proc) == []
+    assert registry.get(proc.userdata, "vad") is vad
+    assert calls == ["vad", "buffer"]
+
+
+def test_get_requires_prewarm():
+    """Test that calls never fall back to loading an asset themselves"""
+    registry = PrewarmRegistry()
+    registry.register("turn_detector", object)
+
+    with pytest.raises(RuntimeError, match="not prewarmed"):
+        registry.get({}, "turn_detector")
+    with pytest.raises(RuntimeError, match="Unknown"):
+        registry.get({}, "tts")
+
+
+def test_register_rejects_duplicates():
+    """Test that an asset name can only be registered once"""
+    registry = PrewarmRegistry()
+    registry.register("vad", object)
+    with pytest.raises(ValueError):
+        registry.register("vad", object)
@@ -0,0 +1,103 @@
+"""Test versioned prompt store"""
+from datetime import datetime
+
+import pytest
+
+from models.prompts import PromptTemplate
+from prompts.store import PromptStore
+
+
+def _template(prompt_id: str, version: str, text: str, org_id=None) -> PromptTemplate:
+    """Create a prompt template for tests"""
+    now = datetime.utcnow().isoformat()
+    return PromptTemplate(
+        id=prompt_id,
+        name=prompt_id,
+        description="Test",
+        template=text,
+        version=version,
+        organization_id=org_id,
+        created_at=now,
+        updated_at=now,
+    )
+
+
+@pytest.mark.asyncio
+async def test_resolve_newest_version_with_global_fallback():
+    """Test org-specific resolution and fallback to global templates"""
+    store = PromptStore(db_path=":memory:")
+    await store.initialize()
+
+    await store.publish(_template("receptionist", "1.0.0", "global v1"))
+    await store.publish(_template("receptionist", "1.2.0", "acme v1.2"), org_id="acme")
+    await store.publish(
+        _template("receptionist", "1.10.0", "acme v1.10"), org_id="acme"
+    )
+
+    assert store.resolve("acme", "receptionist").template == "acme v1.10"
+    assert store.resolve("other", "receptionist").template == "global v1"
+    assert store.resolve(None, "receptionist").template == "global v1"
+    assert store.resolve("acme", "missing") is None
+
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_deactivate_rolls_back():
+    """Test that deactivating the newest version falls back to the previous one"""
+    store = PromptStore(db_path=":memory:")
+    await store.initialize()
+
+    await store.publish(_template("support", "1.0.0", "v1"), org_id="acme")
+    await store.publish(_template("support", "2.0.0", "v2"), org_id="acme")
+    await store.deactivate("acme", "support", "2.0.0")
+
+    assert store.resolve("acme", "support").template == "v1"
+    versions = await store.list_versions("acme", "support")
+    assert [v["version"] for v in versions] == ["2.0.0", "1.0.0"]
+    assert versions[0]["active"] is False
+
+    await store.close()
+
+
+@pytest.mark.asyncio
+async def test_duplicate_publish_keeps_cache(tmp_path):
+    """Test that a failed publish leaves the published version in place"""
+    store = PromptStore(db_path=str(tmp_path / "prompts.db"))
+    await store.initialize()
+
+    await store.publish(_template("support", "1.0.0", "v1"), org_id="acme")
+    with pytest.raises(Exception):
+        await store.publish(_template("support", "1.0.0", "clash"), org_id="acme")
+
+    assert store.resolve("acme", "support").template == "v1"
+
+    # A second store on the same database sees the published version
+    other = PromptStore(db_path=str(tmp_path / "prompts.db"))
+    await other.initialize()
+    assert other.resolve("acme", "support").template == "v1"
+
+
+@pytest.mark.asyncio
+async def test_poll_picks_up_other_processes_versions(tmp_path):
+    """Test that a running store sees versions another store publishes"""
+    db_path = str(tmp_path / "prompts.db")
+    worker = PromptStore(db_path=db_path)
+    admin = PromptStore(db_path=db_path)
+    await worker.initialize()
+    await admin.initialize()
+
+    assert worker.poll() is False
+    await admin.publish(_template("support", "1.0.0", "v1"), org_id="acme")
+    await admin.publish(_template("support", "2.0.0", "v2"), org_id="acme")
+    assert worker.resolve("acme", "support") is None
+    assert worker.poll() is True
+    assert worker.resolve("acme", "support").template == "v2"
+    assert worker.poll() is False
+
+    await admin.deactivate("acme", "support", "2.0.0")
+    assert worker.poll() is True
+    assert worker.resolve("acme", "support").template == "v1"
+
+    await worker.close()
+    await admin.close()
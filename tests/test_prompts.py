@@ -1,9 +1,14 @@
 """Test prompt system"""
-import pytest
+import json
+import os
+import time
 from datetime import datetime
 
+import pytest
+
 from models.context import AgentContext, ConversationContext, OrganizationContext, UserContext
 from models.prompts import PromptTemplate, PromptVariable, PromptVariableType
+from prompts.manager import PromptManager
 from prompts.renderer import PromptRenderer
 
 
@@ -67,4 +72,108 @@ def test_missing_required_variable():
     renderer = PromptRenderer()
 
     with pytest.raises(ValueError):
-        renderer.render(template, context)
\ No newline at end of file
+        renderer.render(template, context)
+
+def _write_prompt(directory, prompt_id, **overrides):
+    """Write a prompt template JSON file and return its path"""
+    data = {
+        "id": prompt_id,
+        "name": prompt_id.title(),
+        "description": "Test template",
+        "template": "Hello {{ user_name }}",
+        "category": "test",
+        "created_at": "2025-01-01T00:00:00Z",
+        "updated_at": "2025-01-01T00:00:00Z",
+    }
+    data.update(overrides)
+    path = directory / f"{prompt_id}.json"
+    path.write_text(json.dumps(data))
+    return path
+
+
+def test_prompt_manager_indexes(tmp_path):
+    """Test category, organization and tag lookups"""
+    _write_prompt(tmp_path, "a", category="telephony", tags=["phone"])
+    _write_prompt(tmp_path, "b", category="telephony", organization_id="org1")
+    _write_prompt(tmp_path, "c", category="support", tags=["phone", "faq"])
+
+    manager = PromptManager(prompts_dir=str(tmp_path))
+
+    assert {p.id for p in manager.get_prompts_by_category("telephony")} == {"a", "b"}
+    assert [p.id for p in manager.get_organization_prompts("org1")] == ["b"]
+    assert {p.id for p in manager.get_prompts_by_tag("phone")} == {"a", "c"}
+    assert manager.get_prompts_by_category("missing") == []
+
+
+def test_prompt_manager_incremental_reload(tmp_path):
+    """Test that reload only re-parses changed files"""
+    _write_prompt(tmp_path, "a")
+    path_b = _write_prompt(tmp_path, "b")
+
+    manager = PromptManager(prompts_dir=str(tmp_path))
+    before = manager.snapshot
+    prompt_a = manager.get_prompt("a")
+
+    assert manager.reload() is False
+    assert manager.snapshot is before
+
+    _write_prompt(tmp_path, "b", template="Changed")
+    os.utime(path_b, ns=(0, path_b.stat().st_mtime_ns + 1_000_000))
+    _write_prompt(tmp_path, "d")
+
+    assert manager.reload() is True
+    assert manager.get_prompt("a") is prompt_a
+    assert manager.get_prompt("b").template == "Changed"
+    assert manager.get_prompt("d") is not None
+    # The old snapshot is untouched by the reload
+    assert before.prompts["b"].template == "Hello {{ user_name }}"
+    assert "d" not in before.prompts
+
+    path_b.unlink()
+    assert manager.reload() is True
+    assert manager.get_prompt("b") is None
+
+
+def test_prompt_manager_keeps_last_good_version(tmp_path):
+    """Test that an invalid edit does not drop a loaded prompt"""
+    path = _write_prompt(tmp_path, "a")
+    manager = PromptManager(prompts_dir=str(tmp_path))
+
+    path.write_text("{not json")
+    manager.reload()
+
+    assert manager.get_prompt("a") is not None
+
+
+def test_prompt_manager_watcher(tmp_path):
+    """Test that the background watcher picks up new files"""
+    manager = PromptManager(prompts_dir=str(tmp_path))
+    manager.start_watching(interval=0.01)
+    try:
+        _write_prompt(tmp_path, "late")
+        deadline = time.monotonic() + 2
+        while manager.get_prompt("late") is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        manager.stop_watching()
+
+    assert manager.get_prompt("late") is not None
+
+
+def test_renderer_caches_compiled_templates():
+    """Test that a prompt's template is compiled once per version"""
+    prompt = PromptTemplate(
+        id="test",
+        name="Test",
+        description="Test",
+        template="Hi {{ user_name }}",
+        created_at=datetime.utcnow().isoformat(),
+        updated_at=datetime.utcnow().isoformat(),
+    )
+    renderer = PromptRenderer()
+
+    compiled = renderer.compile(prompt)
+    assert renderer.compile(prompt) is compiled
+
+    updated = prompt.model_copy(update={"version": "1.1.0", "template": "Hey"})
+    assert renderer.compile(updated) is not compiled
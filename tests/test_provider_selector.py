@@ -0,0 +1,160 @@
+"""Test latency-adaptive provider selection against synthetic traces"""
+import random
+
+from livekit.agents import ErrorEvent, MetricsCollectedEvent, llm, metrics
+
+from config.config import ModelConfig
+from config.provider_selector import ProviderSelector
+from testing.fakes import StubSession
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _simulate(selector, traces, sessions, clock=None, step=1.0):
+    """Route sessions, feeding each chosen LLM's next latency (None = error)"""
+    chosen = []
+    for i in range(sessions):
+        if clock is not None:
+            clock.now += step
+        descriptor = selector.select("llm")
+        chosen.append(descriptor)
+        latency = traces[descriptor](i)
+        if latency is None:
+            selector.record_error("llm", descriptor)
+        else:
+            selector.record_latency("llm", descriptor, latency)
+    return chosen
+
+
+def test_routes_to_faster_candidate_and_adapts_to_degradation():
+    """Test that sessions follow the faster provider as latencies shift"""
+    rng = random.Random(7)
+    selector = ProviderSelector({"llm": ["a", "b"]}, explore_every=10)
+    traces = {
+        # a is fast for 100 sessions, then degrades to 1.5s
+        "a": lambda i: rng.gauss(300 if i < 100 else 1500, 30),
+        "b": lambda i: rng.gauss(600, 30),
+    }
+
+    chosen = _simulate(selector, traces, 200)
+
+    assert chosen[50:100].count("a") >= 45
+    assert chosen[150:].count("b") >= 45
+    assert selector.stats()["llm"]["best"] == "b"
+
+
+def test_exploration_keeps_other_candidates_measured():
+    """Test that every explore_every-th session tries another candidate"""
+    selector = ProviderSelector({"llm": ["a", "b", "c"]}, explore_every=5)
+    traces = {"a": lambda i: 100, "b": lambda i: 900, "c": lambda i: 800}
+
+    chosen = _simulate(selector, traces, 40)
+
+    assert chosen.count("b") >= 2 and chosen.count("c") >= 2
+    assert chosen.count("a") == 40 - chosen.count("b") - chosen.count("c")
+    stats = selector.stats()["llm"]["candidates"]
+    assert all(stats[d]["samples"] > 0 for d in "abc")
+
+
+def test_circuit_breaker_opens_and_half_opens():
+    """Test that repeated errors stop routing until the cooldown expires"""
+    clock = FakeClock()
+    selector = ProviderSelector(
+        {"llm": ["a", "b"]},
+        failure_threshold=3,
+        cooldown=30,
+        explore_every=0,
+        error_penalty_ms=0,
+        clock=clock,
+    )
+    selector.record_latency("llm", "a", 100)
+    selector.record_latency("llm", "b", 400)
+    for _ in range(3):
+        selector.record_error("llm", "a")
+
+    assert selector.select("llm") == "b"
+    assert selector.stats()["llm"]["candidates"]["a"]["open"]
+
+    # Half-open after the cooldown: a is chosen again, one error re-opens it
+    clock.now = 31
+    assert selector.select("llm") == "a"
+    selector.record_error("llm", "a")
+    assert selector.select("llm") == "b"
+
+    clock.now = 62
+    selector.record_latency("llm", "a", 100)
+    assert selector.select("llm") == "a"
+
+
+def test_cost_weight_trades_latency_for_price():
+    """Test that a cheaper, slightly slower candidate wins under cost weight"""
+    selector = ProviderSelector(
+        {"llm": ["fast", "cheap"]},
+        costs={"fast": 10.0, "cheap": 1.0},
+        cost_weight=50.0,
+        explore_every=0,
+    )
+    selector.record_latency("llm", "fast", 300)
+    selector.record_latency("llm", "cheap", 500)
+
+    assert selector.select("llm") == "cheap"
+
+
+def test_attached_session_feeds_metrics_and_errors():
+    """Test that session events update the candidates chosen for it"""
+    selector = ProviderSelector({"llm": ["a", "b"], "tts": ["x", "y"]})
+    session = StubSession()
+    choice = {"llm": "a", "tts": "y"}
+    selector.attach(session, choice)
+
+    llm_metrics = metrics.LLMMetrics(
+        label="llm",
+        request_id="req",
+        timestamp=0.0,
+        duration=1.0,
+        ttft=0.25,
+        cancelled=False,
+        completion_tokens=10,
+        prompt_tokens=100,
+        prompt_cached_tokens=0,
+        total_tokens=110,
+        tokens_per_second=20.0,
+    )
+    session.emit("metrics_collected", MetricsCollectedEvent(metrics=llm_metrics))
+    error = llm.LLMError(
+        timestamp=0.0, label="llm", error=Exception("down"), recoverable=False
+    )
+    session.emit("error", ErrorEvent(error=error, source=object()))
+
+    stats = selector.stats()
+    assert stats["llm"]["candidates"]["a"]["ttft_ms"] == 250.0
+    assert stats["llm"]["candidates"]["a"]["errors"] == 1
+    assert selector.providers_for(session) == choice
+
+
+def test_model_config_candidates_and_choice():
+    """Test candidate lists and applying a chosen candidate to the config"""
+    config = ModelConfig(
+        llm_candidates=["groq/llama-3.3-70b-versatile", "openai/gpt-4o-mini"],
+        tts_candidates=["elevenlabs/turbo-v2.5"],
+    )
+    candidates = config.get_candidates()
+    assert candidates["llm"] == ["openai/gpt-4o-mini", "groq/llama-3.3-70b-versatile"]
+    assert candidates["tts"] == [
+        "cartesia/sonic-2:sonic-english",
+        "elevenlabs/turbo-v2.5:rachel",
+    ]
+    assert candidates["stt"] == ["deepgram/nova-3"]
+
+    chosen = config.with_providers(
+        {"llm": "groq/llama-3.3-70b-versatile", "tts": "elevenlabs/turbo-v2.5:rachel"}
+    )
+    assert chosen.get_llm_descriptor() == "groq/llama-3.3-70b-versatile"
+    assert (chosen.tts_provider, chosen.tts_voice) == ("elevenlabs", "rachel")
+    assert config.llm_provider == "openai"
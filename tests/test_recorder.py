@@ -0,0 +1,141 @@
+"""Test call recording"""
+import asyncio
+import time
+
+import av
+import numpy as np
+import pytest
+
+from agent.call_setup import run_call
+from audio.recorder import CallRecorder, _Timeline
+from testing.fakes import FakeJobContext, tone_frames
+from test_call_setup import _dependencies
+
+
+def _decode(path) -> tuple[int, np.ndarray]:
+    """Sample rate and (channels, samples) float audio of a recording"""
+    with av.open(str(path)) as container:
+        stream = container.streams.audio[0]
+        chunks = [f.to_ndarray() for f in container.decode(stream)]
+        rate = stream.rate
+    planar = [c if c.shape[0] == 2 else c.reshape(-1, 2).T for c in chunks]
+    return rate, np.concatenate(planar, axis=1).astype(np.float32)
+
+
+def test_timeline_keeps_silence_between_frames():
+    """Test that a leg's frame lands at its arrival time, not after the last"""
+    timeline = _Timeline(sample_rate=1000, start=0.0)
+    timeline.add(0, arrival=0.1, samples=np.ones(100, dtype=np.int16))
+    timeline.add(1, arrival=1.0, samples=np.full(100, 2, dtype=np.int16))
+
+    stereo = timeline.take(timeline.end)
+
+    assert stereo.shape == (1000, 2)
+    assert stereo[:100, 0].tolist() == [1] * 100
+    assert not stereo[100:, 0].any()
+    assert not stereo[:900, 1].any()
+    assert stereo[900:, 1].tolist() == [2] * 100
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("format", ["ogg", "flac"])
+async def test_records_both_legs_to_stereo_file(tmp_path, format):
+    """Test that each leg ends up in its own channel, at any input rate"""
+    recorder = CallRecorder(str(tmp_path / f"call.{format}"), format=format)
+    await recorder.start()
+    # The agent leg arrives at 48 kHz and is resampled
+    for caller, agent in zip(tone_frames(1.0), tone_frames(1.0, 48000, 880)):
+        recorder.push_frame("caller", caller)
+        recorder.push_frame("agent", agent)
+        await asyncio.sleep(0)
+    stats = await recorder.aclose()
+
+    rate, audio = _decode(recorder.path)
+    assert audio.shape[0] == 2
+    assert audio.shape[1] / rate == pytest.approx(1.0, abs=0.1)
+    assert np.abs(audio[0]).max() > 0.1 and np.abs(audio[1]).max() > 0.1
+    assert stats["dropped_frames"] == 0
+    assert stats["bytes"] == recorder.path.stat().st_size > 0
+
+
+@pytest.mark.asyncio
+async def test_slow_disk_drops_frames_instead_of_blocking(tmp_path):
+    """Test that push_frame returns immediately while the writer is stuck"""
+
+    class SlowDiskRecorder(CallRecorder):
+        def _write(self, file, chunk):
+            time.sleep(0.2)
+            super()._write(file, chunk)
+
+    recorder = SlowDiskRecorder(
+        str(tmp_path / "call.flac"),
+        format="flac",
+        chunk_bytes=1024,
+        max_pending_frames=50,
+        max_pending_chunks=1,
+        flush_delay=0.0,
+    )
+    await recorder.start()
+
+    slowest = 0.0
+    for frame in tone_frames(5.0):
+        started = time.perf_counter()
+        recorder.push_frame("caller", frame)
+        slowest = max(slowest, time.perf_counter() - started)
+    stats = await recorder.aclose()
+
+    assert stats["dropped_frames"] > 0
+    assert stats["frames"] + stats["dropped_frames"] == 500
+    assert slowest < 0.05
+
+
+@pytest.mark.asyncio
+async def test_failed_write_ends_recording_without_hanging(tmp_path):
+    """Test that aclose() returns the error after the disk fails"""
+
+    class FailingDiskRecorder(CallRecorder):
+        def _write(self, file, chunk):
+            raise OSError("No space left on device")
+
+    recorder = FailingDiskRecorder(
+        str(tmp_path / "call.flac"),
+        format="flac",
+        chunk_bytes=1024,
+        max_pending_chunks=1,
+        flush_delay=0.0,
+    )
+    await recorder.start()
+    for frame in tone_frames(2.0):
+        recorder.push_frame("caller", frame)
+        await asyncio.sleep(0)
+    stats = await asyncio.wait_for(recorder.aclose(), 5)
+
+    assert "No space left" in stats["error"]
+    assert stats["bytes"] == 0
+    assert not recorder.recording
+
+
+@pytest.mark.asyncio
+async def test_call_recording_is_linked_from_conversation(tmp_path):
+    """Test that a recorded call lists its file in the conversation metadata"""
+    deps = _dependencies()
+    deps.recording_dir = str(tmp_path)
+    ctx = FakeJobContext()
+
+    state = await run_call(ctx, deps)
+    conversation_id = state.agent_context.conversation.conversation_id
+    assert state.recorder.recording
+    await ctx.shutdown()
+
+    conn = await deps.storage._get_connection()
+    async with conn.execute(
+        "SELECT metadata FROM conversations WHERE conversation_id = ?",
+        (conversation_id,),
+    ) as cursor:
+        (metadata,) = await cursor.fetchone()
+    assert str(state.recorder.path) in metadata
+    assert state.recorder.path.parent == tmp_path
+    assert state.recorder.path.name.startswith(conversation_id)
+    assert not state.recorder.recording
+
+    await deps.storage.close()
@@ -0,0 +1,215 @@
+"""Test the org-scoped LLM response cache"""
+import asyncio
+import threading
+
+import pytest
+from livekit.agents import llm
+
+from agent.response_cache import ResponseCache, last_user_message, normalize_utterance
+from models.context import (
+    AgentContext,
+    ConversationContext,
+    OrganizationContext,
+    UserContext,
+)
+from testing.fakes import StubLLM
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _context(org_id="acme", name=None, custom_settings=None, version="phone@1.0"):
+    user = UserContext(user_id="caller", name=name, phone_number="+15550001111")
+    return AgentContext(
+        user=user,
+        organization=OrganizationContext(
+            org_id=org_id, name=org_id.title(), custom_settings=custom_settings or {}
+        ),
+        conversation=ConversationContext(conversation_id="conv", user_id="caller"),
+        call_metadata={"prompt_version": version},
+    )
+
+
+def _chat(text: str, previous: str) -> llm.ChatContext:
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="assistant", content=previous)
+    chat_ctx.add_message(role="user", content=text)
+    return chat_ctx
+
+
+async def _turn(cache, context, text, stub, previous="Hello, how can I help?"):
+    chat_ctx = _chat(text, previous)
+    chunks = [c async for c in cache.respond(context, chat_ctx, stub.stream)]
+    return "".join(chunks).strip()
+
+
+def test_normalize_utterance():
+    """Test that case and punctuation do not matter"""
+    assert normalize_utterance("What're your HOURS?!") == "whatre your hours"
+    assert last_user_message(llm.ChatContext()) is None
+
+
+@pytest.mark.asyncio
+async def test_repeated_question_is_answered_from_cache():
+    """Test exact and filler-word repeats hit, unrelated questions miss"""
+    cache = ResponseCache()
+    stub = StubLLM()
+    context = _context()
+
+    first = await _turn(cache, context, "What are your hours?", stub)
+    assert await _turn(cache, context, "what are your hours", stub) == first
+    assert await _turn(cache, context, "What are the hours, please?", stub) == first
+    assert stub.calls == 1
+
+    await _turn(cache, context, "Where are you located?", stub)
+    assert stub.calls == 2
+
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["stores"]) == (2, 2, 2)
+    assert stats["hit_rate"] == 0.5
+    assert stats["by_org"]["acme"]["hits"] == 2
+
+
+@pytest.mark.asyncio
+async def test_questions_differing_in_one_word_miss():
+    """Test that a Sunday question never gets the cached Saturday answer"""
+    cache = ResponseCache()
+    stub = StubLLM()
+    context = _context()
+
+    await _turn(cache, context, "Are you open on Saturday?", stub)
+    await _turn(cache, context, "Are you open on Sunday?", stub)
+    await _turn(cache, context, "What are your opening hours?", stub)
+    await _turn(cache, context, "What are your closing hours?", stub)
+
+    assert stub.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_keyed_by_previous_assistant_turn():
+    """Test that the same words answering a different question miss"""
+    cache = ResponseCache()
+    stub = StubLLM()
+    context = _context()
+
+    await _turn(cache, context, "Next week works", stub, previous="Book for when?")
+    await _turn(cache, context, "Next week works", stub, previous="Cancel which one?")
+    await _turn(cache, context, "Next week works", stub, previous="Book for when?")
+
+    assert stub.calls == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "utterance", ["yes", "Yes please", "No.", "What about that one?", "hours"]
+)
+async def test_short_and_contextual_turns_are_never_cached(utterance):
+    """Test that confirmations and follow-ups always reach the LLM"""
+    cache = ResponseCache()
+    stub = StubLLM()
+    context = _context()
+    previous = "Shall I book you for Saturday at ten?"
+
+    await _turn(cache, context, utterance, stub, previous=previous)
+    await _turn(cache, context, utterance, stub, previous=previous)
+
+    assert stub.calls == 2
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_scoped_by_org_and_prompt_version():
+    """Test that answers never cross organizations or prompt versions"""
+    cache = ResponseCache()
+    stub = StubLLM()
+
+    await _turn(cache, _context("acme"), "What are your hours?", stub)
+    await _turn(cache, _context("globex"), "What are your hours?", stub)
+    new_version = _context("acme", version="phone@2.0")
+    await _turn(cache, new_version, "What are your hours?", stub)
+
+    assert stub.calls == 3
+
+
+@pytest.mark.asyncio
+async def test_entries_expire_after_org_ttl():
+    """Test per-organization TTLs, including disabling the cache"""
+    clock = FakeClock()
+    cache = ResponseCache(default_ttl=60, clock=clock)
+    stub = StubLLM()
+    short = _context(custom_settings={"response_cache_ttl": 10})
+
+    await _turn(cache, short, "What are your hours?", stub)
+    clock.now = 5
+    await _turn(cache, short, "What are your hours?", stub)
+    clock.now = 11
+    await _turn(cache, short, "What are your hours?", stub)
+    assert stub.calls == 2
+
+    disabled = _context("globex", custom_settings={"response_cache_ttl": 0})
+    await _turn(cache, disabled, "What are your hours?", stub)
+    await _turn(cache, disabled, "What are your hours?", stub)
+    assert stub.calls == 4
+    assert cache.stats()["by_org"]["globex"]["skipped"] == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "utterance",
+    [
+        "When is my appointment?",
+        "Can you call me back at 555 123 4567?",
+        "Send it to jane@example.com",
+        "Is Jane on the list?",
+    ],
+)
+async def test_personal_turns_are_never_cached(utterance):
+    """Test that turns about the caller always reach the LLM"""
+    cache = ResponseCache()
+    stub = StubLLM()
+    context = _context(name="Jane Doe")
+
+    await _turn(cache, context, utterance, stub)
+    await _turn(cache, context, utterance, stub)
+
+    assert stub.calls == 2
+    assert cache.stats()["entries"] == 0
+
+
+@pytest.mark.asyncio
+async def test_personalized_response_is_not_stored():
+    """Test that a response naming the caller is not reused"""
+    cache = ResponseCache()
+    stub = StubLLM(response="Hi Jane Doe, we open at nine.")
+    context = _context(name="Jane Doe")
+
+    await _turn(cache, context, "What time do you open?", stub)
+    await _turn(cache, context, "What time do you open?", stub)
+
+    assert stub.calls == 2
+
+
+def test_shared_by_jobs_running_as_threads():
+    """Test that calls on other threads' event loops hit one shared cache"""
+    cache = ResponseCache()
+    stub = StubLLM()
+    context = _context()
+
+    def job():
+        for _ in range(20):
+            asyncio.run(_turn(cache, context, "What are your hours?", stub))
+
+    threads = [threading.Thread(target=job) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 80
+    assert stats["hits"] >= 76 and stats["entries"] == 1
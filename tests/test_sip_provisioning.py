@@ -0,0 +1,205 @@
+"""Test diffing and syncing SIP trunks and dispatch rules against a stub server"""
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+from livekit import api
+
+from telephony.api_client import LiveKitAPIPool
+from telephony.sip_provisioning import (
+    CREATE,
+    DELETE,
+    DISPATCH,
+    INBOUND,
+    OUTBOUND,
+    UPDATE,
+    SIPProvisioner,
+    desired_state,
+    is_managed,
+)
+from testing.fakes import StubLiveKitServer
+
+CONFIG = Path(__file__).parent.parent / "config"
+
+
+def _config(tmp_path, orgs: list[dict]) -> str:
+    for name in ("inbound_trunk.json", "outbound_trunk.json", "dispatch_rules.json"):
+        shutil.copy(CONFIG / name, tmp_path / name)
+    (tmp_path / "organizations.json").write_text(json.dumps({"organizations": orgs}))
+    return str(tmp_path)
+
+
+def _orgs(count: int) -> list[dict]:
+    return [
+        {"org_id": f"org{i}", "numbers": [f"+1555000{i:04d}"]} for i in range(count)
+    ]
+
+
+def _provisioner(server: StubLiveKitServer, **options) -> SIPProvisioner:
+    pool = LiveKitAPIPool(server.url, "key", "secret-" * 6, jitter=lambda: 0.0)
+    return SIPProvisioner(pool, **options)
+
+
+def _writes(server: StubLiveKitServer) -> list:
+    return [r for r in server.requests if not type(r).__name__.startswith("List")]
+
+
+def test_desired_state_from_templates(tmp_path):
+    """Test per-org names, numbers, overrides and skipped organizations"""
+    orgs = _orgs(1) + [
+        {"org_id": "nophone"},
+        {
+            "org_id": "custom",
+            "numbers": ["+15559990000"],
+            "sip": {"outbound": {"address": "sip.custom.example"}, "inbound": False},
+        },
+    ]
+    resources = desired_state(_config(tmp_path, orgs))
+    by_name = {r.name: r for r in resources}
+
+    assert sorted(by_name) == [
+        "custom-dispatch",
+        "custom-outbound",
+        "org0-dispatch",
+        "org0-inbound",
+        "org0-outbound",
+    ]
+    inbound = by_name["org0-inbound"].info()
+    assert list(inbound.numbers) == ["+15550000000"]
+    assert json.loads(inbound.metadata)["org_id"] == "org0" and is_managed(inbound)
+    rule = by_name["org0-dispatch"].info({"org0-inbound": "ST_1"})
+    assert list(rule.trunk_ids) == ["ST_1"]
+    assert rule.rule.dispatch_rule_direct.room_name == "call-{callID}"
+    assert by_name["custom-outbound"].info().address == "sip.custom.example"
+    assert by_name["custom-dispatch"].trunks == ()
+
+
+@pytest.mark.asyncio
+async def test_sync_creates_then_is_idempotent(tmp_path):
+    """Test that a second sync of the same state lists but writes nothing"""
+    server = await StubLiveKitServer().start()
+    provisioner = _provisioner(server)
+    desired = desired_state(_config(tmp_path, _orgs(3)))
+
+    report = await provisioner.sync(desired)
+
+    assert report.to_dict()["create"] == 9 and not report.failed
+    assert {len(server.sip[kind]) for kind in (INBOUND, OUTBOUND, DISPATCH)} == {3}
+    rule = next(
+        r for r in server.sip[DISPATCH].values() if r.name == "org1-dispatch"
+    )
+    assert list(rule.trunk_ids) == [report.trunk_ids["org1"]["inbound"]]
+
+    writes = len(_writes(server))
+    again = await provisioner.sync(desired)
+
+    assert again.changes == [] and again.unchanged == 9
+    assert len(_writes(server)) == writes
+    await provisioner.pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_dry_run_plans_without_writing(tmp_path):
+    """Test that a dry run reports the changes and sends only list requests"""
+    server = await StubLiveKitServer().start()
+    provisioner = _provisioner(server)
+    desired = desired_state(_config(tmp_path, _orgs(2)))
+
+    report = await provisioner.sync(desired, dry_run=True)
+
+    assert [c.action for c in report.changes] == [CREATE] * 6
+    assert report.trunk_ids["org0"] == {"inbound": "<new>", "outbound": "<new>"}
+    assert _writes(server) == []
+    await provisioner.pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_sync_updates_deletes_and_leaves_unmanaged(tmp_path):
+    """Test changed numbers, a removed org, duplicates and hand-made trunks"""
+    server = await StubLiveKitServer().start()
+    provisioner = _provisioner(server)
+    await provisioner.sync(desired_state(_config(tmp_path, _orgs(2))))
+    manual = api.SIPInboundTrunkInfo(sip_trunk_id="ST_manual", name="legacy")
+    server.sip[INBOUND]["ST_manual"] = manual
+    # A retried create left a second copy of org0's outbound trunk
+    original = next(
+        t for t in server.sip[OUTBOUND].values() if t.name == "org0-outbound"
+    )
+    duplicate = api.SIPOutboundTrunkInfo()
+    duplicate.CopyFrom(original)
+    duplicate.sip_trunk_id = "ST_duplicate"
+    server.sip[OUTBOUND]["ST_duplicate"] = duplicate
+
+    orgs = [{"org_id": "org0", "numbers": ["+15550009999"]}]
+    report = await provisioner.sync(desired_state(_config(tmp_path, orgs)))
+
+    changes = sorted((c.action, c.name) for c in report.changes)
+    assert (UPDATE, "org0-inbound") in changes
+    assert (UPDATE, "org0-outbound") in changes
+    assert (DELETE, "org0-outbound") in changes
+    assert {name for action, name in changes if action == DELETE} == {
+        "org0-outbound",
+        "org1-inbound",
+        "org1-outbound",
+        "org1-dispatch",
+    }
+    assert not report.failed
+    inbound_names = {t.name for t in server.sip[INBOUND].values()}
+    assert inbound_names == {"org0-inbound", "legacy"}
+    assert len(server.sip[OUTBOUND]) == 1
+    trunk = next(t for t in server.sip[INBOUND].values() if t.name == "org0-inbound")
+    assert list(trunk.numbers) == ["+15550009999"]
+
+    # Syncing only org1 recreates it without touching org0
+    later = await provisioner.sync(
+        desired_state(_config(tmp_path, _orgs(2))), orgs={"org1"}
+    )
+    assert {c.name for c in later.changes} == {
+        "org1-inbound",
+        "org1-outbound",
+        "org1-dispatch",
+    }
+    await provisioner.pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_rules_route_the_kept_copy_of_a_duplicated_trunk(tmp_path):
+    """Test that a rule never routes the duplicate trunk the sync deletes"""
+    server = await StubLiveKitServer().start()
+    provisioner = _provisioner(server)
+    desired = desired_state(_config(tmp_path, _orgs(1)))
+    inbound = next(r for r in desired if r.kind == INBOUND).info()
+    for trunk_id in ("ST_A", "ST_B"):
+        copy = api.SIPInboundTrunkInfo()
+        copy.CopyFrom(inbound)
+        copy.sip_trunk_id = trunk_id
+        server.sip[INBOUND][trunk_id] = copy
+
+    report = await provisioner.sync(desired)
+
+    assert (DELETE, "org0-inbound") in {(c.action, c.name) for c in report.changes}
+    assert list(server.sip[INBOUND]) == ["ST_A"]
+    assert report.trunk_ids["org0"]["inbound"] == "ST_A"
+    (rule,) = server.sip[DISPATCH].values()
+    assert list(rule.trunk_ids) == ["ST_A"]
+    await provisioner.pool.aclose()
+    await server.close()
+
+
+@pytest.mark.asyncio
+async def test_changes_run_concurrently_within_bound(tmp_path):
+    """Test that changes overlap but never exceed the worker limit"""
+    server = await StubLiveKitServer(delay=0.02).start()
+    provisioner = _provisioner(server, concurrency=4)
+    desired = desired_state(_config(tmp_path, _orgs(12)))
+
+    report = await provisioner.sync(desired)
+
+    assert report.to_dict()["create"] == 36 and not report.failed
+    assert server.max_in_flight == 4
+    await provisioner.pool.aclose()
+    await server.close()
@@ -0,0 +1,181 @@
+"""Test speculative LLM generation with scripted transcripts"""
+import asyncio
+import threading
+
+import pytest
+from livekit.agents import llm
+
+from agent.speculative import SpeculationStats, SpeculativeGeneration, divergence
+from testing.fakes import StubLLM
+
+LLM_DELAY = 0.05
+
+
+class RecordingLLM(StubLLM):
+    """StubLLM that records the user message of every request"""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.prompts: list[str] = []
+
+    def generate(self, chat_ctx: llm.ChatContext):
+        self.prompts.append(chat_ctx.items[-1].text_content)
+        return self.stream()
+
+
+def _speculation(stub: RecordingLLM, **kwargs) -> SpeculativeGeneration:
+    history = llm.ChatContext()
+    history.add_message(role="assistant", content="Hello, how can I help?")
+    return SpeculativeGeneration(stub.generate, lambda: history, **kwargs)
+
+
+def _final(text: str) -> llm.ChatContext:
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="assistant", content="Hello, how can I help?")
+    chat_ctx.add_message(role="user", content=text)
+    return chat_ctx
+
+
+async def _play(speculation, transcripts, gap=0.01):
+    """Feed (text, is_final) transcripts with a gap between them"""
+    for text, is_final in transcripts:
+        speculation.on_transcript(text, is_final)
+        await asyncio.sleep(gap)
+
+
+async def _respond(speculation, text) -> str:
+    chunks = [c async for c in speculation.respond(_final(text))]
+    return "".join(chunks).strip()
+
+
+def test_divergence():
+    """Test word-level divergence ignores case and punctuation"""
+    assert divergence("What are your hours?", "what are your hours") == 0.0
+    assert divergence("what are your hours", "where are you") > 0.4
+    assert divergence("", "") == 0.0
+
+
+@pytest.mark.asyncio
+async def test_stable_interim_is_committed_when_final_matches():
+    """Test that a matching final commits the speculation it started"""
+    stub = RecordingLLM(delay=LLM_DELAY)
+    speculation = _speculation(stub)
+
+    await _play(
+        speculation,
+        [
+            ("what are", False),
+            ("what are your hours", False),
+            ("what are your hours", False),
+        ],
+    )
+    await asyncio.sleep(LLM_DELAY)
+    speculation.on_transcript("What are your hours?", True)
+
+    assert await _respond(speculation, "What are your hours?") == "We are open 9 to 5."
+    assert stub.prompts == ["what are your hours"]
+
+    stats = speculation.stats.summary()
+    assert stats["committed"] == 1 and stats["wasted_tokens"] == 0
+    assert stats["saved_ms"]["min"] >= LLM_DELAY * 1000 * 0.9
+
+
+@pytest.mark.asyncio
+async def test_diverging_final_discards_and_regenerates():
+    """Test that a different final text falls back to a normal generation"""
+    stub = RecordingLLM(delay=0.0)
+    speculation = _speculation(stub)
+
+    await _play(speculation, [("where are you", False), ("where are you", False)])
+    await asyncio.sleep(0.01)
+
+    assert await _respond(speculation, "where are you open on sundays")
+    assert stub.prompts == ["where are you", "where are you open on sundays"]
+
+    stats = speculation.stats.summary()
+    assert stats["discarded"] == 1 and stats["committed"] == 0
+    assert stats["wasted_tokens"] == len(stub.response.split(" "))
+
+
+@pytest.mark.asyncio
+async def test_changed_stable_text_restarts_speculation():
+    """Test that a new stable interim beyond the threshold restarts"""
+    stub = RecordingLLM(delay=LLM_DELAY)
+    speculation = _speculation(stub)
+
+    await _play(
+        speculation,
+        [
+            ("can i book", False),
+            ("can i book", False),
+            ("can i book for tuesday", False),
+            ("can i book for tuesday", False),
+        ],
+    )
+    speculation.on_transcript("Can I book for Tuesday?", True)
+
+    assert await _respond(speculation, "Can I book for Tuesday?")
+    assert stub.prompts == ["can i book", "can i book for tuesday"]
+    assert speculation.stats.discarded == 1
+    assert speculation.stats.committed == 1
+
+
+@pytest.mark.asyncio
+async def test_threshold_commits_near_matches_and_final_segments_join():
+    """Test that earlier final segments are part of the speculated turn"""
+    stub = RecordingLLM(delay=0.0)
+    speculation = _speculation(stub, max_divergence=0.2)
+
+    await _play(
+        speculation,
+        [
+            ("I'd like to book", True),
+            ("an appointment please", False),
+            ("an appointment please", False),
+        ],
+    )
+
+    assert await _respond(speculation, "I'd like to book an appointment")
+    assert stub.prompts == [
+        "I'd like to book",
+        "I'd like to book an appointment please",
+    ]
+    assert speculation.stats.committed == 1
+
+
+@pytest.mark.asyncio
+async def test_end_turn_cancels_unused_speculation():
+    """Test that a turn answered elsewhere does not leave generation running"""
+    stub = RecordingLLM(delay=1.0)
+    speculation = _speculation(stub)
+
+    await _play(speculation, [("what are your hours", True)])
+    speculation.end_turn()
+
+    assert speculation.stats.discarded == 1
+    assert speculation._current is None
+
+
+def test_stats_shared_by_job_threads():
+    """Test that stats updated from several job threads add up"""
+    stats = SpeculationStats()
+
+    def job():
+        for _ in range(1000):
+            stats.record_started()
+            stats.record_discarded(2)
+            stats.record_committed(10.0)
+            stats.record_committed_tokens(3)
+
+    threads = [threading.Thread(target=job) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    summary = stats.summary()
+    assert summary["started"] == 8000
+    assert summary["discarded"] == 8000 and summary["committed"] == 8000
+    assert summary["wasted_tokens"] == 16000
+    assert summary["saved_ms"]["count"] == 8000
+    assert stats.committed_tokens == 24000
@@ -135,4 +135,44 @@ async def test_multiple_conversations():
     
     assert len(conversations) == 2
     
-    await storage.close()
\ No newline at end of file
+    await storage.close()
+
+@pytest.mark.asyncio
+async def test_context_snapshot_by_conversation_and_room():
+    """Test saving and looking up context snapshots"""
+    storage = MemoryStorage(db_path=":memory:")
+    await storage.initialize()
+
+    await storage.save_conversation("conv1", "user1")
+    await storage.save_context_snapshot("conv1", b"first", room="room-a")
+    assert await storage.get_context_snapshot(conversation_id="conv1") == b"first"
+    assert await storage.get_context_snapshot(room="room-a") == b"first"
+
+    # A newer conversation in the same room replaces the room's snapshot
+    await storage.save_conversation("conv2", "user1")
+    await storage.save_context_snapshot("conv2", b"second", room="room-a")
+    assert await storage.get_context_snapshot(room="room-a") == b"second"
+    assert await storage.get_context_snapshot(conversation_id="conv1") is None
+    assert await storage.get_context_snapshot(room="room-b") is None
+
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_update_conversation_metadata():
+    """Test merging keys into conversation metadata"""
+    storage = MemoryStorage(db_path=":memory:")
+    await storage.initialize()
+
+    await storage.save_conversation("conv1", "user1", {"room": "r1"})
+    await storage.update_conversation_metadata(
+        "conv1", {"setup_timings_ms": {"connect": 12.5}}
+    )
+
+    conversations = await storage.get_user_conversations("user1")
+    assert conversations[0]["metadata"] == {
+        "room": "r1",
+        "setup_timings_ms": {"connect": 12.5},
+    }
+
+    await storage.close()
@@ -0,0 +1,167 @@
+"""Test the on-disk synthesized audio cache"""
+import asyncio
+import threading
+
+import pytest
+
+from audio.tts_cache import CachedAudio, TTSAudioCache, cache_key
+from testing.fakes import StubSession, StubTTS
+
+VOICE = ("cartesia", "sonic-2", "sonic-english")
+GREETING = "Hello, thanks for calling Acme. How can I help you today?"
+
+
+def _audio(seconds: float = 0.1, level: int = 1) -> CachedAudio:
+    samples = int(24000 * seconds)
+    return CachedAudio(24000, 1, level.to_bytes(2, "little") * samples)
+
+
+def test_cache_key_normalizes_text():
+    """Test that whitespace differences share a key but voices do not"""
+    assert cache_key(*VOICE, "Hello,  there\n") == cache_key(*VOICE, "Hello, there")
+    other_voice = ("cartesia", "sonic-2", "other")
+    assert cache_key(*VOICE, "Hello") != cache_key(*other_voice, "Hello")
+
+
+def test_cached_audio_roundtrip():
+    """Test encoding and decoding a cache file"""
+    audio = _audio()
+    assert CachedAudio.decode(audio.encode()) == audio
+    assert audio.duration == pytest.approx(0.1)
+    with pytest.raises(ValueError):
+        CachedAudio.decode(b"nope")
+    # A file cut short by a crashed or concurrent writer is detected
+    with pytest.raises(ValueError, match="truncated"):
+        CachedAudio.decode(audio.encode()[:-2])
+
+
+@pytest.mark.asyncio
+async def test_miss_populates_cache_and_hit_skips_tts(tmp_path):
+    """Test that only the first utterance reaches TTS"""
+    cache = TTSAudioCache(str(tmp_path))
+    tts = StubTTS(frames=25)
+    key = cache_key(*VOICE, GREETING)
+
+    first = [frame async for frame in cache.speak(key, GREETING, tts)]
+    await cache.flush()
+    second = [frame async for frame in cache.speak(key, GREETING, tts)]
+
+    assert tts.calls == [GREETING]
+    assert (cache.hits, cache.misses) == (1, 1)
+    assert [bytes(f.data) for f in first] == [bytes(f.data) for f in second]
+
+    # A new process finds the entry on disk and preloads it
+    restarted = TTSAudioCache(str(tmp_path))
+    assert key in restarted
+    assert restarted.preload() == 1
+    frames = [frame async for frame in restarted.speak(key, GREETING, tts)]
+    assert len(frames) == 25
+    assert tts.calls == [GREETING]
+
+
+@pytest.mark.asyncio
+async def test_evicts_least_recently_used(tmp_path):
+    """Test that the directory stays under max_bytes, oldest entry first"""
+    entry_size = len(_audio().encode())
+    cache = TTSAudioCache(str(tmp_path), max_bytes=entry_size * 2, memory_entries=0)
+
+    await cache.put("a", _audio(level=1))
+    await cache.put("b", _audio(level=2))
+    assert await cache.get("a") is not None  # "a" is now most recent
+    await cache.put("c", _audio(level=3))
+
+    assert "a" in cache and "c" in cache and "b" not in cache
+    assert cache.size <= cache.max_bytes
+    assert sorted(p.stem for p in tmp_path.iterdir()) == ["a", "c"]
+
+
+@pytest.mark.asyncio
+async def test_processes_share_directory_and_size_limit(tmp_path):
+    """Test that entries and max_bytes span every cache on one directory"""
+    entry_size = len(_audio().encode())
+    first = TTSAudioCache(str(tmp_path), max_bytes=entry_size * 2)
+    second = TTSAudioCache(str(tmp_path), max_bytes=entry_size * 2)
+
+    await first.put("a", _audio(level=1))
+    assert "a" in second
+    assert await second.get("a") == _audio(level=1)
+    await second.put("b", _audio(level=2))
+    await first.put("c", _audio(level=3))
+
+    # Written atomically: no temp files, and never more than max_bytes
+    assert sum(p.stat().st_size for p in tmp_path.iterdir()) <= entry_size * 2
+    assert not list(tmp_path.glob("*.tmp"))
+    assert "c" in first and first.size <= first.max_bytes
+
+
+@pytest.mark.asyncio
+async def test_unreadable_entry_is_dropped(tmp_path):
+    """Test that a corrupt file is treated as a miss"""
+    cache = TTSAudioCache(str(tmp_path))
+    (tmp_path / "bad.pcm").write_bytes(b"garbage")
+    cache = TTSAudioCache(str(tmp_path))
+
+    assert await cache.get("bad") is None
+    assert "bad" not in cache
+
+
+@pytest.mark.asyncio
+async def test_interrupted_synthesis_is_not_cached(tmp_path):
+    """Test that a greeting cut off mid-synthesis is not stored"""
+    cache = TTSAudioCache(str(tmp_path))
+    key = cache_key(*VOICE, GREETING)
+
+    stream = cache.speak(key, GREETING, StubTTS(frames=10))
+    await stream.__anext__()
+    await stream.aclose()
+    await cache.flush()
+
+    assert key not in cache
+
+
+@pytest.mark.asyncio
+async def test_session_plays_cached_audio(tmp_path):
+    """Test playback through session.say without calling TTS"""
+    cache = TTSAudioCache(str(tmp_path))
+    session = StubSession(tts=StubTTS(frames=5))
+    key = cache_key(*VOICE, GREETING)
+    await cache.put(key, _audio(seconds=0.2))
+
+    await session.say(GREETING, audio=cache.speak(key, GREETING, session.tts))
+
+    assert session.spoken == [(GREETING, 10)]
+    assert session.tts.calls == []
+
+
+def test_jobs_on_threads_share_one_cache(tmp_path):
+    """Test that job threads, each with its own loop, share entries safely"""
+    cache = TTSAudioCache(str(tmp_path), memory_entries=4)
+    texts = [f"Line {i}" for i in range(12)]
+    errors = []
+
+    async def job():
+        tts = StubTTS(frames=2)
+        for text in texts:
+            key = cache_key(*VOICE, text)
+            frames = [frame async for frame in cache.speak(key, text, tts)]
+            assert len(frames) == 2
+        # Only this loop's writes are waited for
+        await cache.flush()
+
+    def run_job():
+        try:
+            asyncio.run(job())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run_job) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert cache.hits + cache.misses == 4 * len(texts)
+    assert all(cache_key(*VOICE, text) in cache for text in texts)
+    assert cache.size == sum(p.stat().st_size for p in tmp_path.glob("*.pcm"))
+    assert len(cache._memory) <= 4 and not cache._writes
@@ -0,0 +1,176 @@
+"""Test per-turn latency collection and rollups"""
+import pytest
+from livekit.agents import AgentStateChangedEvent, MetricsCollectedEvent, metrics
+
+from memory.storage import MemoryStorage
+from metrics.turn_metrics import TurnMetricsCollector
+from testing.fakes import StubSession
+
+T0 = 1767268800.0  # 2026-01-01T12:00:00Z
+
+
+def _turn(session, speech_id, start, eou=0.3, ttft=0.4, ttfb=0.2, playout=None):
+    """Emit the events a session produces for one user turn"""
+    session.emit(
+        "metrics_collected",
+        MetricsCollectedEvent(
+            metrics=metrics.EOUMetrics(
+                timestamp=start + eou,
+                end_of_utterance_delay=eou,
+                transcription_delay=eou / 2,
+                on_user_turn_completed_delay=0.0,
+                last_speaking_time=start,
+                speech_id=speech_id,
+            )
+        ),
+    )
+    session.emit(
+        "metrics_collected",
+        MetricsCollectedEvent(
+            metrics=metrics.LLMMetrics(
+                label="llm",
+                request_id=speech_id,
+                timestamp=start + eou + ttft,
+                duration=1.0,
+                ttft=ttft,
+                cancelled=False,
+                completion_tokens=10,
+                prompt_tokens=100,
+                prompt_cached_tokens=0,
+                total_tokens=110,
+                tokens_per_second=20.0,
+                speech_id=speech_id,
+            )
+        ),
+    )
+    if playout is not None:
+        session.emit(
+            "agent_state_changed",
+            AgentStateChangedEvent(
+                old_state="thinking", new_state="speaking", created_at=start + playout
+            ),
+        )
+    session.emit(
+        "metrics_collected",
+        MetricsCollectedEvent(
+            metrics=metrics.TTSMetrics(
+                label="tts",
+                request_id=speech_id,
+                timestamp=start + 2,
+                ttfb=ttfb,
+                duration=1.0,
+                audio_duration=2.0,
+                cancelled=False,
+                characters_count=40,
+                streamed=True,
+                speech_id=speech_id,
+            )
+        ),
+    )
+
+
+@pytest.mark.asyncio
+async def test_turns_are_joined_and_batched():
+    """Test that EOU, LLM and TTS metrics form one row per turn"""
+    storage = MemoryStorage(db_path=":memory:")
+    await storage.initialize()
+    session = StubSession()
+    collector = TurnMetricsCollector(
+        storage, "conv1", "acme", providers={"llm": "openai/gpt-4o-mini"}, batch_size=2
+    )
+    collector.attach(session)
+
+    _turn(session, "s1", T0, playout=1.0)
+    _turn(session, "s2", T0 + 10)
+    await collector.flush()
+
+    first, second = collector.turns
+    assert first.total_ms == pytest.approx(900)
+    assert first.playout_ms == pytest.approx(1000)
+    assert first.transcription_ms == pytest.approx(150)
+    assert first.started_at == "2026-01-01T12:00:00"
+    assert second.playout_ms is None
+
+    rollup = await storage.get_turn_latency_rollup("llm_provider")
+    assert rollup == [
+        {
+            "llm_provider": "openai/gpt-4o-mini",
+            "count": 2,
+            "mean": 900.0,
+            "p50": 900.0,
+            "p95": 900.0,
+            "p99": 900.0,
+        }
+    ]
+
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_rollups_per_provider_org_and_hour():
+    """Test percentile rollups over several conversations"""
+    storage = MemoryStorage(db_path=":memory:")
+    await storage.initialize()
+
+    for conversation, org, llm, start, ttfts in [
+        ("c1", "acme", "openai/gpt-4o-mini", T0, [0.1, 0.2, 0.3, 0.4]),
+        ("c2", "globex", "groq/llama-3.1-8b", T0 + 3600, [0.05, 0.06]),
+    ]:
+        session = StubSession()
+        collector = TurnMetricsCollector(storage, conversation, org, {"llm": llm})
+        collector.attach(session)
+        for i, ttft in enumerate(ttfts):
+            _turn(session, f"{conversation}-{i}", start + i, ttft=ttft)
+        await collector.flush()
+
+    by_provider = await storage.get_turn_latency_rollup("llm_provider", "llm_ttft_ms")
+    summary = [(r["llm_provider"], r["count"], r["p50"], r["p95"]) for r in by_provider]
+    assert summary == [
+        ("groq/llama-3.1-8b", 2, 50.0, 60.0),
+        ("openai/gpt-4o-mini", 4, 200.0, 400.0),
+    ]
+
+    by_org = await storage.get_turn_latency_rollup("org_id")
+    assert [r["org_id"] for r in by_org] == ["acme", "globex"]
+
+    by_hour = await storage.get_turn_latency_rollup("hour", since="2026-01-01T13")
+    assert [(r["hour"], r["count"]) for r in by_hour] == [("2026-01-01T13", 2)]
+
+    with pytest.raises(ValueError):
+        await storage.get_turn_latency_rollup("content")
+    with pytest.raises(ValueError):
+        await storage.get_turn_latency_rollup("org_id", "1; DROP TABLE messages")
+
+    await storage.close()
+
+
+@pytest.mark.asyncio
+async def test_unfinished_turn_is_flushed_without_total():
+    """Test that an interrupted turn is kept but left out of rollups"""
+    storage = MemoryStorage(db_path=":memory:")
+    await storage.initialize()
+    session = StubSession()
+    collector = TurnMetricsCollector(storage, "conv1", "acme")
+    collector.attach(session)
+
+    session.emit(
+        "metrics_collected",
+        MetricsCollectedEvent(
+            metrics=metrics.EOUMetrics(
+                timestamp=T0,
+                end_of_utterance_delay=0.3,
+                transcription_delay=0.1,
+                on_user_turn_completed_delay=0.0,
+                last_speaking_time=T0,
+                speech_id="s1",
+            )
+        ),
+    )
+    await collector.flush()
+
+    assert collector.turns[0].total_ms is None
+    assert await storage.get_turn_latency_rollup("org_id") == []
+    eou = await storage.get_turn_latency_rollup("org_id", "end_of_utterance_ms")
+    assert eou[0]["count"] == 1
+
+    await storage.close()
@@ -0,0 +1,189 @@
+"""Test worker load reporting and admission under simulated load"""
+import asyncio
+import subprocess
+import sys
+import time
+from types import SimpleNamespace
+
+import psutil
+import pytest
+from livekit.agents import JobExecutorType
+
+from agent.worker_load import (
+    LOAD_INTERVAL,
+    ProcessTreeCPU,
+    WorkerLoad,
+    job_executor_type,
+)
+from metrics.loop_watchdog import LoopWatchdog
+
+
+class SimulatedWorker:
+    """Worker with a settable number of active calls and CPU usage"""
+
+    def __init__(self):
+        self.active_jobs = []
+        self.cpu = 0.0
+        self.now = 0.0
+
+    def clock(self):
+        return self.now
+
+    def cpu_percent(self):
+        return self.cpu
+
+    def tick(self, late_by: float = 0.0):
+        """Advance to the next load_fnc call, optionally delayed by loop lag"""
+        self.now += LOAD_INTERVAL + late_by
+
+
+class FakeJobRequest:
+    def __init__(self):
+        self.room = SimpleNamespace(name="call-test")
+        self.answer = None
+
+    async def accept(self):
+        self.answer = "accepted"
+
+    async def reject(self):
+        self.answer = "rejected"
+
+
+def _load(worker: SimulatedWorker, **kwargs) -> WorkerLoad:
+    return WorkerLoad(cpu_percent=worker.cpu_percent, clock=worker.clock, **kwargs)
+
+
+def test_sessions_fill_worker_at_max():
+    """Test that load reaches 1.0 exactly at the concurrent call limit"""
+    worker = SimulatedWorker()
+    load = _load(worker, max_sessions=4)
+
+    loads = []
+    for calls in range(5):
+        worker.active_jobs = [object()] * calls
+        worker.tick()
+        loads.append(load.get_load(worker))
+
+    assert loads == [0.25 * n for n in range(4)] + [1.0]
+    assert load.last_sample.sessions == 4
+
+
+def test_loop_lag_and_cpu_raise_load():
+    """Test that a lagging loop or saturated CPU marks an idle worker full"""
+    worker = SimulatedWorker()
+    load = _load(worker, max_sessions=8, max_loop_lag=0.125, max_cpu=0.8, window=2)
+    load.get_load(worker)
+
+    worker.tick(late_by=0.25)
+    assert load.get_load(worker) == 1.0
+    assert load.last_sample.loop_lag == 0.125
+
+    # The lag recovers once the loop is back on schedule
+    for _ in range(2):
+        worker.tick()
+        load.get_load(worker)
+    assert load.last_sample.lag_load == 0.0
+
+    worker.cpu = 90.0
+    for _ in range(2):
+        worker.tick()
+        value = load.get_load(worker)
+    assert value == 1.0
+    assert load.last_sample.cpu_load > 1.0
+
+
+@pytest.mark.asyncio
+async def test_job_loop_lag_raises_load():
+    """Test that a stalled job loop marks the worker full though its own is idle"""
+    worker = SimulatedWorker()
+    load = _load(worker, max_sessions=8, max_loop_lag=0.1, window=1)
+    load.get_load(worker)
+    watchdog = LoopWatchdog(
+        threshold_ms=20,
+        interval=0.01,
+        report_interval=0,
+        on_lag=lambda lag_ms: load.record_job_lag(lag_ms / 1000),
+    )
+
+    def job():
+        async def run():
+            watchdog.start()
+            await asyncio.sleep(0.03)
+            time.sleep(0.15)
+            await asyncio.sleep(0.03)
+            watchdog.stop()
+
+        asyncio.run(run())
+
+    await asyncio.to_thread(job)
+    worker.tick()
+
+    assert load.get_load(worker) == 1.0
+    assert load.last_sample.loop_lag >= 0.1
+    # Reported lag counts once; the next sample is back to the worker's own
+    worker.tick()
+    assert load.get_load(worker) == 0.0
+
+
+def test_process_tree_cpu_includes_children():
+    """Test that a busy child process shows in the worker's CPU"""
+    cpu = ProcessTreeCPU()
+    cpu()
+    spin = "import time\nend = time.time() + 5\nwhile time.time() < end: pass"
+    child = subprocess.Popen([sys.executable, "-c", spin])
+    try:
+        cpu()
+        time.sleep(0.5)
+        busy = cpu()
+    finally:
+        child.kill()
+        child.wait()
+
+    # Most of a core, less whatever else the machine is running
+    assert busy * psutil.cpu_count() >= 20
+
+
+@pytest.mark.asyncio
+async def test_admission_rejects_once_full():
+    """Test that a burst of dispatches between status updates is capped"""
+    worker = SimulatedWorker()
+    load = _load(worker, max_sessions=3)
+    worker.active_jobs = [object()]
+    worker.tick()
+    load.get_load(worker)
+
+    requests = [FakeJobRequest() for _ in range(4)]
+    await asyncio.gather(*(load.request_fnc(req) for req in requests))
+    answers = [req.answer for req in requests]
+    assert answers == ["accepted", "accepted", "rejected", "rejected"]
+
+    # The next sample sees the admitted calls as active jobs
+    worker.active_jobs = [object()] * 3
+    worker.tick()
+    assert load.get_load(worker) == 1.0
+    assert load.admit() is False
+
+    # A call ends and capacity frees up again
+    worker.active_jobs = [object()] * 2
+    worker.tick()
+    load.get_load(worker)
+    assert load.admit() is True
+
+
+def test_admission_rejects_when_cpu_saturated():
+    """Test that a CPU-bound worker stops taking calls before sessions run out"""
+    worker = SimulatedWorker()
+    load = _load(worker, max_sessions=8, max_cpu=0.85)
+    worker.cpu = 95.0
+    worker.tick()
+    load.get_load(worker)
+
+    assert load.admit() is False
+
+
+def test_shared_state_runs_jobs_as_threads():
+    """Test that jobs share a process only while cross-call state is enabled"""
+    assert job_executor_type({"response_cache": None}) == JobExecutorType.PROCESS
+    assert job_executor_type({"setup_metrics": False}) == JobExecutorType.PROCESS
+    shared = {"response_cache": None, "provider_selector": object()}
+    assert job_executor_type(shared) == JobExecutorType.THREAD